@@ -0,0 +1,316 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# biwingbatch.py: vectorized gap/stagger/span/lift ratio sweep of the box wing
+#
+# Sizing the box wing takes thousands of variants and rebuilding an ACBiWing
+# for each one is far too slow. BatchBoxWing takes the tables and the section
+# data of one built box wing (BiWing.py) once, strips their units and
+# evaluates whole broadcast arrays of Gap, Stagger, b and Lift_Ratio:
+#    -> Oswald efficiency and biwing correction from GapInterp/OeffInterp and
+#       GapInterp/BWCFInterp (held constant outside the tables)
+#    -> lift split Lift_Ratio*Lift_LO on the UpperWing, the rest on the LowerWing
+#    -> lift-off CL scaled from the reference wing by the biwing correction and
+#       the finite-wing lift slope a0/(1 + a0/(pi e AR)), and V_LO from it
+#    -> structural weight from the weight per span of the two wings and the
+#       weight per length of the end plates
+#
+#    Batch = BatchBoxWing.from_box_wing(build_box_wing())
+#    R = Batch.evaluate_si(Gap[:,None], 0.0, b[None,:], 0.5)  # Gap x b tables
+#
+# The chord is held at the reference chord (the wings are untapered) and
+# Stagger is measured in chords. This is a surrogate calibrated at a single
+# point, not a batch version of ACBiWing:
+#    -> CLScale is fitted at the reference wing only, so the lift-off CL of
+#       other variants follows the biwing correction and the lift slope alone
+#    -> Stagger only lengthens the end plates; it does not change Oeff, BWCF
+#       or V_LO
+#    -> Lift_Ratio only splits the lift; it does not change V_LO
+#    -> the structural weight is linear in span (fixed weight per span)
+# At the reference variant V_LO and the weight reproduce the ACBiWing exactly.
+# compare() rebuilds ACBiWing over VARIANTS, which spans the sizing range, and
+# raises EquivalenceError past RTOL; sizing_model() only returns a model that
+# passed it:
+#    Batch = sizing_model(build_box_wing())
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of, EquivalenceError
+from Tools.atmosphere import density
+
+#==============================================================================#
+# BATCH BOX WING
+#==============================================================================#
+class BatchBoxWing(object):
+    """
+    Vectorized box wing model. All attributes are plain SI floats or arrays.
+    """
+    PARAMETERS = ('Lift_LO', 'Alt_LO', 'Chord', 'a0', 'GapInterp', 'OeffInterp', 'BWCFInterp',
+                  'WingSpanWeight', 'EndPlateWeight', 'CLScale')
+
+    def __init__(self, name='', **params):
+        self.name = name
+        self.Lift_LO        = 0.0   # lift at lift-off [N]
+        self.Alt_LO         = 0.0   # lift-off altitude [m]
+        self.Chord          = 0.0   # chord of both wings [m]
+        self.a0             = 2*npy.pi # section lift slope [1/rad]
+        self.GapInterp      = npy.zeros(1)
+        self.OeffInterp     = npy.ones(1)
+        self.BWCFInterp     = npy.ones(1)
+        self.WingSpanWeight = 0.0   # weight per span of one wing [N/m]
+        self.EndPlateWeight = 0.0   # weight per length of end plate [N/m]
+        self.CLScale        = 0.0   # CL_LO / (BWCF * finite-wing lift slope)
+        self.set_params(**params)
+
+    @classmethod
+    def from_box_wing(cls, BoxWing, **kwargs):
+        """
+        Returns the batch model of a built ACBiWing, calibrated so its own
+        Gap, Stagger, b and Lift_Ratio reproduce its V_LO and weight
+        """
+        from Aerothon.scalar.units import M, FT, SEC, KG
+
+        NEWTON = KG*M/SEC**2
+        b = value_of(BoxWing.b, M)
+        Chord = value_of(BoxWing.LowerWing.Chord(0*FT), M)
+        Gap, Stagger = value_of(BoxWing.Gap), value_of(BoxWing.Stagger)
+        Batch = cls(name=getattr(BoxWing, 'name', ''),
+                    Lift_LO    = value_of(BoxWing.Lift_LO, NEWTON),
+                    Alt_LO     = value_of(BoxWing.Alt_LO, M),
+                    Chord      = Chord,
+                    GapInterp  = value_of(BoxWing.GapInterp),
+                    OeffInterp = value_of(BoxWing.OeffInterp),
+                    BWCFInterp = value_of(BoxWing.BWCFInterp),
+                    WingSpanWeight = (value_of(BoxWing.UpperWing.Weight, NEWTON) +
+                                      value_of(BoxWing.LowerWing.Weight, NEWTON))/(2*b),
+                    **kwargs)
+        Batch.calibrate(Gap, Stagger, b, value_of(BoxWing.GetV_LO(), M/SEC),
+                        value_of(BoxWing.EndPlate.Weight, NEWTON))
+        return Batch
+
+    def calibrate(self, Gap, Stagger, b, V_LO, EndPlate):
+        """
+        Sets CLScale and EndPlateWeight so the reference variant reproduces
+        the lift-off speed and end plate weight of the reference wing
+
+        Inputs:
+            Gap, Stagger, b - reference variant (gap/span, stagger/chord, span [m])
+            V_LO            - lift-off speed of the reference wing [m/s]
+            EndPlate        - weight of its end plates [N]
+        """
+        self.EndPlateWeight = EndPlate/self.end_plate(Gap, Stagger, b)
+        CL_LO = 2*self.Lift_LO/(density(self.Alt_LO)*V_LO**2*self.area(b))
+        Oeff, BWCF = self.tables(Gap)
+        self.CLScale = float(CL_LO/(BWCF*self.lift_slope(Oeff, b)))
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self.PARAMETERS:
+                raise AttributeError("'%s' is not a BatchBoxWing parameter" % name)
+            setattr(self, name, npy.asarray(value, dtype=float) if npy.ndim(value) else float(value))
+
+    #--------------------------------------------------------------------------#
+    def tables(self, Gap):
+        """
+        Returns the Oswald efficiency and biwing correction at Gap (gap/span)
+        """
+        Gap = npy.asarray(Gap, dtype=float)
+        return (npy.interp(Gap, self.GapInterp, self.OeffInterp),
+                npy.interp(Gap, self.GapInterp, self.BWCFInterp))
+
+    def area(self, b):
+        """
+        Returns the reference area (both wings) [m**2] at span b [m]
+        """
+        return 2*self.Chord*npy.asarray(b, dtype=float)
+
+    def lift_slope(self, Oeff, b):
+        """
+        Returns the finite-wing lift slope [1/rad]
+        """
+        AR = npy.asarray(b, dtype=float)**2/self.area(b)
+        return self.a0/(1 + self.a0/(npy.pi*Oeff*AR))
+
+    def end_plate(self, Gap, Stagger, b):
+        """
+        Returns the length of an end plate [m]
+        """
+        height = npy.asarray(Gap, dtype=float)*b
+        return npy.sqrt(height**2 + (npy.asarray(Stagger, dtype=float)*self.Chord)**2)
+
+    def evaluate_si(self, Gap, Stagger, b, Lift_Ratio):
+        """
+        Returns an ordered dictionary of broadcast arrays of Oeff, BWCF, AR,
+        S [m**2], CL_LO, V_LO [m/s], UpperLift and LowerLift [N], and Weight [N]
+
+        Inputs:
+            Gap        - gap/span
+            Stagger    - stagger/chord
+            b          - span [m]
+            Lift_Ratio - fraction of Lift_LO carried by the upper wing
+        """
+        Gap, Stagger, b, Lift_Ratio = npy.broadcast_arrays(*[npy.asarray(x, dtype=float) for x in
+                                                             (Gap, Stagger, b, Lift_Ratio)])
+        Oeff, BWCF = self.tables(Gap)
+        S = self.area(b)
+        CL_LO = self.CLScale*BWCF*self.lift_slope(Oeff, b)
+
+        R = OrderedDict()
+        R['Oeff']      = Oeff
+        R['BWCF']      = BWCF
+        R['AR']        = b**2/S
+        R['S']         = S
+        R['CL_LO']     = CL_LO
+        R['V_LO']      = npy.sqrt(2*self.Lift_LO/(density(self.Alt_LO)*S*CL_LO))
+        R['UpperLift'] = Lift_Ratio*self.Lift_LO
+        R['LowerLift'] = (1 - Lift_Ratio)*self.Lift_LO
+        R['Weight']    = 2*b*self.WingSpanWeight + self.EndPlateWeight*self.end_plate(Gap, Stagger, b)
+        return R
+
+    def evaluate(self, Gap, Stagger, b, Lift_Ratio):
+        """
+        Returns the results of evaluate_si with units (span b an Aerothon
+        quantity). The units are stripped and reapplied once per array.
+        """
+        from Aerothon.scalar.units import M, SEC, KG
+
+        R = self.evaluate_si(Gap, Stagger, value_of(b, M), Lift_Ratio)
+        NEWTON = KG*M/SEC**2
+        R['S'] = R['S']*M**2
+        R['V_LO'] = R['V_LO']*M/SEC
+        for name in ('UpperLift', 'LowerLift', 'Weight'):
+            R[name] = R[name]*NEWTON
+        return R
+
+#==============================================================================#
+# COMPARISON WITH ACBIWING
+#==============================================================================#
+# (Gap, Stagger, b [in], Lift_Ratio) spanning the sizing range (Gap 0.1-0.4,
+# b 50-80 in, Lift_Ratio 0.4-0.7); the reference is Gap 0.34, b 66.86 in
+VARIANTS = ((0.10, 0.0, 50.0, 0.5), (0.40, 0.0, 50.0, 0.5),
+            (0.10, 0.0, 80.0, 0.5), (0.40, 0.0, 80.0, 0.5),
+            (0.25, 0.0, 66.86, 0.5), (0.25, 0.5, 66.86, 0.5),
+            (0.34, 0.0, 66.86, 0.4), (0.34, 0.0, 66.86, 0.7))
+RTOL = 0.05 # largest relative V_LO or weight error accepted
+
+
+def compare_si(Batch, reference, variants=VARIANTS, rtol=RTOL):
+    """
+    Returns a list of ordered dictionaries of each variant, the batch and
+    reference V_LO [m/s] and weight [N] and their relative errors. Raises
+    EquivalenceError when an error exceeds rtol (None only reports).
+
+    Inputs:
+        reference - function(Gap, Stagger, b [m], Lift_Ratio) returning V_LO
+                    [m/s] and weight [N]
+        variants  - (Gap, Stagger, b [in], Lift_Ratio) tuples
+    """
+    rows = []
+    for Gap, Stagger, b, Lift_Ratio in variants:
+        R = Batch.evaluate_si(Gap, Stagger, b*0.0254, Lift_Ratio)
+        V_LO, Weight = reference(Gap, Stagger, b*0.0254, Lift_Ratio)
+        row = OrderedDict([('Gap', Gap), ('Stagger', Stagger), ('b', b), ('Lift_Ratio', Lift_Ratio),
+                           ('V_LO', float(R['V_LO'])), ('V_LO_ref', V_LO),
+                           ('Weight', float(R['Weight'])), ('Weight_ref', Weight)])
+        row['V_LO_error'] = row['V_LO']/row['V_LO_ref'] - 1
+        row['Weight_error'] = row['Weight']/row['Weight_ref'] - 1
+        rows.append(row)
+    if rtol is not None:
+        check_rows(rows, rtol)
+    return rows
+
+
+def check_rows(rows, rtol=RTOL):
+    """
+    Raises EquivalenceError if a V_LO or weight error of the rows of
+    compare_si exceeds rtol
+    """
+    bad = ['Gap %.2f, Stagger %.2f, b %.1f in, Lift_Ratio %.2f: %s %+.2f%%' %
+           (row['Gap'], row['Stagger'], row['b'], row['Lift_Ratio'], name, 100*row[name + '_error'])
+           for row in rows for name in ('V_LO', 'Weight') if abs(row[name + '_error']) > rtol]
+    if bad:
+        raise EquivalenceError('BatchBoxWing differs from the reference by more than %g:\n   %s' %
+                               (rtol, '\n   '.join(bad)))
+
+
+def box_wing_reference(Gap, Stagger, b, Lift_Ratio):
+    """
+    Rebuilds an ACBiWing (build_box_wing) and returns its V_LO [m/s] and
+    weight [N]
+    """
+    from Aerothon.scalar.units import IN, M, SEC, KG
+    from Aerodynamics.Wing.BiWing import build_box_wing
+
+    BoxWing = build_box_wing({'BoxWing.Gap': Gap, 'BoxWing.b': b/0.0254*IN,
+                              'BoxWing.Stagger': Stagger, 'BoxWing.Lift_Ratio': Lift_Ratio})
+    return value_of(BoxWing.GetV_LO(), M/SEC), value_of(BoxWing.Weight, KG*M/SEC**2)
+
+
+def compare(Batch, variants=VARIANTS, rtol=RTOL):
+    """
+    Compares the batch model with an ACBiWing rebuilt for every variant (see
+    compare_si). Raises EquivalenceError past rtol.
+    """
+    return compare_si(Batch, box_wing_reference, variants, rtol)
+
+
+def sizing_model(BoxWing, rtol=RTOL, **kwargs):
+    """
+    Returns the batch model of a built ACBiWing once compare() has checked it
+    over VARIANTS; raises EquivalenceError if it is off by more than rtol
+    """
+    Batch = BatchBoxWing.from_box_wing(BoxWing, **kwargs)
+    compare(Batch, rtol=rtol)
+    return Batch
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    import pylab as pyl
+    from Aerothon.scalar.units import AsUnit
+    from Aerodynamics.Wing.BiWing import build_box_wing
+
+    BoxWing = build_box_wing()
+    Batch = BatchBoxWing.from_box_wing(BoxWing)
+
+    R = Batch.evaluate(BoxWing.Gap, BoxWing.Stagger, BoxWing.b, BoxWing.Lift_Ratio)
+    print('Reference V_LO   : %s (ACBiWing %s)' % (AsUnit(R['V_LO'], 'ft/s'),
+                                                  AsUnit(BoxWing.GetV_LO(), 'ft/s')))
+    print('Reference Weight : %s (ACBiWing %s)' % (AsUnit(R['Weight'], 'lbf'),
+                                                  AsUnit(BoxWing.Weight, 'lbf')))
+
+    print('%5s %7s %7s %5s %23s %23s' % ('Gap', 'Stagger', 'b [in]', 'LR',
+                                         'V_LO batch/ACBiWing', 'Weight batch/ACBiWing'))
+    rows = compare(Batch, rtol=None)
+    for row in rows:
+        print('%5.2f %7.2f %7.2f %5.2f %7.2f %7.2f %+6.2f%% %7.3f %7.3f %+6.2f%%' %
+              (row['Gap'], row['Stagger'], row['b'], row['Lift_Ratio'],
+               row['V_LO']/0.3048, row['V_LO_ref']/0.3048, 100*row['V_LO_error'],
+               row['Weight']/4.4482216152605, row['Weight_ref']/4.4482216152605,
+               100*row['Weight_error']))
+    check_rows(rows) # only size with a model that passed the check
+
+    # 100 gaps x 100 spans x 4 lift ratios
+    Gap = npy.linspace(0.1, 0.4, 100)[:, None, None]
+    b = npy.linspace(50, 80, 100)[None, :, None]*0.0254
+    Lift_Ratio = npy.array([0.4, 0.5, 0.6, 0.7])[None, None, :]
+    start = time.time()
+    R = Batch.evaluate_si(Gap, 0.0, b, Lift_Ratio)
+    print('%d variants in %.4f s' % (R['V_LO'].size, time.time() - start))
+
+    pyl.figure(1)
+    pyl.subplot(121)
+    pyl.contourf(b[0, :, 0]/0.0254, Gap[:, 0, 0], R['V_LO'][:, :, 1]/0.3048, 20)
+    pyl.colorbar(); pyl.xlabel('b (in)'); pyl.ylabel('Gap/b'); pyl.title('V_LO (ft/s)')
+    pyl.subplot(122)
+    pyl.contourf(b[0, :, 0]/0.0254, Gap[:, 0, 0], R['Weight'][:, :, 1]/4.4482216152605, 20)
+    pyl.colorbar(); pyl.xlabel('b (in)'); pyl.title('Structural weight (lbf)')
+    pyl.show()
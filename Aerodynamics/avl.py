@@ -0,0 +1,801 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# avl.py: array-backed AVL geometry model, reader and incremental writer
+#
+# WriteAVLAircraft('BAP.avl') and WriteAVLWing('BoxWing.avl') write the
+# geometry in the AVL input format:
+#    header   - title, Mach, iYsym iZsym Zsym, Sref Cref Bref, Xref Yref Zref, [CDp]
+#    SURFACE  - name, Nchord Cspace [Nspan Sspace], then the keywords
+#               YDUPLICATE, ANGLE, SCALE, TRANSLATE, INDEX, COMPONENT, ...
+#    SECTION  - Xle Yle Zle Chord Ainc [Nspan Sspace], then AFIL/NACA and
+#               CONTROL name gain Xhinge XYZhvec SgnDup
+# Comments start with '#' or '!', and anything after '|' is a label.
+#
+# The sections and controls of a surface are numpy structured arrays
+# (SECTION_DTYPE, CONTROL_DTYPE) so a sweep edits them in place, e.g.
+#    Geometry.surface('Horizontal Tail').Sections['Chord'] *= 1.1
+# Every surface remembers the text it was read from (or last written as) and a
+# signature of its data; write_avl only regenerates the SURFACE blocks whose
+# data changed, so an unchanged file round-trips byte for byte. Airfoil files
+# are resolved once per path and shared by content (Geometry.Airfoils).
+#
+# An aircraft (or wing) becomes an AVLGeometry through the text Aerothon's own
+# writer produces (avl_geometry), so the conversion is exact. write_component
+# is the path aircraft.py writes BAP.avl through:
+#    write_component(Aircraft, 'BAP.avl')
+# It keeps what it wrote per file, with a fingerprint of each wing and tail
+# (component_state). Later writes regenerate only the SURFACE blocks of the
+# parts that changed, from the part alone (its WriteAVLWing), and recompute
+# the header from the aircraft; WriteAVLAircraft runs once per file, and again
+# only for parts whose own writer was found not to reproduce their aircraft
+# blocks. The file is only rewritten when its content changes.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import os
+import hashlib
+import tempfile
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# GEOMETRY
+#==============================================================================#
+SECTION_DTYPE = npy.dtype([('Xle', 'f8'), ('Yle', 'f8'), ('Zle', 'f8'), ('Chord', 'f8'),
+                           ('Ainc', 'f8'),    # [deg]
+                           ('Nspan', 'i4'),   # 0 -> use the surface spacing
+                           ('Sspace', 'f8'),
+                           ('Airfoil', 'i4')]) # index into Geometry.Airfoils, -1 -> none
+
+CONTROL_DTYPE = npy.dtype([('Section', 'i4'),  # index of the section it is defined on
+                           ('Name', 'U32'),
+                           ('Gain', 'f8'),
+                           ('Xhinge', 'f8'),   # hinge chord fraction
+                           ('Hvec', 'f8', (3,)), # hinge axis, (0,0,0) -> along the hinge line
+                           ('SgnDup', 'f8')])  # deflection sign on the YDUPLICATE image
+
+
+class AVLAirfoil(object):
+    """
+    Airfoil of one or more sections: an AFIL file (resolved once, shared by
+    content) or NACA digits
+    """
+    def __init__(self, kind, text, path=None, digest=None):
+        self.kind = kind        # 'AFIL' or 'NACA'
+        self.text = text        # as written in the .avl file
+        self.path = path        # resolved local file, None if it cannot be found
+        self.digest = digest    # sha1 of the file content
+
+    def key(self):
+        if self.kind == 'AFIL' and self.digest is not None:
+            return ('AFIL', self.digest)
+        return (self.kind, self.text)
+
+    def coordinates(self):
+        """
+        Returns the (x, z) coordinates of a resolved AFIL file, else None
+        """
+        if self.path is None:
+            return None
+        if not hasattr(self, '_coordinates'):
+            coords = []
+            with open(self.path) as f:
+                for line in f:
+                    try:
+                        coords.append([float(v) for v in line.split()[:2]])
+                    except ValueError:
+                        continue
+            coords = npy.array([c for c in coords if len(c) == 2])
+            if len(coords) and coords[0, 0] > 1.5: # Lednicer point counts
+                coords = coords[1:]
+            self._coordinates = coords
+        return self._coordinates
+
+
+class AVLSurface(object):
+    """
+    SURFACE block: spacing, placement keywords, section and control arrays
+    """
+    def __init__(self, name):
+        self.name = name
+        self.Nchord = 1
+        self.Cspace = 1.0
+        self.Nspan = 0
+        self.Sspace = 1.0
+        self.YDuplicate = None  # y of the mirror plane, None -> no image
+        self.Angle = 0.0        # incidence added to every section [deg]
+        self.Scale = None       # (sx, sy, sz), None -> not written
+        self.Translate = None   # (dx, dy, dz), None -> not written
+        self.Index = None
+        self.Component = None
+        self.Flags = []         # NOWAKE, NOALBE, NOLOAD
+        self.Sections = npy.zeros(0, dtype=SECTION_DTYPE)
+        self.Controls = npy.zeros(0, dtype=CONTROL_DTYPE)
+        self._text = None       # text of the block as read or last written
+        self._signature = None  # signature of the data that text represents
+
+    def add_section(self, Xle, Yle, Zle, Chord, Ainc=0.0, Nspan=0, Sspace=0.0, Airfoil=-1):
+        """
+        Appends a section and returns its index
+        """
+        row = npy.array([(Xle, Yle, Zle, Chord, Ainc, Nspan, Sspace, Airfoil)], dtype=SECTION_DTYPE)
+        self.Sections = npy.concatenate([self.Sections, row])
+        return len(self.Sections) - 1
+
+    def add_control(self, section, name, gain=1.0, Xhinge=0.0, Hvec=(0.0, 0.0, 0.0), SgnDup=1.0):
+        """
+        Appends a CONTROL line to the section with index section
+        """
+        row = npy.array([(section, name, gain, Xhinge, Hvec, SgnDup)], dtype=CONTROL_DTYPE)
+        self.Controls = npy.concatenate([self.Controls, row])
+
+    def controls_of(self, section):
+        """
+        Returns the control rows of one section
+        """
+        return self.Controls[self.Controls['Section'] == section]
+
+    def signature(self, Airfoils):
+        """
+        Returns a hash of everything that is written for this surface
+        """
+        sha = hashlib.sha1()
+        sha.update(repr((self.name, self.Nchord, self.Cspace, self.Nspan, self.Sspace,
+                         self.YDuplicate, self.Angle, self.Scale, self.Translate, self.Index,
+                         self.Component, self.Flags)).encode())
+        sha.update(npy.ascontiguousarray(self.Sections).tobytes())
+        sha.update(npy.ascontiguousarray(self.Controls).tobytes())
+        used = sorted(set(int(i) for i in self.Sections['Airfoil'] if i >= 0))
+        sha.update(repr([(Airfoils[i].kind, Airfoils[i].text) for i in used]).encode())
+        return sha.hexdigest()
+
+
+class AVLGeometry(object):
+    """
+    Header data, surfaces and the shared airfoil table of an AVL geometry file
+    """
+    def __init__(self, title=''):
+        self.title = title
+        self.Mach = 0.0
+        self.iYsym = 0
+        self.iZsym = 0
+        self.Zsym = 0.0
+        self.Sref = 1.0
+        self.Cref = 1.0
+        self.Bref = 1.0
+        self.Xref = (0.0, 0.0, 0.0)
+        self.CDp = 0.0
+        self.Surfaces = []
+        self.Airfoils = []      # AVLAirfoil, shared by the sections
+        self.directory = ''     # where relative AFIL paths are resolved
+        self._header = None     # (text, signature) of the header as read or written
+
+    def surface(self, name):
+        """
+        Returns the surface called name
+        """
+        for Surface in self.Surfaces:
+            if Surface.name == name:
+                return Surface
+        raise KeyError(name)
+
+    def airfoil(self, kind, text):
+        """
+        Returns the index of an airfoil in Airfoils, adding it if it is new.
+        AFIL files are resolved once and identical files share one entry.
+        """
+        if kind == 'AFIL':
+            path, digest = resolve_airfoil(text, self.directory)
+            Airfoil = AVLAirfoil(kind, text, path, digest)
+        else:
+            Airfoil = AVLAirfoil(kind, text)
+        key = Airfoil.key()
+        for i, other in enumerate(self.Airfoils):
+            if other.key() == key:
+                return i
+        self.Airfoils.append(Airfoil)
+        return len(self.Airfoils) - 1
+
+    def header_signature(self):
+        return repr((self.title, self.Mach, self.iYsym, self.iZsym, self.Zsym, self.Sref,
+                     self.Cref, self.Bref, tuple(self.Xref), self.CDp))
+
+#==============================================================================#
+# AIRFOIL FILES
+#==============================================================================#
+_resolved = {} # (path, directory) -> (local file, sha1 of its content)
+
+def resolve_airfoil(path, directory=''):
+    """
+    Returns (local file, content sha1) of an AFIL path, looked up as written,
+    relative to directory, and by its base name in directory (the paths are
+    often absolute paths on another machine). Returns (None, None) when the
+    file cannot be found. Each path is only looked up once.
+    """
+    if (path, directory) not in _resolved:
+        found = (None, None)
+        base = path.replace('\\', '/').split('/')[-1]
+        for candidate in (path, os.path.join(directory, path), os.path.join(directory, base)):
+            if os.path.isfile(candidate):
+                with open(candidate, 'rb') as f:
+                    found = (candidate, hashlib.sha1(f.read()).hexdigest())
+                break
+        _resolved[(path, directory)] = found
+    return _resolved[(path, directory)]
+
+#==============================================================================#
+# READER
+#==============================================================================#
+def _strip(line):
+    """
+    Returns the significant part of a line: '|' labels and comments removed
+    """
+    line = line.split('|')[0].strip()
+    return '' if not line or line[0] in '#!%' else line
+
+
+def _numbers(line, n=None):
+    values = [float(v) for v in line.split()]
+    return values if n is None else values[:n]
+
+
+def read_avl(filename):
+    """
+    Returns the AVLGeometry of an AVL geometry file
+    """
+    with open(filename) as f:
+        return parse_avl(f.read(), os.path.dirname(os.path.abspath(filename)))
+
+
+def parse_avl(text, directory=''):
+    """
+    Returns the AVLGeometry of the text of an AVL geometry file
+
+    Inputs:
+        directory - where relative (or base name) AFIL files are looked for
+    """
+    raw = text.splitlines(True)
+
+    # significant lines with the raw line they start on
+    lines = [(n, _strip(line)) for n, line in enumerate(raw)]
+    lines = [(n, line) for n, line in lines if line]
+    if len(lines) < 5:
+        raise ValueError('AVL file header is incomplete')
+
+    Geometry = AVLGeometry(lines[0][1])
+    Geometry.directory = directory
+    Geometry.Mach = _numbers(lines[1][1])[0]
+    iYsym, iZsym, Zsym = _numbers(lines[2][1], 3)
+    Geometry.iYsym, Geometry.iZsym, Geometry.Zsym = int(iYsym), int(iZsym), Zsym
+    Geometry.Sref, Geometry.Cref, Geometry.Bref = _numbers(lines[3][1], 3)
+    Geometry.Xref = tuple(_numbers(lines[4][1], 3))
+    i = 5
+    if i < len(lines) and not lines[i][1][0].isalpha():
+        Geometry.CDp = _numbers(lines[i][1])[0]
+        i += 1
+
+    # SURFACE blocks start at their preceding comment banner, if any
+    starts = []
+    Surface = None
+    section = -1
+    while i < len(lines):
+        n, line = lines[i]
+        keyword = line[:4].upper()
+        value = lines[i + 1][1] if i + 1 < len(lines) else ''
+        if keyword == 'SURF':
+            Surface = AVLSurface(value)
+            spacing = _numbers(lines[i + 2][1])
+            Surface.Nchord, Surface.Cspace = int(spacing[0]), spacing[1]
+            if len(spacing) >= 4:
+                Surface.Nspan, Surface.Sspace = int(spacing[2]), spacing[3]
+            Geometry.Surfaces.append(Surface)
+            start = n
+            while start > 0 and raw[start - 1].strip()[:1] in ('#', '!', '%'):
+                start -= 1
+            starts.append(start)
+            section = -1
+            i += 3
+            continue
+        if Surface is None:
+            raise ValueError('Unexpected line in AVL file: %s' % line)
+        if keyword == 'YDUP':
+            Surface.YDuplicate = _numbers(value)[0]
+        elif keyword == 'ANGL':
+            Surface.Angle = _numbers(value)[0]
+        elif keyword == 'SCAL':
+            Surface.Scale = tuple(_numbers(value, 3))
+        elif keyword == 'TRAN':
+            Surface.Translate = tuple(_numbers(value, 3))
+        elif keyword == 'INDE':
+            Surface.Index = int(_numbers(value)[0])
+        elif keyword == 'COMP':
+            Surface.Component = int(_numbers(value)[0])
+        elif keyword == 'SECT':
+            values = _numbers(value)
+            Nspan, Sspace = (int(values[5]), values[6]) if len(values) >= 7 else (0, 0.0)
+            section = Surface.add_section(*(values[:5] + [Nspan, Sspace]))
+        elif keyword == 'AFIL':
+            Surface.Sections['Airfoil'][section] = Geometry.airfoil('AFIL', value.strip().strip('"'))
+        elif keyword == 'NACA':
+            Surface.Sections['Airfoil'][section] = Geometry.airfoil('NACA', value.split()[0])
+        elif keyword == 'CONT':
+            words = value.split()
+            values = [float(v) for v in words[1:7]]
+            Surface.add_control(section, words[0], values[0], values[1], tuple(values[2:5]), values[5])
+        elif keyword in ('NOWA', 'NOAL', 'NOLO'):
+            Surface.Flags.append(line.split()[0].upper())
+            i += 1
+            continue
+        elif keyword in ('BODY', 'DESI', 'CLAF', 'CDCL', 'AIRF', 'BFIL'):
+            raise ValueError('AVL keyword %s is not supported' % line)
+        else:
+            raise ValueError('Unexpected line in AVL file: %s' % line)
+        i += 2
+
+    # remember the text of every block for the incremental writer
+    ends = starts[1:] + [len(raw)]
+    Geometry._header = (''.join(raw[:starts[0] if starts else len(raw)]),
+                        Geometry.header_signature())
+    for Surface, start, end in zip(Geometry.Surfaces, starts, ends):
+        Surface._text = ''.join(raw[start:end])
+        Surface._signature = Surface.signature(Geometry.Airfoils)
+
+    return Geometry
+
+#==============================================================================#
+# WRITER
+#==============================================================================#
+def _fmt(value):
+    """
+    Formats a float the way the Aerothon writer does (12 significant digits)
+    """
+    text = '%.12g' % value
+    return text if ('.' in text or 'e' in text or 'n' in text) else text + '.0'
+
+
+def _header_text(Geometry):
+    return ''.join(['%s\n' % Geometry.title,
+                    '%s\t\t\t| Mach\n' % _fmt(Geometry.Mach),
+                    '%d %d %s\t\t| iYsym  iZsym  Zsym\n' % (Geometry.iYsym, Geometry.iZsym,
+                                                          _fmt(Geometry.Zsym)),
+                    '%s %s %s\t\t| Sref   Cref   Bref\n' % tuple(_fmt(v) for v in
+                        (Geometry.Sref, Geometry.Cref, Geometry.Bref)),
+                    '%s %s %s\t\t| Xref   Yref   Zref\n' % tuple(_fmt(v) for v in Geometry.Xref),
+                    '%s\t\t\t| CDp  (optional)\n' % _fmt(Geometry.CDp)])
+
+
+def _surface_text(Surface, Airfoils):
+    """
+    Returns the text of one SURFACE block, in the layout of the Aerothon writer
+    """
+    out = ['#==============================================================\n',
+           '#\n',
+           'SURFACE\n',
+           '%s\n' % Surface.name,
+           '%d  %s  %d  %s  |  Nchord   Cspace   Nspan  Sspace\n\n' % (Surface.Nchord,
+               _fmt(Surface.Cspace), Surface.Nspan, _fmt(Surface.Sspace))]
+    if Surface.YDuplicate is not None:
+        out.append('YDUPLICATE\n%s\n\n' % _fmt(Surface.YDuplicate))
+    out.append('ANGLE\n%s\n\n' % _fmt(Surface.Angle))
+    if Surface.Scale is not None:
+        out.append('SCALE\n%s %s %s\n\n' % tuple(_fmt(v) for v in Surface.Scale))
+    if Surface.Translate is not None:
+        out.append('TRANSLATE\n%s %s %s\n\n' % tuple(_fmt(v) for v in Surface.Translate))
+    if Surface.Index is not None:
+        out.append('INDEX\n%d\n' % Surface.Index)
+    if Surface.Component is not None:
+        out.append('COMPONENT\n%d\n' % Surface.Component)
+    for flag in Surface.Flags:
+        out.append('%s\n' % flag)
+
+    for i, S in enumerate(Surface.Sections):
+        out.append('#-----------------------\n')
+        out.append('SECTION\n')
+        out.append('%s %s %s   %s  %s %d %s | Xle Yle Zle   Chord   Ainc   [ Nspan Sspace ]\n' %
+                   (_fmt(S['Xle']), _fmt(S['Yle']), _fmt(S['Zle']), _fmt(S['Chord']),
+                    _fmt(S['Ainc']), S['Nspan'], _fmt(S['Sspace'])))
+        if S['Airfoil'] >= 0:
+            Airfoil = Airfoils[S['Airfoil']]
+            if Airfoil.kind == 'AFIL':
+                out.append('AFIL\n"%s"\n' % Airfoil.text)
+            else:
+                out.append('NACA\n%s\n' % Airfoil.text)
+        for C in Surface.controls_of(i):
+            out.append('CONTROL\n%s  %s  %s  %s %s %s  %s | Name  gain  Xhinge  XYZhvec  SgnDup\n' %
+                       ((C['Name'], _fmt(C['Gain']), _fmt(C['Xhinge'])) +
+                        tuple(_fmt(v) for v in C['Hvec']) + (_fmt(C['SgnDup']),)))
+    return ''.join(out)
+
+
+def avl_text(Geometry):
+    """
+    Returns the text of the geometry file. Only the header and the SURFACE
+    blocks whose data changed since they were read or last written are
+    regenerated; the others are reused as they are.
+    """
+    header = Geometry.header_signature()
+    if Geometry._header is None or Geometry._header[1] != header:
+        Geometry._header = (_header_text(Geometry), header)
+    blocks = [Geometry._header[0]]
+    for Surface in Geometry.Surfaces:
+        signature = Surface.signature(Geometry.Airfoils)
+        if Surface._text is None or Surface._signature != signature:
+            Surface._text = _surface_text(Surface, Geometry.Airfoils)
+            Surface._signature = signature
+        blocks.append(Surface._text)
+    return ''.join(blocks)
+
+
+def write_avl(Geometry, filename):
+    """
+    Writes the geometry file (see avl_text). The file is left untouched when
+    it already holds exactly this text. Returns True if it was written.
+    """
+    text = avl_text(Geometry)
+    if os.path.isfile(filename) and os.path.getsize(filename) == len(text.encode()):
+        with open(filename) as f:
+            if f.read() == text:
+                return False
+    with open(filename, 'w') as f:
+        f.write(text)
+    return True
+
+
+def localize_airfoils(Geometry, directory):
+    """
+    Copies every resolved AFIL file into directory once per content (named by
+    its base name) and points the sections at the copies, so the geometry no
+    longer depends on absolute paths of another machine. Unresolved files are
+    left as they are.
+    """
+    import shutil
+
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    for Airfoil in Geometry.Airfoils:
+        if Airfoil.kind != 'AFIL' or Airfoil.path is None:
+            continue
+        base = Airfoil.text.replace('\\', '/').split('/')[-1]
+        target = os.path.join(directory, base)
+        if not os.path.isfile(target):
+            shutil.copyfile(Airfoil.path, target)
+        Airfoil.text = os.path.relpath(target, Geometry.directory or '.')
+        Airfoil.path = target
+
+#==============================================================================#
+# AEROTHON COMPONENTS
+#==============================================================================#
+AIRCRAFT_PARTS = ('Wing', 'HTail', 'VTail') # lifting surfaces WriteAVLAircraft writes
+
+# parts whose placement is derived from another part (the tails sit behind
+# the wing's aerodynamic center, the vertical tail on the horizontal tail)
+PLACED_FROM = {'Wing'  : (),
+               'HTail' : ('Wing',),
+               'VTail' : ('Wing', 'HTail')}
+
+HEADER_RTOL = 1e-9 # the writer prints 12 significant digits
+
+
+def component_text(Component):
+    """
+    Returns the AVL geometry text Aerothon writes for an aircraft
+    (WriteAVLAircraft) or a wing (WriteAVLWing)
+    """
+    writer = getattr(Component, 'WriteAVLAircraft', None) or Component.WriteAVLWing
+    fd, filename = tempfile.mkstemp(suffix='.avl')
+    os.close(fd)
+    try:
+        writer(filename)
+        with open(filename) as f:
+            return f.read()
+    finally:
+        os.remove(filename)
+
+
+def avl_geometry(Component, directory=''):
+    """
+    Returns the AVLGeometry of an Aerothon aircraft or wing
+
+    Inputs:
+        directory - where relative AFIL files are looked for (the directory
+                    the geometry will be written to)
+    """
+    return parse_avl(component_text(Component), directory)
+
+
+def component_state(Component, depth=2, exclude=()):
+    """
+    Returns a fingerprint of what the AVL blocks of a component are written
+    from: the attribute version (see polarcache) of the component and of the
+    sub-components and control surfaces it holds, depth levels down
+
+    Inputs:
+        exclude - objects not to descend into (e.g. the aircraft)
+    """
+    from Aerodynamics.polarcache import attribute_version
+
+    sha = hashlib.sha1()
+    seen = set(id(Object) for Object in exclude)
+    stack = [(Component, depth)]
+    while stack:
+        Object, level = stack.pop()
+        if id(Object) in seen:
+            continue
+        seen.add(id(Object))
+        sha.update(attribute_version(Object).encode())
+        if level == 0:
+            continue
+        state = dict(vars(Object))
+        param = state.get('param', None)
+        if param is not None and hasattr(param, '__dict__'):
+            state.update(vars(param))
+        for name in sorted(state, reverse=True):
+            value = state[name]
+            if not name.startswith('_') and hasattr(value, '__dict__') and hasattr(value, 'Refresh'):
+                stack.append((value, level - 1))
+    return sha.hexdigest()
+
+
+def header_values(Aircraft):
+    """
+    Returns (Sref, Cref, Bref, Xref, Yref, Zref) of an aircraft in inches, as
+    WriteAVLAircraft writes them: the wing area, MAC and span and the CG
+    """
+    from Aerothon.scalar.units import IN
+
+    Wing = Aircraft.Wing
+    return ((value_of(Wing.S, IN**2), value_of(Wing.MAC(), IN), value_of(Wing.b, IN)) +
+            tuple(value_of(Aircraft.CG(), IN)))
+
+
+def _set_header(Geometry, values):
+    Geometry.Sref, Geometry.Cref, Geometry.Bref = values[:3]
+    Geometry.Xref = tuple(values[3:6])
+
+
+def _airfoils_of(Surface, Airfoils):
+    return [(Airfoils[i].kind, Airfoils[i].text) if i >= 0 else None
+            for i in Surface.Sections['Airfoil']]
+
+
+def _same_surface(Surface, Airfoils, Other, OtherAirfoils):
+    """
+    Returns True if two surfaces (of different geometries) carry the same
+    data, apart from their INDEX
+    """
+    if _airfoils_of(Surface, Airfoils) != _airfoils_of(Other, OtherAirfoils):
+        return False
+    index, sections = Other.Index, Other.Sections
+    Other.Index = Surface.Index
+    Other.Sections = sections.copy()
+    Other.Sections['Airfoil'] = Surface.Sections['Airfoil']
+    try:
+        return Surface.signature(Airfoils) == Other.signature(Airfoils)
+    finally:
+        Other.Index, Other.Sections = index, sections
+
+
+def reuse_text(Geometry, Previous):
+    """
+    Hands the text of the header and of every surface of Previous (e.g. the
+    file on disk) whose data are unchanged over to Geometry, so write_avl
+    leaves those blocks exactly as they were
+    """
+    if Previous._header is not None and Previous.header_signature() == Geometry.header_signature():
+        Geometry._header = Previous._header
+    old = dict((Surface.name, Surface) for Surface in Previous.Surfaces)
+    for Surface in Geometry.Surfaces:
+        Other = old.get(Surface.name)
+        if Other is not None and Other._text is not None and \
+                Other.signature(Previous.Airfoils) == Surface.signature(Geometry.Airfoils):
+            Surface._text = Other._text
+            Surface._signature = Surface.signature(Geometry.Airfoils)
+
+#==============================================================================#
+# INCREMENTAL COMPONENT WRITER
+#==============================================================================#
+class ComponentFile(object):
+    """
+    What was last written to one geometry file: the geometry and its text,
+    the state of every part and which SURFACE blocks each part writes itself
+
+    Inputs:
+        Geometry - AVLGeometry as written
+        text     - text of the file
+    """
+    def __init__(self, Geometry, text):
+        self.Geometry = Geometry
+        self.text = text
+        self.states = {}     # part name -> component_state
+        self.owners = {}     # part name -> names of its surfaces, None -> only WriteAVLAircraft
+        self.header = False  # True if header_values reproduces the written header
+        self.stat = None     # (size, mtime) of the file after the last write
+
+
+_files = {} # absolute file name -> ComponentFile, per process
+
+
+def _stat(filename):
+    try:
+        stat = os.stat(filename)
+    except OSError:
+        return None
+    return (stat.st_size, stat.st_mtime)
+
+
+def _write_text(filename, text, previous=None):
+    """
+    Writes text unless the file already holds it. previous is the text last
+    written to the file (None -> compare with the file on disk).
+    """
+    if previous is None:
+        if os.path.isfile(filename) and os.path.getsize(filename) == len(text.encode()):
+            with open(filename) as f:
+                previous = f.read()
+    if text == previous:
+        return False
+    with open(filename, 'w') as f:
+        f.write(text)
+    return True
+
+
+def _parts(Component):
+    """
+    Returns the (name, part) pairs an aircraft is written from; a wing is
+    written whole by WriteAVLWing and has none
+    """
+    if getattr(Component, 'WriteAVLAircraft', None) is None:
+        return []
+    return [(name, getattr(Component, name)) for name in AIRCRAFT_PARTS
+            if getattr(Component, name, None) is not None]
+
+
+def _states(Component, Parts):
+    """
+    Returns the state of every part, including the aircraft attributes and the
+    parts it is placed from, and that of the header ('': the attributes,
+    weight and CG of the component, see polarcache.geometry_version). A wing
+    has no parts, so its sub-components count towards ''.
+    """
+    from Aerodynamics.polarcache import geometry_version
+
+    own = component_state(Component, depth=0)
+    states = dict((name, component_state(Part, exclude=(Component,))) for name, Part in Parts)
+    placed = {'': geometry_version(Component) + ('' if Parts else component_state(Component))}
+    for name, Part in Parts:
+        placed[name] = hashlib.sha1(''.join([own, states[name]] +
+            [states.get(other, '') for other in PLACED_FROM.get(name, ())]).encode()).hexdigest()
+    return placed
+
+
+def _full_write(Component, filename, Previous=None):
+    """
+    Writes the geometry through WriteAVLAircraft/WriteAVLWing, keeping the text
+    of the unchanged blocks of Previous (or of the file on disk). Returns the
+    ComponentFile and True if the file was written.
+    """
+    directory = os.path.dirname(filename)
+    Geometry = avl_geometry(Component, directory)
+    previous = None
+    if Previous is not None:
+        reuse_text(Geometry, Previous.Geometry)
+        previous = Previous.text
+    elif os.path.isfile(filename):
+        try:
+            reuse_text(Geometry, read_avl(filename))
+        except ValueError: # not a file this reader understands, write it anew
+            pass
+    text = avl_text(Geometry)
+    File = ComponentFile(Geometry, text)
+    return File, _write_text(filename, text, previous)
+
+
+def _check_parts(File, Component, Parts):
+    """
+    Finds the parts whose own writer (WriteAVLWing) reproduces their blocks of
+    the aircraft file, and whether header_values reproduces the header. Only
+    those are regenerated straight from the parts later on.
+    """
+    Geometry = File.Geometry
+    for name, Part in Parts:
+        File.owners[name] = None
+        try:
+            Own = avl_geometry(Part, Geometry.directory)
+        except AttributeError: # no writer of its own
+            continue
+        owned = []
+        for Surface in Own.Surfaces:
+            try:
+                Other = Geometry.surface(Surface.name)
+            except KeyError:
+                break
+            if not _same_surface(Other, Geometry.Airfoils, Surface, Own.Airfoils):
+                break
+            owned.append(Surface.name)
+        else:
+            if owned:
+                File.owners[name] = owned
+    written = (Geometry.Sref, Geometry.Cref, Geometry.Bref) + tuple(Geometry.Xref)
+    File.header = bool(npy.allclose(header_values(Component), written, rtol=HEADER_RTOL, atol=0.0))
+
+
+def _part_write(File, Component, Parts, changed, filename):
+    """
+    Regenerates the blocks of the changed parts from the parts themselves and
+    the header from header_values (if it reproduces the written one), keeping
+    every other block as it is.
+    Returns True if the file was written.
+    """
+    Geometry = File.Geometry
+    names = [Surface.name for Surface in Geometry.Surfaces]
+    for name, Part in Parts:
+        if name not in changed:
+            continue
+        Own = avl_geometry(Part, Geometry.directory)
+        for Surface in Own.Surfaces:
+            k = names.index(Surface.name)
+            Old = Geometry.Surfaces[k]
+            Surface.Index = Old.Index
+            for i in npy.flatnonzero(Surface.Sections['Airfoil'] >= 0):
+                Airfoil = Own.Airfoils[Surface.Sections['Airfoil'][i]]
+                Surface.Sections['Airfoil'][i] = Geometry.airfoil(Airfoil.kind, Airfoil.text)
+            Surface._text, Surface._signature = Old._text, Old._signature
+            Geometry.Surfaces[k] = Surface
+    if File.header:
+        _set_header(Geometry, header_values(Component))
+    text = avl_text(Geometry)
+    File.text, written = text, _write_text(filename, text, File.text)
+    return written
+
+
+def write_component(Component, filename):
+    """
+    Writes the AVL geometry of an Aerothon aircraft or wing incrementally.
+    Returns the AVLGeometry and True if the file was written.
+
+    The first write of a file (or one after the file changed on disk) goes
+    through WriteAVLAircraft/WriteAVLWing and keeps the unchanged blocks of the
+    existing file. After that, per file and process:
+        -> nothing is regenerated while no part changed (component_state)
+        -> the SURFACE blocks of a changed wing or tail are regenerated from
+           the part alone (its WriteAVLWing), the others keep their text
+        -> the header is recomputed from the aircraft (header_values) when
+           its weight or CG changed
+        -> WriteAVLAircraft only runs again when a part whose own writer does
+           not reproduce its aircraft blocks changed, or the header changed
+           and header_values does not reproduce it
+    The file is only rewritten when its text changes.
+    """
+    filename = os.path.abspath(filename)
+    Parts = _parts(Component)
+    states = _states(Component, Parts)
+    File = _files.get(filename)
+    if File is not None and File.stat != _stat(filename): # edited behind our back
+        File = None
+
+    if File is None:
+        File, written = _full_write(Component, filename)
+        if Parts:
+            _check_parts(File, Component, Parts)
+    else:
+        changed = set(name for name in states if states[name] != File.states.get(name))
+        if not changed:
+            written = False
+        elif not Parts or ('' in changed and not File.header) or \
+                any(File.owners.get(name) is None for name in changed if name):
+            Previous = File
+            File, written = _full_write(Component, filename, Previous)
+            File.owners, File.header = Previous.owners, Previous.header
+        else:
+            written = _part_write(File, Component, Parts, changed, filename)
+
+    File.states = states
+    File.stat = _stat(filename)
+    _files[filename] = File
+    return File.Geometry, written
@@ -0,0 +1,395 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# polarcache.py: memoized polar evaluations of the aircraft components
+#
+# The slope queries (CLSlopeAt, CMSlopeAt, CLHTSlopeAt, DWSlopeAt and the
+# ClSlopeAt/CmSlopeAt of every wing and tail) and the plots (PlotPolarsSlopes,
+# PlotCMPolars, PlotCLCMComponents) evaluate the same component polars at
+# overlapping angles of attack. cache_polars replaces the CL/CD/CM methods of
+# the aircraft and of each lifting surface with memoizing callables (the same
+# way Propulsion/matched.py swaps in the thrust table):
+#    -> entries are keyed on (alpha, deflection and other arguments), one
+#       point per entry, so an array query only evaluates the alphas that
+#       were never seen
+#    -> nothing is hashed per query: the caches watch the components instead.
+#       Writing a public attribute of a component (or of its Aerothon
+#       parameter struct .param) to a new value drops the entries of the
+#       caches that depend on it, and so does Refresh() of the component.
+#       Writes made while a cached polar is being evaluated are side effects
+#       of the evaluation and are ignored.
+#    -> the aircraft polars (about the CG) also depend on the other parts of
+#       the aircraft (fuselage, propulsion, landing gear, ...), whose writes
+#       drop the aircraft's entries
+#    -> values come back in the unit of the component's own results
+#    -> each component keeps at most maxsize points, least recently used out
+#
+#    Caches = cache_polars(Aircraft)
+#    Aircraft.PlotPolarsSlopes(fig=2)
+#    print_stats(Caches)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import hashlib
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# GEOMETRY VERSION
+#==============================================================================#
+def _number(value):
+    """
+    Returns a plain float or float array of a number, quantity or array of
+    quantities, or None for anything else
+    """
+    if isinstance(value, (str, bytes, bool)) or value is None:
+        return None
+    try:
+        number = value_of(value)
+    except Exception:
+        return None
+    if isinstance(number, npy.ndarray) and number.dtype == object:
+        return None
+    return number
+
+
+def _update(sha, state):
+    """
+    Adds every public number, quantity, array or string of a dictionary of
+    attributes to a hash (not sub-components)
+    """
+    for name in sorted(state):
+        if name.startswith('_'):
+            continue
+        value = state[name]
+        if isinstance(value, str):
+            sha.update(('%s=%s;' % (name, value)).encode())
+            continue
+        if isinstance(value, (tuple, list)):
+            numbers = [_number(v) for v in value]
+            if any(n is None for n in numbers):
+                continue
+            number = npy.array(numbers, dtype=float)
+        else:
+            number = _number(value)
+            if number is None:
+                continue
+        sha.update(name.encode())
+        sha.update(npy.ascontiguousarray(number, dtype=float).tobytes())
+
+
+def mass_state(Component):
+    """
+    Returns the weight and CG of a component as plain floats (the polars about
+    the CG move with them), skipping what the component does not have
+    """
+    state = {}
+    for name in ('Weight', 'CG'):
+        value = getattr(Component, name, None)
+        try:
+            state[name] = _number(value() if callable(value) else value)
+        except Exception: # not computable before the component is refreshed
+            state[name] = None
+    return dict((name, value) for name, value in state.items() if value is not None)
+
+
+def _attributes(sha, Component, skip=()):
+    """
+    Adds the public numbers, quantities, arrays and strings of a component and
+    of its Aerothon parameter struct (.param, where the inputs live) to a
+    hash, except the attributes named in skip
+    """
+    def select(state):
+        return dict((name, value) for name, value in state.items() if name not in skip)
+    _update(sha, select(vars(Component)))
+    param = vars(Component).get('param', None)
+    if param is not None and hasattr(param, '__dict__'):
+        sha.update(b'param')
+        _update(sha, select(vars(param)))
+
+
+def attribute_version(Component, skip=()):
+    """
+    Returns a fingerprint of the attributes of a component (see _attributes),
+    without evaluating anything
+    """
+    sha = hashlib.sha1()
+    _attributes(sha, Component, skip)
+    return sha.hexdigest()
+
+
+def geometry_version(Component):
+    """
+    Returns a fingerprint of a component: its public numbers, quantities,
+    arrays and strings, the same of its Aerothon parameter struct (.param,
+    where the inputs live) and its weight and CG
+    """
+    sha = hashlib.sha1()
+    _attributes(sha, Component)
+    sha.update(b'mass')
+    _update(sha, mass_state(Component))
+    return sha.hexdigest()
+
+#==============================================================================#
+# POLAR CACHE
+#==============================================================================#
+def _key_value(arg):
+    """
+    Returns a hashable key of a polar argument (deflection, flags, ...)
+    """
+    number = _number(arg)
+    if number is None:
+        return repr(arg)
+    return tuple(npy.round(npy.ravel(number), 9))
+
+
+class PolarCache(object):
+    """
+    Bounded point cache of the polars of one component
+
+    Inputs:
+        Component - aircraft, wing or tail
+        maxsize   - maximum number of cached points
+    """
+    def __init__(self, Component, maxsize=4096):
+        self.Component = Component
+        self.maxsize = maxsize
+        self.points = OrderedDict() # (method, alpha, args, kwargs) -> value
+        self.units = {}             # method -> unit of its results
+        self.hits = 0
+        self.misses = 0
+        self.calls = 0
+        self.invalidations = 0
+
+    def invalidate(self):
+        if self.points:
+            self.invalidations += 1
+        self.points.clear()
+
+    def _unit(self, name, result, values):
+        """
+        Keeps the unit of a method's results: a value over its number (plain
+        results give 1.0)
+        """
+        if name in self.units:
+            return
+        for value, number in zip(npy.ravel(result), values):
+            if number != 0:
+                self.units[name] = value/number
+                return
+
+    def evaluate(self, name, function, alpha, args, kwargs):
+        """
+        Returns function(alpha, *args, **kwargs), evaluating only the alphas
+        missing from the cache (in one call). The values are returned in the
+        unit of the function's own results.
+        """
+        from Aerothon.scalar.units import ARCDEG
+
+        self.calls += 1
+        degrees = value_of(alpha, ARCDEG)
+        scalar = npy.ndim(degrees) == 0
+        degrees = npy.atleast_1d(degrees)
+        extra = (tuple(_key_value(a) for a in args),
+                 tuple((k, _key_value(v)) for k, v in sorted(kwargs.items())))
+        keys = [(name, round(float(a), 9)) + extra for a in degrees.flat]
+
+        points = self.points
+        missing = [i for i, key in enumerate(keys) if key not in points]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            _evaluating.append(self)
+            try:
+                if scalar:
+                    computed = function(alpha, *args, **kwargs)
+                else:
+                    computed = function(degrees.flat[missing]*ARCDEG, *args, **kwargs)
+            finally:
+                _evaluating.pop()
+            values = npy.ravel(value_of(computed))
+            self._unit(name, computed, values)
+            for i, value in zip(missing, values):
+                points[keys[i]] = float(value)
+        result = npy.empty(len(keys))
+        for i, key in enumerate(keys):
+            result[i] = points.pop(key)
+            points[key] = result[i] # most recently used
+        while len(points) > self.maxsize:
+            points.popitem(last=False)
+
+        unit = self.units.get(name, 1.0)
+        if scalar:
+            return float(result[0])*unit
+        return result.reshape(degrees.shape)*unit
+
+
+class CachedPolar(object):
+    """
+    Callable standing in for a polar method (CL, CD, CM) of a component
+    """
+    def __init__(self, Cache, name, function):
+        self.Cache = Cache
+        self.name = name
+        self.function = function
+
+    def __call__(self, alpha, *args, **kwargs):
+        return self.Cache.evaluate(self.name, self.function, alpha, args, kwargs)
+
+
+class InvalidatingRefresh(object):
+    """
+    Callable standing in for Refresh() of a component: refreshes it, then
+    drops the cached polars that depend on it
+    """
+    def __init__(self, function, Caches):
+        self.function = function
+        self.Caches = Caches
+
+    def __call__(self, *args, **kwargs):
+        result = self.function(*args, **kwargs)
+        for Cache in self.Caches:
+            Cache.invalidate()
+        return result
+
+#==============================================================================#
+# WATCHING ATTRIBUTE WRITES
+#==============================================================================#
+_evaluating = []     # caches evaluating a polar right now
+_watchedClasses = {} # class -> its watching subclass
+_MISSING = object()
+
+
+def _changes(Object, name, value):
+    """
+    Returns True if writing value to Object.name (or to its .param) changes it
+    """
+    state = vars(Object)
+    old = state.get(name, _MISSING)
+    param = state.get('param', None)
+    if old is _MISSING and param is not None and hasattr(param, '__dict__'):
+        old = vars(param).get(name, _MISSING)
+    if old is value:
+        return False
+    if isinstance(value, str):
+        return old != value
+    a, b = _number(old), _number(value)
+    if a is None or b is None:
+        return True
+    return npy.shape(a) != npy.shape(b) or not npy.array_equal(a, b)
+
+
+def _watched_setattr(self, name, value):
+    """
+    __setattr__ of a watched component: drops the caches that depend on it
+    when a public attribute changes outside of a polar evaluation
+    """
+    Caches = vars(self).get('_polarCaches', ())
+    if Caches and not _evaluating and not name.startswith('_') and _changes(self, name, value):
+        for Cache in Caches:
+            Cache.invalidate()
+    super(self._watchedClass, self).__setattr__(name, value)
+
+
+def _watch(Object, Caches):
+    """
+    Makes every attribute write of Object (and of its .param) drop Caches.
+    The object's class is swapped for a subclass that only adds the check.
+    """
+    targets = [Object]
+    param = vars(Object).get('param', None)
+    if param is not None and hasattr(param, '__dict__'):
+        targets.append(param)
+    for Target in targets:
+        cls = type(Target)
+        if not vars(cls).get('_watchedClass', None) is cls:
+            if cls not in _watchedClasses:
+                Watched = type(cls.__name__, (cls,), {'__setattr__' : _watched_setattr,
+                                                      '__module__'  : cls.__module__})
+                Watched._watchedClass = Watched
+                _watchedClasses[cls] = Watched
+            object.__setattr__(Target, '__class__', _watchedClasses[cls])
+        watched = vars(Target).get('_polarCaches', [])
+        object.__setattr__(Target, '_polarCaches',
+                           watched + [Cache for Cache in Caches if Cache not in watched])
+
+#==============================================================================#
+# INSTALLING THE CACHES
+#==============================================================================#
+POLAR_METHODS = ('CL', 'CD', 'CM') # memoized methods, where a component has them
+
+# components of an ACTailAircraft with polars (attribute paths from the aircraft)
+POLAR_COMPONENTS = ('', 'Wing', 'Wing.UpperWing', 'Wing.LowerWing', 'HTail', 'VTail')
+
+
+def _resolve(Aircraft, path):
+    Component = Aircraft
+    for name in filter(None, path.split('.')):
+        Component = getattr(Component, name, None)
+        if Component is None:
+            return None
+    return Component
+
+
+def cache_polars(Aircraft, maxsize=4096, components=POLAR_COMPONENTS):
+    """
+    Memoizes the polars of the aircraft and its lifting surfaces. Returns an
+    ordered dictionary of the PolarCache of each component. Install after the
+    aircraft is built (and stored in the component cache). Writing to a
+    component, or its Refresh(), drops the caches of the components it
+    belongs to or is made of.
+
+    Inputs:
+        maxsize    - maximum number of cached points per component
+        components - attribute paths of the components to memoize
+    """
+    found = OrderedDict((path, _resolve(Aircraft, path)) for path in components)
+    found = OrderedDict((path, C) for path, C in found.items() if C is not None)
+
+    Caches = OrderedDict()
+    for path, Component in found.items():
+        Cache = PolarCache(Component, maxsize=maxsize)
+        for name in POLAR_METHODS:
+            function = getattr(Component, name, None)
+            if function is None:
+                continue
+            if isinstance(function, CachedPolar): # already installed
+                function = function.function
+            object.__setattr__(Component, name, CachedPolar(Cache, name, function))
+        Caches[path or 'Aircraft'] = Cache
+
+    for path, Component in found.items():
+        related = [Caches[p or 'Aircraft'] for p in found
+                   if not p or not path or p == path or p.startswith(path + '.') or
+                   path.startswith(p + '.')]
+        _watch(Component, related)
+        Refresh = getattr(Component, 'Refresh', None)
+        if Refresh is None:
+            continue
+        if isinstance(Refresh, InvalidatingRefresh):
+            Refresh = Refresh.function
+        object.__setattr__(Component, 'Refresh', InvalidatingRefresh(Refresh, related))
+
+    # the other parts of the aircraft move its CG
+    if '' in found:
+        listed = set(id(C) for C in found.values())
+        for name, Part in sorted(vars(Aircraft).items()):
+            if not name.startswith('_') and hasattr(Part, '__dict__') and \
+                    callable(getattr(Part, 'Refresh', None)) and id(Part) not in listed:
+                _watch(Part, [Caches['Aircraft']])
+    return Caches
+
+
+def print_stats(Caches):
+    """
+    Prints the points evaluated and served by each component cache
+    """
+    for name, Cache in Caches.items():
+        print('%-16s: %6d calls, %6d points evaluated, %6d served from cache, %4d invalidations' %
+              (name, Cache.calls, Cache.misses, Cache.hits, Cache.invalidations))
@@ -0,0 +1,415 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# polarstore.py: memory-mapped binary store of 2D airfoil polars
+#
+# The wings and tails reference airfoils by name ('S1223', 'S1223_TC',
+# 'NACA0012') and the XFOIL polar text files behind them are slow to parse.
+# The polar store compiles them once into a single binary file for 2D polar
+# lookups (section plots, hand studies of the airfoils):
+#    -> every polar is resampled onto a uniform alpha grid at build time and
+#       the per-cell slopes are stored next to the values, so a lookup is an
+#       index computation and one multiply-add (no searching, no parsing)
+#    -> Reynolds number is interpolated linearly in log(Re) between the
+#       stored polars of an airfoil
+#    -> the file is opened with numpy.memmap read-only; processes forked
+#       after polar_store() share its pages
+#
+# The store is named by a hash of the polar files it was built from, so it is
+# rebuilt automatically when a polar changes, and a rebuild never disturbs a
+# process that still has the previous store mapped.
+#
+# The store does not take part in building the aircraft. Aerothon's wings and
+# tails read their own polar files when Airfoil is assigned, inside the
+# library, and nothing here replaces that: the sweep and payload workers
+# (Tools/sweep.py, Performance/payload.py) parse them on every component
+# cache miss and are spared it only on a hit (Tools/cache.py stores the built
+# wings with their polars). The files are checked when the store is built: an
+# airfoil without polar files, a polar file that is not laid out as an XFOIL
+# save file (Re line, 'alpha CL CD ... CM' header, rows as wide as the header)
+# or one without converged points raises ValueError rather than leaving the
+# airfoil out of the store.
+#
+#    Store = polar_store()
+#    Cl, Cd, Cm = Store['S1223'].coefficients(alpha_deg, Re)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import os
+import re
+import glob
+import json
+import hashlib
+import tempfile
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import ROOT_DIR
+
+#==============================================================================#
+# XFOIL POLAR FILES
+#==============================================================================#
+POLAR_PATTERNS = ('*.pol', '*.polar', '*.txt', '*.dat') # polar file extensions
+COEFFICIENTS   = ('Cl', 'Cd', 'Cm')                     # stored coefficients
+
+_reynolds = re.compile(r'Re\s*=\s*([0-9.]+)\s*e\s*([0-9]+)', re.IGNORECASE)
+
+
+def read_xfoil_polar(filename):
+    """
+    Returns (Re, alpha [deg], Cl, Cd, Cm) of an XFOIL polar save file, or None
+    when the file is not a polar (no 'alpha CL ...' column header). Raises
+    ValueError when a file with the header does not have the XFOIL layout.
+    """
+    with open(filename) as f:
+        lines = f.read().splitlines()
+
+    Re, rows, header = None, [], None
+    for number, line in enumerate(lines):
+        if Re is None and header is None:
+            match = _reynolds.search(line)
+            if match:
+                Re = float(match.group(1))*10**int(match.group(2))
+        words = line.split()
+        if header is None:
+            if words[:2] == ['alpha', 'CL']:
+                header = dict((w.lower(), i) for i, w in enumerate(words))
+                missing = [c for c in ('cd', 'cm') if c not in header]
+                if missing:
+                    raise ValueError("%s: polar without the %s column(s)" %
+                                     (filename, ', '.join(c.upper() for c in missing)))
+            continue
+        if not words or set(line.strip()) <= set('- '): # blank and ----- lines
+            continue
+        try:
+            row = [float(w) for w in words]
+        except ValueError:
+            raise ValueError("%s:%d: not a row of the XFOIL polar" % (filename, number + 1))
+        if len(row) != len(header):
+            raise ValueError("%s:%d: %d columns, the header has %d" %
+                             (filename, number + 1, len(row), len(header)))
+        rows.append(row)
+
+    if header is None:
+        return None
+    if Re is None or Re <= 0:
+        raise ValueError("%s: no viscous 'Re = ...' line above the column header" % filename)
+    if not rows:
+        raise ValueError("%s: polar without converged points" % filename)
+    rows = npy.array(rows)
+    rows = rows[npy.argsort(rows[:, header['alpha']])]
+    return (Re, rows[:, header['alpha']], rows[:, header['cl']], rows[:, header['cd']],
+            rows[:, header['cm']])
+
+
+def airfoil_directory():
+    """
+    Returns the directory searched for airfoil polars: the REG2020_AIRFOILS
+    environment variable, else the Airfoils directory of the Aerothon library
+    """
+    directory = os.environ.get('REG2020_AIRFOILS')
+    if directory is None:
+        import Aerothon
+        directory = os.path.join(os.path.dirname(os.path.abspath(Aerothon.__file__)), 'Airfoils')
+    return directory
+
+
+def polar_files(name, directory=None):
+    """
+    Returns the sorted polar files of an airfoil, looked up in
+    <directory>/<name>/ and as <directory>/<name>_*
+    """
+    if directory is None:
+        directory = airfoil_directory()
+    # flat files are named <name>_Re..., which keeps 'S1223' from taking 'S1223_TC'
+    flat = re.compile(re.escape(name) + r'_(Re)?[0-9]', re.IGNORECASE)
+    files = set()
+    for pattern in POLAR_PATTERNS:
+        files.update(glob.glob(os.path.join(directory, name, pattern)))
+        files.update(f for f in glob.glob(os.path.join(directory, name + '_*' + pattern[1:]))
+                     if flat.match(os.path.basename(f)))
+    return sorted(files)
+
+#==============================================================================#
+# AIRFOIL POLAR
+#==============================================================================#
+class AirfoilPolar(object):
+    """
+    Read-only view of one airfoil in the polar store
+
+    Inputs:
+        name   - airfoil name
+        Re     - Reynolds numbers of the stored polars (ascending)
+        alpha0 - first angle of attack of the grid [deg]
+        dalpha - grid spacing [deg]
+        values - (nRe, nalpha, 3) Cl, Cd, Cm on the grid
+        slopes - (nRe, nalpha, 3) forward differences per grid cell [1/deg]
+    """
+    def __init__(self, name, Re, alpha0, dalpha, values, slopes):
+        self.name = name
+        self.Re = npy.asarray(Re, dtype=float)
+        self.alpha0 = alpha0
+        self.dalpha = dalpha
+        self.values = values
+        self.slopes = slopes
+        self._logRe = npy.log(self.Re)
+
+    @property
+    def alpha(self):
+        """
+        Angle of attack grid [deg]
+        """
+        return self.alpha0 + self.dalpha*npy.arange(self.values.shape[1])
+
+    def _cells(self, alpha):
+        """
+        Returns the grid cell and the offset into it [deg] of each alpha (clamped)
+        """
+        n = self.values.shape[1]
+        u = npy.clip((npy.asarray(alpha, dtype=float) - self.alpha0)/self.dalpha, 0, n - 1)
+        i = npy.minimum(u.astype(int), n - 2)
+        return i, (u - i)*self.dalpha
+
+    def _at(self, k, i, da):
+        """
+        Returns the coefficients of polar k at cells i (offsets da), shape (..., 3)
+        """
+        return self.values[k, i] + self.slopes[k, i]*da[..., None]
+
+    def coefficients(self, alpha, Re=None):
+        """
+        Returns Cl, Cd, Cm at the angles of attack alpha [deg] and Reynolds
+        numbers Re (broadcast; default: the first stored polar). Alpha is
+        clamped to the stored range and Re to the stored polars.
+        """
+        alpha = npy.asarray(alpha, dtype=float)
+        if Re is None or len(self.Re) == 1:
+            i, da = self._cells(alpha)
+            C = self._at(0, i, da)
+        else:
+            alpha, Re = npy.broadcast_arrays(alpha, npy.asarray(Re, dtype=float))
+            i, da = self._cells(alpha)
+            x = npy.clip(npy.log(Re), self._logRe[0], self._logRe[-1])
+            k = npy.clip(npy.searchsorted(self._logRe, x) - 1, 0, len(self.Re) - 2)
+            w = ((x - self._logRe[k])/(self._logRe[k + 1] - self._logRe[k]))[..., None]
+            C = (1 - w)*self._at(k, i, da) + w*self._at(k + 1, i, da)
+        return C[..., 0], C[..., 1], C[..., 2]
+
+    def Cl(self, alpha, Re=None):
+        return self.coefficients(alpha, Re)[0]
+
+    def Cd(self, alpha, Re=None):
+        return self.coefficients(alpha, Re)[1]
+
+    def Cm(self, alpha, Re=None):
+        return self.coefficients(alpha, Re)[2]
+
+    def ClSlope(self, alpha, Re=None, step=0.5):
+        """
+        Returns dCl/dalpha [1/deg] by central differences
+        """
+        alpha = npy.asarray(alpha, dtype=float)
+        return (self.Cl(alpha + step, Re) - self.Cl(alpha - step, Re))/(2*step)
+
+#==============================================================================#
+# BUILDING THE STORE
+#==============================================================================#
+def resample(alpha, coefficients, grid):
+    """
+    Returns the polar resampled on the alpha grid [deg], shape (len(grid), 3).
+    Outside the converged range the end values are held.
+    """
+    return npy.column_stack([npy.interp(grid, alpha, c) for c in coefficients])
+
+
+def sources_digest(sources):
+    """
+    Returns a hash of the polar files (content and names) of a store
+    """
+    sha = hashlib.sha1()
+    for name in sorted(sources):
+        sha.update(name.encode())
+        for filename in sources[name]:
+            sha.update(os.path.basename(filename).encode())
+            with open(filename, 'rb') as f:
+                sha.update(f.read())
+    return sha.hexdigest()
+
+
+def _write_atomic(directory, filename, write):
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        write(tmp)
+        os.rename(tmp, filename)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def build_store(sources, basename, alpha_range=(-20.0, 25.0), dalpha=0.25):
+    """
+    Compiles polar files into <basename>.npy (values and slopes) and
+    <basename>.json (index). Returns the index.
+
+    Inputs:
+        sources     - {airfoil name: [XFOIL polar files]}
+        alpha_range - (min, max) of the stored alpha grid [deg]
+        dalpha      - grid spacing [deg]
+    """
+    nalpha = int(round((alpha_range[1] - alpha_range[0])/dalpha)) + 1
+    grid = alpha_range[0] + dalpha*npy.arange(nalpha)
+
+    index = OrderedDict()
+    tables = []
+    row = 0
+    for name in sorted(sources):
+        polars = [p for p in (read_xfoil_polar(f) for f in sources[name]) if p is not None]
+        if not polars:
+            raise ValueError("No XFOIL polars for airfoil '%s' in %s" %
+                             (name, ', '.join(sources[name]) or 'no files'))
+        polars.sort(key=lambda p: p[0])
+        Res = []
+        for p in polars:
+            if Res and p[0] == Res[-1]: # duplicate Reynolds number, keep the first
+                continue
+            Res.append(p[0])
+            tables.append(resample(p[1], p[2:], grid))
+        index[name] = {'row': row, 'Re': Res}
+        row += len(Res)
+
+    values = npy.array(tables, dtype=float).reshape(row, nalpha, len(COEFFICIENTS))
+    slopes = npy.zeros_like(values)
+    slopes[:, :-1] = npy.diff(values, axis=1)/dalpha
+
+    directory = os.path.dirname(os.path.abspath(basename))
+    header = {'alpha0': float(grid[0]), 'dalpha': float(dalpha), 'nalpha': nalpha,
+              'coefficients': list(COEFFICIENTS), 'airfoils': index}
+    def write_data(tmp):
+        with open(tmp, 'wb') as f:
+            npy.save(f, npy.array((values, slopes)))
+
+    def write_index(tmp):
+        with open(tmp, 'w') as f:
+            json.dump(header, f)
+    # the index goes last: a store is complete once its index exists
+    _write_atomic(directory, basename + '.npy', write_data)
+    _write_atomic(directory, basename + '.json', write_index)
+    return header
+
+#==============================================================================#
+# POLAR STORE
+#==============================================================================#
+class PolarStore(object):
+    """
+    Memory-mapped polar store opened read-only
+
+    Inputs:
+        basename - store path without the .npy/.json extension
+    """
+    def __init__(self, basename):
+        with open(basename + '.json') as f:
+            self.index = json.load(f)
+        self.basename = basename
+        self.data = npy.load(basename + '.npy', mmap_mode='r') # (2, rows, nalpha, 3)
+        self._polars = {}
+
+    def airfoils(self):
+        return list(self.index['airfoils'])
+
+    def __contains__(self, name):
+        return name in self.index['airfoils']
+
+    def __getitem__(self, name):
+        """
+        Returns the AirfoilPolar of an airfoil (views into the mapped file)
+        """
+        if name not in self._polars:
+            entry = self.index['airfoils'][name]
+            rows = slice(entry['row'], entry['row'] + len(entry['Re']))
+            self._polars[name] = AirfoilPolar(name, entry['Re'], self.index['alpha0'],
+                                              self.index['dalpha'], self.data[0, rows],
+                                              self.data[1, rows])
+        return self._polars[name]
+
+
+_stores = {} # (directory, names) -> PolarStore, one per process
+
+# airfoils referenced by the aircraft modules
+AIRFOILS = ('S1223', 'S1223_TC', 'NACA0012')
+
+
+def store_directory():
+    """
+    Returns the directory of compiled polar stores (REG2020_CACHE/polars or
+    .cache/polars in the repository)
+    """
+    root = os.environ.get('REG2020_CACHE', os.path.join(ROOT_DIR, '.cache'))
+    directory = os.path.join(root, 'polars')
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError: # another process may have created it first
+            if not os.path.isdir(directory):
+                raise
+    return directory
+
+
+def polar_store(names=AIRFOILS, directory=None):
+    """
+    Returns the polar store of the named airfoils, compiling it first when the
+    polar files changed. Opened once per process; a multiprocessing pool
+    created after it inherits the mapping. Raises
+    ValueError when an airfoil has no polar files or none of them is an XFOIL
+    polar.
+
+    Inputs:
+        names     - airfoil names
+        directory - where the polar files are (default airfoil_directory())
+    """
+    if directory is None:
+        directory = airfoil_directory()
+    key = (directory, tuple(names))
+    if key not in _stores:
+        sources = OrderedDict((name, polar_files(name, directory)) for name in names)
+        missing = [name for name, files in sources.items() if not files]
+        if missing:
+            raise ValueError("No polar files for airfoil(s) %s in %s" %
+                             (', '.join(missing), directory))
+        basename = os.path.join(store_directory(), 'polars-' + sources_digest(sources))
+        if not os.path.exists(basename + '.json'):
+            build_store(sources, basename)
+        _stores[key] = PolarStore(basename)
+    return _stores[key]
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    import time
+    import pylab as pyl
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else None
+    start = time.time()
+    Store = polar_store(directory=directory)
+    print('Polar store %s opened in %.4f s' % (Store.basename, time.time() - start))
+
+    alpha = npy.linspace(-10, 20, 121)
+    for fig, name in enumerate(Store.airfoils()):
+        Polar = Store[name]
+        pyl.figure(fig + 1)
+        for Re in Polar.Re:
+            Cl, Cd, Cm = Polar.coefficients(alpha, Re)
+            pyl.subplot(131); pyl.plot(alpha, Cl, label='Re %.0f' % Re)
+            pyl.subplot(132); pyl.plot(Cd, Cl)
+            pyl.subplot(133); pyl.plot(alpha, Cm)
+        pyl.subplot(131); pyl.title(name + ' Cl'); pyl.xlabel('alpha (deg)'); pyl.legend(loc='best')
+        pyl.subplot(132); pyl.title('Cl vs Cd'); pyl.xlabel('Cd')
+        pyl.subplot(133); pyl.title('Cm'); pyl.xlabel('alpha (deg)')
+    pyl.show()
@@ -0,0 +1,166 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# stability.py: stability derivative report of an ACTailAircraft
+#
+# The aircraft is written to AVL geometry (WriteAVLAircraft) and solved with
+# the in-process vortex lattice (Aerodynamics/vlm.py). All perturbation cases
+# (alpha, beta and every control deflection, central differences about the
+# reference alpha) are one batch of right-hand sides of a single factored
+# lattice, and lattices are memoized by the content of the geometry, so
+# designs that only differ in mass properties or propulsion reuse the work.
+#
+# Derivatives are per radian, in AVL's stability axes (Cl and Cn positive
+# right wing down and nose right). Static stability needs Cm_alpha < 0,
+# Cn_beta > 0 and Cl_beta < 0.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import hashlib
+from collections import OrderedDict
+import numpy as npy
+
+from Aerodynamics.avl import parse_avl, component_text
+from Aerodynamics.vlm import VortexLattice
+
+#==============================================================================#
+# LATTICE MEMO
+#==============================================================================#
+_lattices = OrderedDict() # sha1 of the AVL text -> VortexLattice
+MAX_LATTICES = 8          # factored lattices kept per process
+
+
+def lattice(text):
+    """
+    Returns the (memoized) VortexLattice of the text of an AVL geometry file
+    """
+    key = hashlib.sha1(text.encode()).hexdigest()
+    if key in _lattices:
+        _lattices[key] = _lattices.pop(key) # most recently used
+    else:
+        _lattices[key] = VortexLattice(parse_avl(text))
+        while len(_lattices) > MAX_LATTICES:
+            _lattices.popitem(last=False)
+    return _lattices[key]
+
+
+def aircraft_avl(Aircraft):
+    """
+    Returns the AVL geometry text of an aircraft (WriteAVLAircraft)
+    """
+    return component_text(Aircraft)
+
+#==============================================================================#
+# STABILITY DERIVATIVES
+#==============================================================================#
+# units of the reported quantities (controls add <coefficient>_<control> 1/rad)
+UNITS = OrderedDict([('Alpha',      'deg'),
+                     ('CL',         '-'),
+                     ('Cm',         '-'),
+                     ('CL_alpha',   '1/rad'),
+                     ('Cm_alpha',   '1/rad'),
+                     ('CY_beta',    '1/rad'),
+                     ('Cl_beta',    '1/rad'),
+                     ('Cn_beta',    '1/rad'),
+                     ('Xnp',        'in'),
+                     ('SM_vlm',     '-')])
+
+# control coefficients reported for each control surface
+CONTROL_COEFFICIENTS = ('CL', 'Cm', 'Cl', 'Cn')
+
+
+def derivatives(Lattice, alpha=0.0, dalpha=1.0, dbeta=1.0, ddelta=2.0):
+    """
+    Returns an ordered dictionary of stability and control derivatives of a
+    VortexLattice at the angle of attack alpha [deg]. Every perturbation case
+    is solved in one batch.
+
+    Inputs:
+        dalpha, dbeta, ddelta - central difference steps [deg]
+    """
+    controls = Lattice.controls
+    # cases: alpha +-, beta +-, then +- for each control
+    n = 4 + 2*len(controls)
+    a = npy.full(n, float(alpha))
+    b = npy.zeros(n)
+    a[0:2] += (dalpha, -dalpha)
+    b[2:4] = (dbeta, -dbeta)
+    deflections = {}
+    for i, name in enumerate(controls):
+        d = npy.zeros(n)
+        d[4 + 2*i:6 + 2*i] = (ddelta, -ddelta)
+        deflections[name] = d
+        a[4 + 2*i:6 + 2*i] = alpha
+    Res = Lattice.solve(alpha=a, beta=b, deflections=deflections)
+
+    def slope(key, i, step):
+        return (Res[key][i] - Res[key][i + 1])/npy.radians(2*step)
+
+    G = Lattice.Geometry
+    D = OrderedDict()
+    D['Alpha']    = float(alpha)
+    D['CL']       = 0.5*(Res['CL'][0] + Res['CL'][1])
+    D['Cm']       = 0.5*(Res['Cm'][0] + Res['Cm'][1])
+    D['CL_alpha'] = slope('CL', 0, dalpha)
+    D['Cm_alpha'] = slope('Cm', 0, dalpha)
+    D['CY_beta']  = slope('CY', 2, dbeta)
+    D['Cl_beta']  = slope('Cl', 2, dbeta)
+    D['Cn_beta']  = slope('Cn', 2, dbeta)
+    D['SM_vlm']   = -D['Cm_alpha']/D['CL_alpha']
+    D['Xnp']      = G.Xref[0] + D['SM_vlm']*G.Cref
+    for i, name in enumerate(controls):
+        for key in CONTROL_COEFFICIENTS:
+            D['%s_%s' % (key, name)] = slope(key, 4 + 2*i, ddelta)
+    for key in D:
+        D[key] = float(D[key])
+    return D
+
+
+def stability_report(Aircraft, alpha=None):
+    """
+    Returns the stability derivatives of a built aircraft as an ordered
+    dictionary of plain floats (units in UNITS, control derivatives 1/rad)
+
+    Inputs:
+        alpha - reference angle of attack (Aerothon quantity, default
+                Aircraft.Alpha_Zero_CM)
+    """
+    from Aerothon.scalar.units import ARCDEG
+    from Tools.fastmode import value_of
+
+    alpha = Aircraft.Alpha_Zero_CM if alpha is None else alpha
+    return derivatives(lattice(aircraft_avl(Aircraft)), value_of(alpha, ARCDEG))
+
+
+def print_report(D):
+    """
+    Prints a stability report
+    """
+    units = dict((key, UNITS.get(key, '1/rad')) for key in D)
+    for key, value in D.items():
+        print('%-16s: %10.5f %s' % (key, value, units[key]))
+    print('Statically stable in pitch : %s' % (D['Cm_alpha'] < 0))
+    print('Statically stable in yaw   : %s' % (D['Cn_beta'] > 0))
+    print('Statically stable in roll  : %s' % (D['Cl_beta'] < 0))
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    import time
+
+    start = time.time()
+    if len(sys.argv) > 1: # an existing AVL file
+        with open(sys.argv[1]) as f:
+            D = derivatives(lattice(f.read()), float(sys.argv[2]) if len(sys.argv) > 2 else 0.0)
+    else:
+        from aircraft import build_aircraft
+        from Tools.cache import ComponentCache
+        D = stability_report(build_aircraft(cache=ComponentCache()))
+    print_report(D)
+    print('Report in %.2f s' % (time.time() - start))
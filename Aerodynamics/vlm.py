@@ -0,0 +1,433 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# vlm.py: in-process vortex lattice solver for AVL geometry files
+#
+# Reads the SURFACE/SECTION/CONTROL data that WriteAVLAircraft and
+# WriteAVLWing produce (see Aerodynamics/avl.py) and lays horseshoe vortices on
+# it the way AVL does:
+#    -> Nchord x Nspan panels per surface with the Cspace/Sspace spacings
+#       (section Nspan/Sspace are ignored, the surface spacing is snapped to
+#       the sections), YDUPLICATE images, SCALE/TRANSLATE
+#    -> incidence (Ainc + ANGLE) and camber (AFIL files that resolve, NACA
+#       4-digit) tilt the panel normals, the geometry stays flat
+#    -> CONTROL deflections rotate the normals of the panels behind the hinge
+#       (gains and hinges interpolated between sections, SgnDup on images)
+# The influence matrix is assembled with numpy and factored once; every
+# combination of alpha, beta and control deflections is then only another
+# right-hand side:
+#
+#    Lattice = VortexLattice(read_avl('BAP.avl'))
+#    Res = Lattice.solve(alpha=npy.linspace(-5, 15, 81), deflections={'Elevator': -5})
+#    print Res['CL'], Res['Cm']
+#
+# Flow is incompressible (Mach is ignored) and iZsym ground images are not
+# supported. Angles are in degrees and lengths in the units of the file.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import numpy as npy
+try:
+    from scipy.linalg import lu_factor, lu_solve
+except ImportError:
+    lu_factor = lu_solve = None
+
+from Aerodynamics.avl import read_avl
+
+#==============================================================================#
+# SPACING AND CAMBER
+#==============================================================================#
+def spacing(n, space):
+    """
+    Returns the n+1 node fractions (0..1) of the AVL spacing parameter
+    (0 equal, 1 cosine, 2 sine bunched at the start, -2 bunched at the end,
+    3 equal, fractions blend the neighbouring distributions)
+    """
+    f = npy.arange(n + 1)/n
+    equal = f
+    cosine = 0.5*(1 - npy.cos(npy.pi*f))
+    sine = 1 - npy.cos(0.5*npy.pi*f) if space >= 0 else npy.sin(0.5*npy.pi*f)
+    p = min(abs(space), 3.0)
+    if p <= 1:
+        return (1 - p)*equal + p*cosine
+    if p <= 2:
+        return (2 - p)*cosine + (p - 1)*sine
+    return (3 - p)*sine + (p - 2)*equal
+
+
+def _camber_from_coordinates(coords):
+    """
+    Returns (x/c, z/c) of the mean line of airfoil coordinates (TE-LE-TE)
+    """
+    ile = npy.argmin(coords[:, 0])
+    upper = coords[:ile + 1][::-1]
+    lower = coords[ile:]
+    x = npy.linspace(coords[ile, 0], 1.0, 101)
+    z = 0.5*(npy.interp(x, upper[:, 0], upper[:, 1]) + npy.interp(x, lower[:, 0], lower[:, 1]))
+    return x, z
+
+
+def _camber_naca(digits):
+    """
+    Returns (x/c, z/c) of the mean line of a NACA 4-digit airfoil
+    """
+    m, p = int(digits[0])/100, int(digits[1])/10
+    x = npy.linspace(0, 1, 101)
+    if m == 0 or p == 0:
+        return x, npy.zeros_like(x)
+    z = npy.where(x < p, m/p**2*(2*p*x - x**2), m/(1 - p)**2*(1 - 2*p + 2*p*x - x**2))
+    return x, z
+
+
+def camber_slope(Airfoil, xc):
+    """
+    Returns dz/dx of the mean line of an AVLAirfoil at the chord fractions xc
+    (zero without an airfoil, for unresolved files and symmetric sections)
+    """
+    mean = None
+    if Airfoil is not None and Airfoil.kind == 'NACA':
+        mean = _camber_naca(Airfoil.text)
+    elif Airfoil is not None:
+        coords = Airfoil.coordinates()
+        if coords is not None and len(coords) > 4:
+            mean = _camber_from_coordinates(coords)
+    if mean is None:
+        return npy.zeros_like(xc)
+    x, z = mean
+    return npy.interp(xc, x, npy.gradient(z, x))
+
+#==============================================================================#
+# BIOT-SAVART
+#==============================================================================#
+def _cross(a, b):
+    """
+    Cross product of component tuples (x, y, z)
+    """
+    return (a[1]*b[2] - a[2]*b[1], a[2]*b[0] - a[0]*b[2], a[0]*b[1] - a[1]*b[0])
+
+
+def _segment(P, A, B, eps=1e-10):
+    """
+    Velocity (component tuple) at points P induced by unit vortex segments
+    A -> B; P, A and B are component tuples of broadcast arrays
+    """
+    r1 = [p - a for p, a in zip(P, A)]
+    r2 = [p - b for p, b in zip(P, B)]
+    r0 = [b - a for a, b in zip(A, B)]
+    c = _cross(r1, r2)
+    den = c[0]**2 + c[1]**2 + c[2]**2
+    n1 = npy.sqrt(r1[0]**2 + r1[1]**2 + r1[2]**2)
+    n2 = npy.sqrt(r2[0]**2 + r2[1]**2 + r2[2]**2)
+    ok = den > eps*(r0[0]**2 + r0[1]**2 + r0[2]**2)
+    n1 = npy.maximum(n1, 1e-30)
+    n2 = npy.maximum(n2, 1e-30)
+    k = sum(r0[i]*(r1[i]/n1 - r2[i]/n2) for i in range(3))
+    k = npy.where(ok, k/(4*npy.pi*npy.where(ok, den, 1.0)), 0.0)
+    return [ci*k for ci in c]
+
+
+def _semi_infinite(P, A, eps=1e-10):
+    """
+    Velocity (component tuple) at points P induced by unit vortices from A to
+    +x infinity
+    """
+    r = [p - a for p, a in zip(P, A)]
+    den = r[1]**2 + r[2]**2             # |x x r|**2
+    nr = npy.maximum(npy.sqrt(r[0]**2 + den), 1e-30)
+    ok = den > eps
+    k = npy.where(ok, (1 + r[0]/nr)/(4*npy.pi*npy.where(ok, den, 1.0)), 0.0)
+    return [0.0*k, -r[2]*k, r[1]*k]    # x x r = (0, -rz, ry)
+
+
+def horseshoe(P, A, B):
+    """
+    Velocity at points P (..., 3) induced by unit horseshoe vortices
+    (inf -> A -> B -> inf), returned as (..., 3)
+    """
+    P, A, B = [[X[..., i] for i in range(3)] for X in (P, A, B)]
+    V = [s + b - a for s, b, a in zip(_segment(P, A, B), _semi_infinite(P, B), _semi_infinite(P, A))]
+    return npy.stack(npy.broadcast_arrays(*V), axis=-1)
+
+#==============================================================================#
+# VORTEX LATTICE
+#==============================================================================#
+class VortexLattice(object):
+    """
+    Vortex lattice model of an AVLGeometry (or an .avl file name)
+    """
+    def __init__(self, Geometry):
+        if not hasattr(Geometry, 'Surfaces'):
+            Geometry = read_avl(Geometry)
+        self.Geometry = Geometry
+        self._build()
+        self._factor()
+
+    #--------------------------------------------------------------------------#
+    def _build(self):
+        """
+        Lays out the panels of every surface and its image
+        """
+        Geometry = self.Geometry
+        A, B, C, Mid, N, dN, Strip = [], [], [], [], [], {}, []
+
+        for Surface in Geometry.Surfaces:
+            images = [False]
+            ydup = Surface.YDuplicate
+            if ydup is None and Geometry.iYsym == 1:
+                ydup = 0.0
+            if ydup is not None:
+                images.append(True)
+            panels = self._surface_panels(Surface)
+            for image in images:
+                for a, b, c, n, controls, strip in panels:
+                    if image:
+                        a, b = _mirror(b, ydup), _mirror(a, ydup)
+                        c = _mirror(c, ydup)
+                        n = n*npy.array([1.0, -1.0, 1.0])
+                        controls = [(name, gain*sgndup, h*npy.array([-1.0, 1.0, -1.0]), sgndup)
+                                    for name, gain, h, sgndup in controls]
+                    i = len(A)
+                    A.append(a)
+                    B.append(b)
+                    C.append(c)
+                    N.append(n)
+                    Mid.append(0.5*(a + b))
+                    for name, gain, h, sgndup in controls:
+                        # small rotation of the normal about the hinge axis
+                        dN.setdefault(name, {})[i] = gain*npy.cross(h, n)
+                    Strip.append((Surface.name, image) + strip)
+
+        self.A = npy.array(A)
+        self.B = npy.array(B)
+        self.C = npy.array(C)
+        self.N = npy.array(N)
+        self.Mid = npy.array(Mid)
+        self.controls = sorted(dN)
+        self.dN = {}
+        for name in self.controls:
+            dn = npy.zeros_like(self.N)
+            for i, v in dN[name].items():
+                dn[i] = v
+            self.dN[name] = dn
+
+        # strip of every panel
+        keys = []
+        self.strip_of = npy.zeros(len(A), dtype=int)
+        for i, key in enumerate(Strip):
+            if key not in keys:
+                keys.append(key)
+            self.strip_of[i] = keys.index(key)
+        self.nstrip = len(keys)
+        self.strip_name = [key[0] for key in keys]
+        self.strip_width = npy.zeros(self.nstrip)
+        self.strip_chord = npy.zeros(self.nstrip)
+        self.strip_y = npy.zeros(self.nstrip)
+        self.strip_z = npy.zeros(self.nstrip)
+        for i in range(len(A)):
+            s = self.strip_of[i]
+            self.strip_width[s] = npy.sqrt(npy.sum((self.B[i, 1:] - self.A[i, 1:])**2))
+            self.strip_chord[s] = Strip[i][-1]
+            self.strip_y[s] = self.Mid[i, 1]
+            self.strip_z[s] = self.Mid[i, 2]
+
+    def _surface_panels(self, Surface):
+        """
+        Returns (A, B, control point, normal, controls, strip key) of every panel
+        """
+        scale = npy.array(Surface.Scale or (1.0, 1.0, 1.0))
+        shift = npy.array(Surface.Translate or (0.0, 0.0, 0.0))
+        Sections = Surface.Sections
+        le = npy.column_stack([Sections['Xle'], Sections['Yle'], Sections['Zle']])*scale + shift
+        chord = Sections['Chord']*scale[0]
+        ainc = npy.radians(Sections['Ainc'] + Surface.Angle)
+
+        # spanwise node fractions (arc length in y-z) snapped to the sections
+        seg = npy.sqrt(npy.sum(npy.diff(le[:, 1:], axis=0)**2, axis=1))
+        fs = npy.concatenate([[0.0], npy.cumsum(seg)])/max(npy.sum(seg), 1e-30)
+        nspan = max(Surface.Nspan, len(Sections) - 1)
+        fn = spacing(nspan, Surface.Sspace)
+        for f in fs[1:-1]:
+            fn[1 + npy.argmin(npy.abs(fn[1:-1] - f))] = f
+        fn = npy.unique(npy.concatenate([fn, fs]))
+
+        def at(f, values):
+            return npy.array([npy.interp(f, fs, v) for v in npy.atleast_2d(values.T)]).T
+
+        fc = spacing(Surface.Nchord, Surface.Cspace)
+        xb = fc[:-1] + 0.25*npy.diff(fc)   # bound vortex chord fractions
+        xc = fc[:-1] + 0.75*npy.diff(fc)   # control point chord fractions
+        Airfoils = self.Geometry.Airfoils
+        slopes = npy.array([camber_slope(Airfoils[i] if i >= 0 else None, xc)
+                            for i in Sections['Airfoil']])
+
+        xhat = npy.array([1.0, 0.0, 0.0])
+        panels = []
+        for j in range(len(fn) - 1):
+            fa, fb, fm = fn[j], fn[j + 1], 0.5*(fn[j] + fn[j + 1])
+            k = min(npy.searchsorted(fs, fm) - 1, len(Sections) - 2) # section interval
+            t = (fm - fs[k])/(fs[k + 1] - fs[k])
+            lea, leb, lem = at(fa, le), at(fb, le), at(fm, le)
+            ca, cb, cm = [float(npy.interp(f, fs, chord)) for f in (fa, fb, fm)]
+            theta = float(npy.interp(fm, fs, ainc))
+            slope = (1 - t)*slopes[k] + t*slopes[k + 1]
+
+            span = leb - lea
+            n0 = npy.cross(xhat, span)
+            n0 = n0/npy.sqrt(npy.sum(n0**2))
+
+            # controls present on both bounding sections apply to this strip
+            controls = []
+            for c0 in Surface.controls_of(k):
+                for c1 in Surface.controls_of(k + 1):
+                    if c1['Name'] == c0['Name']:
+                        gain = (1 - t)*c0['Gain'] + t*c1['Gain']
+                        xh = (1 - t)*c0['Xhinge'] + t*c1['Xhinge']
+                        if npy.any(c0['Hvec']):
+                            h = npy.array(c0['Hvec'], dtype=float)
+                        else:
+                            h = ((le[k + 1] + xhat*chord[k + 1]*c1['Xhinge']) -
+                                 (le[k] + xhat*chord[k]*c0['Xhinge']))
+                        controls.append((str(c0['Name']), gain, h/npy.sqrt(npy.sum(h**2)),
+                                         c0['SgnDup'], xh))
+
+            for i in range(len(xb)):
+                a = lea + xhat*ca*xb[i]
+                b = leb + xhat*cb*xb[i]
+                c = lem + xhat*cm*xc[i]
+                angle = theta - npy.arctan(slope[i])
+                n = npy.cos(angle)*n0 + npy.sin(angle)*xhat
+                active = [(name, gain, h, sgndup) for name, gain, h, sgndup, xh in controls
+                          if xc[i] > xh]
+                panels.append((a, b, c, n, active, (j, cm)))
+        return panels
+
+    #--------------------------------------------------------------------------#
+    def _influence(self, P, block=256):
+        """
+        Returns the (len(P), npanel, 3) velocities induced at P by unit vortices
+        """
+        W = npy.empty((len(P), len(self.A), 3))
+        for i in range(0, len(P), block):
+            W[i:i + block] = horseshoe(P[i:i + block, None, :], self.A[None], self.B[None])
+        return W
+
+    def _factor(self):
+        """
+        Assembles the influence matrix and factors it once
+        """
+        W = self._influence(self.C)
+        self.AIC = npy.einsum('ijk,ik->ij', W, self.N)
+        if lu_factor is not None:
+            self._lu = lu_factor(self.AIC)
+            self._inv = None
+        else:
+            self._lu = None
+            self._inv = npy.linalg.inv(self.AIC)
+        # induced velocity at the bound vortex midpoints, for the forces
+        Wmid = self._influence(self.Mid)
+        self.Wmid = Wmid.transpose(0, 2, 1).reshape(3*len(self.A), len(self.A))
+        self.L = self.B - self.A
+
+    def _solve(self, rhs):
+        if self._lu is not None:
+            return lu_solve(self._lu, rhs)
+        return npy.dot(self._inv, rhs)
+
+    #--------------------------------------------------------------------------#
+    def solve(self, alpha=0.0, beta=0.0, deflections=None):
+        """
+        Returns a dictionary of force and moment coefficients (arrays over the
+        broadcast cases): CL, CDi, CY, Cl, Cm, Cn (moments about Xref, Cl/Cn in
+        AVL's stability axes) and 'ccl' (cases x strips) spanwise loading c*cl/Cref, plus
+        'Gamma' (cases x panels)
+
+        Inputs:
+            alpha, beta - angles of attack and sideslip [deg]
+            deflections - dictionary of control name: deflection [deg]
+        """
+        deflections = deflections or {}
+        for name in deflections:
+            if name not in self.dN:
+                raise KeyError("No control named '%s'" % name)
+        names = list(deflections)
+        arrays = npy.broadcast_arrays(npy.asarray(alpha, dtype=float),
+                                      npy.asarray(beta, dtype=float),
+                                      *[npy.asarray(deflections[n], dtype=float) for n in names])
+        shape = arrays[0].shape
+        a = npy.radians(arrays[0].ravel())
+        b = npy.radians(arrays[1].ravel())
+        d = [npy.radians(x.ravel()) for x in arrays[2:]]
+
+        # freestream (unit speed) of every case and the right-hand sides
+        Vinf = npy.array([npy.cos(a)*npy.cos(b), -npy.sin(b), npy.sin(a)*npy.cos(b)]) # 3 x ncase
+        rhs = -npy.dot(self.N, Vinf)
+        for name, delta in zip(names, d):
+            rhs -= npy.dot(self.dN[name], Vinf)*delta
+        Gamma = self._solve(rhs)                                             # npanel x ncase
+
+        # Kutta-Joukowski on the bound vortices with the local velocity
+        V = Vinf[None, :, :] + npy.dot(self.Wmid, Gamma).reshape(len(self.A), 3, -1) # npanel x 3 x ncase
+        F = npy.cross(V, self.L[:, :, None], axis=1)*Gamma[:, None, :]      # rho = 1
+        q = 0.5
+        G = self.Geometry
+        S, c, bref = G.Sref, G.Cref, G.Bref
+        CF = F.sum(axis=0)/(q*S)                                            # 3 x ncase
+        r = self.Mid - npy.array(G.Xref)
+        CM = npy.cross(r[:, :, None], F, axis=1).sum(axis=0)/(q*S)
+
+        liftdir = npy.array([-npy.sin(a), npy.zeros_like(a), npy.cos(a)])
+        ca, sa = npy.cos(a), npy.sin(a)
+        res = {}
+        res['CL'] = npy.sum(CF*liftdir, axis=0)
+        res['CDi'] = npy.sum(CF*Vinf, axis=0)
+        res['CY'] = CF[1]
+        res['Cl'] = -(CM[0]*ca + CM[2]*sa)/bref   # stability axes: x forward, z down
+        res['Cm'] = CM[1]/c
+        res['Cn'] = -(CM[2]*ca - CM[0]*sa)/bref
+        for key in list(res):
+            res[key] = res[key].reshape(shape)
+
+        # spanwise loading: lift per unit span of each strip
+        Fl = npy.einsum('ikc,kc->ic', F, liftdir)
+        strip = npy.zeros((self.nstrip, len(a)))
+        npy.add.at(strip, self.strip_of, Fl)
+        res['ccl'] = (strip/(q*self.strip_width[:, None]*c)).T.reshape(shape + (self.nstrip,))
+        res['Gamma'] = Gamma.T.reshape(shape + (len(self.A),))
+        return res
+
+
+def _mirror(P, ydup):
+    """
+    Reflects points in the plane y = ydup
+    """
+    P = npy.array(P, dtype=float)
+    P[..., 1] = 2*ydup - P[..., 1]
+    return P
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    import time
+
+    filename = sys.argv[1] if len(sys.argv) > 1 else 'BAP.avl'
+
+    start = time.time()
+    Lattice = VortexLattice(filename)
+    print('%s: %d panels, controls %s, factored in %.2f s' % (filename, len(Lattice.A),
+          ', '.join(Lattice.controls), time.time() - start))
+
+    alpha = npy.linspace(-5, 15, 201)
+    start = time.time()
+    Res = Lattice.solve(alpha=alpha)
+    print('%d cases in %.3f s' % (len(alpha), time.time() - start))
+    print('CL_alpha = %.4f /deg, Cm_alpha = %.4f /deg' % (npy.polyfit(alpha, Res['CL'], 1)[0],
+                                                        npy.polyfit(alpha, Res['Cm'], 1)[0]))
+    Res = Lattice.solve(alpha=5.0, beta=[-2.0, 2.0])
+    print('Cn_beta = %.5f /deg, Cl_beta = %.5f /deg' % ((Res['Cn'][1] - Res['Cn'][0])/4,
+                                                        (Res['Cl'][1] - Res['Cl'][0])/4))
@@ -0,0 +1,376 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# groundroll.py: adaptive, batched takeoff ground roll
+#
+# Aircraft.Groundroll() integrates one takeoff at a time. GroundRoll integrates
+# a whole broadcast array of gross weights, headwinds and field elevations at
+# once with an adaptive Dormand-Prince 5(4) step per case. Lift-off is located
+# exactly inside the last step (airspeed = V_LO) from the cubic Hermite dense
+# output, so the distance does not depend on the step size:
+#
+#    Roll = GroundRoll.from_aircraft(Aircraft)
+#    x, t, V_LO = Roll.solve(npy.linspace(20, 35, 16)*LBF)   # distance vs weight
+#
+# Forces during the roll (at Aircraft.Alpha_Groundroll):
+#    m dv/dt = T(Va, h) - q S CD - mu (W - q S CL),   Va = v + headwind
+# The lift-off speed scales the aircraft V_LO with weight and density:
+#    V_LO = sqrt(2 W/(rho(h) S CL_LO)),   CL_LO = 2 TotalWeight/(rho(Alt_LO) V_LO**2 S)
+# i.e. CL_LO is the aircraft's own lift-off condition: its whole weight carried
+# at V_LO. The thrust comes from a PropulsionTable (Propulsion/matched.py),
+# filled from ACPropulsion's matched solution. The rolling friction mu is taken
+# from the aircraft model itself: from_aircraft solves for the mu at which the
+# batched roll reproduces Aircraft.Groundroll() (at the aircraft's weight and
+# Alt_LO). compare() then rebuilds the aircraft at other payloads and raises
+# EquivalenceError when the batched roll drifts from Aircraft.Groundroll()
+# by more than RTOL:
+#    compare(Roll, Aircraft)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import numpy as npy
+
+from Tools.fastmode import value_of, EquivalenceError
+from Tools.atmosphere import density, GRAVITY
+
+#==============================================================================#
+# DORMAND-PRINCE 5(4) COEFFICIENTS
+#==============================================================================#
+_A = [[],
+      [1/5],
+      [3/40, 9/40],
+      [44/45, -56/15, 32/9],
+      [19372/6561, -25360/2187, 64448/6561, -212/729],
+      [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+      [35/384, 0, 500/1113, 125/192, -2187/6784, 11/84]]
+_B = npy.array([35/384, 0, 500/1113, 125/192, -2187/6784, 11/84, 0])
+_E = _B - npy.array([5179/57600, 0, 7571/16695, 393/640, -92097/339200, 187/2100, 1/40])
+
+#==============================================================================#
+# GROUND ROLL
+#==============================================================================#
+class GroundRoll(object):
+    """
+    Batched takeoff ground roll with plain SI parameters
+
+    Inputs:
+        Table        - PropulsionTable for the thrust
+        S            - wing reference area [m**2]
+        CL, CD       - lift and drag coefficients during the roll
+        CL_LO        - lift coefficient at lift-off
+        mu           - rolling friction coefficient
+        RotationTime - time spent rotating at V_LO, added to the roll [s]
+    """
+    def __init__(self, Table, S, CL, CD, CL_LO, mu=0.04, RotationTime=0.0):
+        self.Table = Table
+        self.S = float(S)
+        self.CL = float(CL)
+        self.CD = float(CD)
+        self.CL_LO = float(CL_LO)
+        self.mu = float(mu)
+        self.RotationTime = float(RotationTime)
+        self.rtol = 1e-6   # relative error per step
+        self.atol = 1e-6   # absolute error per step [m, m/s]
+        self.tmax = 120.0  # cases not off the ground by then never lift off [s]
+        self.nsteps = 0    # steps taken by the last solve (accepted and rejected)
+
+    @classmethod
+    def from_aircraft(cls, Aircraft, Table=None, mu=None):
+        """
+        Returns the ground roll model of a built ACTailAircraft
+
+        Inputs:
+            Table - PropulsionTable (default: computed/loaded for Aircraft.Propulsion)
+            mu    - rolling friction coefficient (default: the one that
+                    reproduces Aircraft.Groundroll(), see friction_si)
+        """
+        from Aerothon.scalar.units import M, SEC, KG
+        from Propulsion.matched import propulsion_table
+
+        Wing = Aircraft.Wing
+        if Table is None:
+            Table = propulsion_table(Aircraft.Propulsion)
+
+        S = value_of(Wing.S, M**2)
+        V_LO = value_of(Wing.GetV_LO(), M/SEC)
+        W = value_of(Aircraft.TotalWeight, KG*M/SEC**2)
+        h_LO = value_of(Wing.Alt_LO, M)
+        alpha = Aircraft.Alpha_Groundroll
+
+        Roll = cls(Table, S,
+                   CL = value_of(Aircraft.CL(alpha)),
+                   CD = value_of(Aircraft.CD(alpha)),
+                   CL_LO = 2*W/(density(h_LO)*V_LO**2*S),
+                   mu = 0.0 if mu is None else mu,
+                   RotationTime = value_of(Aircraft.RotationTime, SEC))
+        if mu is None:
+            Roll.mu = Roll.friction_si(value_of(Aircraft.Groundroll(), M), W, h=h_LO)
+        return Roll
+
+    def friction_si(self, x, W, Vw=0.0, h=0.0, mu=(0.0, 0.5), tol=1e-7):
+        """
+        Returns the rolling friction coefficient for which the ground roll of
+        weight W [N] (headwind Vw [m/s], elevation h [m]) is x [m], bisected
+        inside the bracket mu. Raises ValueError if x is outside the bracket.
+        """
+        def roll(m):
+            self.mu = m
+            return float(self.solve_si(W, Vw, h)[0])
+
+        current = self.mu
+        try:
+            lo, hi = mu
+            xlo, xhi = roll(lo), roll(hi)
+            if npy.isnan(xhi): # never lifts off at hi
+                xhi = npy.inf
+            if not xlo <= x <= xhi:
+                raise ValueError('A ground roll of %g m needs mu outside [%g, %g] '
+                                 '(%g m to %g m)' % (x, lo, hi, xlo, xhi))
+            while hi - lo > tol:
+                m = 0.5*(lo + hi)
+                if roll(m) < x:
+                    lo = m
+                else:
+                    hi = m
+        finally:
+            self.mu = current
+        return 0.5*(lo + hi)
+
+    #--------------------------------------------------------------------------#
+    def V_LO(self, W, h):
+        """
+        Returns the lift-off airspeed [m/s] for weight W [N] at elevation h [m]
+        """
+        return npy.sqrt(2*W/(density(h)*self.S*self.CL_LO))
+
+    def _accel(self, v, W, Vw, h, rho):
+        """
+        Returns the ground acceleration [m/s**2] at ground speed v [m/s]
+        """
+        Va = v + Vw
+        q = 0.5*rho*Va*npy.abs(Va)
+        T = self.Table.interpolate(npy.maximum(Va, 0.0), h)['T']
+        F = T - q*self.S*self.CD - self.mu*npy.maximum(W - q*self.S*self.CL, 0.0)
+        return F*GRAVITY/W
+
+    def solve_si(self, W, Vw=0.0, h=0.0):
+        """
+        Returns ground roll distance [m], time [s] and lift-off airspeed [m/s]
+        arrays for broadcast arrays of weight W [N], headwind Vw [m/s] and
+        field elevation h [m]. Cases that never reach V_LO return NaN.
+        """
+        W, Vw, h = npy.broadcast_arrays(npy.asarray(W, dtype=float), npy.asarray(Vw, dtype=float),
+                                        npy.asarray(h, dtype=float))
+        shape = W.shape
+        W, Vw, h = W.ravel(), Vw.ravel(), h.ravel()
+        n = W.size
+        rho = density(h)
+        VLO = self.V_LO(W, h)
+
+        x = npy.zeros(n)
+        v = npy.zeros(n)               # ground speed, the roll starts at rest
+        t = npy.zeros(n)
+        a = self._accel(v, W, Vw, h, rho)
+        dt = npy.full(n, 0.05)
+        xLO = npy.full(n, npy.nan)
+        tLO = npy.full(n, npy.nan)
+        active = (Vw < VLO) & (a > 0)  # no roll at all with V_LO of headwind
+        xLO[Vw >= VLO] = 0.0
+        tLO[Vw >= VLO] = 0.0
+        self.nsteps = 0
+
+        while npy.any(active):
+            i = npy.nonzero(active)[0]
+            hstep = npy.minimum(dt[i], self.tmax - t[i])
+            args = (W[i], Vw[i], h[i], rho[i])
+
+            # Dormand-Prince stages on the active cases only (the speed does
+            # not depend on the distance, so only v is staged)
+            kx = [v[i]]
+            kv = [a[i]]
+            for s in range(1, 7):
+                vs = v[i] + hstep*sum(c*k for c, k in zip(_A[s], kv))
+                kx.append(vs)
+                kv.append(self._accel(vs, *args))
+            x1 = x[i] + hstep*sum(b*k for b, k in zip(_B, kx))
+            v1 = v[i] + hstep*sum(b*k for b, k in zip(_B, kv))
+            ex = hstep*sum(e*k for e, k in zip(_E, kx))
+            ev = hstep*sum(e*k for e, k in zip(_E, kv))
+            self.nsteps += 1
+
+            scale_x = self.atol + self.rtol*npy.maximum(npy.abs(x[i]), npy.abs(x1))
+            scale_v = self.atol + self.rtol*npy.maximum(npy.abs(v[i]), npy.abs(v1))
+            err = npy.sqrt(0.5*((ex/scale_x)**2 + (ev/scale_v)**2))
+            ok = err <= 1.0
+
+            # lift-off inside an accepted step: locate it on the Hermite cubic
+            a1 = kv[6]
+            lift = ok & (v1 + Vw[i] >= VLO[i])
+            if npy.any(lift):
+                j = npy.nonzero(lift)[0]
+                theta = _hermite_root(v[i][j], v1[j], a[i][j], a1[j], hstep[j], VLO[i][j] - Vw[i][j])
+                k = i[j]
+                tLO[k] = t[k] + theta*hstep[j]
+                xLO[k] = _hermite_integral(x[k], v[k], v1[j], a[k], a1[j], hstep[j], theta)
+                active[k] = False
+
+            # advance the accepted steps; stop cases still rolling at tmax and
+            # cases whose ground speed fell back to zero once rolling (a
+            # tailwind makes the airspeed negative at the start, that is fine)
+            adv = ok & ~lift
+            k = i[adv]
+            x[k], v[k], t[k], a[k] = x1[adv], v1[adv], t[k] + hstep[adv], a1[adv]
+            active[k[(t[k] >= self.tmax) | (v[k] <= 0)]] = False
+
+            # step size control
+            factor = 0.9*npy.maximum(err, 1e-10)**-0.2
+            dt[i] = hstep*npy.clip(factor, 0.2, 5.0)
+
+        # rotation at (about) lift-off ground speed
+        xLO = xLO + (VLO - Vw)*self.RotationTime*(xLO > 0)
+        tLO = tLO + self.RotationTime*(xLO > 0)
+        return xLO.reshape(shape), tLO.reshape(shape), VLO.reshape(shape)
+
+    def solve(self, W, Vw=None, h=None):
+        """
+        Returns ground roll distance, time and lift-off speed arrays for
+        broadcast arrays of gross weight, headwind and field elevation
+        (Aerothon quantities; no headwind and sea level by default)
+        """
+        from Aerothon.scalar.units import M, SEC, KG
+
+        x, t, VLO = self.solve_si(value_of(W, KG*M/SEC**2),
+                                  0.0 if Vw is None else value_of(Vw, M/SEC),
+                                  0.0 if h is None else value_of(h, M))
+        return x*M, t*SEC, VLO*M/SEC
+
+
+def _hermite_root(v0, v1, a0, a1, dt, target, nit=30):
+    """
+    Returns the step fraction theta where the cubic Hermite interpolant of the
+    ground speed reaches target (v0 < target <= v1), by safeguarded bisection
+    """
+    lo = npy.zeros_like(v0)
+    hi = npy.ones_like(v0)
+    for it in range(nit):
+        theta = 0.5*(lo + hi)
+        below = _hermite(v0, v1, a0, a1, dt, theta) < target
+        lo = npy.where(below, theta, lo)
+        hi = npy.where(below, hi, theta)
+    return 0.5*(lo + hi)
+
+
+def _hermite(v0, v1, a0, a1, dt, theta):
+    """
+    Cubic Hermite interpolant of the speed over a step of length dt
+    """
+    t2, t3 = theta**2, theta**3
+    return ((2*t3 - 3*t2 + 1)*v0 + (t3 - 2*t2 + theta)*dt*a0 +
+            (-2*t3 + 3*t2)*v1 + (t3 - t2)*dt*a1)
+
+
+def _hermite_integral(x0, v0, v1, a0, a1, dt, theta):
+    """
+    Distance at fraction theta of the step: x0 + integral of the speed interpolant
+    """
+    t2, t3, t4 = theta**2, theta**3, theta**4
+    return x0 + dt*((t4/2 - t3 + theta)*v0 + (t4/4 - 2*t3/3 + t2/2)*dt*a0 +
+                    (-t4/2 + t3)*v1 + (t4/4 - t3/3)*dt*a1)
+
+#==============================================================================#
+# COMPARISON WITH AIRCRAFT.GROUNDROLL
+#==============================================================================#
+STATIC_WEIGHTS = (10.0, 15.0, 20.0, 25.0, 30.0) # [lbf] payloads compare() rebuilds the aircraft with
+RTOL = 0.02 # largest relative ground roll error accepted
+
+
+def compare_si(Roll, reference, weights, h=0.0, rtol=RTOL):
+    """
+    Returns the batched and reference ground rolls [m] and their relative
+    errors for each case. Raises EquivalenceError when an error exceeds rtol
+    (None only reports).
+
+    Inputs:
+        reference - function(case) returning the gross weight [N] and the
+                    reference ground roll [m] of that case
+        weights   - cases handed to reference (e.g. static weights [lbf])
+        h         - field elevation [m]
+    """
+    W, xref = npy.array([reference(case) for case in weights], dtype=float).T
+    x = Roll.solve_si(W, 0.0, h)[0]
+    error = x/xref - 1
+    if rtol is not None:
+        bad = ['%s: %.2f m against %.2f m (%+.2f%%)' % (case, x[k], xref[k], 100*error[k])
+               for k, case in enumerate(weights) if not abs(error[k]) <= rtol]
+        if bad:
+            raise EquivalenceError('GroundRoll differs from Aircraft.Groundroll() by more than '
+                                   '%g:\n   %s' % (rtol, '\n   '.join(bad)))
+    return x, xref, error
+
+
+def aircraft_reference(overrides=None, cache=None):
+    """
+    Returns function(StaticWeight [lbf]) that rebuilds the aircraft (through
+    the component cache and the propulsion table) and returns its gross
+    weight [N] and Aircraft.Groundroll() [m]
+    """
+    from Aerothon.scalar.units import LBF, M, SEC, KG
+    from aircraft import build_aircraft
+    from Performance.wingplacement import WingPlacement
+
+    placement = WingPlacement()
+    def reference(StaticWeight):
+        Aircraft = build_aircraft(dict(overrides or {}, StaticWeight=StaticWeight*LBF),
+                                  cache=cache, table=True, placement=placement)
+        return (value_of(Aircraft.TotalWeight, KG*M/SEC**2), value_of(Aircraft.Groundroll(), M))
+    return reference
+
+
+def compare(Roll, Aircraft, weights=STATIC_WEIGHTS, overrides=None, cache=None, rtol=RTOL):
+    """
+    Compares the batched ground roll of Aircraft with Aircraft.Groundroll()
+    of the aircraft rebuilt with each static weight [lbf] (see compare_si).
+    Raises EquivalenceError past rtol.
+    """
+    from Aerothon.scalar.units import M
+
+    return compare_si(Roll, aircraft_reference(overrides, cache), weights,
+                      value_of(Aircraft.Wing.Alt_LO, M), rtol)
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    import pylab as pyl
+    from Aerothon.scalar.units import LBF, FT, M, SEC
+    from aircraft import build_aircraft
+    from Tools.cache import ComponentCache
+
+    cache = ComponentCache()
+    Aircraft = build_aircraft(cache=cache, table=True)
+    Roll = GroundRoll.from_aircraft(Aircraft)
+    print('Rolling friction      : %.4f' % Roll.mu)
+
+    x, xref, error = compare(Roll, Aircraft, cache=cache, rtol=None)
+    for StaticWeight, xk, xr, e in zip(STATIC_WEIGHTS, x, xref, error):
+        print('StaticWeight %4.1f lbf: %7.1f ft batched, %7.1f ft Groundroll() (%+.2f%%)' %
+              (StaticWeight, value_of(xk*M, FT), value_of(xr*M, FT), 100*e))
+
+    W = npy.linspace(20, 40, 41)*LBF
+    start = time.time()
+    x, t, V_LO = Roll.solve(W)
+    print('%d ground rolls in %.4f s (%d steps)' % (len(W), time.time() - start, Roll.nsteps))
+    print('Aircraft.Groundroll() : ' + str(value_of(Aircraft.Groundroll(), FT)) + ' ft')
+    print('Batched at TotalWeight: ' +
+          str(value_of(Roll.solve(Aircraft.TotalWeight, h=Aircraft.Wing.Alt_LO)[0], FT)) + ' ft')
+
+    pyl.figure(1)
+    pyl.plot(value_of(W, LBF), value_of(x, FT))
+    pyl.xlabel('Gross weight (lbf)')
+    pyl.ylabel('Ground roll (ft)')
+    pyl.grid()
+    pyl.show()
@@ -0,0 +1,229 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# payload.py: maximum payload for a ground roll limit
+#
+# Instead of hand-tuning SoccerBalls/StaticWeight until Groundroll() looks
+# right, PayloadSolver finds the largest payload that still lifts off inside
+# the ground roll limit (the wing was sized to launch under 200 ft), optionally
+# with the static margin inside a band. Feasibility is assumed to hold from
+# zero payload up to the answer, so the solver brackets the limit by stepping
+# out from a warm start (the previous design's answer) and then bisects.
+#
+# Two evaluators are provided:
+#    RollEvaluator     - batched GroundRoll model of one built aircraft (only the
+#                        weight changes, the polars and thrust table are reused)
+#    AircraftEvaluator - rebuilds the aircraft for each payload through the
+#                        component cache and the propulsion table, so the CG and
+#                        static margin follow the payload; the wing is placed
+#                        by the evaluator's own WingPlacement, warm-started
+#                        from the previous payload
+# The payload is the total carried: SoccerBalls*BallWeight (fixed by the
+# design) plus the StaticWeight that makes up the rest, so the answer is never
+# below the weight of the balls.
+#
+#    Solver = PayloadSolver(AircraftEvaluator())
+#    Payload = Solver.solve(200*FT, sm_band=(0.05, 0.20))
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import time
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# EVALUATORS
+#==============================================================================#
+class RollEvaluator(object):
+    """
+    Ground roll [ft] of a payload [lbf] from the batched GroundRoll model
+
+    Inputs:
+        Roll        - GroundRoll (Performance/groundroll.py)
+        EmptyWeight - weight without payload (Aerothon quantity)
+        Vw, h       - headwind and field elevation (Aerothon quantities)
+    """
+    def __init__(self, Roll, EmptyWeight, Vw=None, h=None):
+        from Aerothon.scalar.units import LBF, M, SEC
+        self.Roll = Roll
+        self.EmptyWeight = value_of(EmptyWeight, LBF)
+        self.Vw = 0.0 if Vw is None else value_of(Vw, M/SEC)
+        self.h = 0.0 if h is None else value_of(h, M)
+
+    def __call__(self, payload):
+        """
+        Returns (ground roll [ft], None): this model has no static margin
+        """
+        x, t, V_LO = self.Roll.solve_si((self.EmptyWeight + payload)*4.4482216152605,
+                                        self.Vw, self.h)
+        return float(x)/0.3048, None
+
+
+class AircraftEvaluator(object):
+    """
+    Ground roll [ft] and static margin of a total payload [lbf] on a rebuilt
+    aircraft: the soccer balls of the design plus StaticWeight for the rest.
+    The wing, fuselage and propulsion come from the component cache and the
+    thrust from the propulsion table, so only the assembly is repeated. The
+    wing is positioned for Aircraft.StaticMargin by one WingPlacement kept for
+    all the payloads, so each placement starts from the previous wing X.
+
+    Inputs:
+        overrides - base overrides of the design (see build_aircraft)
+        cache     - ComponentCache (default: the shared on-disk cache)
+        placement - WingPlacement (default: a new one for this evaluator;
+                    False keeps the WingXMaxIt fixed-point iteration)
+    """
+    def __init__(self, overrides=None, cache=None, placement=None):
+        from Tools.cache import ComponentCache
+        from Performance.wingplacement import WingPlacement
+        self.overrides = dict(overrides or {})
+        self.cache = cache if cache is not None else ComponentCache()
+        self.placement = WingPlacement() if placement is None else placement or None
+
+    @property
+    def minimum(self):
+        """
+        Payload [lbf] carried without static weight: SoccerBalls*BallWeight
+        """
+        from Aerothon.scalar.units import LBF
+        from aircraft import DESIGN
+
+        design = dict(DESIGN, **dict((name, self.overrides[name]) for name in DESIGN
+                                     if name in self.overrides))
+        return value_of(design['SoccerBalls']*design['BallWeight'], LBF)
+
+    def __call__(self, payload):
+        from Aerothon.scalar.units import LBF, FT
+        from aircraft import build_aircraft
+        from Tools.report import static_margin
+
+        overrides = dict(self.overrides, StaticWeight=(payload - self.minimum)*LBF)
+        Aircraft = build_aircraft(overrides, cache=self.cache, table=True,
+                                  placement=self.placement)
+        return value_of(Aircraft.Groundroll(), FT), static_margin(Aircraft)
+
+#==============================================================================#
+# PAYLOAD SOLVER
+#==============================================================================#
+class PayloadSolver(object):
+    """
+    Maximum payload [lbf] inside a ground roll limit (and static margin band)
+    by bracketing and bisection, warm-started from the last answer
+
+    Inputs:
+        evaluate - function(payload lbf) returning (ground roll ft, static
+                   margin); its optional attribute minimum [lbf] is the
+                   smallest payload it can carry (default 0)
+        tol      - payload tolerance [lbf]
+        step     - initial bracketing step [lbf]
+    """
+    def __init__(self, evaluate, tol=0.05, step=2.0):
+        self.evaluate = evaluate
+        self.tol = tol
+        self.step = step
+        self.last = None        # answer of the previous solve (warm start)
+        self.evaluations = 0    # model evaluations of the last solve
+        self.history = []       # (payload, ground roll, static margin, feasible, seconds)
+
+    def feasible(self, payload, limit, sm_band=None):
+        """
+        Evaluates one payload and returns True if it meets the limits
+        """
+        start = time.time()
+        roll, sm = self.evaluate(payload)
+        ok = npy.isfinite(roll) and roll <= limit
+        if sm_band is not None:
+            ok = ok and sm is not None and sm_band[0] <= sm <= sm_band[1]
+        self.evaluations += 1
+        self.history.append((payload, roll, sm, ok, time.time() - start))
+        return ok
+
+    def solve_lbf(self, limit, sm_band=None, guess=None, pmax=200.0):
+        """
+        Returns the maximum payload [lbf] for a ground roll limit [ft], or NaN
+        when even the smallest payload (evaluate.minimum) is infeasible
+
+        Inputs:
+            sm_band - optional (min, max) static margin
+            guess   - warm start [lbf] (default: the previous answer, else the minimum)
+            pmax    - give up bracketing above this payload [lbf]
+        """
+        self.evaluations = 0
+        self.history = []
+        pmin = getattr(self.evaluate, 'minimum', 0.0)
+        guess = self.last if guess is None else guess
+        guess = pmin if guess is None else min(max(guess, pmin), pmax)
+
+        # bracket [lo feasible, hi infeasible] stepping out from the guess
+        step = self.step
+        if self.feasible(guess, limit, sm_band):
+            lo, hi = guess, None
+            while hi is None:
+                p = min(lo + step, pmax)
+                if self.feasible(p, limit, sm_band):
+                    if p >= pmax:
+                        self.last = pmax
+                        return pmax
+                    lo, step = p, 2*step
+                else:
+                    hi = p
+        else:
+            lo, hi = None, guess
+            while lo is None:
+                if hi <= pmin:
+                    self.last = None
+                    return npy.nan
+                p = max(hi - step, pmin)
+                if self.feasible(p, limit, sm_band):
+                    lo = p
+                else:
+                    hi, step = p, 2*step
+                    if p <= pmin:
+                        self.last = None
+                        return npy.nan
+
+        # bisection
+        while hi - lo > self.tol:
+            p = 0.5*(lo + hi)
+            if self.feasible(p, limit, sm_band):
+                lo = p
+            else:
+                hi = p
+
+        self.last = lo
+        return lo
+
+    def solve(self, limit, sm_band=None, guess=None):
+        """
+        Returns the maximum payload for a ground roll limit (Aerothon quantities)
+        """
+        from Aerothon.scalar.units import FT, LBF
+        return self.solve_lbf(value_of(limit, FT), sm_band,
+                              None if guess is None else value_of(guess, LBF))*LBF
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    from Aerothon.scalar.units import FT, LBF, AsUnit
+
+    sm_band = (0.05, 0.20) if '--sm' in sys.argv else None
+    Solver = PayloadSolver(AircraftEvaluator())
+
+    start = time.time()
+    Payload = Solver.solve(200*FT, sm_band)
+    print('Max payload for 200 ft : ' + str(AsUnit(Payload, 'lbf')) +
+          ' (%.2f lbf soccer balls + static weight)' % Solver.evaluate.minimum)
+    print('Model evaluations      : %d in %.1f s' % (Solver.evaluations, time.time() - start))
+
+    # a slightly heavier airframe starts from the answer above
+    Solver.evaluate.overrides['EmptyWeight'] = 21*LBF
+    Payload = Solver.solve(200*FT, sm_band)
+    print('With 21 lbf empty      : ' + str(AsUnit(Payload, 'lbf')) +
+          ' (%d evaluations, warm start)' % Solver.evaluations)
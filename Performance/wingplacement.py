@@ -0,0 +1,219 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# wingplacement.py: wing position for a target static margin
+#
+# ACTailAircraft moves the wing with a fixed-point iteration (up to WingXMaxIt
+# = 60 aircraft evaluations) until Aircraft.StaticMargin is met. WingPlacement
+# solves the same problem as a root of
+#    r(X) = -dCM/dCL(X) - StaticMargin        (X = wing x position [in])
+# with secant steps from a warm start (the last converged X), falling back to
+# Brent's method once the root is bracketed. The static margin is nearly
+# linear in X, so a handful of evaluations is usually enough. Every step
+# assigns Wing.X and refreshes the aircraft, so the tail arms and the CG
+# follow the wing; at the end the static margin of the refreshed aircraft is
+# checked against the target (Tools.report.static_margin):
+#
+#    Placement = WingPlacement()
+#    Aircraft = build_aircraft(placement=Placement)
+#    print Placement.iterations, Placement.residual, Placement.times
+#
+# The warm start only pays off when one WingPlacement is reused across builds:
+# the sweep workers (Tools/sweep.py) use worker_placement(), one instance per
+# process, and the payload AircraftEvaluator keeps its own.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import copy
+import time
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# ROOT FINDING
+#==============================================================================#
+def brent(f, a, b, fa, fb, xtol, maxit=50):
+    """
+    Returns (x, f(x)) of the root of f bracketed by [a, b] (fa*fb <= 0)
+    """
+    if fa == 0:
+        return a, fa
+    if fb == 0:
+        return b, fb
+    c, fc = a, fa
+    d = e = b - a
+    for it in range(maxit):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol = 2e-16*abs(b) + 0.5*xtol
+        m = 0.5*(c - b)
+        if abs(m) <= tol or fb == 0:
+            return b, fb
+        if abs(e) >= tol and abs(fa) > abs(fb):
+            # inverse quadratic interpolation (secant when a == c)
+            s = fb/fa
+            if a == c:
+                p, q = 2*m*s, 1 - s
+            else:
+                q, r = fa/fc, fb/fc
+                p = s*(2*m*q*(q - r) - (b - a)*(r - 1))
+                q = (q - 1)*(r - 1)*(s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2*p < min(3*m*q - abs(tol*q), abs(e*q)):
+                e, d = d, p/q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        a, fa = b, fb
+        b = b + (d if abs(d) > tol else (tol if m > 0 else -tol))
+        fb = f(b)
+    return b, fb
+
+#==============================================================================#
+# WING PLACEMENT
+#==============================================================================#
+class WingPlacement(object):
+    """
+    Secant/Brent solver for the wing x position giving Aircraft.StaticMargin
+
+    Inputs:
+        xtol  - wing position tolerance [in]
+        step  - first secant step and bracketing step [in]
+        maxit - evaluation limit
+        smtol - largest static margin error accepted by the final check
+    """
+    def __init__(self, xtol=0.01, step=0.5, maxit=20, smtol=2e-3):
+        self.xtol = xtol
+        self.step = step
+        self.maxit = maxit
+        self.smtol = smtol
+        self.last = None        # last converged wing X [in] (warm start)
+        self.iterations = 0     # aircraft evaluations of the last solve
+        self.residual = None    # static margin error at the answer
+        self.times = []         # seconds spent in each evaluation
+        self._X = None          # where the wing was put last
+
+    def residual_at(self, Aircraft, X):
+        """
+        Moves the wing to X [in] and returns the static margin error
+        """
+        from Aerothon.scalar.units import IN
+        from Tools.report import static_margin
+
+        start = time.time()
+        # assign (not modify in place) so Aerothon sees the change, then
+        # refresh the tail arms and CG that depend on the wing position
+        Xw = copy.copy(Aircraft.Wing.X)
+        Xw[0] = X*IN
+        Aircraft.Wing.X = Xw
+        Aircraft.Refresh()
+        self._X = X
+        r = static_margin(Aircraft) - value_of(Aircraft.StaticMargin)
+        self.iterations += 1
+        self.times.append(time.time() - start)
+        return r
+
+    def place(self, Aircraft, guess=None):
+        """
+        Places the wing of a built aircraft and returns its x position [in].
+        Raises RuntimeError if the static margin of the refreshed aircraft
+        misses Aircraft.StaticMargin by more than smtol.
+
+        Inputs:
+            guess - starting position [in] (default: the last converged X,
+                    else where the aircraft has the wing now)
+        """
+        from Aerothon.scalar.units import IN
+
+        # the wing is positioned here, not by the aircraft's own iteration
+        Aircraft.WingXMaxIt = 0
+
+        self.iterations = 0
+        self.times = []
+        x0 = self.last if guess is None else guess
+        if x0 is None:
+            x0 = float(value_of(Aircraft.Wing.X, IN)[0])
+
+        f = lambda X: self.residual_at(Aircraft, X)
+        f0 = f(x0)
+        x1 = x0 + self.step
+        f1 = f(x1)
+
+        # secant steps until the root is bracketed or found
+        while f0*f1 > 0 and self.iterations < self.maxit:
+            if f1 != f0:
+                x2 = x1 - f1*(x1 - x0)/(f1 - f0)
+                # keep the step bounded while the slope is unreliable
+                reach = 8*self.step*2**self.iterations
+                x2 = min(max(x2, x1 - reach), x1 + reach)
+            else:
+                x2 = x1 + self.step*2**self.iterations
+            x0, f0 = x1, f1
+            x1, f1 = x2, f(x2)
+            if abs(x1 - x0) < self.xtol:
+                break
+
+        if f0*f1 <= 0:
+            X, r = brent(f, x0, x1, f0, f1, self.xtol, self.maxit - self.iterations)
+        else:
+            X, r = (x1, f1) if abs(f1) < abs(f0) else (x0, f0)
+
+        if self._X != X: # leave the wing where the answer is
+            f(X)
+
+        # check the answer on the aircraft as it is left
+        self.residual = self.check(Aircraft)
+        if abs(self.residual) > self.smtol:
+            raise RuntimeError('Wing placement missed the static margin by %.4f at X = %.3f in'
+                               % (self.residual, X))
+        self.last = X
+        return X
+
+    def check(self, Aircraft):
+        """
+        Refreshes the aircraft and returns its static margin error
+        (Tools.report.static_margin - Aircraft.StaticMargin)
+        """
+        from Tools.report import static_margin
+
+        Aircraft.Refresh()
+        return static_margin(Aircraft) - value_of(Aircraft.StaticMargin)
+
+_worker = [] # the WingPlacement of this process
+
+
+def worker_placement():
+    """
+    Returns the WingPlacement of this process, created on first use. Every
+    pool worker gets its own, so the warm start carries from one build to the
+    next build of the same worker.
+    """
+    if not _worker:
+        _worker.append(WingPlacement())
+    return _worker[0]
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    from aircraft import build_aircraft
+    from Tools.cache import ComponentCache
+
+    cache = ComponentCache()
+    Placement = WingPlacement()
+    for StaticMargin in (0.08, 0.10, 0.12):
+        Aircraft = build_aircraft({'Aircraft.StaticMargin': StaticMargin}, cache=cache,
+                                  placement=Placement)
+        print('SM %.2f : wing X %.3f in, %d evaluations, residual %.2e, %.3f s/evaluation' %
+              (StaticMargin, Placement.last, Placement.iterations, Placement.residual,
+               sum(Placement.times)/max(len(Placement.times), 1)))
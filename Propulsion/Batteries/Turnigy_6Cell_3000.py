@@ -17,11 +17,7 @@
 import os
 import sys
 
-# (USER) set-up directories
-trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
-
 # import Aerothon modules
-sys.path.append(trunkDir)
 from Aerothon.scalar.units import GRAM, gacc, A, V, mAh, IN, LBF
 from Aerothon.scalar.units import AsUnit
 from Aerothon.ACMotor import ACBattery
@@ -18,11 +18,8 @@ from __future__ import division # let 5/2 = 2.5 rather than 2
 # import built-in modules
 import os
 import sys
-# This lets you see the parent directory. Dont delete. You need this to use the batteries.
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import numpy as npy
 import cmath as math
-import pylab as pyl
 
 # (USER) set-up directories
 #trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
@@ -41,9 +38,14 @@ from Aerothon.AeroUtil import STDCorrection
 # (USER) import Aerothon components
 
 #from Batteries.Electrolux_6Cell_3100 import Electrolux_6Cell_3100
-from Batteries.Turnigy_6Cell_3000 import Turnigy_6Cell_3000
-#sys.path.append(os.path.join(BAPDir,r'Propulsion\SpeedControllers'))
-from SpeedControllers.Phoenix import Phoenix100 # note: Phoenix contains multiple models
+try:
+    from Propulsion.Batteries.Turnigy_6Cell_3000 import Turnigy_6Cell_3000
+    from Propulsion.SpeedControllers.Phoenix import Phoenix100 # note: Phoenix contains multiple models
+except ImportError:
+    # run as a script: the batteries and speed controllers live in the parent directory
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from Batteries.Turnigy_6Cell_3000 import Turnigy_6Cell_3000
+    from SpeedControllers.Phoenix import Phoenix100
 
 #==============================================================================#
 # MOTOR MODEL
@@ -102,7 +104,8 @@ Motor.TestData = TestData
 # VISUALIZATION & RESULTS
 #==============================================================================#
 if __name__ == '__main__':
-    
+    import pylab as pyl
+
     print 'V to Motor       : ', AsUnit( Motor.Vmotor(Ib=45*A) , 'V' )
     print 'Efficiency       : ', Motor.Efficiency(Ib=45*A)
     print 'Max efficiency   : ', Motor.Effmax()
@@ -5,7 +5,6 @@ import os
 import sys
 import numpy as npy
 import cmath as math
-import pylab as pyl
 
 # (USER) set-up directories
 #trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
@@ -13,7 +12,6 @@ import pylab as pyl
 
 # link path to Aerothon
 #sys.path.append(trunkDir)
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Optimum Prop None
 from Aerothon.ACMotor import ACMotor
 import numpy as npy
@@ -25,10 +23,14 @@ from Aerothon.AeroUtil import STDCorrection
 #sys.path.append(os.path.join(BAPDir,r'Propulsion\Batteries'))
 
 #from Electrolux_6Cell_3100 import Electrolux_6Cell_3100
-from Batteries.Turnigy_6Cell_3000 import Turnigy_6Cell_3000
-
-#sys.path.append(os.path.join(BAPDir,r'Propulsion\SpeedControllers'))
-from SpeedControllers.Phoenix import Phoenix100 # note: Phoenix contains multiple models
+try:
+    from Propulsion.Batteries.Turnigy_6Cell_3000 import Turnigy_6Cell_3000
+    from Propulsion.SpeedControllers.Phoenix import Phoenix100 # note: Phoenix contains multiple models
+except ImportError:
+    # run as a script: the batteries and speed controllers live in the parent directory
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from Batteries.Turnigy_6Cell_3000 import Turnigy_6Cell_3000
+    from SpeedControllers.Phoenix import Phoenix100
 
 # Set Motor properties
 Motor  = ACMotor()
@@ -19,14 +19,6 @@ from __future__ import division # let 5/2 = 2.5 rather than 2
 import os
 import sys
 import numpy as npy
-import pylab as pyl
-
-# (USER) set-up directories
-trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
-BAPDir = os.path.join(trunkDir,r'Aircraft_Models\Reg2018Aircraft_UCBearForce\BAP')
-
-# link path to Aerothon
-sys.path.append(trunkDir)
 
 # import Aerothon modules
 from Aerothon.scalar.units import IN, LBF, SEC, ARCDEG, FT, RPM, OZF, GRAM, gacc, W, K,\
@@ -88,6 +80,7 @@ Prop.TorqueData = [(5490  *RPM, (9.8*Arm*OZF)),
 # VISUALIZATION & RESULTS
 #==============================================================================#
 if __name__ == '__main__':
+    import pylab as pyl
    
     print " D     : ", AsUnit( Prop.D, 'in')
     print " Pitch : ", AsUnit( Prop.Pitch, 'in')
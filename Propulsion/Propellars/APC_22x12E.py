@@ -19,7 +19,6 @@ from __future__ import division # let 5/2 = 2.5 rather than 2
 import os
 import sys
 import numpy as npy
-import pylab as pyl
 
 # (USER) set-up directories
 #trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
@@ -78,6 +77,7 @@ Prop.TorqueData = None
 # VISUALIZATION & RESULTS
 #==============================================================================#
 if __name__ == '__main__':
+    import pylab as pyl
    
     print " D     : ", AsUnit( Prop.D, 'in')
     print " Pitch : ", AsUnit( Prop.Pitch, 'in')
@@ -2,7 +2,6 @@ from __future__ import division  # let 5/2 = 2.5 rather than 2
 from Aerothon.ACPropeller import ACPropeller
 from Aerothon.AeroUtil import STDCorrection
 import numpy as npy
-import pylab as pyl
 from Aerothon.scalar.units import IN, LBF, SEC, ARCDEG, FT, RPM, OZF, GRAM, gacc, W, K, degR, inHg, MM
 from Aerothon.scalar.units import AsUnit
 
@@ -54,6 +53,8 @@ Prop.TorqueData = [(2489 * RPM, (43*STD*OZF*IN)),
 
 ################################################################################
 if __name__ == '__main__':
+    import pylab as pyl
+
     print " D     : ", AsUnit(Prop.D, 'in')
     print " Pitch : ", AsUnit(Prop.Pitch, 'in')
 
@@ -17,13 +17,6 @@
 import os
 import sys
 
-# (USER) set up directories
-trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
-BAPDir = os.path.join(trunkDir,r'Aircraft_Models\Reg2016Aircraft_bAIRcats\ATLAS')
-
-# link path to Aerothon
-sys.path.append(trunkDir)
-
 # import Aerothon modules
 from Aerothon.scalar.units import GRAM, gacc, A, V, mAh, IN
 from Aerothon.ACMotor import ACSpeedController
@@ -0,0 +1,492 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# matched.py: precomputed motor/propeller operating point tables
+#
+# ACPropulsion matches the motor to the propeller again every time the aircraft
+# asks for thrust (Groundroll, PlotPropulsionPerformance, ...). A
+# PropulsionTable holds the matched point on a grid of airspeed and density
+# altitude for one (Prop, Motor, Battery, ESC) combination, stores it in
+# .cache/propulsion and then answers by bilinear interpolation:
+#
+#    Table = propulsion_table(Propulsion)
+#    T, I, N, Eta = Table.TIN(V, h)          # arrays, Aerothon quantities
+#    use_table(Propulsion, Table)            # Propulsion.T(V) hits the table
+#
+# Tables are named by the same inputs Tools/cache.py keys components on (the
+# Aerothon version, the unit mode and the sources of the defining modules),
+# plus the state of the propulsion parts and the grid (table_key).
+#
+# The table is filled from ACPropulsion itself, so switching it on only speeds
+# the thrust up and does not change the physics: the thrust at every grid
+# point is ACPropulsion's matched thrust, the RPM is where the ACPropeller
+# gives that thrust and the current follows from the propeller torque through
+# the motor constants (Q = (I - Io)*60/(2*pi*Kv)).
+#
+# The three-constant motor behind the battery and speed controller and the
+# BatchPropeller of Propulsion/propbatch.py remain available as match(), a
+# fast screening model for the trade study:
+#    I = (Vbatt - N/Kv)/(Ri + Rs)        Q = (I - Io)*60/(2*pi*Kv)
+# where Vbatt and the series resistance Rs of the battery and speed controller
+# are the secant of Motor.Vmotor(Ib) over SECANT_CURRENTS.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import os
+import sys
+import hashlib
+import tempfile
+import numpy as npy
+
+from Tools.fastmode import value_of, fast_mode_enabled, ROOT_DIR
+
+#==============================================================================#
+# BATCH MOTOR
+#==============================================================================#
+# currents [A] the battery and speed controller drop is sampled at
+SECANT_CURRENTS = (10.0, 40.0)
+
+class BatchMotor(object):
+    """
+    Vectorized three-constant motor model with plain SI floats
+
+    Inputs:
+        Ri    - coil resistance [ohm]
+        Io    - idle current [A]
+        Kv    - speed constant [rpm/V]
+        Vbatt - supply voltage at full throttle [V]
+        Rs    - series resistance of the battery and speed controller [ohm]
+    """
+    def __init__(self, name='', Ri=0.0, Io=0.0, Kv=0.0, Vbatt=0.0, Rs=0.0):
+        self.name = name
+        self.Ri = float(Ri)
+        self.Io = float(Io)
+        self.Kv = float(Kv)
+        self.Vbatt = float(Vbatt)
+        self.Rs = float(Rs)
+
+    @classmethod
+    def from_motor(cls, Motor, Battery=None, SpeedController=None):
+        """
+        Returns the batch model of an Aerothon ACMotor behind a battery and
+        speed controller (default: the motor's own). Vbatt and Rs are the
+        secant of Motor.Vmotor(Ib) over SECANT_CURRENTS.
+        """
+        from Aerothon.scalar.units import OHM, A, RPM, V
+
+        parts = Motor.Battery, Motor.SpeedController
+        try:
+            if Battery is not None:
+                Motor.Battery = Battery
+            if SpeedController is not None:
+                Motor.SpeedController = SpeedController
+            (I1, V1), (I2, V2) = [(I, value_of(Motor.Vmotor(Ib=I*A), V)) for I in SECANT_CURRENTS]
+        finally:
+            Motor.Battery, Motor.SpeedController = parts
+        Rs = max((V1 - V2)/(I2 - I1), 0.0)
+        return cls(name=Motor.name,
+                   Ri    = value_of(Motor.Ri, OHM),
+                   Io    = value_of(Motor.Io, A),
+                   Kv    = value_of(Motor.Kv, RPM/V),
+                   Vbatt = V1 + Rs*I1,
+                   Rs    = Rs)
+
+    def Kt(self):
+        """
+        Returns the torque constant [N m/A]
+        """
+        return 60/(2*npy.pi*self.Kv)
+
+    def current(self, N):
+        """
+        Returns the current [A] drawn at the rotation rate N [rpm]
+        """
+        return (self.Vbatt - npy.asarray(N, dtype=float)/self.Kv)/(self.Ri + self.Rs)
+
+    def Vmotor(self, I):
+        """
+        Returns the voltage [V] at the motor terminals when drawing I [A]
+        """
+        return self.Vbatt - self.Rs*npy.asarray(I, dtype=float)
+
+    def torque(self, N):
+        """
+        Returns the shaft torque [N m] at the rotation rate N [rpm]
+        """
+        return (self.current(N) - self.Io)*self.Kt()
+
+    def Nmax(self):
+        """
+        Returns the no-load rotation rate [rpm]
+        """
+        return self.Kv*(self.Vbatt - self.Io*(self.Ri + self.Rs))
+
+#==============================================================================#
+# MATCHED OPERATING POINT
+#==============================================================================#
+def match(Bprop, Bmotor, V, h, tol=0.01, maxit=60):
+    """
+    Returns a dictionary of the matched operating point arrays (plain SI):
+    'T' thrust [N], 'I' current [A], 'N' rotation rate [rpm], 'P' shaft power
+    [W], 'Eta' motor efficiency and 'EtaProp' propeller efficiency. The torque
+    balance is bisected on the whole broadcast array of V [m/s] and h [m] at
+    once.
+
+    Inputs:
+        Bprop  - BatchPropeller
+        Bmotor - BatchMotor
+        tol    - rotation rate tolerance [rpm]
+    """
+    V = npy.asarray(V, dtype=float)
+    h = npy.asarray(h, dtype=float)
+    shape = npy.broadcast(V, h).shape
+
+    # motor torque minus propeller torque falls with N: bracket [0, Nmax]
+    Nlo = npy.zeros(shape)
+    Nhi = npy.ones(shape)*Bmotor.Nmax()
+    for it in range(maxit):
+        N = 0.5*(Nlo + Nhi)
+        T, P, Q = Bprop.loads_si(N, V, h)
+        excess = Bmotor.torque(N) > Q
+        Nlo = npy.where(excess, N, Nlo)
+        Nhi = npy.where(excess, Nhi, N)
+        if npy.max(Nhi - Nlo) < tol:
+            break
+
+    N = 0.5*(Nlo + Nhi)
+    T, P, Q = Bprop.loads_si(N, V, h)
+    I = Bmotor.current(N)
+    Pelec = npy.maximum(Bmotor.Vmotor(I)*I, 1e-12)
+    return {'T'      : T,
+            'I'      : I,
+            'N'      : N,
+            'P'      : P,
+            'Eta'    : P/Pelec,
+            'EtaProp': T*V/npy.maximum(P, 1e-12)}
+
+def propulsion_point(Propulsion, V, h, tol=0.5, maxit=40):
+    """
+    Returns a dictionary of ACPropulsion's matched operating point (plain SI,
+    fields as match) at airspeed V [m/s] and altitude h [m]. The thrust is
+    ACPropulsion.T (a table installed by use_table is bypassed), the RPM is
+    found on ACPropeller.T by regula falsi and the current from the
+    ACPropeller torque and the motor constants.
+
+    Inputs:
+        Propulsion - ACPropulsion
+        tol        - rotation rate tolerance [rpm]
+    """
+    from Aerothon.scalar.units import M, SEC, KG, RPM, W, A, OHM
+    from Aerothon.scalar.units import V as VOLT
+
+    Prop, Motor = Propulsion.Prop, Propulsion.Motor
+    NEWTON = KG*M/SEC**2
+
+    Alt = Propulsion.Alt
+    try:
+        Propulsion.Alt = h*M
+        T = value_of(type(Propulsion).T(Propulsion, V*M/SEC), NEWTON)
+    finally:
+        Propulsion.Alt = Alt
+
+    def thrust(N):
+        return value_of(Prop.T(N*RPM, V*M/SEC, h*M), NEWTON) - T
+
+    # the propeller thrust rises with N: Illinois regula falsi on [small, no-load]
+    Kv = value_of(Motor.Kv, RPM/VOLT)
+    Nlo = 1.0
+    Nhi = Kv*(value_of(Motor.Battery.Voltage, VOLT) - value_of(Motor.Io, A)*value_of(Motor.Ri, OHM))
+    flo, fhi = thrust(Nlo), thrust(Nhi)
+    N, side = Nhi, 0
+    if flo >= 0:
+        N = Nlo
+    elif fhi > 0:
+        for it in range(maxit):
+            N = (Nlo*fhi - Nhi*flo)/(fhi - flo)
+            f = thrust(N)
+            if f > 0:
+                Nhi, fhi = N, f
+                flo = flo/2 if side == -1 else flo
+                side = -1
+            else:
+                Nlo, flo = N, f
+                fhi = fhi/2 if side == 1 else fhi
+                side = 1
+            if Nhi - Nlo < tol or f == 0:
+                break
+
+    Omega = N*2*npy.pi/60
+    P = value_of(Prop.P(N*RPM, V*M/SEC, h*M), W)
+    I = value_of(Motor.Io, A) + (P/max(Omega, 1e-12))*2*npy.pi*Kv/60
+    Pelec = max(value_of(Motor.Vmotor(Ib=I*A), VOLT)*I, 1e-12)
+    return {'T'      : T,
+            'I'      : I,
+            'N'      : N,
+            'P'      : P,
+            'Eta'    : P/Pelec,
+            'EtaProp': T*V/max(P, 1e-12)}
+
+#==============================================================================#
+# PROPULSION TABLE
+#==============================================================================#
+class PropulsionTable(object):
+    """
+    Matched thrust, current, RPM and efficiency on a grid of airspeed [m/s]
+    and density altitude [m], served by bilinear interpolation
+    """
+    FIELDS = ('T', 'I', 'N', 'P', 'Eta', 'EtaProp')
+
+    def __init__(self, name, V, h, data):
+        self.name = name
+        self.V = npy.asarray(V, dtype=float)
+        self.h = npy.asarray(h, dtype=float)
+        self.data = dict((field, npy.asarray(data[field], dtype=float)) for field in self.FIELDS)
+
+    @classmethod
+    def compute(cls, Bprop, Bmotor, V, h, name=''):
+        """
+        Solves the matched point on the grid V x h (1-D arrays, plain SI)
+        """
+        V = npy.asarray(V, dtype=float)
+        h = npy.asarray(h, dtype=float)
+        return cls(name, V, h, match(Bprop, Bmotor, V[:, None], h[None, :]))
+
+    @classmethod
+    def from_propulsion(cls, Propulsion, V, h, name=''):
+        """
+        Fills the grid V x h (1-D arrays, plain SI) from ACPropulsion's own
+        matched solution, one grid point at a time
+        """
+        V = npy.asarray(V, dtype=float)
+        h = npy.asarray(h, dtype=float)
+        data = dict((field, npy.zeros((len(V), len(h)))) for field in cls.FIELDS)
+        for j, hj in enumerate(h):
+            for i, Vi in enumerate(V):
+                point = propulsion_point(Propulsion, Vi, hj)
+                for field in cls.FIELDS:
+                    data[field][i, j] = point[field]
+        return cls(name, V, h, data)
+
+    #--------------------------------------------------------------------------#
+    def save(self, filename):
+        """
+        Writes the table to a .npz file (atomically)
+        """
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(filename)), suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            npy.savez(f, name=npy.array(self.name), V=self.V, h=self.h, **self.data)
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmp, filename)
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads a table written by save
+        """
+        data = npy.load(filename)
+        return cls(str(data['name']), data['V'], data['h'], data)
+
+    #--------------------------------------------------------------------------#
+    def interpolate(self, V, h=0.0):
+        """
+        Returns a dictionary of the interpolated fields for broadcast arrays
+        of airspeed V [m/s] and altitude h [m] (clipped to the table range)
+        """
+        V, h = npy.broadcast_arrays(npy.asarray(V, dtype=float), npy.asarray(h, dtype=float))
+        i, fi = _cell(self.V, V)
+        j, fj = _cell(self.h, h)
+        values = {}
+        for field, Z in self.data.items():
+            values[field] = (Z[i, j]*(1 - fi)*(1 - fj) + Z[i + 1, j]*fi*(1 - fj) +
+                             Z[i, j + 1]*(1 - fi)*fj + Z[i + 1, j + 1]*fi*fj)
+        return values
+
+    def TIN(self, V, h=None):
+        """
+        Returns thrust, current, RPM and motor efficiency for broadcast arrays
+        of airspeed and altitude (Aerothon quantities; h defaults to sea level)
+        """
+        from Aerothon.scalar.units import M, SEC, KG, A, RPM
+
+        hm = 0.0 if h is None else value_of(h, M)
+        values = self.interpolate(value_of(V, M/SEC), hm)
+        return values['T']*KG*M/SEC**2, values['I']*A, values['N']*RPM, values['Eta']
+
+    def T(self, V, h=None):
+        """
+        Returns the matched thrust for airspeed V (and altitude h)
+        """
+        return self.TIN(V, h)[0]
+
+
+def _cell(grid, x):
+    """
+    Returns the lower grid index and the fraction into the cell for each x
+    """
+    if len(grid) == 1:
+        return npy.zeros(npy.shape(x), dtype=int), npy.zeros(npy.shape(x))
+    x = npy.clip(x, grid[0], grid[-1])
+    i = npy.clip(npy.searchsorted(grid, x, side='right') - 1, 0, len(grid) - 2)
+    return i, (x - grid[i])/(grid[i + 1] - grid[i])
+
+#==============================================================================#
+# DISK CACHE
+#==============================================================================#
+def table_directory():
+    """
+    Returns the directory the tables are stored in (REG2020_CACHE/propulsion or
+    .cache/propulsion in the repository)
+    """
+    root = os.environ.get('REG2020_CACHE', os.path.join(ROOT_DIR, '.cache'))
+    directory = os.path.join(root, 'propulsion')
+    if not os.path.isdir(directory):
+        try:
+            os.makedirs(directory)
+        except OSError: # another process may have created it first
+            if not os.path.isdir(directory):
+                raise
+    return directory
+
+
+def _defining_modules(objects):
+    """
+    Returns the names of the loaded modules that hold one of the objects as a
+    module level name (e.g. Prop in Propulsion/Propellars/APC_22x12E.py)
+    """
+    ids = set(id(Object) for Object in objects)
+    names = []
+    for name, module in sorted(sys.modules.items()):
+        if module is None or not getattr(module, '__file__', None):
+            continue
+        if any(id(value) in ids for value in list(vars(module).values())):
+            names.append(name)
+    return names
+
+
+def table_key(Propulsion, V, h):
+    """
+    Returns the hash identifying a table. It covers what Tools/cache keys the
+    components on: the Aerothon library version and unit mode and the
+    sources of the modules defining the propulsion and its parts (and every
+    repository module they import), plus the state of the ACPropulsion and
+    of its propeller, motor, battery and speed controller (their attributes
+    and .param, see polarcache.attribute_version; Alt is left out since the
+    table spans altitude), the part names and the grid
+    """
+    from Tools.cache import library_version, module_sources
+    from Aerodynamics.polarcache import attribute_version
+
+    Motor = Propulsion.Motor
+    Parts = [Part for Part in (Propulsion, Propulsion.Prop, Motor,
+                               getattr(Motor, 'Battery', None),
+                               getattr(Motor, 'SpeedController', None)) if Part is not None]
+    sha = hashlib.sha1(b'ACPropulsion')
+    sha.update(table_name(Propulsion).encode())
+    sha.update(library_version().encode())
+    sha.update(b'fast' if fast_mode_enabled() else b'units')
+    for filename in module_sources(__name__, *_defining_modules(Parts)):
+        with open(filename, 'rb') as f:
+            sha.update(f.read())
+    for Part in Parts:
+        sha.update(attribute_version(Part, skip=('Alt',) if Part is Propulsion else ()).encode())
+    sha.update(npy.asarray(V, dtype=float).tobytes())
+    sha.update(npy.asarray(h, dtype=float).tobytes())
+    return sha.hexdigest()
+
+
+def table_name(Propulsion):
+    """
+    Returns 'Prop/Motor/Battery/ESC' of an ACPropulsion
+    """
+    Motor = Propulsion.Motor
+    return '%s/%s/%s/%s' % (Propulsion.Prop.name, Motor.name,
+                            getattr(Motor.Battery, 'name', ''),
+                            getattr(Motor.SpeedController, 'name', ''))
+
+
+def propulsion_table(Propulsion, Vmax=None, nV=31, hmax=None, nh=9, use_cache=True):
+    """
+    Returns the PropulsionTable of an ACPropulsion (its Prop, Motor and the
+    motor's Battery and SpeedController), loaded from disk when it has been
+    computed before
+
+    Inputs:
+        Propulsion - ACPropulsion
+        Vmax, nV   - airspeed range 0..Vmax (default Propulsion.Vmax) and grid size
+        hmax, nh   - density altitude range 0..hmax (default 8000 ft) and grid size
+    """
+    from Aerothon.scalar.units import M, SEC
+
+    Vmax = value_of(Propulsion.Vmax if Vmax is None else Vmax, M/SEC)
+    hmax = 2438.4 if hmax is None else value_of(hmax, M)
+    V = npy.linspace(0, Vmax, nV)
+    h = npy.linspace(0, hmax, nh)
+    name = table_name(Propulsion)
+
+    if not use_cache:
+        return PropulsionTable.from_propulsion(Propulsion, V, h, name)
+
+    filename = os.path.join(table_directory(), table_key(Propulsion, V, h) + '.npz')
+    if os.path.exists(filename):
+        try:
+            return PropulsionTable.load(filename)
+        except Exception: # stale or truncated file, recompute it
+            pass
+    Table = PropulsionTable.from_propulsion(Propulsion, V, h, name)
+    Table.save(filename)
+    return Table
+
+#==============================================================================#
+# ACPROPULSION HOOK
+#==============================================================================#
+class TableThrust(object):
+    """
+    Callable standing in for ACPropulsion.T: thrust from a PropulsionTable at
+    the altitude the propulsion model has when it is called
+    """
+    def __init__(self, Table, Propulsion):
+        self.Table = Table
+        self.Propulsion = Propulsion
+
+    def __call__(self, V, h=None):
+        return self.Table.T(V, self.Propulsion.Alt if h is None else h)
+
+
+def use_table(Propulsion, Table=None):
+    """
+    Makes Propulsion.T(V) interpolate a PropulsionTable instead of matching
+    the motor and propeller again (Groundroll and the performance plots call
+    it many times). Propulsion.Alt is read at every call. Returns the table.
+    """
+    if Table is None:
+        Table = propulsion_table(Propulsion)
+    object.__setattr__(Propulsion, 'T', TableThrust(Table, Propulsion))
+    return Table
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    from Aerothon.scalar.units import FT, SEC, LBF, AsUnit
+    from Propulsion.propulsion import build_propulsion
+
+    Propulsion = build_propulsion()
+
+    start = time.time()
+    Table = propulsion_table(Propulsion)
+    print('Table %s ready in %.3f s' % (Table.name, time.time() - start))
+
+    V = npy.linspace(0, 60, 7)*FT/SEC
+    T, I, N, Eta = Table.TIN(V)
+    print('V [ft/s]   : ' + str(npy.round(value_of(V, FT/SEC), 1)))
+    print('Thrust [lbf]: ' + str(npy.round(value_of(T, LBF), 2)))
+    print('Current [A] : ' + str(npy.round(Table.interpolate(value_of(V, FT/SEC)*0.3048)['I'], 1)))
+
+    print('Static Thrust (table)   : ' + str(AsUnit(Table.T(0*FT/SEC), 'lbf')))
+    print('Static Thrust (matched) : ' + str(AsUnit(Propulsion.T(0*FT/SEC), 'lbf')))
@@ -0,0 +1,210 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# motorfit.py: least-squares fit of the ACMotor constants Ri, Io and Kv
+#
+# The motor files carry Ri, Io and Kv tuned by hand ("Matched data - Model 2")
+# until Motor.PlotTestData() looked right against Motor.TestData. The three
+# constant model is linear in a = 1/Kv, Ri and b = Io/Kv:
+#    V = a N + Ri I                           (voltage, N in rpm)
+#    Q = (60/2pi) (a I - b)                   (torque, Q = (I - Io) Kt)
+# so every (RPM, Torque, Current, Voltage) test tuple gives two rows of one
+# weighted linear least-squares problem. Each equation is scaled by its
+# measurement uncertainty (default: the mean of the measured values, so the
+# voltage and torque residuals count as relative errors).
+#
+# All motors are fitted at once: the test points are padded into arrays of
+# shape (nMotor, nPoint) and the 3x3 normal equations of every motor and every
+# bootstrap replicate (test points resampled with replacement, i.e. integer
+# point weights) are formed with einsum and solved in one batched call. The
+# bootstrap percentiles give the confidence intervals.
+#
+#    Fits = fit_motors([Hacker.Motor, Scorpion.Motor], nBoot=2000)
+#    apply_fit(Hacker.Motor, Fits[0])
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+RPM_RADS = 2*npy.pi/60     # rpm -> rad/s
+
+#==============================================================================#
+# TEST DATA
+#==============================================================================#
+def test_arrays(TestData):
+    """
+    Returns plain float arrays (N [rpm], Q [N m], I [A], V [V]) of ACMotor
+    TestData tuples (RPM, Torque, Current, Voltage)
+    """
+    from Aerothon.scalar.units import RPM, A, V, M, KG, SEC
+
+    NM = KG*M**2/SEC**2 # newton meter
+    N = npy.array([value_of(point[0], RPM) for point in TestData])
+    Q = npy.array([value_of(point[1], NM) for point in TestData])
+    I = npy.array([value_of(point[2], A) for point in TestData])
+    U = npy.array([value_of(point[3], V) for point in TestData])
+    return N, Q, I, U
+
+
+def stack_tests(tests):
+    """
+    Returns (N, Q, I, V, mask) arrays of shape (nMotor, nPoint) from a list of
+    (N, Q, I, V) arrays, padded where a motor has fewer points
+    """
+    nPoint = max(len(t[0]) for t in tests)
+    arrays = npy.zeros((5, len(tests), nPoint))
+    for k, test in enumerate(tests):
+        n = len(test[0])
+        arrays[:4, k, :n] = test
+        arrays[4, k, :n] = 1.0
+    return tuple(arrays)
+
+#==============================================================================#
+# BATCHED LEAST SQUARES
+#==============================================================================#
+def solve_si(N, Q, I, V, weights, sigmaV=None, sigmaQ=None):
+    """
+    Returns the arrays (Ri [ohm], Io [A], Kv [rpm/V]) of the weighted least
+    squares fits. Leading axes of weights (e.g. bootstrap replicates) broadcast
+    against the (nMotor, nPoint) test arrays; fits with fewer than three
+    distinct points are nan.
+
+    Inputs:
+        N, Q, I, V - test arrays [rpm, N m, A, V], shape (nMotor, nPoint)
+        weights    - point weights (0 for padding), shape (..., nMotor, nPoint)
+        sigmaV     - voltage uncertainty [V] (default: mean voltage)
+        sigmaQ     - torque uncertainty [N m] (default: mean torque)
+    """
+    mask = weights > 0
+    count = npy.maximum(npy.sum(weights, axis=-1), 1)[..., None]
+    if sigmaV is None:
+        sigmaV = npy.sum(weights*V, axis=-1)[..., None]/count
+    if sigmaQ is None:
+        sigmaQ = npy.sum(weights*npy.abs(Q), axis=-1)[..., None]/count
+    c = 1/RPM_RADS
+
+    # rows of the voltage and torque equations for x = (a, Ri, b)
+    zero = npy.zeros_like(N)
+    Av = npy.stack([N, I, zero], axis=-1)/sigmaV[..., None]
+    Aq = npy.stack([c*I, zero, -c*npy.ones_like(N)], axis=-1)/sigmaQ[..., None]
+    bv, bq = V/sigmaV, Q/sigmaQ
+
+    AtA = (npy.einsum('...p,...pi,...pj->...ij', weights, Av, Av) +
+           npy.einsum('...p,...pi,...pj->...ij', weights, Aq, Aq))
+    Atb = (npy.einsum('...p,...pi,...p->...i', weights, Av, bv) +
+           npy.einsum('...p,...pi,...p->...i', weights, Aq, bq))
+
+    # points that differ (bootstrap replicates repeat points)
+    distinct = npy.sum(mask, axis=-1) >= 3
+    AtA = npy.where(distinct[..., None, None], AtA, npy.eye(3))
+    x = npy.linalg.solve(AtA, Atb[..., None])[..., 0]
+    a, Ri, b = x[..., 0], x[..., 1], x[..., 2]
+    with npy.errstate(divide='ignore', invalid='ignore'):
+        Kv, Io = 1/a, b/a
+    bad = ~distinct
+    return (npy.where(bad, npy.nan, Ri), npy.where(bad, npy.nan, Io),
+            npy.where(bad, npy.nan, Kv))
+
+
+def fit_tests(tests, nBoot=1000, level=0.90, seed=0, sigmaV=None, sigmaQ=None, names=None):
+    """
+    Returns a list with an ordered dictionary per motor: the fitted Ri [ohm],
+    Io [A] and Kv [rpm/V], their bootstrap confidence intervals
+    ('Ri_CI', ... as (low, high)), the rms voltage and torque residuals and
+    the number of test points
+
+    Inputs:
+        tests - list of (N, Q, I, V) arrays, one per motor (see test_arrays)
+        nBoot - bootstrap replicates (0 skips the confidence intervals)
+        level - confidence level of the intervals
+    """
+    N, Q, I, V, mask = stack_tests(tests)
+    Ri, Io, Kv = solve_si(N, Q, I, V, mask, sigmaV, sigmaQ)
+
+    if nBoot:
+        # resample the points of every motor: multinomial counts as weights
+        rng = npy.random.RandomState(seed)
+        nPoints = mask.sum(axis=1).astype(int)
+        weights = npy.zeros((nBoot,) + mask.shape)
+        for k, n in enumerate(nPoints):
+            weights[:, k, :n] = rng.multinomial(n, npy.ones(n)/n, size=nBoot)
+        boot = solve_si(N, Q, I, V, weights, sigmaV, sigmaQ)
+        q = 100*npy.array([(1 - level)/2, (1 + level)/2])
+        bounds = [npy.nanpercentile(values, q, axis=0) for values in boot]
+
+    Fits = []
+    for k in range(len(tests)):
+        n = int(mask[k].sum())
+        Vres = V[k, :n] - N[k, :n]/Kv[k] - Ri[k]*I[k, :n]
+        Qres = Q[k, :n] - (I[k, :n] - Io[k])/(Kv[k]*RPM_RADS)
+        Fit = OrderedDict()
+        Fit['name'] = names[k] if names else 'Motor%d' % k
+        Fit['Ri'], Fit['Io'], Fit['Kv'] = float(Ri[k]), float(Io[k]), float(Kv[k])
+        if nBoot:
+            for name, bound in zip(('Ri', 'Io', 'Kv'), bounds):
+                Fit[name + '_CI'] = (float(bound[0, k]), float(bound[1, k]))
+        Fit['Vrms'] = float(npy.sqrt(npy.mean(Vres**2)))
+        Fit['Qrms'] = float(npy.sqrt(npy.mean(Qres**2)))
+        Fit['nPoint'] = n
+        Fits.append(Fit)
+    return Fits
+
+
+def fit_motors(Motors, nBoot=1000, level=0.90, seed=0, sigmaV=None, sigmaQ=None):
+    """
+    Returns the fits of fit_tests for Aerothon ACMotors from their TestData
+    """
+    return fit_tests([test_arrays(Motor.TestData) for Motor in Motors], nBoot, level, seed,
+                     sigmaV, sigmaQ, [getattr(Motor, 'name', '') for Motor in Motors])
+
+
+def apply_fit(Motor, Fit):
+    """
+    Sets Ri, Io and Kv of an ACMotor from a fit
+    """
+    from Aerothon.scalar.units import OHM, A, RPM, V
+
+    Motor.Ri = Fit['Ri']*OHM
+    Motor.Io = Fit['Io']*A
+    Motor.Kv = Fit['Kv']*RPM/V
+
+
+def print_fits(Fits, Motors=None):
+    """
+    Prints the fitted constants, their confidence intervals and, with Motors,
+    the constants currently set on the motors
+    """
+    for k, Fit in enumerate(Fits):
+        print('%s (%d points, rms %.3f V, %.4f N m)' %
+              (Fit['name'], Fit['nPoint'], Fit['Vrms'], Fit['Qrms']))
+        current = {}
+        if Motors is not None:
+            from Aerothon.scalar.units import OHM, A, RPM, V
+            current = {'Ri': value_of(Motors[k].Ri, OHM), 'Io': value_of(Motors[k].Io, A),
+                       'Kv': value_of(Motors[k].Kv, RPM/V)}
+        for name, unit in (('Ri', 'ohm'), ('Io', 'A'), ('Kv', 'rpm/V')):
+            line = '   %-3s %10.4f %-6s' % (name, Fit[name], unit)
+            if name + '_CI' in Fit:
+                line += '  CI [%10.4f, %10.4f]' % Fit[name + '_CI']
+            if name in current:
+                line += '  (set %.4f)' % current[name]
+            print(line)
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    from Propulsion.tradestudy import MOTORS, load_part, available
+
+    Motors = [load_part(part) for part in available(MOTORS)] # skips parts that do not import
+    start = time.time()
+    Fits = fit_motors(Motors, nBoot=5000)
+    print('%d motors, 5000 bootstrap replicates in %.3f s' % (len(Motors), time.time() - start))
+    print_fits(Fits, Motors)
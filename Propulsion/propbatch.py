@@ -0,0 +1,328 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# propbatch.py: vectorized blade element surrogate of an ACPropeller
+#
+# ACPropeller.T(N, V, h) and ACPropeller.P(N, V, h) work one operating point
+# at a time with unit objects. BatchPropeller is NOT a batch version of them:
+# it is a separate closed-form blade element / momentum model that takes the
+# same blade parameters (D, Pitch, dAlpha, Solidity, AlphaStall, AlphaZeroCL,
+# CLSlope, CDCurve, CDp) once, strips their units and evaluates whole
+# broadcast arrays of RPM, airspeed and altitude:
+#
+#    Bprop = surrogate(Prop)                           # checked over RANGE
+#    T, P, Q = Bprop.TPQ(N[:,None], V[None,:], 0*FT)   # N x V tables
+#
+# The inflow uses the closed-form blade element momentum solution (no tip
+# loss), the section lift is CLSlope*(alpha - AlphaZeroCL) limited at
+# AlphaStall and the section drag is CDp + CDCurve*(alpha - AlphaZeroCL)**2.
+# from_prop() anchors the thrust and torque to ACPropeller at one operating
+# point (Tscale/Qscale, 5000 rpm static by default); away from it the two
+# models drift apart. surrogate() therefore only hands out a model that
+# compare() has checked against ACPropeller over the operating range of the
+# prop files (RANGE, their PTPlot grid) to within RTOL of the static values,
+# and raises EquivalenceError otherwise. Results that matter (matched tables,
+# calibrations, the final trade study ranking) come from ACPropeller itself.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import numpy as npy
+
+from Tools.fastmode import value_of, EquivalenceError
+from Tools.atmosphere import density
+
+#==============================================================================#
+# OPERATING RANGE
+#==============================================================================#
+# operating range of the prop files (the PTPlot grid of their __main__ blocks):
+# rotation rates [rpm], airspeeds 0..50 ft/s [m/s] and altitude [m]
+RANGE = (npy.linspace(1000, 6800, 5), npy.linspace(0, 15.24, 6), 0.0)
+
+# largest surrogate error over RANGE, as a fraction of the static ACPropeller
+# thrust and power at the same rpm
+RTOL = 0.05
+
+#==============================================================================#
+# BATCH PROPELLER
+#==============================================================================#
+class BatchPropeller(object):
+    """
+    Vectorized blade element surrogate of an ACPropeller (see surrogate()).
+    All attributes are plain SI floats (or arrays that broadcast against the
+    operating points, for batched calibration).
+    """
+    PARAMETERS = ('D', 'Pitch', 'dAlpha', 'Solidity', 'AlphaStall', 'AlphaZeroCL',
+                  'CLSlope', 'CDCurve', 'CDp', 'Tscale', 'Qscale')
+
+    def __init__(self, name='', nStation=24, HubFrac=0.15, **params):
+        self.name = name
+        self.nStation = nStation  # radial stations of the blade element sum
+        self.HubFrac  = HubFrac   # hub radius / tip radius
+        self.D           = 0.0   # diameter [m]
+        self.Pitch       = 0.0   # geometric pitch [m]
+        self.dAlpha      = 0.0   # blade angle offset [rad]
+        self.Solidity    = 0.0   # blade area / disk area
+        self.AlphaStall  = 0.0   # [rad]
+        self.AlphaZeroCL = 0.0   # [rad]
+        self.CLSlope     = 0.0   # [1/rad]
+        self.CDCurve     = 0.0   # [1/rad**2]
+        self.CDp         = 0.0
+        self.Tscale      = 1.0   # thrust multiplier (anchor to a reference)
+        self.Qscale      = 1.0   # torque multiplier (anchor to a reference)
+        self.set_params(**params)
+
+    @classmethod
+    def from_prop(cls, Prop, anchor=(5000, 0.0, 0.0), **kwargs):
+        """
+        Returns the surrogate of an Aerothon ACPropeller (unchecked, see
+        surrogate())
+
+        Inputs:
+            Prop   - ACPropeller
+            anchor - (rpm, m/s, m) operating point where Tscale and Qscale are
+                     set so the surrogate matches Prop.T and Prop.P exactly
+                     (None leaves the blade element model unscaled)
+        """
+        from Aerothon.scalar.units import M, RAD
+
+        Bprop = cls(name=Prop.name,
+                   D           = value_of(Prop.D, M),
+                   Pitch       = value_of(Prop.Pitch, M),
+                   dAlpha      = value_of(Prop.dAlpha, RAD),
+                   Solidity    = value_of(Prop.Solidity),
+                   AlphaStall  = value_of(Prop.AlphaStall, RAD),
+                   AlphaZeroCL = value_of(Prop.AlphaZeroCL, RAD),
+                   CLSlope     = value_of(Prop.CLSlope, 1/RAD),
+                   CDCurve     = value_of(Prop.CDCurve),
+                   CDp         = value_of(Prop.CDp),
+                   **kwargs)
+
+        if anchor is not None:
+            Bprop.anchor(prop_reference(Prop), *anchor)
+        return Bprop
+
+    def anchor(self, reference, N, V, h):
+        """
+        Sets Tscale and Qscale so the thrust and power match a reference model
+        at one operating point
+
+        Inputs:
+            reference - function(N [rpm], V [m/s], h [m]) returning the thrust
+                        [N] and power [W] at one point (see prop_reference)
+        """
+        T, P, Q = self.copy(Tscale=1.0, Qscale=1.0).loads_si(N, V, h)
+        Tref, Pref = reference(N, V, h)
+        self.Tscale = float(Tref/T)
+        self.Qscale = float(Pref/P)
+
+    def set_params(self, **params):
+        for name, value in params.items():
+            if name not in self.PARAMETERS:
+                raise AttributeError("'%s' is not a BatchPropeller parameter" % name)
+            setattr(self, name, npy.asarray(value, dtype=float) if npy.ndim(value) else float(value))
+
+    def copy(self, **params):
+        """
+        Returns a copy, optionally with some parameters changed
+        """
+        new = BatchPropeller(self.name, self.nStation, self.HubFrac,
+                             **dict((p, getattr(self, p)) for p in self.PARAMETERS))
+        new.set_params(**params)
+        return new
+
+    #--------------------------------------------------------------------------#
+    def loads(self, Omega, V, rho):
+        """
+        Returns thrust [N] and torque [N m] for broadcast arrays of rotation
+        rate Omega [rad/s], airspeed V [m/s] and density rho [kg/m**3]
+        """
+        Omega = npy.asarray(Omega, dtype=float)[..., None]
+        V     = npy.asarray(V, dtype=float)[..., None]
+        rho   = npy.asarray(rho, dtype=float)[..., None]
+
+        def param(name):
+            return npy.asarray(getattr(self, name), dtype=float)[..., None]
+
+        R     = param('D')/2
+        sigma = param('Solidity')
+        a     = param('CLSlope')
+        stall = param('AlphaStall')
+
+        # radial stations (fraction of the tip radius)
+        dx = (1.0 - self.HubFrac)/self.nStation
+        x  = self.HubFrac + dx*(npy.arange(self.nStation) + 0.5)
+
+        Vtip = npy.maximum(Omega*R, 1e-6)
+        lamc = V/Vtip
+
+        # blade angle above zero lift and the momentum inflow ratio
+        theta = npy.arctan(param('Pitch')/(2*npy.pi*x*R)) + param('dAlpha') - param('AlphaZeroCL')
+        k   = sigma*a/16 - lamc/2
+        lam = npy.sqrt(npy.maximum(k**2 + sigma*a*theta*x/8, 0.0)) - k
+        lam = npy.maximum(lam, lamc)
+
+        phi   = npy.arctan2(lam, x)
+        alpha = theta - phi
+        CL = a*npy.clip(alpha, -stall, stall)
+        CD = param('CDp') + param('CDCurve')*alpha**2
+
+        # 0.5 rho U**2 (B c) dr with B c = sigma pi R and dr = R dx
+        q = 0.5*rho*Vtip**2*(x**2 + lam**2)*sigma*npy.pi*R*R*dx
+        cosphi, sinphi = npy.cos(phi), npy.sin(phi)
+
+        T = npy.sum(q*(CL*cosphi - CD*sinphi), axis=-1)*self.Tscale
+        Q = npy.sum(q*(CL*sinphi + CD*cosphi)*x*R, axis=-1)*self.Qscale
+        return T, Q
+
+    def loads_si(self, N, V, h):
+        """
+        Returns thrust [N], power [W] and torque [N m] as plain float arrays
+
+        Inputs:
+            N - rotation rate [rpm], V - airspeed [m/s], h - altitude [m]
+        """
+        Omega = npy.asarray(N, dtype=float)*(2*npy.pi/60)
+        T, Q = self.loads(Omega, V, density(h))
+        return T, Q*Omega, Q
+
+    #--------------------------------------------------------------------------#
+    def TPQ(self, N, V, h):
+        """
+        Returns thrust, power and torque arrays for broadcast arrays of RPM,
+        airspeed and altitude (Aerothon quantities). The units are stripped once
+        for the whole array and reapplied once to each result.
+        """
+        from Aerothon.scalar.units import RPM, M, SEC, KG, W
+
+        T, P, Q = self.loads_si(value_of(N, RPM), value_of(V, M/SEC), value_of(h, M))
+        NEWTON = KG*M/SEC**2
+        return T*NEWTON, P*W, Q*NEWTON*M
+
+    def T(self, N, V, h):
+        """
+        Returns the thrust for broadcast arrays of RPM, airspeed and altitude
+        """
+        return self.TPQ(N, V, h)[0]
+
+    def P(self, N, V, h):
+        """
+        Returns the shaft power for broadcast arrays of RPM, airspeed and altitude
+        """
+        return self.TPQ(N, V, h)[1]
+
+    def Q(self, N, V, h):
+        """
+        Returns the shaft torque for broadcast arrays of RPM, airspeed and altitude
+        """
+        return self.TPQ(N, V, h)[2]
+
+#==============================================================================#
+# CHECK AGAINST AEROTHON
+#==============================================================================#
+def prop_reference(Prop):
+    """
+    Returns function(N [rpm], V [m/s], h [m]) giving the thrust [N] and
+    power [W] of an Aerothon ACPropeller at one operating point
+    """
+    from Aerothon.scalar.units import RPM, M, SEC, KG, W
+
+    NEWTON = KG*M/SEC**2
+
+    def reference(N, V, h):
+        return (value_of(Prop.T(N*RPM, V*M/SEC, h*M), NEWTON),
+                value_of(Prop.P(N*RPM, V*M/SEC, h*M), W))
+    return reference
+
+
+def compare_si(Bprop, reference, N=None, V=None, h=None, rtol=RTOL):
+    """
+    Returns the thrust and power errors (surrogate - reference) on the grid
+    N x V, each as a fraction of the static reference value at the same rpm.
+    The reference is called point by point. Raises EquivalenceError when an
+    error exceeds rtol (None only reports).
+
+    Inputs:
+        reference - function(N, V, h) returning thrust [N] and power [W]
+        N, V, h   - rpm and airspeed [m/s] sequences and altitude [m]
+                    (default RANGE)
+    """
+    N = npy.asarray(RANGE[0] if N is None else N, dtype=float)
+    V = npy.asarray(RANGE[1] if V is None else V, dtype=float)
+    h = RANGE[2] if h is None else float(h)
+    Tref = npy.zeros((len(N), len(V)))
+    Pref = npy.zeros((len(N), len(V)))
+    for i, n in enumerate(N):
+        for j, v in enumerate(V):
+            Tref[i, j], Pref[i, j] = reference(n, v, h)
+    T, P, Q = Bprop.loads_si(N[:, None], V[None, :], h)
+    if V[0] == 0:
+        T0, P0 = Tref[:, :1], Pref[:, :1]
+    else:
+        T0, P0 = npy.array([reference(n, 0.0, h) for n in N]).T[:, :, None]
+    T0, P0 = npy.abs(T0), npy.abs(P0)
+    dT = (T - Tref)/npy.maximum(T0, 1e-12)
+    dP = (P - Pref)/npy.maximum(P0, 1e-12)
+
+    if rtol is not None:
+        failures = ['%s at %.0f rpm, %.1f m/s off by %+.1f%% of static' %
+                    (kind, N[i], V[j], 100*d[i, j])
+                    for kind, d in (('thrust', dT), ('power', dP))
+                    for i, j in zip(*npy.nonzero(npy.abs(d) > rtol))]
+        if failures:
+            raise EquivalenceError('%s: the surrogate differs from the reference beyond '
+                                   'rtol = %g:\n   %s' % (Bprop.name, rtol, '\n   '.join(failures)))
+    return dT, dP
+
+
+def compare(Prop, N=None, V=None, h=None, rtol=RTOL, Bprop=None):
+    """
+    Returns the thrust and power errors of the surrogate of an ACPropeller
+    over a grid (see compare_si), evaluating ACPropeller point by point.
+    Raises EquivalenceError past rtol.
+
+    Inputs:
+        N, V, h - sequences of RPM and airspeed and the altitude (Aerothon
+                  quantities, default RANGE)
+        Bprop   - surrogate to check (default BatchPropeller.from_prop(Prop))
+    """
+    from Aerothon.scalar.units import RPM, M, SEC
+
+    Bprop = BatchPropeller.from_prop(Prop) if Bprop is None else Bprop
+    return compare_si(Bprop, prop_reference(Prop),
+                      None if N is None else [value_of(n, RPM) for n in N],
+                      None if V is None else [value_of(v, M/SEC) for v in V],
+                      None if h is None else value_of(h, M), rtol)
+
+
+def surrogate(Prop, rtol=RTOL, **kwargs):
+    """
+    Returns the anchored surrogate of an ACPropeller once compare() has
+    checked it over RANGE; raises EquivalenceError if it is off by more than
+    rtol anywhere
+    """
+    Bprop = BatchPropeller.from_prop(Prop, **kwargs)
+    compare(Prop, rtol=rtol, Bprop=Bprop)
+    return Bprop
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    from Aerothon.scalar.units import RPM, FT, SEC, AsUnit
+    from Propulsion.Propellars.APC_22x12E import Prop
+
+    dT, dP = compare(Prop, rtol=None)
+    print('Largest surrogate error over RANGE: thrust %.1f%%, power %.1f%% of static' %
+          (100*npy.max(npy.abs(dT)), 100*npy.max(npy.abs(dP))))
+    Bprop = surrogate(Prop)
+
+    N = npy.linspace(1000, 7000, 100)*RPM
+    V = npy.linspace(0, 60, 50)*FT/SEC
+    start = time.time()
+    T, P, Q = Bprop.TPQ(N[:, None], V[None, :], 0*FT)
+    print('%d point table in %.4f s' % (100*50, time.time() - start))
+    print('Static thrust at 4250 rpm : ' + str(AsUnit(Bprop.T(4250*RPM, 0*FT/SEC, 0*FT), 'lbf')))
@@ -0,0 +1,342 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# propfit.py: calibration of ACPropeller blade parameters against test data
+#
+# The propeller files tune dAlpha, CLSlope, CDCurve, CDp and Solidity by hand
+# until Prop.PlotTestData() agrees with Prop.ThrustData/Prop.TorqueData (the
+# 22x12E carries "dAlpha = 11*ARCDEG # 3.3"). calibrate() fits them with a
+# Levenberg-Marquardt search in two stages (static, standard day):
+#    -> residuals are relative errors of thrust and torque at every test point
+#    -> the search first runs on the blade element surrogate of
+#       Propulsion/propbatch.py (BatchPropeller, unscaled), which evaluates the
+#       current parameters and all finite difference perturbations in one
+#       call (the parameters are arrays broadcast against the test points)
+#    -> from there it is finished on the ACPropeller itself, one T/P call per
+#       parameter set and test point, so the values written back by
+#       apply_calibration are the ones that fit ACPropeller's own model
+#    -> a soft-L1 loss keeps single bad points (e.g. a mistyped thrust) from
+#       dragging the fit, and points off by more than 3 loss scales are
+#       reported as outliers
+#    -> a weak prior ties the parameters to the values in the prop file, so
+#       parameters the data cannot see (torque terms of a prop without
+#       TorqueData) stay where they were
+# TorqueData = None fits thrust only, and a TorqueData tuple wrapping the list
+# (trailing comma, as in the 24x12E) is unwrapped. calibrate_props() fits
+# every prop of the parts library in a process pool.
+#
+#    python -m Propulsion.propfit [-j 4]
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import multiprocessing
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+from Propulsion.propbatch import BatchPropeller
+
+#==============================================================================#
+# TEST DATA
+#==============================================================================#
+# fitted parameters -> (lower bound, upper bound, smallest step scale), SI
+FIT = OrderedDict([('dAlpha',   (-0.35, 0.35, 0.02)),
+                   ('CLSlope',  (1.0,   8.0,  0.1)),
+                   ('CDCurve',  (0.0,   20.0, 0.1)),
+                   ('CDp',      (0.0,   0.3,  0.005)),
+                   ('Solidity', (0.002, 0.2,  0.001))])
+
+
+def test_points(Data, unit):
+    """
+    Returns (N [rpm], value) float arrays of ThrustData or TorqueData, empty
+    for None. A tuple wrapping a single list (trailing comma) is unwrapped.
+
+    Inputs:
+        unit - Aerothon unit of the values (newton, newton meter)
+    """
+    while isinstance(Data, tuple) and len(Data) == 1 and isinstance(Data[0], list):
+        Data = Data[0]
+    if not Data:
+        return npy.zeros(0), npy.zeros(0)
+    from Aerothon.scalar.units import RPM
+
+    return (npy.array([value_of(point[0], RPM) for point in Data]),
+            npy.array([value_of(point[1], unit) for point in Data]))
+
+
+def prop_task(Prop, surrogate=False, **options):
+    """
+    Returns the picklable calibration task of an Aerothon ACPropeller
+
+    Inputs:
+        surrogate - fit the BatchPropeller surrogate only (leaves the
+                    propeller out of the task)
+    """
+    from Aerothon.scalar.units import M, KG, SEC
+
+    NEWTON = KG*M/SEC**2
+    Bprop = BatchPropeller.from_prop(Prop, anchor=None)
+    params = dict((name, getattr(Bprop, name)) for name in BatchPropeller.PARAMETERS)
+    return (Prop.name, None if surrogate else Prop, params, test_points(Prop.ThrustData, NEWTON),
+            test_points(getattr(Prop, 'TorqueData', None), NEWTON*M), options)
+
+#==============================================================================#
+# CALIBRATION
+#==============================================================================#
+def batch_loads(Bprop, names):
+    """
+    Returns loads(P, NT, NQ): the static thrust [N] at NT and torque [N m] at
+    NQ [rpm] of the BatchPropeller for parameter sets P (nSet, nName)
+    """
+    def loads(P, NT, NQ):
+        B = Bprop.copy(**dict((name, P[:, i:i + 1]) for i, name in enumerate(names)))
+        Tm, Pm, Qm = B.loads_si(npy.concatenate((NT, NQ)), 0.0, 0.0)
+        return Tm[:, :len(NT)], Qm[:, len(NT):]
+    return loads
+
+
+def _units():
+    """
+    Returns the Aerothon units of the fitted parameters given in SI
+    """
+    from Aerothon.scalar.units import RAD
+    return {'dAlpha': RAD, 'CLSlope': 1/RAD}
+
+
+class PropellerLoads(object):
+    """
+    loads(P, NT, NQ) of an Aerothon ACPropeller: the parameter sets are set on
+    the propeller one after the other and T/P are called at every test point
+    (static, sea level). The propeller's own values are restored afterwards.
+    """
+    def __init__(self, Prop, names):
+        self.Prop = Prop
+        self.names = names
+
+    def _set(self, values):
+        for name, value in zip(self.names, values):
+            setattr(self.Prop, name, value)
+        Refresh = getattr(self.Prop, 'Refresh', None)
+        if Refresh is not None:
+            Refresh()
+
+    def __call__(self, P, NT, NQ):
+        from Aerothon.scalar.units import RPM, M, SEC, KG, W
+
+        NEWTON = KG*M/SEC**2
+        units = _units()
+        Prop = self.Prop
+        T = npy.empty((len(P), len(NT)))
+        Q = npy.empty((len(P), len(NQ)))
+        saved = [getattr(Prop, name) for name in self.names]
+        try:
+            for k, p in enumerate(P):
+                self._set([value*units.get(name, 1) for name, value in zip(self.names, p)])
+                for i, N in enumerate(NT):
+                    T[k, i] = value_of(Prop.T(N*RPM, 0*M/SEC, 0*M), NEWTON)
+                for i, N in enumerate(NQ):
+                    Q[k, i] = value_of(Prop.P(N*RPM, 0*M/SEC, 0*M), W)/(N*2*npy.pi/60)
+        finally:
+            self._set(saved)
+        return T, Q
+
+
+def residuals(loads, P, thrust, torque):
+    """
+    Returns the relative thrust and torque errors of parameter sets P
+    (shape (nSet, nName)) at the test points, shape (nSet, nThrust + nTorque)
+
+    Inputs:
+        loads - function(P, NT, NQ) returning thrust at NT and torque at NQ
+                (batch_loads or PropellerLoads)
+    """
+    (NT, T), (NQ, Q) = thrust, torque
+    Tm, Qm = loads(P, NT, NQ)
+    return npy.concatenate((Tm/T - 1, Qm/Q - 1), axis=1)
+
+
+def _search(evaluate, x, lower, upper, maxit, h=1e-4):
+    """
+    Levenberg-Marquardt search from the scaled parameters x within the bounds.
+    Returns (x, iterations).
+
+    Inputs:
+        evaluate - function(X) returning the residual vectors and costs of
+                   scaled parameter sets X
+    """
+    n, lam = len(x), 1e-2
+    iterations = 0
+    for iterations in range(1, maxit + 1):
+        # base point and every forward difference in one call
+        X = x + npy.vstack((npy.zeros(n), h*npy.eye(n)))
+        R, costs = evaluate(X)[:2]
+        J = (R[1:] - R[0])/h                        # (nName, nResidual)
+        A, g = J.dot(J.T), J.dot(R[0])
+        accepted = False
+        while lam < 1e8:
+            damping = lam*(npy.diag(npy.diag(A)) + 1e-12*npy.eye(n))
+            step = npy.linalg.solve(A + damping, -g)
+            trial = npy.clip(x + step, lower, upper)
+            costt = evaluate(trial[None, :])[1]
+            if costt[0] < costs[0]:
+                x, lam, accepted = trial, max(lam/3, 1e-9), True
+                break
+            lam *= 4
+        if not accepted or npy.max(npy.abs(step)) < 1e-6:
+            break
+    return x, iterations
+
+
+def calibrate_task(task):
+    """
+    Returns an ordered dictionary with the calibrated parameters (SI), the rms
+    relative errors of the inliers before and after, the outliers and the
+    iterations of one task (see prop_task). 'model' names the model the final
+    residuals come from: 'ACPropeller', or 'BatchPropeller' for a task
+    without the propeller (surrogate only, not for apply_calibration).
+    """
+    name, Prop, params, thrust, torque, options = task
+    names = list(options.get('names', FIT))
+    f = options.get('scale', 0.05)          # soft-L1 loss scale (relative error)
+    prior = options.get('prior', 0.02)      # weight of the prior per parameter scale
+    maxit = options.get('maxit', 50)
+    nData = len(thrust[0]) + len(torque[0])
+    if nData == 0:
+        return None
+
+    p0 = npy.array([params[n] for n in names])
+    scale = npy.maximum(npy.abs(p0), [FIT[n][2] for n in names])
+    lower = (npy.array([FIT[n][0] for n in names]) - p0)/scale
+    upper = (npy.array([FIT[n][1] for n in names]) - p0)/scale
+
+    def evaluator(loads):
+        def evaluate(X):
+            """ robust residual vectors (data, prior), costs and residuals of scaled sets X """
+            r = residuals(loads, p0 + X*scale, thrust, torque)
+            z = (r/f)**2
+            cost = npy.sum(2*f**2*(npy.sqrt(1 + z) - 1), axis=1) + npy.sum((prior*X)**2, axis=1)
+            rw = r*(1 + z)**-0.25                   # IRLS weighted residuals
+            return npy.concatenate((rw, prior*X), axis=1), cost, r
+        return evaluate
+
+    x = npy.zeros(len(names))
+    evaluate = evaluator(batch_loads(BatchPropeller(name, **params), names))
+    x, iterations = _search(evaluate, x, lower, upper, maxit)
+    if Prop is not None:
+        # finish on the propeller the calibration is written to
+        evaluate = evaluator(PropellerLoads(Prop, names))
+        x, more = _search(evaluate, x, lower, upper, maxit)
+        iterations += more
+
+    r0 = evaluate(npy.zeros((1, len(names))))[2]
+    r = evaluate(x[None, :])[2]
+    Fit = OrderedDict()
+    Fit['name'] = name
+    Fit['model'] = 'BatchPropeller' if Prop is None else 'ACPropeller'
+    for i, n in enumerate(names):
+        Fit[n] = float(p0[i] + x[i]*scale[i])
+    inliers = npy.abs(r[0]) <= 3*f
+    Fit['rms0'] = float(npy.sqrt(npy.mean(r0[0, inliers]**2))) if inliers.any() else npy.nan
+    Fit['rms'] = float(npy.sqrt(npy.mean(r[0, inliers]**2))) if inliers.any() else npy.nan
+    Fit['nThrust'], Fit['nTorque'] = len(thrust[0]), len(torque[0])
+    kind = ['thrust']*len(thrust[0]) + ['torque']*len(torque[0])
+    N = npy.concatenate((thrust[0], torque[0]))
+    Fit['outliers'] = [(kind[i], float(N[i]), float(r[0, i])) for i in range(nData)
+                       if not inliers[i]]
+    Fit['iterations'] = iterations
+    return Fit
+
+
+def calibrate(Prop, **options):
+    """
+    Returns the calibration of one Aerothon ACPropeller (None without data)
+
+    Inputs:
+        names - parameters to fit (default every entry of FIT)
+        scale - soft-L1 loss scale as a relative error
+        prior - pull towards the prop file values per parameter scale
+        maxit - Levenberg-Marquardt iterations
+        surrogate - fit the BatchPropeller surrogate only (the result cannot be
+                    applied to the propeller)
+    """
+    return calibrate_task(prop_task(Prop, **options))
+
+
+def calibrate_props(Props, processes=None, **options):
+    """
+    Returns the calibrations of several propellers fitted in a process pool
+    (processes=1 runs serially)
+    """
+    tasks = [prop_task(Prop, **options) for Prop in Props]
+    if processes == 1 or len(tasks) <= 1:
+        return [calibrate_task(task) for task in tasks]
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(calibrate_task, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def apply_calibration(Prop, Fit):
+    """
+    Sets the calibrated blade parameters on an ACPropeller. Raises ValueError
+    for a fit of the BatchPropeller surrogate only.
+    """
+    if Fit.get('model') != 'ACPropeller':
+        raise ValueError("'%s' was fitted on the %s surrogate, not on the ACPropeller" %
+                         (Fit['name'], Fit.get('model')))
+    units = _units()
+    for name in FIT:
+        if name in Fit:
+            setattr(Prop, name, Fit[name]*units.get(name, 1))
+
+
+def print_calibration(Fit, Prop=None):
+    """
+    Prints a calibration next to the prop file values
+    """
+    if Fit is None:
+        print('   no test data')
+        return
+    print('%s (%d thrust, %d torque points, %d iterations)' %
+          (Fit['name'], Fit['nThrust'], Fit['nTorque'], Fit['iterations']))
+    current = {}
+    if Prop is not None:
+        from Aerothon.scalar.units import RAD
+        current = {'dAlpha': value_of(Prop.dAlpha, RAD), 'CLSlope': value_of(Prop.CLSlope, 1/RAD),
+                   'CDCurve': value_of(Prop.CDCurve), 'CDp': value_of(Prop.CDp),
+                   'Solidity': value_of(Prop.Solidity)}
+    for name in FIT:
+        if name in Fit:
+            show = (lambda v: npy.degrees(v)) if name == 'dAlpha' else (lambda v: v)
+            unit = 'deg' if name == 'dAlpha' else ''
+            line = '   %-9s %10.4f %-4s' % (name, show(Fit[name]), unit)
+            if name in current:
+                line += ' (file %.4f)' % show(current[name])
+            print(line)
+    print('   rms error of the other points %.1f%% -> %.1f%%' % (100*Fit['rms0'], 100*Fit['rms']))
+    for kind, N, error in Fit['outliers']:
+        print('   outlier: %s at %.0f rpm off by %+.0f%%' % (kind, N, 100*error))
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    import time
+    from Propulsion.tradestudy import PROPS, load_part, available
+
+    args = sys.argv[1:]
+    processes = int(args[args.index('-j') + 1]) if '-j' in args else None
+
+    Props = [load_part(part) for part in available(PROPS)] # skips parts that do not import
+    start = time.time()
+    Fits = calibrate_props(Props, processes)
+    print('%d propellers calibrated in %.2f s' % (len(Props), time.time() - start))
+    for Prop, Fit in zip(Props, Fits):
+        print_calibration(Fit, Prop)
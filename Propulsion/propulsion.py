@@ -1,5 +1,5 @@
 from __future__ import division # let 5/2 = 2.5 rather than 2
-#from os import environ as _environ; _environ["scalar_off"] = "off"
+# unit-free fast mode: set scalar_off=off in the environment (see Tools/fastmode.py)
 #==============================================================================#
 # TITLE
 #==============================================================================#
@@ -21,18 +21,13 @@ import os
 import sys
 import numpy as npy
 
-# (USER) set-up directories
-trunkDir = r'C:\eclipse\workspace\AircraftDesign\trunk'
-BAPDir = os.path.join(trunkDir,r'Aircraft_Models\Reg2018Aircraft_UCBearForce\BAP')
-
-# link path to Aerothon
-sys.path.append(trunkDir)
-
 # import Aerothon modules
 from Aerothon.scalar.units import IN, LBF, PSFC, SEC, ARCDEG, FT, OZF, RPM, HP, inHg
 from Aerothon.scalar.units import AsUnit
 from Aerothon.ACPropulsion import ACPropulsion
 
+from Tools.overrides import apply_overrides
+
 # Hacker Powerplant
 #sys.path.append(os.path.join(BAPDir,r'Propulsion\Propellers'))
 from Propellars.APC_22x12E import Prop
@@ -49,17 +44,29 @@ from Motors.Scorpion250KV import Motor
 #==============================================================================#
 # PROPULSION MODEL
 #==============================================================================#
-# Set Propulsion properties
-Propulsion = ACPropulsion(Prop,Motor)
-Propulsion.Alt  = 0*FT
-Propulsion.Vmax = 60*FT/SEC
-Propulsion.nV   = 20
+def build_propulsion(overrides=None):
+    """
+    Returns a freshly built propulsion model for the Prop and Motor imported
+    above (the part definitions themselves are shared). Entries of overrides
+    starting with 'Propulsion.' are applied after the default definition.
+    """
+    # Set Propulsion properties
+    Propulsion = ACPropulsion(Prop,Motor)
+    Propulsion.Alt  = 0*FT
+    Propulsion.Vmax = 60*FT/SEC
+    Propulsion.nV   = 20
+
+    apply_overrides(Propulsion, 'Propulsion', overrides)
+
+    return Propulsion
 
 #==============================================================================#
 # VISUALIZATION & RESULTS
 #==============================================================================#
 if __name__ == '__main__':
     import pylab as pyl
+
+    Propulsion = build_propulsion()
    
     print "Static Thrust :", AsUnit( Propulsion.T(0*FT/SEC), "lbf")
     
@@ -0,0 +1,307 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# teststand.py: streaming ingestion of raw test-stand logs
+#
+# Test data used to be typed into the motor and propeller files as tuples
+# with a per-session STDCorrection(pressure, temperature) and a 19.5 in torque
+# Arm. ingest() reads a raw test-stand log instead
+#    rpm, load, arm, current, voltage, pressure, temperature     (CSV header)
+# in chunks of rows, so the memory used does not grow with the length of the
+# log:
+#    -> the standard day correction (29.92 inHg, 15 C density over the test
+#       density) is applied to every load-cell reading as one array operation
+#    -> a sample is steady when the rpm and load over the last `window`
+#       samples vary less than tolRPM/tolLoad (relative standard deviation)
+#       and the arm did not change; rolling sums carry the last window
+#       samples from one chunk to the next
+#    -> every run of at least minSamples steady samples (a plateau) becomes
+#       one averaged operating point; start-up, throttle steps and spin-down
+#       are dropped
+# Plateaus logged with an arm are torque points (load x arm), plateaus with
+# arm = 0 are thrust points (load). The result gives Motor.TestData,
+# Prop.ThrustData and Prop.TorqueData with units, and the plain arrays of
+# Propulsion/motorfit.py and Propulsion/propfit.py.
+#
+#    Data = ingest('logs/hacker_2020-01-18.csv', load='ozf', arm='in')
+#    Motor.TestData, Prop.TorqueData = Data.TestData(), Data.TorqueData()
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import itertools
+import numpy as npy
+
+#==============================================================================#
+# UNITS AND STANDARD DAY
+#==============================================================================#
+COLUMNS = ('rpm', 'load', 'arm', 'current', 'voltage', 'pressure', 'temperature')
+
+# unit name -> factor to SI (N, m, Pa)
+FORCE_UNITS    = {'N': 1.0, 'ozf': 4.4482216152605/16, 'lbf': 4.4482216152605,
+                  'g': 9.80665e-3, 'kg': 9.80665}
+LENGTH_UNITS   = {'m': 1.0, 'mm': 1e-3, 'cm': 1e-2, 'in': 0.0254}
+PRESSURE_UNITS = {'Pa': 1.0, 'hPa': 100.0, 'kPa': 1000.0, 'inHg': 3386.389}
+
+P_STD = 101325.0    # standard day pressure [Pa] (29.92 inHg)
+T_STD = 288.15      # standard day temperature [K]
+
+
+def kelvin(T, unit='C'):
+    """
+    Returns temperatures in K from 'C', 'F' or 'K'
+    """
+    T = npy.asarray(T, dtype=float)
+    if unit == 'C':
+        return T + 273.15
+    if unit == 'F':
+        return (T - 32)/1.8 + 273.15
+    return T
+
+
+def std_correction(P, T):
+    """
+    Returns the standard day correction (standard density over test density)
+    for arrays of pressure P [Pa] and temperature T [K], the vectorized
+    counterpart of Aerothon's STDCorrection
+    """
+    return (P_STD/npy.asarray(P, dtype=float))*(npy.asarray(T, dtype=float)/T_STD)
+
+#==============================================================================#
+# STEADY STATE FILTER
+#==============================================================================#
+class TestStandReader(object):
+    """
+    Streaming steady-state filter. feed() takes blocks of raw samples in SI
+    (columns of COLUMNS, the load already corrected to standard day) and keeps
+    at most window samples and one open plateau between blocks.
+
+    Inputs:
+        window     - samples in the steadiness window
+        minSamples - steady samples needed for an operating point
+        tolRPM     - largest relative standard deviation of the rpm
+        tolLoad    - largest relative standard deviation of the load
+    """
+    def __init__(self, window=50, minSamples=100, tolRPM=0.01, tolLoad=0.03):
+        self.window = window
+        self.minSamples = minSamples
+        self.tolRPM = tolRPM
+        self.tolLoad = tolLoad
+        self.points = []            # (rpm, load, arm, current, voltage, samples)
+        self.samples = 0
+        self._carry = npy.zeros((0, 6))
+        self._open = None           # sums and count of a plateau still running
+
+    def feed(self, rpm, load, arm, current, voltage):
+        """
+        Adds a block of samples (arrays of equal length)
+        """
+        block = npy.column_stack([rpm, load, arm, current, voltage, npy.zeros(len(rpm))])
+        block[:, 5] = ~npy.all(npy.isfinite(block[:, :5]), axis=1)   # bad rows
+        block[~npy.isfinite(block)] = 0.0
+        self.samples += len(block)
+        data = npy.concatenate((self._carry, block))
+        nCarry, w = len(self._carry), self.window
+
+        def window_sum(x):
+            c = npy.concatenate(([0.0], npy.cumsum(x)))
+            i = npy.arange(nCarry, len(data)) + 1
+            return c[i] - c[npy.maximum(i - w, 0)]
+
+        steady = npy.arange(nCarry, len(data)) + 1 >= w     # full window available
+        for column, tol in ((0, self.tolRPM), (1, self.tolLoad)):
+            x = data[:, column]
+            mean = window_sum(x)/w
+            var = npy.maximum(window_sum(x**2)/w - mean**2, 0.0)
+            steady &= npy.sqrt(var) <= tol*npy.abs(mean)
+        changes = npy.concatenate(([0.0], npy.diff(data[:, 2]) != 0)) + data[:, 5]
+        steady &= window_sum(changes) == 0
+
+        self._plateaus(block, steady)
+        self._carry = data[max(len(data) - w, 0):]
+
+    def _plateaus(self, block, steady):
+        values = npy.column_stack((block[:, :5], npy.ones(len(block))))
+        sums = npy.concatenate((npy.zeros((1, 6)), npy.cumsum(values*steady[:, None], axis=0)))
+        edges = npy.diff(npy.concatenate(([0], steady.astype(int), [0])))
+        starts, ends = npy.nonzero(edges == 1)[0], npy.nonzero(edges == -1)[0]
+        if self._open is not None and (len(starts) == 0 or starts[0] != 0):
+            self._close(self._open)
+            self._open = None
+        for start, end in zip(starts, ends):
+            run = sums[end] - sums[start]
+            if start == 0 and self._open is not None:
+                run, self._open = run + self._open, None
+            if end == len(block):
+                self._open = run        # may continue in the next block
+            else:
+                self._close(run)
+
+    def _close(self, run):
+        if run[5] >= self.minSamples:
+            self.points.append(tuple(run[:5]/run[5]) + (int(run[5]),))
+
+    def finish(self):
+        """
+        Closes the last plateau and returns the operating points
+        """
+        if self._open is not None:
+            self._close(self._open)
+            self._open = None
+        return TestStandData(self.points, self.samples)
+
+#==============================================================================#
+# TEST DATA
+#==============================================================================#
+class TestStandData(object):
+    """
+    Averaged operating points of a test-stand log (plain SI)
+    """
+    def __init__(self, points, samples=0):
+        points = npy.array(points, dtype=float).reshape(-1, 6)
+        self.samples = samples
+        self.rpm, self.load, self.arm = points[:, 0], points[:, 1], points[:, 2]
+        self.current, self.voltage, self.count = points[:, 3], points[:, 4], points[:, 5]
+        self.torque = self.arm > 0
+
+    def thrust_si(self):
+        """
+        Returns (rpm, thrust [N]) of the thrust points
+        """
+        return self.rpm[~self.torque], self.load[~self.torque]
+
+    def torque_si(self):
+        """
+        Returns (rpm, torque [N m]) of the torque points
+        """
+        return self.rpm[self.torque], self.load[self.torque]*self.arm[self.torque]
+
+    def motor_si(self):
+        """
+        Returns (rpm, torque [N m], current [A], voltage [V]) of the torque
+        points, the test arrays of Propulsion/motorfit.py
+        """
+        rpm, Q = self.torque_si()
+        return rpm, Q, self.current[self.torque], self.voltage[self.torque]
+
+    #--------------------------------------------------------------------------#
+    def TestData(self):
+        """
+        Returns ACMotor TestData tuples (RPM, Torque, Current, Voltage)
+        """
+        from Aerothon.scalar.units import RPM, A, V, M, KG, SEC
+
+        NM = KG*M**2/SEC**2
+        return [(n*RPM, q*NM, i*A, u*V) for n, q, i, u in zip(*self.motor_si())]
+
+    def ThrustData(self):
+        """
+        Returns ACPropeller ThrustData tuples (RPM, Thrust)
+        """
+        from Aerothon.scalar.units import RPM, M, KG, SEC
+
+        NEWTON = KG*M/SEC**2
+        return [(n*RPM, t*NEWTON) for n, t in zip(*self.thrust_si())]
+
+    def TorqueData(self):
+        """
+        Returns ACPropeller TorqueData tuples (RPM, Torque), None without
+        torque points
+        """
+        from Aerothon.scalar.units import RPM, M, KG, SEC
+
+        NM = KG*M**2/SEC**2
+        points = [(n*RPM, q*NM) for n, q in zip(*self.torque_si())]
+        return points or None
+
+#==============================================================================#
+# CSV LOGS
+#==============================================================================#
+def read_chunks(filename, chunksize=50000, columns=COLUMNS):
+    """
+    Yields blocks of a CSV log as dictionaries of float arrays (missing or
+    unreadable values are nan). The header names the columns, in any order
+    and case; a missing arm column reads as 0 (thrust only).
+    """
+    with open(filename) as f:
+        header = [name.strip().lower() for name in f.readline().split(',')]
+        missing = [name for name in columns if name not in header and name != 'arm']
+        if missing:
+            raise ValueError("%s: no column %s (header %s)" % (filename, ', '.join(missing), header))
+        names = [name for name in columns if name in header]
+        usecols = [header.index(name) for name in names]
+        while True:
+            lines = list(itertools.islice(f, chunksize))
+            if not lines:
+                break
+            block = npy.genfromtxt(lines, delimiter=',', usecols=usecols, filling_values=npy.nan)
+            block = npy.asarray(block, dtype=float).reshape(-1, len(names))
+            chunk = dict((name, block[:, k]) for k, name in enumerate(names))
+            chunk.setdefault('arm', npy.zeros(len(block)))
+            yield chunk
+
+
+def ingest(filename, chunksize=50000, load='ozf', arm='in', pressure='inHg', temperature='C',
+           **options):
+    """
+    Returns the TestStandData of a raw test-stand log
+
+    Inputs:
+        chunksize             - rows read at a time
+        load, arm, pressure   - units of the load cell, arm and barometer
+                                columns (see FORCE_UNITS, LENGTH_UNITS,
+                                PRESSURE_UNITS)
+        temperature           - 'C', 'F' or 'K'
+        options               - TestStandReader settings (window, minSamples,
+                                tolRPM, tolLoad)
+    """
+    Reader = TestStandReader(**options)
+    for chunk in read_chunks(filename, chunksize):
+        STD = std_correction(chunk['pressure']*PRESSURE_UNITS[pressure],
+                             kelvin(chunk['temperature'], temperature))
+        Reader.feed(chunk['rpm'], chunk['load']*FORCE_UNITS[load]*STD,
+                    chunk['arm']*LENGTH_UNITS[arm], chunk['current'], chunk['voltage'])
+    return Reader.finish()
+
+
+def print_points(Data):
+    """
+    Prints the operating points of a log [rpm, ozf, in*ozf, A, V]
+    """
+    ozf = FORCE_UNITS['ozf']
+    print('%d samples -> %d thrust and %d torque points' %
+          (Data.samples, npy.sum(~Data.torque), npy.sum(Data.torque)))
+    for k in range(len(Data.rpm)):
+        kind = 'torque' if Data.torque[k] else 'thrust'
+        value = Data.load[k]*Data.arm[k]/(ozf*0.0254) if Data.torque[k] else Data.load[k]/ozf
+        print('   %-6s %7.0f rpm %9.2f %-6s %6.1f A %6.2f V (%d samples)' %
+              (kind, Data.rpm[k], value, 'in*ozf' if Data.torque[k] else 'ozf',
+               Data.current[k], Data.voltage[k], Data.count[k]))
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    import time
+
+    if len(sys.argv) < 2:
+        print('usage: python -m Propulsion.teststand log.csv [log.csv ...]')
+        sys.exit(1)
+
+    try:
+        from Aerothon.scalar.units import inHg, K
+        from Aerothon.AeroUtil import STDCorrection
+        print('STDCorrection(29.9 inHg, 23.9 C) Aerothon %.5f, vectorized %.5f' %
+              (STDCorrection(29.9*inHg, (23.9 + 273.15)*K),
+               std_correction(29.9*PRESSURE_UNITS['inHg'], 23.9 + 273.15)))
+    except ImportError:
+        pass
+
+    for filename in sys.argv[1:]:
+        start = time.time()
+        Data = ingest(filename)
+        print('%s (%.2f s)' % (filename, time.time() - start))
+        print_points(Data)
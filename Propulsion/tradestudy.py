@@ -0,0 +1,289 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# tradestudy.py: powerplant trade study across the parts library
+#
+# Every motor x propeller x battery x speed controller combination of the parts
+# library is matched (Propulsion/matched.py) in a process pool. Combinations
+# drawing more current than Motor.Imax, the speed controller Imax or the
+# battery C-rating allows are rejected; the rest are ranked by static thrust,
+# thrust at lift-off speed and system weight.
+#
+# The matching runs in two passes:
+#    screening - the fast batch model (the BatchPropeller surrogate, checked
+#                against ACPropeller by propbatch.surrogate, and the motor
+#                behind the battery and speed controller resistance). It only
+#                rejects combinations whose current exceeds a limit by more
+#                than MARGIN.
+#    recheck   - every other combination, borderline ones included, is matched
+#                again through ACPropulsion (propulsion_point) and the limits
+#                are applied to those values. The ranking uses these values
+#                only.
+#
+# Usage:
+#    python -m Propulsion.tradestudy [--vlo 40] [--alt 0] [--margin 0.25] [-j 4]
+#    (lift-off speed in ft/s, field density altitude in ft)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import sys
+import time
+import warnings
+import importlib
+import itertools
+import traceback
+import multiprocessing
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# PARTS LIBRARY
+#==============================================================================#
+# (USER) parts as (module, name) pairs, add new definitions here
+MOTORS = [('Propulsion.Motors.Hacker_A50_14L', 'Motor'),
+          ('Propulsion.Motors.Scorpion250KV', 'Motor')]
+
+PROPS = [('Propulsion.Propellars.APC_20x8E', 'Prop'),
+         ('Propulsion.Propellars.APC_22x12E', 'Prop'),
+         ('Propulsion.Propellars.APC_24x12E', 'Prop')]
+
+BATTERIES = [('Propulsion.Batteries.Turnigy_6Cell_3000', 'Turnigy_6Cell_3000')]
+
+ESCS = [('Propulsion.SpeedControllers.Phoenix', 'Phoenix10'),
+        ('Propulsion.SpeedControllers.Phoenix', 'Phoenix25'),
+        ('Propulsion.SpeedControllers.Phoenix', 'Phoenix100'),
+        ('Propulsion.SpeedControllers.Phoenix', 'X5')]
+
+
+def load_part(part):
+    """
+    Returns the part object named by a (module, name) pair
+    """
+    module, name = part
+    return getattr(importlib.import_module(module), name)
+
+
+def available(parts):
+    """
+    Returns the parts that import, warning about the ones that do not
+    """
+    good = []
+    for part in parts:
+        try:
+            load_part(part)
+            good.append(part)
+        except Exception:
+            warnings.warn('Skipping %s.%s: %s' % (part[0], part[1],
+                          traceback.format_exc().strip().splitlines()[-1]))
+    return good
+
+#==============================================================================#
+# EVALUATION
+#==============================================================================#
+# fraction a screening current may exceed a limit by and still be rechecked
+MARGIN = 0.25
+
+
+def evaluate(combo, V_LO, h, nV=11, margin=MARGIN):
+    """
+    Screens one combination with the batch model and returns an ordered
+    dictionary of plain floats (thrust lbf, current A, weight lbf). 'Rejected'
+    names the limits the current exceeds by more than margin; a screening
+    that fails rejects nothing ('Screening' holds the error) and leaves the
+    combination to recheck.
+
+    Inputs:
+        combo - (motor, prop, battery, esc) as (module, name) pairs
+        V_LO  - lift-off speed [m/s]
+        h     - field density altitude [m]
+    """
+    from Aerothon.scalar.units import LBF
+    from Propulsion.propbatch import surrogate
+    from Propulsion.matched import BatchMotor, match
+
+    Motor, Prop, Battery, ESC = [load_part(part) for part in combo]
+    result = OrderedDict([('Motor', Motor.name), ('Prop', Prop.name),
+                          ('Battery', combo[2][1]), ('ESC', combo[3][1])])
+    result['Weight'] = sum(value_of(getattr(part, 'Weight', 0*LBF), LBF)
+                           for part in (Motor, Prop, Battery, ESC))
+    result['Rejected'] = result['Screening'] = ''
+    try:
+        Bprop = surrogate(Prop)
+        Bmotor = BatchMotor.from_motor(Motor, Battery, ESC)
+        V = npy.linspace(0, V_LO, nV)
+        point = match(Bprop, Bmotor, V, h)
+
+        NEWTON_LBF = 1/4.4482216152605
+        result['Tstatic'] = float(point['T'][0])*NEWTON_LBF
+        result['T_LO']    = float(point['T'][-1])*NEWTON_LBF
+        result['Imax']    = float(npy.max(point['I']))
+        result['Nstatic'] = float(point['N'][0])
+
+        result['Rejected'] = _limits(result, Motor, Battery, ESC, margin)
+    except Exception:
+        result['Screening'] = traceback.format_exc().strip().splitlines()[-1]
+    return result
+
+
+def _evaluate_task(task):
+    return evaluate(*task)
+
+
+def _limits(result, Motor, Battery, ESC, margin=0.0):
+    """
+    Returns the names of the current limits result['Imax'] exceeds by more
+    than the fraction margin
+    """
+    from Aerothon.scalar.units import A
+
+    limits = [('Motor.Imax', Motor.Imax), ('ESC.Imax', ESC.Imax),
+              ('Battery C-rating', Battery.Imax)]
+    return ', '.join(name for name, limit in limits
+                     if result['Imax'] > value_of(limit, A)*(1 + margin))
+
+
+def recheck(result, combo, V_LO, h):
+    """
+    Returns a copy of an evaluate() result with the static and lift-off
+    thrust and the current of ACPropulsion's own matched solution
+    ('Checked' True) and the limits applied to them again
+
+    Inputs:
+        combo - (motor, prop, battery, esc) as (module, name) pairs
+        V_LO  - lift-off speed [m/s]
+        h     - field density altitude [m]
+    """
+    from Aerothon.scalar.units import M, SEC, FT
+    from Aerothon.ACPropulsion import ACPropulsion
+    from Propulsion.matched import propulsion_point
+
+    Motor, Prop, Battery, ESC = [load_part(part) for part in combo]
+    result = OrderedDict(result)
+    parts = Motor.Battery, Motor.SpeedController
+    try:
+        Motor.Battery, Motor.SpeedController = Battery, ESC
+        Propulsion = ACPropulsion(Prop, Motor)
+        Propulsion.Alt = 0*FT
+        Propulsion.Vmax = max(V_LO, 1.0)*M/SEC
+        static = propulsion_point(Propulsion, 0.0, h)
+        liftoff = propulsion_point(Propulsion, V_LO, h)
+
+        NEWTON_LBF = 1/4.4482216152605
+        result['Tstatic'] = static['T']*NEWTON_LBF
+        result['T_LO']    = liftoff['T']*NEWTON_LBF
+        result['Imax']    = max(static['I'], liftoff['I'])
+        result['Nstatic'] = static['N']
+        result['Rejected'] = _limits(result, Motor, Battery, ESC)
+    except Exception:
+        result['Rejected'] = traceback.format_exc().strip().splitlines()[-1]
+    finally:
+        Motor.Battery, Motor.SpeedController = parts
+    result['Checked'] = True
+    return result
+
+
+def _recheck_task(task):
+    return recheck(*task)
+
+
+def _run(function, tasks, processes):
+    """
+    Maps function over tasks in a process pool (processes=1 runs serially)
+    """
+    if processes == 1 or len(tasks) <= 1:
+        return [function(task) for task in tasks]
+    pool = multiprocessing.Pool(processes)
+    try:
+        return pool.map(function, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _rank(results):
+    return sorted(results, key=lambda r: (-round(r['Tstatic'], 2), -round(r['T_LO'], 2),
+                                          r['Weight']))
+
+#==============================================================================#
+# TRADE STUDY
+#==============================================================================#
+def trade_study(V_LO, h=None, motors=MOTORS, props=PROPS, batteries=BATTERIES, escs=ESCS,
+                processes=None, margin=MARGIN):
+    """
+    Returns (feasible, rejected) lists of result dictionaries. The screening
+    rejects the combinations whose current exceeds a limit by more than
+    margin; all the others are matched again through ACPropulsion, and the
+    feasible ones are ranked on those values by static thrust, then thrust at
+    V_LO (both descending), then system weight (ascending).
+
+    Inputs:
+        V_LO      - lift-off speed (Aerothon quantity)
+        h         - field density altitude (Aerothon quantity, default sea level)
+        processes - number of worker processes (default: one per cpu, 1 runs serially)
+        margin    - screening current error allowed before a limit rejects
+                    without a recheck (None rechecks every combination)
+    """
+    from Aerothon.scalar.units import M, SEC
+
+    combos = list(itertools.product(available(motors), available(props),
+                                    available(batteries), available(escs)))
+    V_LO, h = value_of(V_LO, M/SEC), 0.0 if h is None else value_of(h, M)
+    if margin is None:
+        margin = npy.inf
+    results = _run(_evaluate_task, [(combo, V_LO, h, 11, margin) for combo in combos], processes)
+    for result, combo in zip(results, combos):
+        result['Checked'] = False
+        result['combo'] = combo
+
+    tasks = [(r, r['combo'], V_LO, h) for r in results if not r['Rejected']]
+    checked = _run(_recheck_task, tasks, processes)
+    feasible = _rank([r for r in checked if not r['Rejected']])
+    rejected = [r for r in checked if r['Rejected']] + [r for r in results if r['Rejected']]
+    return feasible, rejected
+
+
+def print_study(feasible, rejected):
+    """
+    Prints the ranked table of feasible combinations and the rejections
+    """
+    print('%4s  %-16s %-14s %-20s %-11s %8s %8s %7s %8s' % ('Rank', 'Motor', 'Prop', 'Battery',
+          'ESC', 'T0 [lbf]', 'TLO[lbf]', 'I [A]', 'W [lbf]'))
+    for rank, r in enumerate(feasible):
+        print('%4d  %-16s %-14s %-20s %-11s %8.2f %8.2f %7.1f %8.3f' % (rank + 1,
+              r['Motor'], r['Prop'], r['Battery'], r['ESC'],
+              r['Tstatic'], r['T_LO'], r['Imax'], r['Weight']))
+    print('(matched through ACPropulsion)')
+    print('')
+    for r in rejected:
+        print('Rejected %s / %s / %s / %s : %s%s' % (r['Motor'], r['Prop'], r['Battery'], r['ESC'],
+              r['Rejected'], '' if r['Checked'] else ' (screening)'))
+
+#==============================================================================#
+# COMMAND LINE
+#==============================================================================#
+if __name__ == '__main__':
+    from Aerothon.scalar.units import FT, SEC
+
+    args = sys.argv[1:]
+    V_LO, Alt, processes, margin = 40.0, 0.0, None, MARGIN
+    while args:
+        arg = args.pop(0)
+        if arg == '--vlo':
+            V_LO = float(args.pop(0))
+        elif arg == '--alt':
+            Alt = float(args.pop(0))
+        elif arg == '--margin':
+            margin = float(args.pop(0))
+        elif arg == '-j':
+            processes = int(args.pop(0))
+
+    start = time.time()
+    feasible, rejected = trade_study(V_LO*FT/SEC, Alt*FT, processes=processes, margin=margin)
+    print_study(feasible, rejected)
+    print('%d combinations in %.1f s' % (len(feasible) + len(rejected), time.time() - start))
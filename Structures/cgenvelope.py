@@ -0,0 +1,222 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# cgenvelope.py: Monte Carlo CG, static margin and trim alpha envelope
+#
+# Many masses in the model are flagged ##MASS## or "guess for now", and the CG
+# limits (AFT = +12%, FWD = -22% of the MAC about the design CG) were checked
+# by hand with PlotCMPolars(..., XcgOffsets=(+0.05, -0.05)). cg_envelope
+# samples every mass item of the aircraft (Structures/massprops.py) inside
+# user-declared bands
+#    BANDS = [('*Servo*', 0.10, 0.25),    (name pattern, weight fraction, in)
+#             ('*',       0.05, 0.25)]    first matching pattern applies
+# and evaluates for every sample
+#    -> the CG (array sums over the items, no Aerothon in the loop), as an
+#       offset from the CG of the nominal items, Mass.cg_si(). The items drop
+#       the residuals massprops does not keep, so their CG is not exactly
+#       Aircraft.CG(); measuring from it keeps that difference out of the
+#       offsets, which are then applied to the design CG of the trim model
+#    -> the static margin SM = (Xnp - Xcg)/MAC with the neutral point of the
+#       design
+#    -> the trim alpha of the linearized polars about the design CG,
+#       CM = CM0 + CMa*alpha + (CL0 + CLa*alpha)*(Xcg - Xcg0)/MAC = 0
+# The samples run as independently seeded batches in a process pool, and the
+# result is the distributions and the probabilities of exceeding the AFT/FWD
+# limits.
+#
+#    python -m Structures.cgenvelope -n 50000 -j 4
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import fnmatch
+import multiprocessing
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+from Structures.massprops import MassProperties, IN_M
+
+#==============================================================================#
+# UNCERTAINTY BANDS
+#==============================================================================#
+# (item name or weight group pattern, +- weight fraction, +- x position [in])
+BANDS = [('*Servo*',    0.10, 0.25), # servo weights and positions vary build to build
+         ('*Battery*',  0.03, 0.50), # battery slides in the nose
+         ('*',          0.05, 0.25)]
+
+# CG limits as fractions of the MAC about the design CG
+AFT_LIMIT = +0.12
+FWD_LIMIT = -0.22
+
+
+def item_bands(Mass, bands=BANDS):
+    """
+    Returns the weight fraction and position [m] band of every mass item
+    (first pattern matching the item name or its weight group)
+    """
+    dW = npy.zeros(Mass.n)
+    dX = npy.zeros(Mass.n)
+    for i, name in enumerate(Mass.names):
+        group = Mass.groupNames[Mass.group[i]]
+        for pattern, weight, position in bands:
+            if fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(group, pattern):
+                dW[i], dX[i] = weight, position*IN_M
+                break
+    return dW, dX
+
+#==============================================================================#
+# LINEARIZED TRIM
+#==============================================================================#
+class TrimModel(object):
+    """
+    Linear CL and CM about the design CG (plain floats, alpha in radians)
+
+    Inputs:
+        Xcg0 - design CG [m], MAC - [m], Xnp - neutral point [m]
+        CL0, CLa, CM0, CMa - intercepts and slopes [1/rad]
+    """
+    def __init__(self, Xcg0, MAC, Xnp, CL0, CLa, CM0, CMa):
+        self.Xcg0, self.MAC, self.Xnp = Xcg0, MAC, Xnp
+        self.CL0, self.CLa, self.CM0, self.CMa = CL0, CLa, CM0, CMa
+
+    @classmethod
+    def from_aircraft(cls, Aircraft):
+        """
+        Returns the trim model of a built aircraft, linearized at Alpha_Zero_CM
+        """
+        from Aerothon.scalar.units import RAD, IN
+        from Tools.report import static_margin
+
+        alpha = Aircraft.Alpha_Zero_CM
+        CLa = value_of(Aircraft.dCL_da(), 1/RAD)
+        CMa = value_of(Aircraft.dCM_da(), 1/RAD)
+        a = value_of(alpha, RAD)
+        CL0 = value_of(Aircraft.CL(alpha)) - CLa*a
+        CM0 = value_of(Aircraft.CM(alpha)) - CMa*a
+        Xcg0 = value_of(Aircraft.CG(), IN)[0]*IN_M
+        MAC = value_of(Aircraft.Wing.MAC(), IN)*IN_M
+        return cls(Xcg0, MAC, Xcg0 + static_margin(Aircraft)*MAC, CL0, CLa, CM0, CMa)
+
+    def evaluate(self, Xcg):
+        """
+        Returns the CG offset (fraction of MAC), static margin and trim alpha
+        [deg] of arrays of CG positions [m]
+        """
+        d = (Xcg - self.Xcg0)/self.MAC
+        SM = (self.Xnp - Xcg)/self.MAC
+        with npy.errstate(divide='ignore', invalid='ignore'):
+            alpha = -(self.CM0 + self.CL0*d)/(self.CMa + self.CLa*d)
+        return d, SM, npy.degrees(alpha)
+
+#==============================================================================#
+# MONTE CARLO
+#==============================================================================#
+def sample_batch(task):
+    """
+    Returns the CG offsets, static margins and trim alphas of one batch
+
+    Inputs:
+        task - (seed, nSample, m, X, dW, dX, Xref, Trim) with the masses m [kg],
+               positions X [m] and bands of the items, and the CG [m] of the
+               nominal items the sampled CGs are measured from
+    """
+    seed, nSample, m, X, dW, dX, Xref, Trim = task
+    rng = npy.random.RandomState(seed)
+    ms = m*(1 + dW*rng.uniform(-1, 1, (nSample, len(m))))
+    Xs = X[:, 0] + dX*rng.uniform(-1, 1, (nSample, len(m)))
+    Xcg = npy.einsum('si,si->s', ms, Xs)/ms.sum(axis=1)
+    return Trim.evaluate(Trim.Xcg0 + (Xcg - Xref))
+
+
+def cg_envelope(Mass, Trim, nSample=20000, bands=BANDS, batch=5000, processes=None, seed=0):
+    """
+    Returns an ordered dictionary of the sampled distributions (dXcg fraction
+    of MAC, SM, AlphaTrim deg) and the probabilities of exceeding the AFT and
+    FWD CG limits
+
+    Inputs:
+        Mass      - MassProperties of the design
+        Trim      - TrimModel of the design
+        batch     - samples per task
+        processes - number of worker processes (default: one per cpu, 1 runs serially)
+        seed      - base seed (batch k uses seed + k)
+    """
+    n = Mass.n
+    dW, dX = item_bands(Mass, bands)
+    sizes = [min(batch, nSample - k) for k in range(0, nSample, batch)]
+    Xref = Mass.cg_si()[0]
+    tasks = [(seed + k, size, Mass.m[:n].copy(), Mass.X[:n].copy(), dW, dX, Xref, Trim)
+             for k, size in enumerate(sizes)]
+
+    if processes == 1 or len(tasks) <= 1:
+        results = [sample_batch(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(sample_batch, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+    E = OrderedDict()
+    E['dXcg'] = npy.concatenate([r[0] for r in results])
+    E['SM'] = npy.concatenate([r[1] for r in results])
+    E['AlphaTrim'] = npy.concatenate([r[2] for r in results])
+    E['P_AFT'] = npy.mean(E['dXcg'] > AFT_LIMIT)
+    E['P_FWD'] = npy.mean(E['dXcg'] < FWD_LIMIT)
+    E['P_unstable'] = npy.mean(E['SM'] <= 0)
+    return E
+
+
+def print_envelope(E):
+    """
+    Prints percentiles of the distributions and the exceedance probabilities
+    """
+    print('%-10s %9s %9s %9s %9s %9s' % ('', 'min', '5%', '50%', '95%', 'max'))
+    for name, scale in (('dXcg', 100), ('SM', 100), ('AlphaTrim', 1)):
+        values = E[name][npy.isfinite(E[name])]*scale
+        print('%-10s %9.3f %9.3f %9.3f %9.3f %9.3f' %
+              ((name,) + tuple(npy.percentile(values, (0, 5, 50, 95, 100)))))
+    print('(dXcg and SM in % MAC, AlphaTrim in deg)')
+    print('P(Xcg aft of %+.0f%% MAC)     : %.4f' % (100*AFT_LIMIT, E['P_AFT']))
+    print('P(Xcg forward of %+.0f%% MAC) : %.4f' % (100*FWD_LIMIT, E['P_FWD']))
+    print('P(statically unstable)     : %.4f' % E['P_unstable'])
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import sys
+    import time
+    from aircraft import build_aircraft
+    from Tools.cache import ComponentCache
+
+    args = sys.argv[1:]
+    nSample, processes = 50000, None
+    while args:
+        arg = args.pop(0)
+        if arg == '-n':
+            nSample = int(args.pop(0))
+        elif arg == '-j':
+            processes = int(args.pop(0))
+
+    Aircraft = build_aircraft(cache=ComponentCache())
+    Mass = MassProperties.from_component(Aircraft, 'Aircraft')
+    Trim = TrimModel.from_aircraft(Aircraft)
+
+    start = time.time()
+    E = cg_envelope(Mass, Trim, nSample, processes=processes)
+    print('%d samples of %d mass items in %.2f s' % (nSample, Mass.n, time.time() - start))
+    print_envelope(E)
+
+    import pylab as pyl
+    pyl.figure(1)
+    pyl.subplot(131); pyl.hist(100*E['dXcg'], 60); pyl.xlabel('Xcg offset (% MAC)')
+    pyl.axvline(100*AFT_LIMIT, color='r'); pyl.axvline(100*FWD_LIMIT, color='r')
+    pyl.subplot(132); pyl.hist(100*E['SM'], 60); pyl.xlabel('Static margin (% MAC)')
+    pyl.subplot(133); pyl.hist(E['AlphaTrim'][npy.isfinite(E['AlphaTrim'])], 60)
+    pyl.xlabel('Trim alpha (deg)')
+    pyl.show()
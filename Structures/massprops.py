@@ -0,0 +1,388 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# massprops.py: array-backed mass properties with weight group rollups
+#
+# Every mass item (bulkheads, components, spars, servos, gear, battery, ...)
+# is one row of contiguous arrays: weight, CG, own inertia and weight group.
+# The totals are kept as running sums
+#    M = sum m,  Mx = sum m x,  Mxx = sum m x x^T,  I0 = sum I_own
+# so the total weight, CG and the full inertia tensor about the CG
+#    I = I0 + (tr(Mxx) E - Mxx) - M (|c|^2 E - c c^T)       (parallel axis)
+# follow without visiting the items, and changing one item is an O(1) update
+# of the sums (and of the sums of its weight group). recompute() redoes the
+# sums from the arrays in one vectorized pass.
+#
+# mass_items() walks an Aerothon component tree (aircraft, fuselage, section)
+# and returns the leaves with their own MOI; whatever weight a component
+# carries itself (skin, stringers, ...) is kept as a residual item so the
+# totals match Aerothon, unless it is too light to be more than rounding.
+#
+#    Mass = MassProperties.from_component(Aircraft)
+#    Mass.update('HTail.Elevator.Servo', weight=2.0*OZF)
+#    print Mass.CG(), Mass.groups()
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+GRAVITY      = 9.80665                        # [m/s**2], weights are stored as masses
+LBF_N        = 4.4482216152605                # conversions of the Aerothon wrappers
+IN_M         = 0.0254
+SLUGFT2_KGM2 = 14.593902937206364*0.3048**2
+
+#==============================================================================#
+# MASS PROPERTIES
+#==============================================================================#
+class MassProperties(object):
+    """
+    Mass items in contiguous arrays with running totals. The _si methods take
+    and return plain SI values (N, m, kg m**2).
+
+    Inputs:
+        capacity - initial number of rows (grows by doubling)
+    """
+    def __init__(self, capacity=64):
+        self.n = 0
+        self.names = []
+        self.groupNames = []
+        self._index = {}
+        self._groupIndex = {}
+        self.m = npy.zeros(capacity)              # mass [kg]
+        self.X = npy.zeros((capacity, 3))         # CG [m]
+        self.I = npy.zeros((capacity, 3, 3))      # own inertia about own CG [kg m**2]
+        self.group = npy.zeros(capacity, dtype=int)
+        self._clear_sums()
+
+    def _clear_sums(self):
+        self.M = 0.0
+        self.Mx = npy.zeros(3)
+        self.Mxx = npy.zeros((3, 3))
+        self.I0 = npy.zeros((3, 3))
+        nGroup = max(len(self.groupNames), 1)
+        self.gM = npy.zeros(nGroup)
+        self.gMx = npy.zeros((nGroup, 3))
+
+    def _grow(self):
+        capacity = 2*len(self.m)
+        for name in ('m', 'X', 'I', 'group'):
+            old = getattr(self, name)
+            new = npy.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.n] = old[:self.n]
+            setattr(self, name, new)
+
+    def _group_of(self, name):
+        if name not in self._groupIndex:
+            self._groupIndex[name] = len(self.groupNames)
+            self.groupNames.append(name)
+            if len(self.groupNames) > len(self.gM):
+                self.gM = npy.append(self.gM, 0.0)
+                self.gMx = npy.vstack((self.gMx, npy.zeros(3)))
+        return self._groupIndex[name]
+
+    def _accumulate(self, i, sign):
+        m, x = sign*self.m[i], self.X[i]
+        self.M += m
+        self.Mx += m*x
+        self.Mxx += m*npy.outer(x, x)
+        self.I0 += sign*self.I[i]
+        g = self.group[i]
+        self.gM[g] += m
+        self.gMx[g] += m*x
+
+    #--------------------------------------------------------------------------#
+    def add_si(self, name, weight, cg, group='', inertia=None):
+        """
+        Adds a mass item
+
+        Inputs:
+            weight  - [N]
+            cg      - (x, y, z) [m]
+            group   - weight group name
+            inertia - optional 3x3 (or 3 principal) own inertia [kg m**2]
+        """
+        if name in self._index:
+            raise KeyError("Mass item '%s' already exists" % name)
+        if self.n == len(self.m):
+            self._grow()
+        i = self.n
+        self.n += 1
+        self.names.append(name)
+        self._index[name] = i
+        self.group[i] = self._group_of(group)
+        self._set(i, weight, cg, inertia)
+        self._accumulate(i, +1)
+        return i
+
+    def _set(self, i, weight, cg, inertia):
+        if weight is not None:
+            self.m[i] = weight/GRAVITY
+        if cg is not None:
+            self.X[i] = cg
+        if inertia is not None:
+            inertia = npy.asarray(inertia, dtype=float)
+            self.I[i] = npy.diag(inertia) if inertia.ndim == 1 else inertia
+
+    def update_si(self, name, weight=None, cg=None, inertia=None):
+        """
+        Changes the weight [N], CG [m] and/or own inertia of one item in O(1)
+        """
+        i = self._index[name]
+        self._accumulate(i, -1)
+        self._set(i, weight, cg, inertia)
+        self._accumulate(i, +1)
+
+    def recompute(self):
+        """
+        Redoes every running sum from the arrays (vectorized)
+        """
+        n = self.n
+        m, X = self.m[:n], self.X[:n]
+        self._clear_sums()
+        self.M = m.sum()
+        self.Mx = npy.dot(m, X)
+        self.Mxx = npy.einsum('i,ij,ik->jk', m, X, X)
+        self.I0 = self.I[:n].sum(axis=0)
+        self.gM = npy.bincount(self.group[:n], m, minlength=len(self.gM))
+        for k in range(3):
+            self.gMx[:, k] = npy.bincount(self.group[:n], m*X[:, k], minlength=len(self.gM))
+
+    #--------------------------------------------------------------------------#
+    def weight_si(self):
+        """
+        Returns the total weight [N]
+        """
+        return self.M*GRAVITY
+
+    def cg_si(self):
+        """
+        Returns the CG [m]
+        """
+        return self.Mx/self.M
+
+    def inertia_si(self, about=None):
+        """
+        Returns the 3x3 inertia tensor [kg m**2] about the CG (or a point)
+        """
+        c = self.cg_si() if about is None else npy.asarray(about, dtype=float)
+        E = npy.eye(3)
+        # second moments about c from the running sums about the origin
+        S = self.Mxx - npy.outer(self.Mx, c) - npy.outer(c, self.Mx) + self.M*npy.outer(c, c)
+        return self.I0 + npy.trace(S)*E - S
+
+    def groups_si(self):
+        """
+        Returns an ordered dictionary of weight group -> (weight [N], CG [m])
+        """
+        G = OrderedDict()
+        for g, name in enumerate(self.groupNames):
+            G[name] = (self.gM[g]*GRAVITY,
+                       self.gMx[g]/self.gM[g] if self.gM[g] != 0 else npy.zeros(3))
+        return G
+
+    def item_si(self, name):
+        """
+        Returns (weight [N], CG [m], group) of one item
+        """
+        i = self._index[name]
+        return self.m[i]*GRAVITY, self.X[i].copy(), self.groupNames[self.group[i]]
+
+    #--------------------------------------------------------------------------#
+    def add(self, name, weight, cg, group='', inertia=None):
+        """
+        Adds a mass item (Aerothon quantities)
+        """
+        from Aerothon.scalar.units import LBF, IN, SLUG, FT
+        return self.add_si(name, value_of(weight, LBF)*LBF_N, value_of(cg, IN)*IN_M, group,
+                           None if inertia is None else value_of(inertia, SLUG*FT**2)*SLUGFT2_KGM2)
+
+    def update(self, name, weight=None, cg=None, inertia=None):
+        """
+        Changes the weight, CG and/or own inertia of one item (Aerothon quantities)
+        """
+        from Aerothon.scalar.units import LBF, IN, SLUG, FT
+        self.update_si(name,
+                       None if weight is None else value_of(weight, LBF)*LBF_N,
+                       None if cg is None else value_of(cg, IN)*IN_M,
+                       None if inertia is None else value_of(inertia, SLUG*FT**2)*SLUGFT2_KGM2)
+
+    def Weight(self):
+        from Aerothon.scalar.units import LBF
+        return self.weight_si()/LBF_N*LBF
+
+    def CG(self):
+        from Aerothon.scalar.units import IN
+        return self.cg_si()/IN_M*IN
+
+    def MOI(self):
+        """
+        Returns the inertia tensor about the CG
+        """
+        from Aerothon.scalar.units import SLUG, FT
+        return self.inertia_si()/SLUGFT2_KGM2*SLUG*FT**2
+
+    def groups(self):
+        """
+        Returns an ordered dictionary of weight group -> (weight, CG)
+        """
+        from Aerothon.scalar.units import LBF, IN
+        return OrderedDict((name, (W/LBF_N*LBF, X/IN_M*IN))
+                           for name, (W, X) in self.groups_si().items())
+
+    @classmethod
+    def from_component(cls, Component, name=None):
+        """
+        Returns the mass properties of the leaves of an Aerothon component tree
+        """
+        Mass = cls()
+        for item in mass_items(Component, name):
+            Mass.add_si(*item)
+        return Mass
+
+#==============================================================================#
+# AEROTHON COMPONENT TREES
+#==============================================================================#
+# named sub-components that are not in param.Components
+PARTS = ('Wing', 'Fuselage', 'Propulsion', 'HTail', 'VTail', 'MainGear', 'NoseGear', # aircraft
+         'UpperWing', 'LowerWing', 'EndPlate',                                        # box wing
+         'Aileron', 'Elevator', 'Rudder', 'Servo',                                    # controls
+         'Nose', 'PayBay', 'Pay2Tail', 'Tail', 'FrontBulk', 'BackBulk',               # fuselage
+         'Prop', 'Motor', 'Battery', 'SpeedController')                               # propulsion
+
+
+def children(Component):
+    """
+    Returns (name, child) of the sub-components of an Aerothon component
+    """
+    found = []
+    param = getattr(Component, 'param', None)
+    for child in getattr(param, 'Components', None) or []:
+        found.append((getattr(child, 'name', '') or type(child).__name__, child))
+    for name in PARTS:
+        try:
+            child = getattr(Component, name, None)
+        except Exception: # parts that are not defined on this component
+            child = None
+        if child is not None and hasattr(child, 'Weight') and hasattr(child, 'CG'):
+            found.append((name, child))
+    return found
+
+
+def parallel_axis(m, X, about):
+    """
+    Returns the 3x3 inertia [kg m**2] of a point mass m [kg] at X about a point
+    """
+    d = npy.asarray(X, dtype=float) - about
+    return m*(npy.dot(d, d)*npy.eye(3) - npy.outer(d, d))
+
+
+def component_si(Component):
+    """
+    Returns the weight [N], CG [m] and own inertia about its CG [kg m**2]
+    (None without MOI) of an Aerothon component
+    """
+    from Aerothon.scalar.units import LBF, IN, SLUG, FT
+
+    W = value_of(Component.Weight, LBF)*LBF_N
+    X = npy.asarray(value_of(Component.CG(), IN), dtype=float)*IN_M
+    MOI = getattr(Component, 'MOI', None)
+    if MOI is None:
+        return W, X, None
+    I = npy.asarray(value_of(MOI(), SLUG*FT**2), dtype=float)*SLUGFT2_KGM2
+    return W, X, npy.diag(I) if I.ndim == 1 else I
+
+
+# residual items lighter than this fraction of their component are dropped
+RESIDUAL = 1e-3
+
+
+def mass_items_si(Component, read, name=None, group='', _seen=None):
+    """
+    Returns (name, weight [N], CG [m], group, own inertia [kg m**2]) of the
+    leaves below a component. A component's own weight (its total minus its
+    children) is an item named after the component, carrying what is left of
+    the component's inertia (clamped to positive semi-definite). Residuals lighter than RESIDUAL of the component
+    (rounding, or children the component does not count) are dropped instead
+    of being placed at the huge lever arm their tiny weight would need.
+
+    Inputs:
+        read - function(Component) returning its weight [N], CG [m] and own
+               inertia about its CG [kg m**2] (or None)
+    """
+    _seen = set() if _seen is None else _seen
+    _seen.add(id(Component))
+    name = name or getattr(Component, 'name', '') or type(Component).__name__
+    group = getattr(Component, 'WeightGroup', None) or group
+
+    W, X, I = read(Component)
+
+    items = []
+    for childName, child in children(Component):
+        if id(child) in _seen:
+            continue
+        items.extend(mass_items_si(child, read, name + '.' + childName, group, _seen))
+
+    # residual: what the component weighs itself
+    Wc = sum(item[1] for item in items)
+    Mc = sum((item[1]*item[2] for item in items), npy.zeros(3))
+    Wown = W - Wc
+    if Wown > RESIDUAL*abs(W):
+        Xown = (W*X - Mc)/Wown
+        Iown = None
+        if I is not None:
+            Iown = I - parallel_axis(Wown/GRAVITY, Xown, X)
+            for item in items:
+                Iown = Iown - parallel_axis(item[1]/GRAVITY, item[2], X)
+                if item[4] is not None:
+                    Iown = Iown - item[4]
+            # an inertia the children more than account for is clamped at zero
+            lam, V = npy.linalg.eigh(0.5*(Iown + Iown.T))
+            Iown = npy.dot(V*npy.maximum(lam, 0.0), V.T)
+        items.insert(0, (name, Wown, Xown, group, Iown))
+    return items
+
+
+def mass_items(Component, name=None, group=''):
+    """
+    Returns the mass_items_si of an Aerothon component tree
+    """
+    return mass_items_si(Component, component_si, name, group)
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+def print_groups(Mass):
+    """
+    Prints the weight group rollup [ozf, in]
+    """
+    for name, (W, X) in Mass.groups_si().items():
+        print('   %-14s %8.2f ozf   CG (%7.2f, %6.2f, %6.2f) in' %
+              ((name or '(none)',) + (W/LBF_N*16,) + tuple(X/IN_M)))
+    print('   %-14s %8.2f ozf   CG (%7.2f, %6.2f, %6.2f) in' %
+          (('Total', Mass.weight_si()/LBF_N*16) + tuple(Mass.cg_si()/IN_M)))
+
+
+if __name__ == '__main__':
+    import time
+    from aircraft import build_aircraft
+    from Tools.cache import ComponentCache
+
+    Aircraft = build_aircraft(cache=ComponentCache())
+
+    start = time.time()
+    Mass = MassProperties.from_component(Aircraft, 'Aircraft')
+    print('%d mass items collected in %.3f s' % (Mass.n, time.time() - start))
+    print_groups(Mass)
+    print('Inertia about the CG [slug ft**2]:')
+    print(Mass.inertia_si()/SLUGFT2_KGM2)
+
+    start = time.time()
+    for i in range(10000):
+        Mass.update_si(Mass.names[i % Mass.n], weight=Mass.item_si(Mass.names[i % Mass.n])[0])
+    print('10000 incremental updates in %.3f s' % (time.time() - start))
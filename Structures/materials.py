@@ -0,0 +1,476 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# materials.py: copy-on-write material handles and whole-aircraft material trades
+#
+# The build modules used to take Balsa.copy(), Ultracote.copy(), ... from the
+# Aerothon DefaultMaterialsLibrary and scale ForceDensity/AreaForceDensity of
+# the copy in place, so a material trade meant editing and rebuilding every
+# component. The names below replace the library imports one for one:
+#    from Structures.materials import Balsa, Basswood, Ultracote
+#    RibMat = Balsa.copy()                 # a handle, nothing is copied
+#    RibMat.ForceDensity *= 0.425*0.85     # stored on the handle as a factor
+# A handle reads every property through the MaterialRegistry (one Aerothon
+# material per library name, loaded on first use) and keeps only what was set
+# on it. Densities are kept as factors of the registry material, so the
+# cut-out factor of a rib or the measured scaling of a skin survives a
+# material swap, and rescaling a registry material reaches every handle.
+#
+# substitute() walks a built aircraft for the handles of its spars, ribs,
+# skins, stringers and bulkheads, swaps and/or rescales the ones matching a
+# path pattern (copy-on-write, so a handle shared with an unmatched part is
+# left alone), refreshes only the affected components and reports the weight
+# and CG change:
+#    Trade = substitute(Aircraft, 'Balsa', 'Basswood', match='*TrailingEdge*')
+#    print_trade(Trade); Trade.undo()
+#
+# check_library() builds the aircraft once with handles and once with the
+# library materials (REG2020_LIBRARY_MATERIALS=1, the build modules unchanged)
+# in fresh interpreters and compares every mass item, the weight and the CG:
+#    python -m Structures.materials --check
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import os
+import sys
+import json
+import time
+import fnmatch
+import tempfile
+import subprocess
+import numpy as npy
+
+from Tools.fastmode import ROOT_DIR, EquivalenceError
+
+# set to build with the Aerothon library materials instead of handles
+LIBRARY_ENV = 'REG2020_LIBRARY_MATERIALS'
+LIBRARY = bool(os.environ.get(LIBRARY_ENV))
+
+#==============================================================================#
+# MATERIAL REGISTRY
+#==============================================================================#
+# properties that are stored on handles as factors of the registry material
+DENSITIES = ('ForceDensity', 'AreaForceDensity', 'LinearForceDensity')
+
+
+class MaterialRegistry(object):
+    """
+    Shared Aerothon library materials with registry-wide density scales
+    """
+    def __init__(self):
+        self._materials = {}
+        self._scales = {}
+
+    def material(self, name):
+        """
+        Returns the shared Aerothon material of a library name (loaded once)
+        """
+        if name not in self._materials:
+            import Aerothon.DefaultMaterialsLibrary as Library
+            self._materials[name] = getattr(Library, name)
+        return self._materials[name]
+
+    def value(self, name, attribute):
+        """
+        Returns a property of a registry material, scaled if it is a density
+        """
+        Material = self.material(name)
+        value = getattr(Material, attribute, None) if attribute in DENSITIES else \
+                getattr(Material, attribute)
+        scale = self._scales.get(name, {}).get(attribute)
+        return value if scale is None or value is None else value*scale
+
+    def rescale(self, name, **factors):
+        """
+        Scales densities of a registry material for every handle that uses it,
+        e.g. rescale('Balsa', ForceDensity=1.2). Returns the previous scales.
+        Raises ValueError for a density the material does not define.
+        """
+        for attribute in factors:
+            if attribute not in DENSITIES:
+                raise AttributeError("'%s' is not a density (%s)" % (attribute, ', '.join(DENSITIES)))
+            if getattr(self.material(name), attribute, None) is None:
+                raise ValueError("'%s' has no %s to rescale" % (name, attribute))
+        previous = dict(self._scales.get(name, {}))
+        for attribute, factor in factors.items():
+            self._scales.setdefault(name, {})[attribute] = previous.get(attribute, 1.0)*factor
+        return previous
+
+    def restore(self, name, scales):
+        """
+        Restores the scales returned by rescale
+        """
+        self._scales[name] = dict(scales)
+
+    def state(self):
+        """
+        Returns the registry-wide density scales as a sorted, hashable tuple
+        (part of the component cache key, see Tools/cache.py)
+        """
+        state = tuple((name, tuple(sorted(scales.items())))
+                      for name, scales in sorted(self._scales.items()) if scales)
+        return state + (('library materials',),) if LIBRARY else state
+
+    def handle(self, name):
+        return MaterialHandle(name)
+
+
+REGISTRY = MaterialRegistry()
+
+
+def _restore_handle(name, overrides):
+    Handle = MaterialHandle(name)
+    Handle._overrides.update(overrides)
+    return Handle
+
+
+class MaterialHandle(object):
+    """
+    Copy-on-write view of a registry material. Reads fall through to the
+    registry; writes stay on the handle (densities as factors).
+
+    Inputs:
+        name - Aerothon library material name ('Balsa', 'Ultracote', ...)
+    """
+    def __init__(self, name):
+        object.__setattr__(self, '_name', name)
+        object.__setattr__(self, '_overrides', {})
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('__'):
+            raise AttributeError(attribute)
+        overrides = self.__dict__['_overrides']
+        if attribute in overrides:
+            factor, value = overrides[attribute]
+            if factor is None:
+                return value
+            base = REGISTRY.value(self._name, attribute)
+            return None if base is None else base*factor
+        return REGISTRY.value(self._name, attribute)
+
+    def __setattr__(self, attribute, value):
+        if attribute.startswith('_'):
+            object.__setattr__(self, attribute, value)
+            return
+        if attribute in DENSITIES and value is not None:
+            try:
+                self._overrides[attribute] = (value/REGISTRY.value(self._name, attribute), None)
+                return
+            except (TypeError, ZeroDivisionError): # no density to scale (e.g. LinearForceDensity)
+                pass
+        self._overrides[attribute] = (None, value)
+
+    def __reduce__(self):
+        # cached components re-attach to the registry of the running process
+        return _restore_handle, (self._name, self._overrides)
+
+    def __repr__(self):
+        return 'MaterialHandle(%r, %s)' % (self._name, sorted(self._overrides))
+
+    #--------------------------------------------------------------------------#
+    @property
+    def MaterialName(self):
+        return self._name
+
+    def copy(self):
+        """
+        Returns a new handle with the same material and overrides
+        """
+        return _restore_handle(self._name, self._overrides)
+
+    def swapped(self, name, scale=None):
+        """
+        Returns a copy on another registry material, keeping the density
+        factors and overrides; scale multiplies every density the new
+        material defines. Densities set as plain values (no registry density
+        to scale) follow the ratio of the first density both materials define
+        (ForceDensity for woods, AreaForceDensity for films), if any.
+        """
+        Handle = _restore_handle(name, self._overrides)
+        old = dict((attribute, REGISTRY.value(self._name, attribute)) for attribute in DENSITIES)
+        new = dict((attribute, REGISTRY.value(name, attribute)) for attribute in DENSITIES)
+        ratio = 1.0 if scale is None else scale
+        if name != self._name:
+            for attribute in DENSITIES:
+                if old[attribute] and new[attribute] is not None:
+                    ratio = ratio*(new[attribute]/old[attribute])
+                    break
+        for attribute in DENSITIES:
+            factor, value = Handle._overrides.get(attribute, (1.0, None))
+            if factor is None:
+                if value is not None:
+                    Handle._overrides[attribute] = (None, value*ratio)
+            elif new[attribute] is None:
+                # a factor of a density the new material does not define
+                if attribute in Handle._overrides and old[attribute] is not None:
+                    Handle._overrides[attribute] = (None, old[attribute]*factor*ratio)
+            elif scale is not None:
+                Handle._overrides[attribute] = (factor*scale, None)
+        return Handle
+
+
+# the library materials used by the build modules (the Aerothon library
+# materials themselves when LIBRARY_ENV is set, see check_library)
+if LIBRARY:
+    from Aerothon.DefaultMaterialsLibrary import (Balsa, Basswood, Poplar, AircraftPly,
+                                                  PinkFoam, Monokote, Ultracote, CarbonBar,
+                                                  Steel, Aluminum, AluminumBalsa)
+else:
+    Balsa         = REGISTRY.handle('Balsa')
+    Basswood      = REGISTRY.handle('Basswood')
+    Poplar        = REGISTRY.handle('Poplar')
+    AircraftPly   = REGISTRY.handle('AircraftPly')
+    PinkFoam      = REGISTRY.handle('PinkFoam')
+    Monokote      = REGISTRY.handle('Monokote')
+    Ultracote     = REGISTRY.handle('Ultracote')
+    CarbonBar     = REGISTRY.handle('CarbonBar')
+    Steel         = REGISTRY.handle('Steel')
+    Aluminum      = REGISTRY.handle('Aluminum')
+    AluminumBalsa = REGISTRY.handle('AluminumBalsa')
+
+#==============================================================================#
+# MATERIAL USAGES
+#==============================================================================#
+# attributes that hold the material of a part
+MATERIAL_ATTRIBUTES = ('SparMat', 'RibMat', 'SkinMat', 'WingMat', 'StringerMat', 'Material')
+
+
+def _members(obj):
+    members = []
+    for holder in (obj, getattr(obj, 'param', None)):
+        try:
+            members.extend(sorted(vars(holder).items(), key=lambda item: item[0]))
+        except TypeError: # no __dict__
+            pass
+    return members
+
+
+def usages(Component, path='', _seen=None):
+    """
+    Returns (path, owner, attribute, handle) of every material handle below a
+    component, e.g. ('HTail.WingWeight.LeadingEdge', Spar, 'SparMat', Handle)
+    """
+    from Structures.massprops import children
+
+    _seen = set() if _seen is None else _seen
+    if id(Component) in _seen:
+        return []
+    _seen.add(id(Component))
+
+    found = []
+    for attribute in MATERIAL_ATTRIBUTES:
+        Handle = getattr(Component, attribute, None)
+        if isinstance(Handle, MaterialHandle):
+            found.append((path, Component, attribute, Handle))
+
+    subs = list(children(Component))
+    WingWeight = getattr(Component, 'WingWeight', None)
+    if WingWeight is not None:
+        subs.append(('WingWeight', WingWeight))
+    # spars and other parts stored as attributes (AddSpar, AddTubeSpar)
+    for name, member in _members(Component):
+        if not name.startswith('_') and any(isinstance(getattr(member, a, None), MaterialHandle)
+                                            for a in MATERIAL_ATTRIBUTES if a != 'Material'):
+            subs.append((name, member))
+    for name, child in subs:
+        found.extend(usages(child, path + '.' + name if path else name, _seen))
+    return found
+
+#==============================================================================#
+# MATERIAL TRADES
+#==============================================================================#
+class MaterialTrade(object):
+    """
+    Result of substitute(): the changed usages, the weight [N] and CG [m]
+    before and after, and undo()
+    """
+    def __init__(self, Aircraft, changed, before, after, roots):
+        self.Aircraft = Aircraft
+        self.changed = changed      # (path, owner, attribute, old handle, new handle)
+        self.before = before        # MassProperties before the trade
+        self.after = after          # MassProperties after the trade
+        self.roots = roots
+
+    @property
+    def dWeight(self):
+        return self.after.weight_si() - self.before.weight_si()
+
+    @property
+    def dCG(self):
+        return self.after.cg_si() - self.before.cg_si()
+
+    def undo(self):
+        """
+        Puts the previous handles back and refreshes the affected components
+        """
+        for path, owner, attribute, old, new in self.changed:
+            setattr(owner, attribute, old)
+        _refresh(self.Aircraft, self.roots)
+
+
+def _refresh(Aircraft, roots):
+    for root in roots:
+        Component = getattr(Aircraft, root, None)
+        if Component is not None and hasattr(Component, 'Refresh'):
+            Component.Refresh()
+    Aircraft.Refresh()
+
+
+def substitute(Aircraft, old, new=None, scale=None, match='*', attributes=MATERIAL_ATTRIBUTES):
+    """
+    Swaps and/or rescales a material across a built aircraft and returns the
+    MaterialTrade with its weight and CG impact
+
+    Inputs:
+        Aircraft   - a built aircraft whose parts use MaterialHandles
+        old        - registry material to replace ('Balsa')
+        new        - registry material to use instead (None keeps old)
+        scale      - factor on the densities of the substituted handles
+        match      - fnmatch pattern on the usage path ('*TrailingEdge*',
+                     'HTail.*', ...)
+        attributes - material attributes to consider (e.g. ('RibMat',))
+    """
+    from Structures.massprops import MassProperties
+
+    before = MassProperties.from_component(Aircraft, 'Aircraft')
+    replaced = {}               # id(old handle) -> new handle, shared handles stay shared
+    changed, roots = [], []
+    for path, owner, attribute, Handle in usages(Aircraft):
+        if (Handle.MaterialName != old or attribute not in attributes or
+                not fnmatch.fnmatch(path, match)):
+            continue
+        if id(Handle) not in replaced:
+            replaced[id(Handle)] = Handle.swapped(new or old, scale)
+        setattr(owner, attribute, replaced[id(Handle)])
+        changed.append((path, owner, attribute, Handle, replaced[id(Handle)]))
+        root = path.split('.', 1)[0]
+        if root and root not in roots:
+            roots.append(root)
+
+    _refresh(Aircraft, roots)
+    after = MassProperties.from_component(Aircraft, 'Aircraft')
+    return MaterialTrade(Aircraft, changed, before, after, roots)
+
+
+def print_trade(Trade):
+    """
+    Prints the changed parts and the weight [ozf] and CG [in] impact
+    """
+    for path, owner, attribute, old, new in Trade.changed:
+        print('   %-40s %-8s %s -> %s' % (path, attribute, old.MaterialName, new.MaterialName))
+    before, after = Trade.before.groups_si(), Trade.after.groups_si()
+    for name in after:
+        dW = after[name][0] - before.get(name, (0.0, None))[0]
+        if abs(dW) > 1e-9:
+            print('   %-14s %+8.2f ozf' % (name or '(none)', dW/4.4482216152605*16))
+    print('   Weight %+.2f ozf, CG %+.3f in' % (Trade.dWeight/4.4482216152605*16,
+                                               Trade.dCG[0]/0.0254))
+
+#==============================================================================#
+# LIBRARY EQUIVALENCE
+#==============================================================================#
+def _dump_weights(filename):
+    """
+    Builds the aircraft in this interpreter and writes its mass items [N],
+    weight [N] and CG [m] as json
+    """
+    from aircraft import build_aircraft
+    from Structures.massprops import MassProperties
+
+    Mass = MassProperties.from_component(build_aircraft(), 'Aircraft')
+    weights = [(name, Mass.item_si(name)[0]) for name in Mass.names]
+    weights.append(('Weight', Mass.weight_si()))
+    weights.extend(zip(('Xcg', 'Ycg', 'Zcg'), Mass.cg_si().tolist()))
+    with open(filename, 'w') as f:
+        json.dump(weights, f)
+
+
+def _run_build(library):
+    """
+    Builds the aircraft in a fresh interpreter and returns (weights, seconds)
+    """
+    env = os.environ.copy()
+    env.pop(LIBRARY_ENV, None)
+    if library:
+        env[LIBRARY_ENV] = '1'
+
+    fd, filename = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        start = time.time()
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, '-m', 'Structures.materials', '--dump', filename],
+                                  cwd=ROOT_DIR, env=env, stdout=devnull)
+        elapsed = time.time() - start
+        with open(filename) as f:
+            weights = json.load(f)
+    finally:
+        os.remove(filename)
+    return weights, elapsed
+
+
+def check_library(rtol=1e-9, atol=1e-12, verbose=True):
+    """
+    Builds the aircraft with material handles and with the Aerothon library
+    materials and compares every mass item, the weight and the CG. Raises
+    EquivalenceError listing those differing by more than atol + rtol*|library|.
+    Returns the two lists of (name, value).
+    """
+    library, tlibrary = _run_build(library=True)
+    handles, thandles = _run_build(library=False)
+
+    failures = []
+    for (name, ref), (hname, val) in zip(library, handles):
+        if name != hname or not npy.isclose(val, ref, rtol=rtol, atol=atol):
+            failures.append((name, ref, val))
+
+    if verbose:
+        print('Library materials build : %.3f s' % tlibrary)
+        print('Material handles build  : %.3f s' % thandles)
+        for name, ref in library[-4:]:
+            print('   %-8s %14.6g' % (name, ref))
+
+    if failures or len(library) != len(handles):
+        lines = ['%s: library %r, handles %r' % f for f in failures]
+        if len(library) != len(handles):
+            lines.append('mass items differ (%d vs %d)' % (len(library), len(handles)))
+        raise EquivalenceError('Material handles differ from the library materials:\n   ' +
+                               '\n   '.join(lines))
+    return library, handles
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    if '--dump' in sys.argv:
+        _dump_weights(sys.argv[sys.argv.index('--dump') + 1])
+        sys.exit(0)
+
+    if '--check' in sys.argv:
+        try:
+            check_library()
+        except EquivalenceError as e:
+            print(str(e))
+            sys.exit(1)
+        print('Material handles give the weights of the library materials')
+        sys.exit(0)
+
+    from aircraft import build_aircraft
+
+    Aircraft = build_aircraft()
+    for path, owner, attribute, Handle in usages(Aircraft):
+        print('%-45s %-12s %s' % (path, attribute, Handle.MaterialName))
+
+    print('All trailing edges basswood')
+    Trade = substitute(Aircraft, 'Balsa', 'Basswood', match='*TrailingEdge*')
+    print_trade(Trade)
+    Trade.undo()
+
+    print('Ultracote 10% heavier')
+    Trade = substitute(Aircraft, 'Ultracote', scale=1.1)
+    print_trade(Trade)
+    Trade.undo()
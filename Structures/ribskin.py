@@ -0,0 +1,264 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# ribskin.py: vectorized rib and skin weights of ACRibWing surfaces
+#
+# The main wing (wing.py), HTail and VTail use ACRibWing with a scalar
+# RibSpace, and
+# RibWeight()/SkinWeight() walk the span rib by rib. RibSkinModel reads the
+# chord distribution of each surface once, on a common normalized span grid,
+# and caches the airfoil cross-section coefficients
+#    rib area  A = kA c**2        skin perimeter  P = kP c
+# from the airfoil coordinates (NACA 4-digit sections analytically, other
+# airfoils from their coordinate file, else from the thickness ratio). The
+# rib and skin weights of every surface then follow for whole broadcast
+# arrays of rib spacing, rib thickness, rib and skin densities and cut-out
+# fractions, all surfaces in one computation:
+#    rib weight  = density*thickness*(1 - cutout)*kA*sum(c(y_k)**2),  y_k = k*spacing
+#    skin weight = AreaForceDensity*kP*integral(c dy)
+#
+#    Model = RibSkinModel.from_wings([build_wing(), Aircraft.HTail, Aircraft.VTail])
+#    Wr, Ws = Model.weights_si(spacing[:,None], thickness, density, skin, cutout)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import os
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# CROSS-SECTION COEFFICIENTS
+#==============================================================================#
+_sections = {} # airfoil name -> (kA, kP)
+
+
+def naca_coordinates(digits, n=101):
+    """
+    Returns closed (x/c, z/c) coordinates of a NACA 4-digit airfoil
+    """
+    m, p, t = int(digits[0])/100, int(digits[1])/10, int(digits[2:4])/100
+    x = 0.5*(1 - npy.cos(npy.linspace(0, npy.pi, n)))
+    zt = 5*t*(0.2969*npy.sqrt(x) - 0.1260*x - 0.3516*x**2 + 0.2843*x**3 - 0.1036*x**4)
+    if m == 0 or p == 0:
+        zc = npy.zeros_like(x)
+    else:
+        zc = npy.where(x < p, m/p**2*(2*p*x - x**2), m/(1 - p)**2*(1 - 2*p + 2*p*x - x**2))
+    # upper surface TE -> LE, lower surface LE -> TE (camber added to the thickness)
+    return (npy.concatenate((x[::-1], x[1:])),
+            npy.concatenate(((zc + zt)[::-1], (zc - zt)[1:])))
+
+
+def coordinate_coefficients(x, z):
+    """
+    Returns (kA, kP) of closed airfoil coordinates in chords
+    """
+    x, z = npy.append(x, x[0]), npy.append(z, z[0])
+    kA = 0.5*abs(npy.sum(x[:-1]*z[1:] - x[1:]*z[:-1]))
+    kP = npy.sum(npy.hypot(npy.diff(x), npy.diff(z)))
+    return kA, kP
+
+
+def section_coefficients(name, tc=None):
+    """
+    Returns the (kA, kP) cross-section coefficients of an airfoil (cached)
+
+    Inputs:
+        name - airfoil name ('NACA0012', 'S1223', ...)
+        tc   - thickness ratio used when no coordinates can be found
+    """
+    if name in _sections:
+        return _sections[name]
+    digits = name[4:] if name.upper().startswith('NACA') else ''
+    if len(digits) == 4 and digits.isdigit():
+        coefficients = coordinate_coefficients(*naca_coordinates(digits))
+    else:
+        coefficients = None
+        try:
+            from Aerodynamics.polarstore import airfoil_directory
+            directory = airfoil_directory()
+        except ImportError:
+            directory = None
+        for path in ([os.path.join(directory, name + '.dat'),
+                      os.path.join(directory, name, name + '.dat')] if directory else []):
+            if os.path.exists(path):
+                coords = npy.loadtxt(path, skiprows=1)
+                if coords[0, 0] > 1.5: # Lednicer point counts
+                    coords = coords[1:]
+                coefficients = coordinate_coefficients(coords[:, 0], coords[:, 1])
+                break
+        if coefficients is None:
+            if tc is None:
+                raise ValueError("No coordinates for airfoil '%s' and no thickness ratio" % name)
+            # typical area and perimeter of a section of thickness ratio tc
+            coefficients = (0.685*tc, 2.0 + 1.2*tc**2)
+    _sections[name] = coefficients
+    return coefficients
+
+#==============================================================================#
+# RIB AND SKIN MODEL
+#==============================================================================#
+class RibSkinModel(object):
+    """
+    Chord distributions and section coefficients of several surfaces on a
+    common normalized span grid (plain SI)
+
+    Inputs:
+        names    - surface names
+        halfSpan - span from root to tip of one side [m], shape (nSurface,)
+        sides    - 2 for full (mirrored) wings, 1 otherwise
+        chords   - chord [m] at eta = y/halfSpan, shape (nSurface, nEta)
+        kA, kP   - cross-section coefficients, shape (nSurface,)
+    """
+    def __init__(self, names, halfSpan, sides, chords, kA, kP):
+        self.names = list(names)
+        self.halfSpan = npy.asarray(halfSpan, dtype=float)
+        self.sides = npy.asarray(sides, dtype=float)
+        self.chords = npy.asarray(chords, dtype=float)
+        self.kA = npy.asarray(kA, dtype=float)
+        self.kP = npy.asarray(kP, dtype=float)
+        self.eta = npy.linspace(0, 1, self.chords.shape[1])
+        # planform integral of the chord over all sides [m**2]
+        mean = 0.5*(self.chords[:, 1:] + self.chords[:, :-1])
+        self.chordArea = self.sides*self.halfSpan*npy.sum(mean*npy.diff(self.eta), axis=1)
+
+    @classmethod
+    def from_wings(cls, Wings, names=None, nEta=201):
+        """
+        Returns the model of built Aerothon wings (ACMainWing, ACTail, ...)
+        """
+        from Aerothon.scalar.units import M
+
+        names = names or [getattr(W, 'name', '') or 'Surface%d' % i for i, W in enumerate(Wings)]
+        halfSpan, sides, chords, kA, kP = [], [], [], [], []
+        eta = npy.linspace(0, 1, nEta)
+        for Wing in Wings:
+            full = bool(getattr(Wing, 'FullWing', True))
+            b = value_of(Wing.b, M)
+            h = b/2 if full else b
+            c = npy.array([value_of(Wing.Chord(y*M), M) for y in eta*h])
+            tc = value_of(Wing.Thickness(0*M), M)/c[0]
+            Airfoil = Wing.Airfoil if isinstance(Wing.Airfoil, str) else Wing.Airfoil[0]
+            kAi, kPi = section_coefficients(os.path.splitext(os.path.basename(Airfoil))[0], tc)
+            halfSpan.append(h)
+            sides.append(2 if full else 1)
+            chords.append(c)
+            kA.append(kAi)
+            kP.append(kPi)
+        return cls(names, halfSpan, sides, chords, kA, kP)
+
+    #--------------------------------------------------------------------------#
+    def _chord(self, eta):
+        """
+        Returns the chord of each surface (last axis) at normalized spans eta
+        of shape (..., nSurface, K)
+        """
+        n = len(self.eta) - 1
+        u = npy.clip(eta, 0, 1)*n
+        i = npy.minimum(u.astype(int), n - 1)
+        w = u - i
+        s = npy.arange(len(self.names))[:, None]
+        return (1 - w)*self.chords[s, i] + w*self.chords[s, i + 1]
+
+    def rib_sum(self, spacing):
+        """
+        Returns sum(c(y_k)**2) [m**2] over the ribs of every surface, counting
+        both sides of full wings and the root rib once. Ribs sit at k*spacing
+        from the root plus one at the tip.
+
+        Inputs:
+            spacing - rib spacing [m], broadcast against (nSurface,)
+        """
+        spacing = npy.asarray(spacing, dtype=float)
+        spacing = npy.broadcast_to(spacing, npy.broadcast(spacing, self.halfSpan).shape)
+        nRib = npy.floor(self.halfSpan/spacing + 1e-9) # ribs after the root
+        K = int(npy.max(nRib)) + 1
+        k = npy.arange(1, K + 1)
+        eta = npy.minimum(spacing[..., None]*k/self.halfSpan[:, None], 1.0)
+        # ribs 1..nRib at k*spacing, rib nRib + 1 at the tip unless one is there already
+        tip = npy.abs(nRib*spacing - self.halfSpan) > 1e-9*self.halfSpan
+        present = (k <= nRib[..., None]) | ((k == nRib[..., None] + 1) & tip[..., None])
+        c = self._chord(eta)
+        root = self.chords[:, 0]**2
+        return root + self.sides*npy.sum(npy.where(present, c**2, 0.0), axis=-1)
+
+    def weights_si(self, spacing, thickness, density, skinDensity, cutout=0.0):
+        """
+        Returns (rib weight, skin weight) [N] of every surface; the inputs
+        broadcast against the surface axis (last axis, length nSurface)
+
+        Inputs:
+            spacing     - rib spacing [m]
+            thickness   - rib thickness [m]
+            density     - rib material ForceDensity [N/m**3]
+            skinDensity - skin AreaForceDensity [N/m**2]
+            cutout      - fraction of the rib area cut out
+        """
+        ribs = self.rib_sum(spacing)
+        Wrib = npy.asarray(density)*thickness*(1 - npy.asarray(cutout))*self.kA*ribs
+        Wskin = npy.asarray(skinDensity)*self.kP*self.chordArea
+        return Wrib, npy.broadcast_to(Wskin, npy.broadcast(Wrib, Wskin).shape)
+
+    def weights(self, spacing, thickness, RibMats, SkinMats, cutout=0.0):
+        """
+        Returns (rib weight, skin weight) arrays with units for rib spacings and
+        thicknesses (Aerothon quantities or lists of them, one per surface) and
+        the rib and skin materials of each surface
+        """
+        from Aerothon.scalar.units import M, KG, SEC
+
+        def meters(x):
+            if isinstance(x, (list, tuple)):
+                return npy.array([value_of(v, M) for v in x])
+            return value_of(x, M)
+
+        NEWTON = KG*M/SEC**2
+        density, skin = material_densities(RibMats, SkinMats)
+        Wrib, Wskin = self.weights_si(meters(spacing), meters(thickness), density, skin, cutout)
+        return Wrib*NEWTON, Wskin*NEWTON
+
+
+def material_densities(RibMats, SkinMats):
+    """
+    Returns the rib ForceDensity [N/m**3] and skin AreaForceDensity [N/m**2]
+    arrays of Aerothon materials
+    """
+    from Aerothon.scalar.units import M, KG, SEC
+
+    NEWTON = KG*M/SEC**2
+    return (npy.array([value_of(Mat.ForceDensity, NEWTON/M**3) for Mat in RibMats]),
+            npy.array([value_of(Mat.AreaForceDensity, NEWTON/M**2) for Mat in SkinMats]))
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    from aircraft import build_aircraft
+    from Aerodynamics.Wing.wing import build_wing
+    from Tools.cache import ComponentCache
+    from Aerothon.scalar.units import AsUnit
+
+    Aircraft = build_aircraft(cache=ComponentCache())
+    Surfaces = [build_wing(), Aircraft.HTail, Aircraft.VTail]
+    Model = RibSkinModel.from_wings(Surfaces, ['Wing', 'HTail', 'VTail'])
+
+    WW = [S.WingWeight for S in Surfaces]
+    Wrib, Wskin = Model.weights([W.RibSpace for W in WW], [W.RibMat.Thickness for W in WW],
+                                [W.RibMat for W in WW], [W.SkinMat for W in WW])
+    for i, name in enumerate(Model.names):
+        print('%-6s ribs %s (ACRibWing %s)  skin %s (ACRibWing %s)' %
+              (name, AsUnit(Wrib[i], 'ozf'), AsUnit(WW[i].RibWeight(), 'ozf'),
+               AsUnit(Wskin[i], 'ozf'), AsUnit(WW[i].SkinWeight(), 'ozf')))
+
+    # rib spacing x rib thickness x cut-out trade of the three surfaces at once
+    density, skin = material_densities([W.RibMat for W in WW], [W.SkinMat for W in WW])
+    spacing = npy.linspace(2, 8, 61)[:, None, None, None]*0.0254
+    thickness = npy.array([1/16, 3/32, 1/8])[None, :, None, None]*0.0254
+    cutout = npy.linspace(0, 0.6, 13)[None, None, :, None]
+    start = time.time()
+    Wrib, Wskin = Model.weights_si(spacing, thickness, density, skin, cutout)
+    print('%d rib variants in %.4f s' % (Wrib.size, time.time() - start))
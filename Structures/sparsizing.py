@@ -0,0 +1,301 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# sparsizing.py: minimum weight spar sizing against bending stress and deflection
+#
+# The spar densities of the main wing are derived by hand (SparLinearDensity,
+# AluminumBalsa.ForceDensity *= 1.317) and the box wing carbon tubes
+# (AddTubeSpar("MainSpar", 0.75*IN, 0.625*IN)) are never checked against load.
+# SpanLoad integrates the lift-off load of one wing (Lift_LO, times Lift_Ratio
+# for the upper wing of a box wing) once on a spanwise grid:
+#    -> Schrenk lift distribution from the chord (mean of the planform and the
+#       elliptic distributions)
+#    -> shear V(y) and moment M(y) of the cantilevered half span
+#    -> the double integral of M from the root, so the tip deflection of a
+#       spar of constant section is delta = D/(E I)
+# A spar candidate (section dimensions and material) then only needs its
+# area, second moment and half height:
+#    sigma = M_root (H/2)/I,   delta = D/(E I),   weight = rho g A (2 halfSpan)
+# so size_spar evaluates thousands of sections in one array pass and returns
+# the lightest one within the stress (with a factor of safety) and deflection
+# limits. add_spar puts the result on a WingWeight through AddSpar/AddTubeSpar.
+#
+#    Load = SpanLoad.from_wing(BoxWing.LowerWing, BoxWing.Lift_LO*(1 - BoxWing.Lift_Ratio))
+#    Best = size_spar(Load, 'tube', {'D': D, 'd': d}, maxDepth=LowerThickness)
+#    add_spar(BoxWing.LowerWing.WingWeight, 'MainSpar', Best)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# SPAR MATERIALS
+#==============================================================================#
+GRAVITY = 9.80665
+
+# name -> (density [kg/m**3], modulus E [Pa], allowable stress [Pa])
+# handbook values along the grain/fibers, compression for the woods since the
+# upper cap fails first; replace with coupon tests when available
+MATERIALS = OrderedDict([('Balsa',     (160.,  3.7e9,  12.0e6)),
+                         ('Basswood',  (415., 10.1e9,  32.0e6)),
+                         ('Poplar',    (450., 10.9e9,  38.0e6)),
+                         ('CarbonBar', (1550., 120e9, 600.0e6)),
+                         ('Aluminum',  (2700., 69e9,  240.0e6))])
+
+
+def material_arrays(names=None, materials=MATERIALS):
+    """
+    Returns (names, weight density [N/m**3], E [Pa], allowable stress [Pa])
+    arrays of spar materials
+    """
+    names = list(names or materials)
+    table = npy.array([materials[name] for name in names], dtype=float).reshape(-1, 3)
+    return names, table[:, 0]*GRAVITY, table[:, 1], table[:, 2]
+
+#==============================================================================#
+# SPAR SECTIONS
+#==============================================================================#
+def section_tube(D, d):
+    """
+    Returns the area, second moment and height of a tube (outer D, inner d) [m]
+    """
+    return npy.pi/4*(D**2 - d**2), npy.pi/64*(D**4 - d**4), D
+
+
+def section_box(W, H, tc, tw):
+    """
+    Returns the area, second moment and height of a box spar of width W and
+    height H with caps of thickness tc and two webs of thickness tw [m]
+    (the main spar of wing.py)
+    """
+    Wi, Hi = npy.maximum(W - 2*tw, 0), npy.maximum(H - 2*tc, 0)
+    return W*H - Wi*Hi, (W*H**3 - Wi*Hi**3)/12, H
+
+
+def section_rect(W, H):
+    """
+    Returns the area, second moment and height of a solid rectangular spar [m]
+    """
+    return W*H, W*H**3/12, H
+
+
+# section name -> (function, dimension names, valid(dims))
+SECTIONS = OrderedDict([('tube', (section_tube, ('D', 'd'),             lambda D, d: d < D)),
+                        ('box',  (section_box,  ('W', 'H', 'tc', 'tw'), lambda W, H, tc, tw:
+                                                                        (2*tc < H) & (2*tw < W))),
+                        ('rect', (section_rect, ('W', 'H'),             lambda W, H: W > 0))])
+
+#==============================================================================#
+# SPANWISE LOADS
+#==============================================================================#
+def _cumulative(f, y, reverse=False):
+    """
+    Returns the trapezoid integral of f from y[0] (or to y[-1] if reverse)
+    """
+    segments = 0.5*(f[1:] + f[:-1])*npy.diff(y)
+    if reverse:
+        return npy.append(npy.cumsum(segments[::-1])[::-1], 0.0)
+    return npy.append(0.0, npy.cumsum(segments))
+
+
+class SpanLoad(object):
+    """
+    Shear, moment and deflection integral of a cantilevered half span (plain SI)
+
+    Inputs:
+        Lift     - lift of the whole wing [N] (both sides of full wings)
+        halfSpan - root to tip [m]
+        chords   - chord at the grid stations (None for an elliptic load)
+        sides    - 2 for full (mirrored) wings, 1 otherwise
+        n        - load factor
+    """
+    def __init__(self, Lift, halfSpan, chords=None, sides=2, n=1.0, nSpan=201):
+        self.Lift, self.halfSpan, self.sides, self.n = Lift, halfSpan, sides, n
+        self.y = npy.linspace(0, halfSpan, nSpan if chords is None else len(chords))
+        eta = self.y/halfSpan
+        shape = 4/npy.pi*npy.sqrt(npy.maximum(1 - eta**2, 0))
+        if chords is not None:
+            chords = npy.asarray(chords, dtype=float)
+            shape = 0.5*(shape + chords/npy.mean(chords))
+        shape /= _cumulative(shape, self.y)[-1]
+        self.w = n*Lift/sides*shape                             # running load [N/m]
+        self.V = _cumulative(self.w, self.y, reverse=True)      # shear [N]
+        self.M = _cumulative(self.V, self.y, reverse=True)      # moment [N m]
+        slope = _cumulative(self.M, self.y)                     # E I * slope
+        self.D = _cumulative(slope, self.y)[-1]                 # E I * tip deflection [N m**3]
+
+    @classmethod
+    def from_wing(cls, Wing, Lift=None, n=1.0, nSpan=201):
+        """
+        Returns the load of a built Aerothon wing carrying Lift (default
+        Wing.Lift_LO)
+        """
+        from Aerothon.scalar.units import M, KG, SEC
+
+        NEWTON = KG*M/SEC**2
+        full = bool(getattr(Wing, 'FullWing', True))
+        b = value_of(Wing.b, M)
+        h = b/2 if full else b
+        chords = npy.array([value_of(Wing.Chord(y*M), M) for y in npy.linspace(0, h, nSpan)])
+        Lift = Wing.Lift_LO if Lift is None else Lift
+        return cls(value_of(Lift, NEWTON), h, chords, 2 if full else 1, n)
+
+    @classmethod
+    def from_box_wing(cls, BoxWing, n=1.0, nSpan=201):
+        """
+        Returns the (upper, lower) wing loads of a built ACBiWing from Lift_LO
+        and Lift_Ratio
+        """
+        Ratio = value_of(BoxWing.Lift_Ratio)
+        return (cls.from_wing(BoxWing.UpperWing, BoxWing.Lift_LO*Ratio, n, nSpan),
+                cls.from_wing(BoxWing.LowerWing, BoxWing.Lift_LO*(1 - Ratio), n, nSpan))
+
+    #--------------------------------------------------------------------------#
+    def evaluate_si(self, A, I, H, rho, E, sigma=None):
+        """
+        Returns an ordered dictionary of broadcast arrays of the root stress
+        [Pa], tip deflection [m], spar weight [N] and, with sigma, the stress
+        ratio of constant section spars
+
+        Inputs:
+            A, I, H - section area [m**2], second moment [m**4] and height [m]
+            rho, E  - weight density [N/m**3] and modulus [Pa]
+            sigma   - allowable stress [Pa]
+        """
+        R = OrderedDict()
+        R['Stress'] = self.M[0]*H/(2*I)
+        R['TipDeflection'] = self.D/(E*I)
+        R['Weight'] = rho*A*self.sides*self.halfSpan
+        if sigma is not None:
+            R['StressRatio'] = R['Stress']/sigma
+        return R
+
+#==============================================================================#
+# MINIMUM WEIGHT SEARCH
+#==============================================================================#
+def size_spar(Load, section, dims, materials=None, safety=1.5, maxDeflection=0.05,
+              maxDepth=None, table=MATERIALS):
+    """
+    Returns an ordered dictionary describing the lightest feasible spar (None if
+    no candidate is feasible), with the candidate count under 'Candidates'
+
+    Inputs:
+        Load          - SpanLoad of the wing
+        section       - 'tube', 'box' or 'rect'
+        dims          - dimension name -> 1-d array of values [m] (every
+                        combination is a candidate)
+        materials     - material names (default every entry of table)
+        safety        - factor of safety on the allowable stress
+        maxDeflection - tip deflection limit as a fraction of the half span
+        maxDepth      - largest spar height that fits in the wing [m]
+    """
+    function, names, valid = SECTIONS[section]
+    matNames, rho, E, sigma = material_arrays(materials, table)
+    grids = npy.meshgrid(*[npy.asarray(dims[name], dtype=float) for name in names],
+                         indexing='ij')
+    grids = [g.ravel()[:, None] for g in grids]          # candidates x materials
+    A, I, H = function(*grids)
+    with npy.errstate(divide='ignore', invalid='ignore'):
+        R = Load.evaluate_si(A, I, H, rho, E, sigma/safety)
+    shape = (len(A), len(matNames))
+    for name in R:
+        R[name] = npy.broadcast_to(R[name], shape)
+    feasible = (valid(*grids) & (R['StressRatio'] <= 1) &
+                (R['TipDeflection'] <= maxDeflection*Load.halfSpan))
+    if maxDepth is not None:
+        feasible &= H <= maxDepth
+    feasible = npy.broadcast_to(feasible, shape)
+    nCandidate = feasible.size
+    if not feasible.any():
+        return None
+    i, j = npy.unravel_index(npy.argmin(npy.where(feasible, R['Weight'], npy.inf)), feasible.shape)
+
+    Best = OrderedDict()
+    Best['Section'] = section
+    for name, g in zip(names, grids):
+        Best[name] = float(g[i, 0])
+    Best['Material'] = matNames[j]
+    Best['ForceDensity'] = float(rho[j])
+    Best['LinearForceDensity'] = float(rho[j]*A[i, 0])
+    for name in R:
+        Best[name] = float(R[name][i, j])
+    Best['Candidates'] = nCandidate
+    return Best
+
+
+def add_spar(WingWeight, name, Best, Position=(0.27, 0), **kwargs):
+    """
+    Adds a sized spar to an ACSolidWing/ACRibWing weight calculation with
+    AddTubeSpar (tubes) or AddSpar (box and rectangular spars). The material
+    is a registry handle with the linear density of the section, in place of
+    the hand-derived SparLinearDensity.
+    """
+    from Aerothon.scalar.units import M, KG, SEC
+    from Structures.materials import REGISTRY
+
+    NEWTON = KG*M/SEC**2
+    if Best['Section'] == 'tube':
+        WingWeight.AddTubeSpar(name, Best['D']*M, Best['d']*M)
+    else:
+        WingWeight.AddSpar(name, Best['H']*M, Best['W']*M, Position, 1.0,
+                           DSpar=False, Mirror=False, Structural=True, **kwargs)
+    Spar = getattr(WingWeight, name)
+    Spar.SparMat = REGISTRY.handle(Best['Material'])
+    Spar.SparMat.ForceDensity = Best['ForceDensity']*NEWTON/M**3
+    if Best['Section'] == 'box':
+        Spar.SparMat.LinearForceDensity = Best['LinearForceDensity']*NEWTON/M
+    Spar.ScaleToWing = [False, False]
+    return Spar
+
+
+def print_spar(Best):
+    """
+    Prints a sizing result in inches, ozf and psi
+    """
+    if Best is None:
+        print('   no feasible spar')
+        return
+    dims = ', '.join('%s %.4f in' % (name, Best[name]/0.0254)
+                     for name in SECTIONS[Best['Section']][1])
+    print('   %s %s, %s' % (Best['Material'], Best['Section'], dims))
+    print('   weight %.3f ozf, stress ratio %.3f, tip deflection %.3f in (%d candidates)' %
+          (Best['Weight']/4.4482216152605*16, Best['StressRatio'], Best['TipDeflection']/0.0254,
+           Best['Candidates']))
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    import time
+    from Aerothon.scalar.units import M, FT
+    from Aerodynamics.Wing.BiWing import build_box_wing
+
+    BoxWing = build_box_wing()
+    Upper, Lower = SpanLoad.from_box_wing(BoxWing, n=2.0)
+    depth = value_of(BoxWing.LowerWing.Thickness(0*FT), M)
+
+    # the current carbon tube of the box wing
+    A, I, H = section_tube(0.75*0.0254, 0.625*0.0254)
+    names, rho, E, sigma = material_arrays(['CarbonBar'])
+    print('Current 0.75 x 0.625 in carbon tube, lower wing')
+    for name, value in Lower.evaluate_si(A, I, H, rho, E, sigma/1.5).items():
+        print('   %-14s %12.5g' % (name, value[0]))
+
+    IN = 0.0254
+    tubes = {'D': npy.arange(0.25, 1.0001, 1/32)*IN, 'd': npy.arange(0.125, 0.9701, 1/32)*IN}
+    boxes = {'W': npy.arange(0.25, 1.501, 1/16)*IN, 'H': npy.arange(0.5, 2.001, 1/16)*IN,
+             'tc': npy.array([1/32, 1/16, 3/32, 1/8])*IN, 'tw': npy.array([1/32, 1/16, 1/8])*IN}
+    for label, Load in (('Upper', Upper), ('Lower', Lower)):
+        for section, dims in (('tube', tubes), ('box', boxes)):
+            start = time.time()
+            Best = size_spar(Load, section, dims, maxDepth=depth)
+            seconds = time.time() - start
+            print('%s wing, lightest %s (%.2f us per candidate)' %
+                  (label, section, 1e6*seconds/max(Best['Candidates'] if Best else 1, 1)))
+            print_spar(Best)
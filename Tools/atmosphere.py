@@ -0,0 +1,43 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# atmosphere.py: vectorized standard atmosphere (troposphere, SI units)
+#
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import numpy as npy
+
+#==============================================================================#
+# STANDARD ATMOSPHERE
+#==============================================================================#
+RHO0   = 1.225      # sea level density [kg/m**3]
+P0     = 101325.0   # sea level pressure [Pa]
+T0     = 288.15     # sea level temperature [K]
+LAPSE  = 0.0065     # temperature lapse rate [K/m]
+GRAVITY = 9.80665   # [m/s**2]
+R_AIR  = 287.053    # gas constant of air [J/(kg K)]
+
+
+def temperature(h):
+    """
+    Returns the standard temperature [K] at the altitude h [m] (array or float)
+    """
+    return T0 - LAPSE*npy.asarray(h, dtype=float)
+
+
+def pressure(h):
+    """
+    Returns the standard pressure [Pa] at the altitude h [m] (array or float)
+    """
+    return P0*(temperature(h)/T0)**(GRAVITY/(LAPSE*R_AIR))
+
+
+def density(h):
+    """
+    Returns the standard density [kg/m**3] at the altitude h [m] (array or float)
+    """
+    return RHO0*(temperature(h)/T0)**(GRAVITY/(LAPSE*R_AIR) - 1.0)
@@ -0,0 +1,286 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# cache.py: content-addressed on-disk cache of built components
+#
+# A component (box wing, fuselage, propulsion, ...) is stored as a pickle named
+# by a hash of everything that defines it:
+#    -> the source of the module that builds it and of every repository
+#       module it imports, directly or through other modules (module_sources)
+#    -> the overrides that apply to it
+#    -> the Aerothon library version and the unit mode (see Tools/fastmode.py)
+#    -> any runtime state the build reads, e.g. the density scales of the
+#       material registry (Structures/materials.py)
+# so changing a tail parameter never invalidates the wing. Entries are evicted
+# least-recently-used first once the cache exceeds its size limit.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import os
+import sys
+import ast
+import glob
+import hashlib
+import tempfile
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from Tools.fastmode import fast_mode_enabled, ROOT_DIR
+from Tools.overrides import select
+
+#==============================================================================#
+# LIBRARY VERSION
+#==============================================================================#
+_libraryVersion = [] # memo, the installed Aerothon does not change while running
+
+def library_version():
+    """
+    Returns a string identifying the installed Aerothon library. Uses
+    Aerothon.__version__ when available and otherwise a fingerprint of the
+    names, sizes and modification times of the library sources.
+    """
+    if not _libraryVersion:
+        import Aerothon
+        version = getattr(Aerothon, '__version__', None)
+        if version is None:
+            sha = hashlib.sha1()
+            libDir = os.path.dirname(os.path.abspath(Aerothon.__file__))
+            for root, dirs, files in sorted(os.walk(libDir)):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith('.py'):
+                        stat = os.stat(os.path.join(root, name))
+                        sha.update(('%s:%d:%d;' % (name, stat.st_size, int(stat.st_mtime))).encode())
+            version = sha.hexdigest()
+        _libraryVersion.append(str(version))
+    return _libraryVersion[0]
+
+
+def source_files(*modules):
+    """
+    Returns the .py source files of the given modules or package directories
+    """
+    files = []
+    for module in modules:
+        if os.path.isdir(module):
+            for root, dirs, names in sorted(os.walk(module)):
+                dirs.sort()
+                files.extend(os.path.join(root, n) for n in sorted(names) if n.endswith('.py'))
+        else:
+            filename = sys.modules[module].__file__ if module in sys.modules else module
+            files.append(os.path.splitext(filename)[0] + '.py')
+    return files
+
+
+def _imported_names(module):
+    """
+    Returns the candidate module names of every import statement of a module,
+    most specific first (implicit relative imports of Python 2 included)
+    """
+    filename = os.path.splitext(module.__file__)[0] + '.py'
+    if not os.path.exists(filename):
+        return []
+    with open(filename) as f:
+        tree = ast.parse(f.read(), filename)
+    package = module.__name__.rsplit('.', 1)[0] if '.' in module.__name__ else ''
+    if hasattr(module, '__path__'): # a package imports relative to itself
+        package = module.__name__
+
+    names = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            bases = [alias.name for alias in node.names]
+            members = [[]]*len(bases)
+        elif isinstance(node, ast.ImportFrom):
+            bases = [node.module or '']
+            members = [[alias.name for alias in node.names]]
+            if node.level: # explicit relative import
+                parent = package.split('.')[:len(package.split('.')) - node.level + 1]
+                bases = ['.'.join(parent + ([node.module] if node.module else []))]
+        else:
+            continue
+        for base, member in zip(bases, members):
+            for name in ([base + '.' + m for m in member] if base else member) + [base]:
+                if package and not getattr(node, 'level', 0):
+                    names.append(package + '.' + name)
+                names.append(name)
+    return names
+
+
+def module_sources(*modules):
+    """
+    Returns the .py source files of the given (imported) modules and of every
+    repository module they import, directly or transitively. Only modules that
+    are actually loaded count, so a module the builder never imports does not
+    change the key; library modules outside the repository are left to
+    library_version().
+    """
+    root = os.path.normcase(ROOT_DIR) + os.sep
+    seen, files = set(), []
+    stack = list(modules)
+    while stack:
+        name = stack.pop()
+        module = sys.modules.get(name)
+        filename = getattr(module, '__file__', None)
+        if name in seen or filename is None:
+            continue
+        seen.add(name)
+        if not os.path.normcase(os.path.abspath(filename)).startswith(root):
+            continue
+        files.append(os.path.splitext(os.path.abspath(filename))[0] + '.py')
+        stack.extend(_imported_names(module))
+    return sorted(set(files))
+
+#==============================================================================#
+# COMPONENT CACHE
+#==============================================================================#
+class ComponentCache(object):
+    """
+    On-disk cache of built components keyed by their defining content
+
+    Inputs:
+        directory - where entries are stored (default .cache/components in the
+                    repository, or the REG2020_CACHE environment variable)
+        max_bytes - total size above which least recently used entries are evicted
+    """
+    def __init__(self, directory=None, max_bytes=512*1024**2):
+        if directory is None:
+            directory = os.environ.get('REG2020_CACHE',
+                                       os.path.join(ROOT_DIR, '.cache', 'components'))
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError: # another process may have created it first
+                if not os.path.isdir(directory):
+                    raise
+
+    #--------------------------------------------------------------------------#
+    def key(self, name, overrides, sources, state=None):
+        """
+        Returns the content hash identifying a component
+
+        Inputs:
+            name      - override root of the component, e.g. 'BoxWing'
+            overrides - overrides handed to the builder (only name.* entries matter)
+            sources   - source files that define the component
+            state     - optional picklable runtime state the build depends on
+        """
+        sha = hashlib.sha1()
+        sha.update(name.encode())
+        sha.update(library_version().encode())
+        sha.update(b'fast' if fast_mode_enabled() else b'units')
+        for filename in sources:
+            with open(filename, 'rb') as f:
+                sha.update(f.read())
+        sha.update(pickle.dumps(select(overrides, name), 2))
+        if state is not None:
+            sha.update(pickle.dumps(state, 2))
+        return sha.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.pkl')
+
+    #--------------------------------------------------------------------------#
+    def load_or_build(self, name, builder, overrides, sources, prepare=None, state=None):
+        """
+        Returns the component from the cache, or builds and stores it
+
+        Inputs:
+            name      - override root of the component, e.g. 'BoxWing'
+            builder   - function(overrides) returning the component
+            overrides - overrides handed to the builder
+            sources   - source files that define the component
+            prepare   - optional function(component) run before storing so the
+                        expensive derived quantities are part of the entry
+            state     - optional picklable runtime state the build depends on
+        """
+        path = self._path(self.key(name, overrides, sources, state))
+
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as f:
+                    component = pickle.load(f)
+                os.utime(path, None) # most recently used
+                self.hits += 1
+                return component
+            except Exception: # stale or truncated entry, rebuild it
+                self._remove(path)
+
+        self.misses += 1
+        component = builder(overrides)
+        if prepare is not None:
+            prepare(component)
+        self._store(path, component)
+        return component
+
+    def _store(self, path, component):
+        """
+        Writes an entry atomically so concurrent workers never read half a file
+        """
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(component, f, pickle.HIGHEST_PROTOCOL)
+            if os.path.exists(path):
+                self._remove(path)
+            os.rename(tmp, path)
+        except Exception: # components that cannot be pickled are simply not cached
+            self._remove(tmp)
+            return
+        self.evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    #--------------------------------------------------------------------------#
+    def entries(self):
+        """
+        Returns (last use, size, path) of every entry, least recently used first
+        """
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, '*.pkl')):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size(self):
+        """
+        Returns the total size of the cache in bytes
+        """
+        return sum(size for used, size, path in self.entries())
+
+    def evict(self, max_bytes=None):
+        """
+        Removes least recently used entries until the cache fits in max_bytes
+        """
+        if max_bytes is None:
+            max_bytes = self.max_bytes
+        entries = self.entries()
+        total = sum(size for used, size, path in entries)
+        for used, size, path in entries:
+            if total <= max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Removes every entry
+        """
+        self.evict(max_bytes=0)
@@ -0,0 +1,349 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# depgraph.py: lazily recomputed derived quantities of the aircraft
+#
+# Changing one input such as HTail.S or BoxWing.Gap used to mean an explicit
+# Refresh() and re-reading every derived quantity. DependencyGraph keeps each
+# derived value (weights, CG, MOI, MAC, tail volume coefficients, polar
+# slopes) as a node that is computed on first use and cached:
+#    -> a node depends on input prefixes ('HTail' = any HTail.* input) and on
+#       the other nodes it reads, which are recorded while it computes
+#    -> setting an input only bumps the revision of that input; nothing is
+#       recomputed until a node is asked for
+#    -> a node recomputes only if one of its actual inputs changed since it was
+#       last verified, and a recomputed node that comes out unchanged does not
+#       force its dependents to recompute (early cutoff)
+#    -> every recomputation is logged with its run time
+#
+#    Model = AircraftModel(Aircraft)
+#    Model.set('HTail.S', 600*IN**2)
+#    print Model['HTail.VC'], Model['CG']
+#    print_log(Model.recomputed())       # [('HTail.Weight', 0.01), ...]
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+import time
+from collections import OrderedDict
+import numpy as npy
+
+from Tools.fastmode import value_of
+from Tools.overrides import get_path, set_path
+
+#==============================================================================#
+# DEPENDENCY GRAPH
+#==============================================================================#
+def same_value(a, b):
+    """
+    Returns True if two node values are equal (floats, arrays, tuples)
+    """
+    try:
+        return npy.array_equal(npy.asarray(a), npy.asarray(b))
+    except Exception:
+        return a is b
+
+
+class _Node(object):
+    def __init__(self, name, function=None, prefixes=()):
+        self.name = name
+        self.function = function    # None for inputs
+        self.prefixes = tuple(prefixes)
+        self.value = None
+        self.changed = -1           # revision at which the value last changed
+        self.verified = -1          # revision at which the value was last checked
+        self.nodes = ()             # derived nodes read while computing
+
+
+class DependencyGraph(object):
+    """
+    Inputs set by name and derived nodes computed on demand
+
+    Derived node functions take the graph and read other nodes with graph[name].
+    """
+    def __init__(self):
+        self.inputs = OrderedDict()
+        self.nodes = OrderedDict()
+        self.revision = 0
+        self.log = []               # (node, seconds) of every recomputation
+        self._reading = []          # nodes being computed (dependency recording)
+
+    #--------------------------------------------------------------------------#
+    def define(self, name, function, prefixes=()):
+        """
+        Adds a derived node
+
+        Inputs:
+            function - function(graph) returning the value
+            prefixes - input name prefixes the node depends on ('HTail' covers
+                       every 'HTail.*' input)
+        """
+        self.nodes[name] = _Node(name, function, prefixes)
+
+    def set(self, name, value):
+        """
+        Sets an input. Returns True if its value changed.
+        """
+        node = self.inputs.get(name)
+        if node is None:
+            node = self.inputs[name] = _Node(name)
+        elif same_value(node.value, value):
+            return False
+        self.revision += 1
+        node.value = value
+        node.changed = self.revision
+        return True
+
+    def __getitem__(self, name):
+        if name in self.inputs:
+            return self.inputs[name].value
+        node = self.nodes[name]
+        if self._reading:
+            self._reading[-1].add(node)
+        self._update(node)
+        return node.value
+
+    #--------------------------------------------------------------------------#
+    def _inputs_of(self, node):
+        for prefix in node.prefixes:
+            for name, Input in self.inputs.items():
+                if name == prefix or name.startswith(prefix + '.'):
+                    yield Input
+
+    def _update(self, node):
+        """
+        Brings a node up to date with the current revision
+        """
+        if node.verified == self.revision:
+            return
+        stale = node.verified < 0
+        if not stale:
+            stale = any(Input.changed > node.verified for Input in self._inputs_of(node))
+        if not stale:
+            for dependency in node.nodes:
+                self._update(dependency)
+                if dependency.changed > node.verified:
+                    stale = True
+                    break
+        if stale:
+            self._compute(node)
+        node.verified = self.revision
+
+    def _compute(self, node):
+        self._reading.append(set())
+        start = time.time()
+        try:
+            value = node.function(self)
+        finally:
+            node.nodes = tuple(self._reading.pop())
+        self.log.append((node.name, time.time() - start))
+        if node.changed < 0 or not same_value(value, node.value):
+            node.value = value
+            node.changed = self.revision
+
+    #--------------------------------------------------------------------------#
+    def recomputed(self):
+        """
+        Returns and clears the (node, seconds) log of recomputations
+        """
+        log, self.log = self.log, []
+        return log
+
+    def invalidate(self, name=None):
+        """
+        Forces a node (default: every node) to recompute on next use
+        """
+        for node in ([self.nodes[name]] if name else self.nodes.values()):
+            node.verified = -1
+
+
+def print_log(log):
+    """
+    Prints a recomputation log
+    """
+    for name, seconds in log:
+        print('   %-18s %8.4f s' % (name, seconds))
+    print('   %d nodes recomputed in %.4f s' % (len(log), sum(s for n, s in log)))
+
+#==============================================================================#
+# AIRCRAFT MODEL
+#==============================================================================#
+# objects below the aircraft that input paths may start with
+ROOTS = OrderedDict([('Aircraft',   ''),
+                     ('BoxWing',    'Wing'),
+                     ('Fuselage',   'Fuselage'),
+                     ('Propulsion', 'Propulsion'),
+                     ('HTail',      'HTail'),
+                     ('VTail',      'VTail'),
+                     ('MainGear',   'MainGear'),
+                     ('NoseGear',   'NoseGear')])
+
+EVERYTHING = tuple(ROOTS)
+
+
+def _weight(path, root):
+    def compute(Model):
+        from Aerothon.scalar.units import OZF
+        Model.refresh(root)
+        return value_of(Model.component(path).Weight, OZF)
+    return compute
+
+
+def _vc(path):
+    def compute(Model):
+        Model.refresh(path, 'BoxWing', 'Aircraft')
+        return value_of(Model.component(path).VC)
+    return compute
+
+
+def _empty_weight(Model):
+    return sum(Model[name] for name in ('Wing.Weight', 'Fuselage.Weight', 'Propulsion.Weight',
+                                        'HTail.Weight', 'VTail.Weight'))
+
+
+def _cg(Model):
+    from Aerothon.scalar.units import IN
+    Model.refresh(*EVERYTHING)
+    return tuple(value_of(Model.Aircraft.CG(), IN))
+
+
+def _moi(Model):
+    from Aerothon.scalar.units import SLUG, FT
+    Model.refresh(*EVERYTHING)
+    return tuple(value_of(Model.Aircraft.MOI(), SLUG*FT**2))
+
+
+def _mac(Model):
+    from Aerothon.scalar.units import IN
+    Model.refresh('BoxWing')
+    return value_of(Model.Aircraft.Wing.MAC(), IN)
+
+
+def _dCL_da(Model):
+    Model.refresh(*POLARS)
+    return value_of(Model.Aircraft.dCL_da())
+
+
+def _dCM_da(Model):
+    Model['CG'] # the moment slope is taken about the CG
+    Model.refresh(*POLARS)
+    return value_of(Model.Aircraft.dCM_da())
+
+
+def _static_margin(Model):
+    return -Model['dCM_da']/Model['dCL_da']
+
+
+# inputs the polar slopes depend on
+POLARS = ('Aircraft', 'BoxWing', 'HTail', 'Fuselage')
+
+# derived quantities: name -> (function(Model), input prefixes)
+DERIVED = OrderedDict([('Wing.Weight',       (_weight('Wing', 'BoxWing'),         ('BoxWing',))),
+                       ('Fuselage.Weight',   (_weight('Fuselage', 'Fuselage'),    ('Fuselage',))),
+                       ('Propulsion.Weight', (_weight('Propulsion', 'Propulsion'), ('Propulsion',))),
+                       ('HTail.Weight',      (_weight('HTail', 'HTail'),          ('HTail',))),
+                       ('VTail.Weight',      (_weight('VTail', 'VTail'),          ('VTail',))),
+                       ('EmptyWeight',       (_empty_weight,                      ())),
+                       ('CG',                (_cg,                                EVERYTHING)),
+                       ('MOI',               (_moi,                               EVERYTHING)),
+                       ('Wing.MAC',          (_mac,                               ('BoxWing',))),
+                       ('HTail.VC',          (_vc('HTail'),                       ('HTail', 'BoxWing', 'Aircraft'))),
+                       ('VTail.VC',          (_vc('VTail'),                       ('VTail', 'BoxWing', 'Aircraft'))),
+                       ('dCL_da',            (_dCL_da,                            POLARS)),
+                       ('dCM_da',            (_dCM_da,                            POLARS)),
+                       ('StaticMargin',      (_static_margin,                     ()))])
+
+
+class AircraftModel(DependencyGraph):
+    """
+    Dependency graph over a built ACTailAircraft. Inputs are override paths
+    ('HTail.S', 'BoxWing.Gap', 'Aircraft.StaticMargin', ...) and the derived
+    nodes are listed in DERIVED. Only the components whose inputs changed are
+    refreshed, and only when a node that needs them is evaluated.
+
+    Inputs:
+        Aircraft - a built ACTailAircraft
+        derived  - derived nodes (default DERIVED)
+    """
+    def __init__(self, Aircraft, derived=None):
+        DependencyGraph.__init__(self)
+        self.Aircraft = Aircraft
+        self._dirty = set()     # roots set since their last Refresh()
+        self._stale = False     # a component was refreshed after the aircraft
+        for name, (function, prefixes) in (derived or DERIVED).items():
+            self.define(name, function, prefixes)
+
+    def component(self, path):
+        """
+        Returns the component at a path of the derived node names ('Wing', 'HTail', ...)
+        """
+        return get_path(self.Aircraft, path)
+
+    def root(self, name):
+        """
+        Returns the object an input root refers to
+        """
+        return get_path(self.Aircraft, ROOTS[name]) if ROOTS[name] else self.Aircraft
+
+    def set(self, name, value):
+        """
+        Sets an input on the aircraft (e.g. 'HTail.S') and in the graph
+        """
+        root, path = name.split('.', 1)
+        if root not in ROOTS:
+            raise KeyError("Unknown input '%s' (expected one of %s)" % (name, ', '.join(ROOTS)))
+        changed = DependencyGraph.set(self, name, value)
+        if changed:
+            set_path(self.root(root), path, value)
+            self._dirty.add(root)
+        return changed
+
+    def refresh(self, *roots):
+        """
+        Refreshes the changed components among roots (called by the nodes).
+        The aircraft is refreshed when it is among roots and it, or any
+        component since its last Refresh(), was changed.
+        """
+        for root in roots:
+            if root != 'Aircraft' and root in self._dirty:
+                self._dirty.discard(root)
+                self._refresh(self.root(root))
+                self._stale = True # the aircraft has to re-read it
+        if 'Aircraft' in roots and (self._stale or 'Aircraft' in self._dirty):
+            self._dirty.discard('Aircraft')
+            self._stale = False
+            self._refresh(self.Aircraft)
+
+    def _refresh(self, Component):
+        Refresh = getattr(Component, 'Refresh', None)
+        if Refresh is not None:
+            Refresh()
+
+#==============================================================================#
+# VISUALIZATION & RESULTS
+#==============================================================================#
+if __name__ == '__main__':
+    from Aerothon.scalar.units import IN
+    from aircraft import build_aircraft
+    from Tools.cache import ComponentCache
+
+    Model = AircraftModel(build_aircraft(cache=ComponentCache()))
+    for name in Model.nodes:
+        Model[name]
+    print('First evaluation')
+    print_log(Model.recomputed())
+
+    Model.set('HTail.S', 600*IN**2)
+    print('HTail.VC %.4f, static margin %.4f' % (Model['HTail.VC'], Model['StaticMargin']))
+    for name in Model.nodes:
+        Model[name]
+    print('After HTail.S = 600 in**2')
+    print_log(Model.recomputed())
+
+    Model.set('HTail.S', 600*IN**2)
+    for name in Model.nodes:
+        Model[name]
+    print('Setting the same value again')
+    print_log(Model.recomputed())
@@ -0,0 +1,168 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# fastmode.py: unit-free ("fast numeric") mode for Aerothon builds
+#
+# Aerothon.scalar decides at import time whether quantities carry units. With
+# the environment variable scalar_off=off every unit becomes a plain float
+# (SI) and arrays become plain numpy arrays, which removes the unit bookkeeping
+# from every arithmetic operation in the model.
+#
+# Usage:
+#    python aircraft.py --fast            build/print the aircraft unit-free
+#    python -m Tools.fastmode             run the equivalence check
+#    python -m Tools.fastmode --rtol 1e-4
+#
+# The equivalence check builds the aircraft twice in fresh interpreters (the
+# mode cannot be switched once Aerothon is imported), once unit-checked and
+# once unit-free, and fails if any reported quantity differs beyond tolerance.
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import numpy as npy
+
+#==============================================================================#
+# FAST MODE SWITCH
+#==============================================================================#
+ENV_KEY   = 'scalar_off'
+ENV_VALUE = 'off'
+ROOT_DIR  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def fast_mode_enabled():
+    """
+    Returns True if Aerothon.scalar is (or will be) imported unit-free
+    """
+    return os.environ.get(ENV_KEY) == ENV_VALUE
+
+
+def enable_fast_mode():
+    """
+    Switches Aerothon.scalar to plain floats. Must be called before the first
+    Aerothon import; the unit system cannot be swapped afterwards.
+    """
+    if fast_mode_enabled():
+        return
+    if 'Aerothon.scalar' in sys.modules:
+        raise RuntimeError('Fast mode must be enabled before Aerothon is imported')
+    os.environ[ENV_KEY] = ENV_VALUE
+
+
+def value_of(quantity, unit=None):
+    """
+    Returns a quantity as a plain float (or float array) expressed in unit.
+    Works the same for unit-checked and unit-free quantities.
+
+    Inputs:
+        quantity - Aerothon scalar, array of scalars, float or numpy array
+        unit     - Aerothon unit to express the quantity in (None if dimensionless)
+    """
+    if unit is not None:
+        quantity = quantity / unit
+    value = npy.asarray(quantity, dtype=float)
+    if value.ndim == 0:
+        return float(value)
+    return value
+
+#==============================================================================#
+# EQUIVALENCE HARNESS
+#==============================================================================#
+class EquivalenceError(AssertionError):
+    pass
+
+
+def _dump_report(filename):
+    """
+    Builds the aircraft in this interpreter and writes its report as json
+    """
+    from aircraft import build_aircraft
+    from Tools.report import aircraft_report
+
+    report = aircraft_report(build_aircraft())
+    with open(filename, 'w') as f:
+        json.dump(list(report.items()), f)
+
+
+def _run_build(fast):
+    """
+    Builds the aircraft in a fresh interpreter and returns (report, seconds)
+    """
+    env = os.environ.copy()
+    env.pop(ENV_KEY, None)
+    if fast:
+        env[ENV_KEY] = ENV_VALUE
+
+    fd, filename = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    try:
+        start = time.time()
+        with open(os.devnull, 'w') as devnull:
+            subprocess.check_call([sys.executable, '-m', 'Tools.fastmode', '--dump', filename],
+                                  cwd=ROOT_DIR, env=env, stdout=devnull)
+        elapsed = time.time() - start
+        with open(filename) as f:
+            report = json.load(f)
+    finally:
+        os.remove(filename)
+
+    return report, elapsed
+
+
+def check_equivalence(rtol=1e-6, atol=1e-9, verbose=True):
+    """
+    Builds the aircraft unit-checked and unit-free and compares every reported
+    quantity. Raises EquivalenceError listing the quantities that differ by
+    more than atol + rtol*|checked|. Returns the two reports and run times.
+    """
+    checked, tchecked = _run_build(fast=False)
+    fast, tfast = _run_build(fast=True)
+
+    failures = []
+    for (name, ref), (fname, val) in zip(checked, fast):
+        if name != fname or not npy.isclose(val, ref, rtol=rtol, atol=atol):
+            failures.append((name, ref, val))
+
+    if verbose:
+        from Tools.report import UNITS
+        print('Unit-checked build : %.3f s' % tchecked)
+        print('Unit-free build    : %.3f s' % tfast)
+        for name, ref in checked:
+            print('   %-16s %14.6g %s' % (name, ref, UNITS.get(name, '')))
+
+    if failures or len(checked) != len(fast):
+        lines = ['%s: checked %r, fast %r' % f for f in failures]
+        if len(checked) != len(fast):
+            lines.append('report lengths differ (%d vs %d)' % (len(checked), len(fast)))
+        raise EquivalenceError('Fast mode differs from unit-checked build:\n   ' +
+                               '\n   '.join(lines))
+
+    return checked, fast, tchecked, tfast
+
+#==============================================================================#
+# COMMAND LINE
+#==============================================================================#
+if __name__ == '__main__':
+    if '--dump' in sys.argv:
+        _dump_report(sys.argv[sys.argv.index('--dump') + 1])
+        sys.exit(0)
+
+    rtol = 1e-6
+    if '--rtol' in sys.argv:
+        rtol = float(sys.argv[sys.argv.index('--rtol') + 1])
+
+    try:
+        check_equivalence(rtol=rtol)
+    except EquivalenceError as e:
+        print(str(e))
+        sys.exit(1)
+    print('Fast mode matches the unit-checked build (rtol = %g)' % rtol)
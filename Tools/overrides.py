@@ -0,0 +1,62 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# overrides.py: dotted attribute-path overrides for the design factories
+#
+# An override is a dictionary entry such as
+#    'HTail.S'           : 600*IN**2
+#    'BoxWing.Gap'       : 0.3
+#    'Aircraft.StaticMargin' : 0.12
+#    'SoccerBalls'       : 2.0       (design variable, no dots)
+# The first name selects the object the factory hands to apply_overrides.
+#==============================================================================#
+
+def get_path(obj, path):
+    """
+    Returns the attribute at the dotted path below obj
+    """
+    for name in path.split('.'):
+        obj = getattr(obj, name)
+    return obj
+
+
+def set_path(obj, path, value):
+    """
+    Sets the attribute at the dotted path below obj. Raises AttributeError if
+    the attribute does not already exist so a typo cannot silently add one.
+    """
+    names = path.split('.')
+    owner = get_path(obj, '.'.join(names[:-1])) if len(names) > 1 else obj
+    if not hasattr(owner, names[-1]):
+        raise AttributeError("'%s' has no attribute '%s'" % (type(owner).__name__, path))
+    setattr(owner, names[-1], value)
+
+
+def select(overrides, root):
+    """
+    Returns the overrides below root with the root name stripped, in a
+    deterministic (sorted) order
+    """
+    prefix = root + '.'
+    return [(key[len(prefix):], overrides[key]) for key in sorted(overrides or {})
+            if key.startswith(prefix)]
+
+
+def apply_overrides(obj, root, overrides):
+    """
+    Applies every 'root.attr.path' entry of overrides to obj
+    """
+    for path, value in select(overrides, root):
+        set_path(obj, path, value)
+
+
+def check_roots(overrides, roots):
+    """
+    Raises KeyError for overrides that do not start with one of the known roots
+    """
+    for key in overrides or {}:
+        if key.split('.')[0] not in roots:
+            raise KeyError("Unknown override '%s' (expected one of %s)" % (key, ', '.join(sorted(roots))))
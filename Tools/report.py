@@ -0,0 +1,77 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# report.py: plain-float summary of the quantities reported by aircraft.py
+#
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+from collections import OrderedDict
+
+from Tools.fastmode import value_of
+
+#==============================================================================#
+# AIRCRAFT REPORT
+#==============================================================================#
+# units of the reported quantities
+UNITS = OrderedDict([('V_LO',            'ft/s'),
+                     ('Groundroll',      'ft'),
+                     ('AlphaFus_LO',     'deg'),
+                     ('TotalWeight',     'lbf'),
+                     ('WingWeight',      'ozf'),
+                     ('FuselageWeight',  'ozf'),
+                     ('HTailWeight',     'ozf'),
+                     ('VTailWeight',     'ozf'),
+                     ('Xcg',             'in'),
+                     ('Ycg',             'in'),
+                     ('Zcg',             'in'),
+                     ('WingX',           'in'),
+                     ('WingZ',           'in'),
+                     ('HTailVC',         '-'),
+                     ('VTailVC',         '-')])
+
+
+def aircraft_report(Aircraft):
+    """
+    Returns an ordered dictionary of the quantities printed by aircraft.py as
+    plain floats in the units listed in UNITS. The same numbers come out
+    whether or not Aerothon.scalar is running unit-free.
+
+    Inputs:
+        Aircraft - a built ACTailAircraft
+    """
+    from Aerothon.scalar.units import FT, SEC, ARCDEG, IN, LBF, OZF
+
+    Wing = Aircraft.Wing
+    CG = value_of(Aircraft.CG(), IN)
+    WingX = value_of(Wing.X, IN)
+
+    report = OrderedDict()
+    report['V_LO']           = value_of(Wing.GetV_LO(), FT/SEC)
+    report['Groundroll']     = value_of(Aircraft.Groundroll(), FT)
+    report['AlphaFus_LO']    = value_of(Aircraft.GetAlphaFus_LO(), ARCDEG)
+    report['TotalWeight']    = value_of(Aircraft.TotalWeight, LBF)
+    report['WingWeight']     = value_of(Wing.Weight, OZF)
+    report['FuselageWeight'] = value_of(Aircraft.Fuselage.Weight, OZF)
+    report['HTailWeight']    = value_of(Aircraft.HTail.Weight, OZF)
+    report['VTailWeight']    = value_of(Aircraft.VTail.Weight, OZF)
+    report['Xcg']            = float(CG[0])
+    report['Ycg']            = float(CG[1])
+    report['Zcg']            = float(CG[2])
+    report['WingX']          = float(WingX[0])
+    report['WingZ']          = float(WingX[2])
+    report['HTailVC']        = value_of(Aircraft.HTail.VC)
+    report['VTailVC']        = value_of(Aircraft.VTail.VC)
+
+    return report
+
+
+def static_margin(Aircraft):
+    """
+    Returns the static margin -dCM/dCL of a built aircraft as a plain float
+    (positive is stable), from the CL and CM slopes at Aircraft.CMSlopeAt
+    """
+    return -value_of(Aircraft.dCM_da())/value_of(Aircraft.dCL_da())
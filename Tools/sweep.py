@@ -0,0 +1,225 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# TITLE
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# sweep.py: parametric sweeps of the aircraft definition in a process pool
+#
+# Every variant is a dictionary of overrides for build_aircraft (see
+# Tools/overrides.py). Values are plain numbers; an optional unit expression
+# per path (e.g. 'IN**2') is evaluated against Aerothon.scalar.units in the
+# worker, which keeps the tasks cheap to send between processes. Each worker
+# builds its own ACTailAircraft and the results are written column by column
+# to a numpy .npz file. The wing is positioned for Aircraft.StaticMargin by
+# the secant/Brent WingPlacement of the worker (warm-started from the worker's
+# previous variant) instead of the WingXMaxIt fixed-point loop; --fixed-point
+# switches back to the loop. With --stability every variant also gets the stability
+# derivative columns of Aerodynamics/stability.py, so designs can be filtered
+# on Cm_alpha, Cn_beta, Cl_beta, ...
+#
+# Usage:
+#    python -m Tools.sweep HTail.S=500,600,700 HTail.L=40:56:5 --unit HTail.S=IN**2 \
+#                          --unit HTail.L=IN --out tails.npz -j 4 [--stability] \
+#                          [--fixed-point]
+#    (a:b:n is n values from a to b)
+#==============================================================================#
+# IMPORTS
+#==============================================================================#
+# import built-in modules
+import sys
+import time
+import itertools
+import traceback
+import multiprocessing
+from collections import OrderedDict
+import numpy as npy
+
+#==============================================================================#
+# VARIANTS
+#==============================================================================#
+def grid(axes):
+    """
+    Returns the full factorial list of variants
+
+    Inputs:
+        axes - (ordered) dictionary or list of (path, values) pairs
+    """
+    axes = list(axes.items()) if hasattr(axes, 'items') else list(axes)
+    paths = [path for path, values in axes]
+    return [OrderedDict(zip(paths, combo))
+            for combo in itertools.product(*[values for path, values in axes])]
+
+#==============================================================================#
+# EVALUATION
+#==============================================================================#
+def _unit(expression):
+    """
+    Returns the Aerothon unit described by expression, e.g. 'IN**2' or 'FT/SEC'
+    """
+    from Aerothon.scalar import units
+    return eval(expression, {'__builtins__': {}}, vars(units))
+
+
+def evaluate(variant, units=None, use_cache=True, stability=False, placement=True):
+    """
+    Builds one variant and returns (report, seconds, error message)
+
+    Inputs:
+        variant   - dictionary of overrides with plain number values
+        units     - dictionary of unit expressions for the paths that need one
+        use_cache - load unchanged components from the shared on-disk cache
+        stability - add the stability derivatives to the report
+        placement - position the wing with the WingPlacement of this worker
+                    (False keeps the WingXMaxIt fixed-point iteration)
+    """
+    from aircraft import build_aircraft
+    from Tools.cache import ComponentCache
+    from Tools.report import aircraft_report
+    from Performance.wingplacement import worker_placement
+
+    start = time.time()
+    try:
+        overrides = {}
+        for path, value in variant.items():
+            if units and path in units:
+                value = value*_unit(units[path])
+            overrides[path] = value
+        cache = ComponentCache() if use_cache else None
+        Aircraft = build_aircraft(overrides, cache=cache,
+                                  placement=worker_placement() if placement else None)
+        report = aircraft_report(Aircraft)
+        if stability:
+            from Aerodynamics.stability import stability_report
+            report.update(stability_report(Aircraft))
+        return report, time.time() - start, ''
+    except Exception:
+        return None, time.time() - start, traceback.format_exc().strip().splitlines()[-1]
+
+
+def _evaluate_task(task):
+    return evaluate(*task)
+
+#==============================================================================#
+# SWEEP
+#==============================================================================#
+def run_sweep(variants, outfile=None, units=None, processes=None, use_cache=True, verbose=True,
+              stability=False, placement=True):
+    """
+    Evaluates every variant in a process pool and returns the results as an
+    ordered dictionary of columns (numpy arrays). Failed variants get NaN
+    results and their error message in the 'error' column.
+
+    Inputs:
+        variants  - list of override dictionaries (see grid)
+        outfile   - optional .npz file the columns are written to
+        units     - dictionary of unit expressions for the swept paths
+        processes - number of worker processes (default: one per cpu, 1 runs serially)
+        use_cache - share built components between variants through the disk cache
+        stability - also report the stability derivatives of every variant
+        placement - position the wing with one WingPlacement per worker (False
+                    keeps the WingXMaxIt fixed-point iteration)
+    """
+    from Tools.report import UNITS
+
+    variants = [OrderedDict(v) for v in variants]
+    tasks = [(variant, units, use_cache, stability, placement) for variant in variants]
+
+    start = time.time()
+    if processes == 1 or len(tasks) <= 1:
+        results = [_evaluate_task(task) for task in tasks]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_evaluate_task, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    elapsed = time.time() - start
+
+    paths = []
+    for variant in variants:
+        paths.extend(path for path in variant if path not in paths)
+
+    columns = OrderedDict()
+    for path in paths:
+        columns[path] = npy.array([v.get(path, npy.nan) for v in variants], dtype=float)
+    names = list(UNITS)
+    for r, t, e in results:
+        names.extend(name for name in (r or {}) if name not in names)
+    for name in names:
+        columns[name] = npy.array([r.get(name, npy.nan) if r else npy.nan for r, t, e in results],
+                                  dtype=float)
+    columns['seconds'] = npy.array([t for r, t, e in results], dtype=float)
+    columns['error'] = npy.array([e for r, t, e in results])
+
+    if outfile is not None:
+        save_sweep(outfile, columns, units)
+
+    if verbose:
+        nfail = sum(1 for r, t, e in results if r is None)
+        print('%d variants in %.1f s (%d failed)' % (len(variants), elapsed, nfail))
+
+    return columns
+
+
+def save_sweep(outfile, columns, units=None):
+    """
+    Writes sweep columns to a .npz file together with their units
+    """
+    from Tools.report import UNITS
+    from Aerodynamics.stability import UNITS as STABILITY_UNITS
+
+    names = list(columns)
+    allunits = dict(STABILITY_UNITS, **UNITS)
+    allunits['seconds'] = 's'
+    allunits.update(units or {})
+    npy.savez(outfile, _names=npy.array(names),
+              _units=npy.array([allunits.get(name, '') for name in names]),
+              **dict(('c%d' % i, columns[name]) for i, name in enumerate(names)))
+
+
+def load_sweep(filename):
+    """
+    Returns (columns, units) read back from a file written by save_sweep
+    """
+    data = npy.load(filename)
+    names = [str(name) for name in data['_names']]
+    columns = OrderedDict((name, data['c%d' % i]) for i, name in enumerate(names))
+    units = dict(zip(names, [str(u) for u in data['_units']]))
+    return columns, units
+
+#==============================================================================#
+# COMMAND LINE
+#==============================================================================#
+def _parse_values(text):
+    if ':' in text:
+        a, b, n = text.split(':')
+        return list(npy.linspace(float(a), float(b), int(n)))
+    return [float(v) for v in text.split(',')]
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    axes, units = [], {}
+    outfile, processes, stability, placement = 'sweep.npz', None, False, True
+    while args:
+        arg = args.pop(0)
+        if arg == '--unit':
+            path, expression = args.pop(0).split('=', 1)
+            units[path] = expression
+        elif arg == '--out':
+            outfile = args.pop(0)
+        elif arg == '-j':
+            processes = int(args.pop(0))
+        elif arg == '--stability':
+            stability = True
+        elif arg == '--fixed-point':
+            placement = False
+        else:
+            path, values = arg.split('=', 1)
+            axes.append((path, _parse_values(values)))
+
+    columns = run_sweep(grid(axes), outfile, units, processes, stability=stability,
+                        placement=placement)
+    print('Results written to ' + outfile)
@@ -43,273 +43,401 @@ from __future__ import division # let 5/2 = 2.5 rather than 2
 import os
 import sys
 import time
-import pylab as pyl
 import cmath as math
 
-# (USER) set-up directories
-#trunkDir = r'C:\eclipse\AircraftDesign\trunk'
-#BAPDir = os.path.join(trunkDir,r'Aircraft_Models\Reg2018Aircraft_UCBearForce')
+importStart = time.time() # start clock (to time the imports)
 
-# link path to Aerothon
-##sys.path.append(trunkDir)
+# (USER) unit-free fast numeric mode (python aircraft.py --fast), see Tools/fastmode.py
+# -> must be switched on before any Aerothon module is imported
+from Tools.fastmode import enable_fast_mode
+if __name__ == '__main__' and '--fast' in sys.argv:
+    enable_fast_mode()
 
 # import Aerothon modules
 from Aerothon.scalar.units import M, FT, IN, ARCDEG, RAD, LBF, SEC, KG, SLUG, OZF, gacc,\
      GRAM, OZM
 from Aerothon.scalar.units import AsUnit
-from Aerothon.DefaultMaterialsLibrary import Monokote, Basswood,\
-     Steel, Balsa, Aluminum, Ultracote
 from Aerothon.ACAircraft import ACTailAircraft
 #from Aerothon.ACTLenAircraft import ACTLenAircraft
 from Aerothon.ACWingWeight import ACRibWing
 
 # (USER) import Aerothon components
-#sys.path.append(os.path.join(BAPDir,r'Aerodynamics\Wing'))
-from Aerodynamics.Wing.BiWing import BoxWing # wing model
+from Aerodynamics.Wing.BiWing import build_box_wing # wing model
+from Propulsion.propulsion import build_propulsion # propulsion model
+from Structures.Fuselage.fuselage import build_fuselage # fuselage model
+
+from Propulsion.matched import use_table # tabulated propulsion performance
+from Aerodynamics.stability import stability_report, print_report # stability derivatives
+from Aerodynamics.avl import write_component # incremental AVL geometry writer
+from Aerodynamics.polarcache import cache_polars, print_stats # memoized component polars
+from Structures.massprops import MassProperties, print_groups # weight group rollup
+from Structures.materials import Monokote, Basswood,\
+     Steel, Balsa, Aluminum, Ultracote # copy-on-write material handles
+from Tools.overrides import apply_overrides, check_roots
+from Tools.cache import ComponentCache, module_sources
+
+importTime = time.time() - importStart # seconds spent importing the model
 
-#sys.path.append(os.path.join(BAPDir,'Propulsion'))
-from Propulsion.propulsion import Propulsion # propulsion model
-
-#sys.path.append(os.path.join(BAPDir,r'Structures\Fuselage'))
-from Structures.Fuselage.fuselage import Fuselage # fuselage model
+#==============================================================================#
+# DESIGN VARIABLES
+#==============================================================================#
+# (USER) defaults for the overrides that are not attribute paths
+DESIGN = {'EmptyWeight'  : 20*LBF, # dechellis: estimated airframe  weight
+          'SoccerBalls'  : 1.0,
+          'BallWeight'   : 1.0*LBF,
+          'StaticWeight' : 20*LBF}
 
-timeStart = time.time() # start clock (to time simulation)
+# objects that attribute-path overrides may start with
+OVERRIDE_ROOTS = ('Aircraft', 'BoxWing', 'Fuselage', 'Propulsion', 'HTail', 'VTail',
+                  'MainGear', 'NoseGear') + tuple(DESIGN)
 
 #==============================================================================#
 # AIRCRAFT MODEL
 #==============================================================================#
-# Create the Aircraft from the ACTailAircraft class imported above from Aerothon
-Aircraft = ACTailAircraft()
-#Aircraft = ACTLenAircraft()
-Aircraft.name = 'Turbo Time'
-
-# Assign parts we imported above (generated outside of this script) to aircraft
-Aircraft.SetWing(BoxWing)
-Aircraft.SetFuselage(Fuselage)
-Aircraft.SetPropulsion(Propulsion)
-
-# Wing alignment
-Aircraft.WingFuseFrac = 0.025 # 0.0 @ bottom of fuselage; 1.0 @ top of fuselage
-#Aircraft.Wing.i = 0*ARCDEG   # induced angle of attack, wing incidence
-
-# Engine alignment (height)
-Aircraft.EngineAlign = 0.72
-
-# Aircraft Properties
-EmptyWeight = 20*LBF # dechellis: estimated airframe  weight
-SoccerBalls = 1.0
-BallWeight = 1.0*LBF
-StaticWeight = 20*LBF
-PayloadWeight = (SoccerBalls*BallWeight)+StaticWeight
-Fuselage.PayBay.SoccerBalls.Weight = BallWeight*SoccerBalls
-Fuselage.PayBay.StaticPayload.Weight = StaticWeight
-#TennisBalls = 60.0 # dechellis: number of tennis balls flying
-#BallWeight = 0.131333*LBF # dechellis: weight of 1 tennis ball
-#PayloadWeight = (0.50*LBF+BallWeight)*TennisBalls # dechellis: "passenger luggage"
-#Fuselage.PayBay.TennisBalls.Weight = BallWeight*TennisBalls # Reassign tennis ball weight distribution based off desired loading
-Aircraft.TotalWeight = PayloadWeight + EmptyWeight # needed for calculations
-Aircraft.TippingAngle = 14*ARCDEG # Black line on AC plot, set to Lift Off AoA
-Aircraft.RotationAngle = 20*ARCDEG # Red line on AC plot, recommend 15 deg
-Aircraft.Alpha_Groundroll = 0*ARCDEG # AOA during ground roll
-
-Aircraft.CMSlopeAt = (2 * ARCDEG, 10 * ARCDEG)    # shiggins: what does this do? 
-Aircraft.CLSlopeAt = (3 * ARCDEG, 14 * ARCDEG)    # shiggins: what does this do?
-Aircraft.CLHTSlopeAt = (-5 * ARCDEG, 10 * ARCDEG) # shiggins: what does this do?
-Aircraft.DWSlopeAt = (3 * ARCDEG, 15 * ARCDEG)    # shiggins: what does this do?
-
-Aircraft.Alpha_Zero_CM = 5.0 * ARCDEG # for steady level flight
-Aircraft.StaticMargin = 0.1 # shiggins: this is driving wing position (higher values move the wing farther aft)
-Aircraft.WingXMaxIt = 60 # shiggins: this is the no. of iterations to solve
-
-Aircraft.VmaxPlt = 60*FT/SEC # Maximum velocity for plotting purposes
-
-Aircraft.RotationTime = 0.5*SEC # Est time aircraft rotates on ground during takeoff
+def build_aircraft(overrides=None, timing=None, cache=None, table=False, placement=None):
+    """
+    Returns a freshly built aircraft. Nothing is shared between calls and no
+    plotting module is imported.
+
+    Inputs:
+        overrides - dictionary of attribute-path overrides, e.g.
+                    {'HTail.S' : 600*IN**2, 'BoxWing.Gap' : 0.3,
+                     'Aircraft.StaticMargin' : 0.12, 'SoccerBalls' : 2.0}
+        timing    - optional dictionary filled with the import and build times
+                    (seconds) of each part of the model
+        cache     - optional ComponentCache; the wing, fuselage and propulsion
+                    are then loaded from disk unless their definition changed
+        table     - serve the propulsion thrust from a precomputed (disk cached)
+                    PropulsionTable instead of matching motor and prop each call
+        placement - optional WingPlacement (Performance/wingplacement.py) that
+                    positions the wing for Aircraft.StaticMargin instead of the
+                    WingXMaxIt fixed-point iteration
+    """
+    overrides = overrides or {}
+    check_roots(overrides, OVERRIDE_ROOTS)
+    times = {}
+
+    start = time.time()
+    BoxWing = _component(cache, 'BoxWing', build_box_wing, overrides)
+    times['wing'] = time.time() - start
+
+    start = time.time()
+    Fuselage = _component(cache, 'Fuselage', build_fuselage, overrides)
+    times['fuselage'] = time.time() - start
+
+    start = time.time()
+    Propulsion = _component(cache, 'Propulsion', build_propulsion, overrides)
+    if table:
+        use_table(Propulsion)
+    times['propulsion'] = time.time() - start
+
+    start = time.time()
+    Aircraft = _assemble(BoxWing, Fuselage, Propulsion, overrides)
+    times['aircraft'] = time.time() - start
+
+    if placement is not None:
+        start = time.time()
+        placement.place(Aircraft)
+        times['placement'] = time.time() - start
+
+    if timing is not None:
+        timing.update(times)
+        timing['import'] = importTime
+        timing['build'] = sum(times.values())
+
+    return Aircraft
+
+
+def _component(cache, name, builder, overrides):
+    """
+    Builds a component, or loads it from the cache when one is given
+    """
+    if cache is None:
+        return builder(overrides)
+
+    # the builder module and every repository module it loads (parts library,
+    # materials, ...), plus the material registry scales the weights depend on
+    from Structures.materials import REGISTRY
+    return cache.load_or_build(name, builder, overrides, module_sources(builder.__module__),
+                               prepare=lambda component: component.Refresh(),
+                               state=REGISTRY.state())
+
+
+def _design(overrides, name):
+    """
+    Returns the design variable name, overridden if requested
+    """
+    return overrides.get(name, DESIGN[name])
+
+
+def _assemble(BoxWing, Fuselage, Propulsion, overrides):
+    """
+    Assembles the aircraft from its components and sets up the tails and gear
+    """
+    # Create the Aircraft from the ACTailAircraft class imported above from Aerothon
+    Aircraft = ACTailAircraft()
+    #Aircraft = ACTLenAircraft()
+    Aircraft.name = 'Turbo Time'
+
+    # Assign parts built above (generated outside of this script) to aircraft
+    Aircraft.SetWing(BoxWing)
+    Aircraft.SetFuselage(Fuselage)
+    Aircraft.SetPropulsion(Propulsion)
+
+    # Wing alignment
+    Aircraft.WingFuseFrac = 0.025 # 0.0 @ bottom of fuselage; 1.0 @ top of fuselage
+    #Aircraft.Wing.i = 0*ARCDEG   # induced angle of attack, wing incidence
+
+    # Engine alignment (height)
+    Aircraft.EngineAlign = 0.72
+
+    # Aircraft Properties
+    EmptyWeight = _design(overrides, 'EmptyWeight')
+    SoccerBalls = _design(overrides, 'SoccerBalls')
+    BallWeight = _design(overrides, 'BallWeight')
+    StaticWeight = _design(overrides, 'StaticWeight')
+    PayloadWeight = (SoccerBalls*BallWeight)+StaticWeight
+    Fuselage.PayBay.SoccerBalls.Weight = BallWeight*SoccerBalls
+    Fuselage.PayBay.StaticPayload.Weight = StaticWeight
+    #TennisBalls = 60.0 # dechellis: number of tennis balls flying
+    #BallWeight = 0.131333*LBF # dechellis: weight of 1 tennis ball
+    #PayloadWeight = (0.50*LBF+BallWeight)*TennisBalls # dechellis: "passenger luggage"
+    #Fuselage.PayBay.TennisBalls.Weight = BallWeight*TennisBalls # Reassign tennis ball weight distribution based off desired loading
+    Aircraft.TotalWeight = PayloadWeight + EmptyWeight # needed for calculations
+    Aircraft.TippingAngle = 14*ARCDEG # Black line on AC plot, set to Lift Off AoA
+    Aircraft.RotationAngle = 20*ARCDEG # Red line on AC plot, recommend 15 deg
+    Aircraft.Alpha_Groundroll = 0*ARCDEG # AOA during ground roll
+
+    Aircraft.CMSlopeAt = (2 * ARCDEG, 10 * ARCDEG)    # shiggins: what does this do? 
+    Aircraft.CLSlopeAt = (3 * ARCDEG, 14 * ARCDEG)    # shiggins: what does this do?
+    Aircraft.CLHTSlopeAt = (-5 * ARCDEG, 10 * ARCDEG) # shiggins: what does this do?
+    Aircraft.DWSlopeAt = (3 * ARCDEG, 15 * ARCDEG)    # shiggins: what does this do?
+
+    Aircraft.Alpha_Zero_CM = 5.0 * ARCDEG # for steady level flight
+    Aircraft.StaticMargin = 0.1 # shiggins: this is driving wing position (higher values move the wing farther aft)
+    Aircraft.WingXMaxIt = 60 # shiggins: this is the no. of iterations to solve
+
+    Aircraft.VmaxPlt = 60*FT/SEC # Maximum velocity for plotting purposes
+
+    Aircraft.RotationTime = 0.5*SEC # Est time aircraft rotates on ground during takeoff
+
+    RibMat = _htail(Aircraft)
+    apply_overrides(Aircraft.HTail, 'HTail', overrides)
+
+    _vtail(Aircraft, RibMat)
+    apply_overrides(Aircraft.VTail, 'VTail', overrides)
+
+    _landing_gear(Aircraft)
+    apply_overrides(Aircraft.MainGear, 'MainGear', overrides)
+    apply_overrides(Aircraft.NoseGear, 'NoseGear', overrides)
+
+    apply_overrides(Aircraft, 'Aircraft', overrides)
+
+    return Aircraft
 
 #==============================================================================#
 # HORIZONTAL TAIL
 #==============================================================================#
-HTail = Aircraft.HTail # set up the horizontal tail class
-HTail.Airfoil = 'NACA0012'
-
-Aircraft.HTailPos = 0.0 # T-Tail = 1 (horiz tail at top of vert tail);
-                        # reg    = 0 (horiz tail at same lvl as middle of tail bulk)
-
-HTail.FullWing = True # Full wing surface (i.e. top and bottom tail)
-HTail.Inverted = True # Invert the airfoil section
-
-HTail.b = 49.18 * IN # horizontal tail span #MJZ was 50 in sholsinger
-#HTail.S = 590.4 * IN**2 # horizontal tail planform area was 600 in**2 sholsinger
-HTail.S =  600 * IN**2 # horizontal tail planform area was 600 in**2 sholsinger
-HTail.L = 48.21*IN   # horizontal tail "length", dist back from wing AC
-HTail.TR = 1.0 # horizontal tail taper ratio
-HTail.o_eff = 0.97 # horizontal tail oswald #MJZ
-
-HTail.SweepFc  = 1.0 - HTail.Elevator.Fc # sweep bout hinge, (Elevator LE straight)
-HTail.DWF = 1.4 # Main wing Down wash factor (b/w 1 (close to wing), 2 (far away))
-
-HTail.ClSlopeAt = (-10*ARCDEG, 10*ARCDEG) #SPH: what is this actually doing?
-HTail.CmSlopeAt = (-4*ARCDEG, 5*ARCDEG) #SPH: what is this actually doing?
-
-# Elevator properties
-HTail.Elevator.Fc = 0.62 # Elevator chord (% chord)
-HTail.Elevator.Fb = 1.0 # Elevator span (% span)
-HTail.Elevator.Ft = 0.0 # Start of the aileron (% span)
-HTail.Elevator.Weight = 2.8*OZF # ##MASS##: matches prototype build 01/14/2016 SPH
-HTail.Elevator.WeightGroup = 'HTail'
-
-HTail.Elevator.Servo.Fc  = 0.363 # c.g. of servo matches proto build 01/14/2016 SPH
-HTail.Elevator.Servo.Fbc = 0.0
-HTail.Elevator.Servo.Weight = 1.58*OZF ##MASS## measured for proto build 01/15/2016 SPHHTail.Elevator.Servo.WeightGroup = 'Controls'
-HTail.Elevator.Servo.Torque = 152*IN*OZM # 2 servos on elevator @76 IN*OZM each
-
-# Structural properties
-# Spar taken as 1/8 inch width and thickness of the max thickness at the root
-Basswood = Basswood.copy()
-RibMat = Balsa.copy()
-RibMat.Thickness = 1/8 * IN
-RibMat.ForceDensity *= 0.425*0.85 # assuming 50% rib area cut-out
-
-HTail.SetWeightCalc(ACRibWing)
-HTail.WingWeight.RibMat = RibMat
-HTail.WingWeight.RibSpace = 4.0 * IN
-
-HTail.WingWeight.SkinMat = Ultracote.copy()
-HTail.WingWeight.SkinMat.AreaForceDensity *= 0.5 # shiggins: based on measurements
-HTail.WingWeight.SkinMat.Thickness = 0.002125 * IN # shiggins: based on measurements
-HTail.WingWeight.WeightGroup = 'HTail'
-
-HTail.WingWeight.AddSpar('MainSpar', 0.5*IN, 0.75*IN, (0.25,1),1.0, False)
-HTail.WingWeight.MainSpar.SparMat = Basswood.copy()
-HTail.WingWeight.MainSpar.SparMat.LinearForceDensity = 0.83*0.078125*OZF/IN # = Balsa.copy()
-HTail.WingWeight.MainSpar.Position = (0.45,0.55)
-HTail.WingWeight.MainSpar.ScaleToWing = [False, False]
-HTail.WingWeight.MainSpar.WeightGroup = "HTail"
-
-HTail.WingWeight.AddSpar('LeadingEdge', 1/32*IN, 1.25*IN, (0.25,1),1.0, False)
-HTail.WingWeight.LeadingEdge.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
-HTail.WingWeight.LeadingEdge.Position = (0.45,0.55)
-HTail.WingWeight.LeadingEdge.ScaleToWing = [False, False]
-HTail.WingWeight.LeadingEdge.WeightGroup = "HTail"
-
-HTail.WingWeight.AddSpar('TrailingEdge1', 1/32*IN, 2*IN, (0.25,1),1.0, False)
-HTail.WingWeight.TrailingEdge1.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
-HTail.WingWeight.TrailingEdge1.Position = (0.45,0.55)
-HTail.WingWeight.TrailingEdge1.ScaleToWing = [False, False]
-HTail.WingWeight.TrailingEdge1.WeightGroup = "HTail"
-
-HTail.WingWeight.AddSpar('TrailingEdge2', 1/32*IN, 2*IN, (0.25,1),1.0, False)
-HTail.WingWeight.TrailingEdge2.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
-HTail.WingWeight.TrailingEdge2.Position = (0.45,0.55)
-HTail.WingWeight.TrailingEdge2.ScaleToWing = [False, False]
-HTail.WingWeight.TrailingEdge2.WeightGroup = "HTail"
+def _htail(Aircraft):
+    """
+    Sets up the horizontal tail and returns the rib material shared with the vertical tail
+    """
+    HTail = Aircraft.HTail # set up the horizontal tail class
+    HTail.Airfoil = 'NACA0012'
+
+    Aircraft.HTailPos = 0.0 # T-Tail = 1 (horiz tail at top of vert tail);
+                            # reg    = 0 (horiz tail at same lvl as middle of tail bulk)
+
+    HTail.FullWing = True # Full wing surface (i.e. top and bottom tail)
+    HTail.Inverted = True # Invert the airfoil section
+
+    HTail.b = 49.18 * IN # horizontal tail span #MJZ was 50 in sholsinger
+    #HTail.S = 590.4 * IN**2 # horizontal tail planform area was 600 in**2 sholsinger
+    HTail.S =  600 * IN**2 # horizontal tail planform area was 600 in**2 sholsinger
+    HTail.L = 48.21*IN   # horizontal tail "length", dist back from wing AC
+    HTail.TR = 1.0 # horizontal tail taper ratio
+    HTail.o_eff = 0.97 # horizontal tail oswald #MJZ
+
+    HTail.SweepFc  = 1.0 - HTail.Elevator.Fc # sweep bout hinge, (Elevator LE straight)
+    HTail.DWF = 1.4 # Main wing Down wash factor (b/w 1 (close to wing), 2 (far away))
+
+    HTail.ClSlopeAt = (-10*ARCDEG, 10*ARCDEG) #SPH: what is this actually doing?
+    HTail.CmSlopeAt = (-4*ARCDEG, 5*ARCDEG) #SPH: what is this actually doing?
+
+    # Elevator properties
+    HTail.Elevator.Fc = 0.62 # Elevator chord (% chord)
+    HTail.Elevator.Fb = 1.0 # Elevator span (% span)
+    HTail.Elevator.Ft = 0.0 # Start of the aileron (% span)
+    HTail.Elevator.Weight = 2.8*OZF # ##MASS##: matches prototype build 01/14/2016 SPH
+    HTail.Elevator.WeightGroup = 'HTail'
+
+    HTail.Elevator.Servo.Fc  = 0.363 # c.g. of servo matches proto build 01/14/2016 SPH
+    HTail.Elevator.Servo.Fbc = 0.0
+    HTail.Elevator.Servo.Weight = 1.58*OZF ##MASS## measured for proto build 01/15/2016 SPHHTail.Elevator.Servo.WeightGroup = 'Controls'
+    HTail.Elevator.Servo.Torque = 152*IN*OZM # 2 servos on elevator @76 IN*OZM each
+
+    # Structural properties
+    # Spar taken as 1/8 inch width and thickness of the max thickness at the root
+    RibMat = Balsa.copy()
+    RibMat.Thickness = 1/8 * IN
+    RibMat.ForceDensity *= 0.425*0.85 # assuming 50% rib area cut-out
+
+    HTail.SetWeightCalc(ACRibWing)
+    HTail.WingWeight.RibMat = RibMat
+    HTail.WingWeight.RibSpace = 4.0 * IN
+
+    HTail.WingWeight.SkinMat = Ultracote.copy()
+    HTail.WingWeight.SkinMat.AreaForceDensity *= 0.5 # shiggins: based on measurements
+    HTail.WingWeight.SkinMat.Thickness = 0.002125 * IN # shiggins: based on measurements
+    HTail.WingWeight.WeightGroup = 'HTail'
+
+    HTail.WingWeight.AddSpar('MainSpar', 0.5*IN, 0.75*IN, (0.25,1),1.0, False)
+    HTail.WingWeight.MainSpar.SparMat = Basswood.copy()
+    HTail.WingWeight.MainSpar.SparMat.LinearForceDensity = 0.83*0.078125*OZF/IN # = Balsa.copy()
+    HTail.WingWeight.MainSpar.Position = (0.45,0.55)
+    HTail.WingWeight.MainSpar.ScaleToWing = [False, False]
+    HTail.WingWeight.MainSpar.WeightGroup = "HTail"
+
+    HTail.WingWeight.AddSpar('LeadingEdge', 1/32*IN, 1.25*IN, (0.25,1),1.0, False)
+    HTail.WingWeight.LeadingEdge.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
+    HTail.WingWeight.LeadingEdge.Position = (0.45,0.55)
+    HTail.WingWeight.LeadingEdge.ScaleToWing = [False, False]
+    HTail.WingWeight.LeadingEdge.WeightGroup = "HTail"
+
+    HTail.WingWeight.AddSpar('TrailingEdge1', 1/32*IN, 2*IN, (0.25,1),1.0, False)
+    HTail.WingWeight.TrailingEdge1.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
+    HTail.WingWeight.TrailingEdge1.Position = (0.45,0.55)
+    HTail.WingWeight.TrailingEdge1.ScaleToWing = [False, False]
+    HTail.WingWeight.TrailingEdge1.WeightGroup = "HTail"
+
+    HTail.WingWeight.AddSpar('TrailingEdge2', 1/32*IN, 2*IN, (0.25,1),1.0, False)
+    HTail.WingWeight.TrailingEdge2.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
+    HTail.WingWeight.TrailingEdge2.Position = (0.45,0.55)
+    HTail.WingWeight.TrailingEdge2.ScaleToWing = [False, False]
+    HTail.WingWeight.TrailingEdge2.WeightGroup = "HTail"
+
+    return RibMat
 
 #==============================================================================#
 # VERTICAL TAIL
 #==============================================================================#
-# VERTICAL TAIL
-VTail = Aircraft.VTail
-VTail.Airfoil = 'NACA0012'
-
-Aircraft.VTailPos = 0.0 # spanwise along the horiz tail semi-span
-VTail.Axis    = (0.0, 1.0) # (0,1) full wing (or vert above centerline); (0,-1) for vert below centerline
-
-VTail.L       = HTail.L # match the LE of the horiz and vert tails
-VTail.S       = 154.29 * IN**2
-VTail.b       = 12.65 * IN
-VTail.TR      = 1
-
-VTail.o_eff   = 0.96
-
-VTail.FullWing = False # top and bottom of centerline
-VTail.Symmetric = False # duplicates the vtail on the opposite side of tail
-
-# Rudder properties
-VTail.Rudder.Fc = 0.50 # percent of vertical tail used by rudder
-VTail.Rudder.Fb = 1.0 # span of the rudder (percent span of vtail)
-VTail.Rudder.Ft = 0.0 # start of the rudder (percent span of vtail)
-VTail.Rudder.Weight = 0.5*OZF # ##MASS##: matches prototype build 01/14/2016 SPH
-VTail.Rudder.WeightGroup = "VTail"
-VTail.Rudder.SgnDup    = -1.0 # ??? #SPH 11/17/2015
-VTail.Rudder.Servo.Fc  = 0.32 # fraction of vtail chord, matches prototype build 01/14/2016 SPH
-VTail.Rudder.Servo.Fbc = 0.17 # matches prototype build 01/14/2016 SPH
-VTail.Rudder.Servo.Weight = 0.85 * OZF ##MASS##: matches prototype build 01/14/2016 SPH
-VTail.Rudder.Servo.WeightGroup = "Controls"
-VTail.Rudder.Servo.Torque = 76*IN*OZM # matches prototype build 01/14/2016 SPH
-VTail.SweepFc = VTail.TR #sweep bout rudder hinge 
-
-# Structural properties
-VTail.SetWeightCalc(ACRibWing)
-VTail.WingWeight.RibMat = RibMat # properties assigned above in htail
-VTail.WingWeight.RibSpace = 5.0 * IN
-
-VTail.WingWeight.SkinMat = Ultracote.copy()
-VTail.WingWeight.SkinMat.AreaForceDensity *= 0.5 # shiggins: based on measurements
-VTail.WingWeight.SkinMat.Thickness = 0.002125*IN  # shiggins: based on measurements
-
-VTail.WingWeight.WeightGroup = 'VTail'
-
-VTail.WingWeight.AddSpar("MainSpar", 0.5*IN, 0.75*IN, (0.25,1),1.0, False)
-VTail.WingWeight.MainSpar.SparMat = Basswood.copy()
-VTail.WingWeight.MainSpar.SparMat.LinearForceDensity = 0.83*0.078125*OZF/IN #= Balsa.copy()
-VTail.WingWeight.MainSpar.Position = (0.45,0)
-VTail.WingWeight.MainSpar.ScaleToWing = [False, False]
-VTail.WingWeight.MainSpar.WeightGroup = "VTail"
-
-VTail.WingWeight.AddSpar("LeadingEdge", 1/8*IN, 1/4*IN, (0.25,1),1.0, False)
-VTail.WingWeight.LeadingEdge.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
-VTail.WingWeight.LeadingEdge.Position = (0.008,0)
-VTail.WingWeight.LeadingEdge.ScaleToWing = [False, False]
-VTail.WingWeight.LeadingEdge.WeightGroup = "VTail"
-
-VTail.WingWeight.AddSpar("TrailingEdge1", 1/32*IN, 0.5*IN, (0.25,1),1.0, False)
-VTail.WingWeight.TrailingEdge1.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
-VTail.WingWeight.TrailingEdge1.Position = (0.915,0.2)
-VTail.WingWeight.TrailingEdge1.ScaleToWing = [False, False]
-VTail.WingWeight.TrailingEdge1.WeightGroup = "VTail"
-
-VTail.WingWeight.AddSpar("TrailingEdge2", 1/32*IN, 0.5*IN, (0.25,1),1.0, False)
-VTail.WingWeight.TrailingEdge2.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
-VTail.WingWeight.TrailingEdge2.Position = (0.915,-0.2)
-VTail.WingWeight.TrailingEdge2.ScaleToWing = [False, False]
-VTail.WingWeight.TrailingEdge2.WeightGroup = "VTail"
+def _vtail(Aircraft, RibMat):
+    """
+    Sets up the vertical tail (after the horizontal tail it is aligned with)
+    """
+    # VERTICAL TAIL
+    HTail = Aircraft.HTail
+    VTail = Aircraft.VTail
+    VTail.Airfoil = 'NACA0012'
+
+    Aircraft.VTailPos = 0.0 # spanwise along the horiz tail semi-span
+    VTail.Axis    = (0.0, 1.0) # (0,1) full wing (or vert above centerline); (0,-1) for vert below centerline
+
+    VTail.L       = HTail.L # match the LE of the horiz and vert tails
+    VTail.S       = 154.29 * IN**2
+    VTail.b       = 12.65 * IN
+    VTail.TR      = 1
+
+    VTail.o_eff   = 0.96
+
+    VTail.FullWing = False # top and bottom of centerline
+    VTail.Symmetric = False # duplicates the vtail on the opposite side of tail
+
+    # Rudder properties
+    VTail.Rudder.Fc = 0.50 # percent of vertical tail used by rudder
+    VTail.Rudder.Fb = 1.0 # span of the rudder (percent span of vtail)
+    VTail.Rudder.Ft = 0.0 # start of the rudder (percent span of vtail)
+    VTail.Rudder.Weight = 0.5*OZF # ##MASS##: matches prototype build 01/14/2016 SPH
+    VTail.Rudder.WeightGroup = "VTail"
+    VTail.Rudder.SgnDup    = -1.0 # ??? #SPH 11/17/2015
+    VTail.Rudder.Servo.Fc  = 0.32 # fraction of vtail chord, matches prototype build 01/14/2016 SPH
+    VTail.Rudder.Servo.Fbc = 0.17 # matches prototype build 01/14/2016 SPH
+    VTail.Rudder.Servo.Weight = 0.85 * OZF ##MASS##: matches prototype build 01/14/2016 SPH
+    VTail.Rudder.Servo.WeightGroup = "Controls"
+    VTail.Rudder.Servo.Torque = 76*IN*OZM # matches prototype build 01/14/2016 SPH
+    VTail.SweepFc = VTail.TR #sweep bout rudder hinge 
+
+    # Structural properties
+    VTail.SetWeightCalc(ACRibWing)
+    VTail.WingWeight.RibMat = RibMat # properties assigned above in htail
+    VTail.WingWeight.RibSpace = 5.0 * IN
+
+    VTail.WingWeight.SkinMat = Ultracote.copy()
+    VTail.WingWeight.SkinMat.AreaForceDensity *= 0.5 # shiggins: based on measurements
+    VTail.WingWeight.SkinMat.Thickness = 0.002125*IN  # shiggins: based on measurements
+
+    VTail.WingWeight.WeightGroup = 'VTail'
+
+    VTail.WingWeight.AddSpar("MainSpar", 0.5*IN, 0.75*IN, (0.25,1),1.0, False)
+    VTail.WingWeight.MainSpar.SparMat = Basswood.copy()
+    VTail.WingWeight.MainSpar.SparMat.LinearForceDensity = 0.83*0.078125*OZF/IN #= Balsa.copy()
+    VTail.WingWeight.MainSpar.Position = (0.45,0)
+    VTail.WingWeight.MainSpar.ScaleToWing = [False, False]
+    VTail.WingWeight.MainSpar.WeightGroup = "VTail"
+
+    VTail.WingWeight.AddSpar("LeadingEdge", 1/8*IN, 1/4*IN, (0.25,1),1.0, False)
+    VTail.WingWeight.LeadingEdge.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
+    VTail.WingWeight.LeadingEdge.Position = (0.008,0)
+    VTail.WingWeight.LeadingEdge.ScaleToWing = [False, False]
+    VTail.WingWeight.LeadingEdge.WeightGroup = "VTail"
+
+    VTail.WingWeight.AddSpar("TrailingEdge1", 1/32*IN, 0.5*IN, (0.25,1),1.0, False)
+    VTail.WingWeight.TrailingEdge1.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
+    VTail.WingWeight.TrailingEdge1.Position = (0.915,0.2)
+    VTail.WingWeight.TrailingEdge1.ScaleToWing = [False, False]
+    VTail.WingWeight.TrailingEdge1.WeightGroup = "VTail"
+
+    VTail.WingWeight.AddSpar("TrailingEdge2", 1/32*IN, 0.5*IN, (0.25,1),1.0, False)
+    VTail.WingWeight.TrailingEdge2.SparMat = Balsa.copy() #.LinearForceDensity = .008*LBF/(1*IN)
+    VTail.WingWeight.TrailingEdge2.Position = (0.915,-0.2)
+    VTail.WingWeight.TrailingEdge2.ScaleToWing = [False, False]
+    VTail.WingWeight.TrailingEdge2.WeightGroup = "VTail"
 
 #==============================================================================#
 # LANDING GEAR
 #==============================================================================#
-# set material variables
-Aluminum = Aluminum.copy()
-Steel    = Steel.copy()
-
-MainGear = Aircraft.MainGear # set main gear class
-MainGear.GearHeight   = 8.698 * IN
-##MainGear.StrutL       = 1 * IN # with theta = 0 set to distance axle sits below payload bay
-##MainGear.StrutW       = 0.2 * IN
-##MainGear.StrutH       = 0.1 * IN
-MainGear.WheelDiam    = 6.0 * IN    # Changed Wheel Diameter to account for AC Tipping Angle
-MainGear.WheelThickness = 0.25*IN
-MainGear.Theta = 0.0*ARCDEG # for gear angle (strut)
-MainGear.X[1] = 7.0 * IN # distance from center in y (shiggins: I am overriding the default calc here)
-MainGear.Strut.Weight = 5.68*OZF 
-MainGear.Strut.WeightGroup = "LandingGear"
-MainGear.Wheel.Weight = 3.0*OZF # shiggins: guess for now
-MainGear.Wheel.WeightGroup = "LandingGear"
-
-NoseGear = Aircraft.NoseGear # set nose gear class
-NoseGear.StrutW    = 0.1 * IN
-NoseGear.StrutH    = 0.1 * IN
-NoseGear.WheelDiam = 2 * IN
-
-NoseGear.Strut.Weight = 3.0*OZF # shiggins: guess for now
-NoseGear.Strut.WeightGroup = "LandingGear"
-NoseGear.Wheel.Weight = 1.0*OZF # shiggins: guess for now
-NoseGear.Wheel.WeightGroup = "LandingGear"
+def _landing_gear(Aircraft):
+    """
+    Sets up the main and nose gear
+    """
+    MainGear = Aircraft.MainGear # set main gear class
+    MainGear.GearHeight   = 8.698 * IN
+    ##MainGear.StrutL       = 1 * IN # with theta = 0 set to distance axle sits below payload bay
+    ##MainGear.StrutW       = 0.2 * IN
+    ##MainGear.StrutH       = 0.1 * IN
+    MainGear.WheelDiam    = 6.0 * IN    # Changed Wheel Diameter to account for AC Tipping Angle
+    MainGear.WheelThickness = 0.25*IN
+    MainGear.Theta = 0.0*ARCDEG # for gear angle (strut)
+    MainGear.X[1] = 7.0 * IN # distance from center in y (shiggins: I am overriding the default calc here)
+    MainGear.Strut.Weight = 5.68*OZF 
+    MainGear.Strut.WeightGroup = "LandingGear"
+    MainGear.Wheel.Weight = 3.0*OZF # shiggins: guess for now
+    MainGear.Wheel.WeightGroup = "LandingGear"
+
+    NoseGear = Aircraft.NoseGear # set nose gear class
+    NoseGear.StrutW    = 0.1 * IN
+    NoseGear.StrutH    = 0.1 * IN
+    NoseGear.WheelDiam = 2 * IN
+
+    NoseGear.Strut.Weight = 3.0*OZF # shiggins: guess for now
+    NoseGear.Strut.WeightGroup = "LandingGear"
+    NoseGear.Wheel.Weight = 1.0*OZF # shiggins: guess for now
+    NoseGear.Wheel.WeightGroup = "LandingGear"
 
 #==============================================================================#
 # VISUALIZATION & RESULTS
 #==============================================================================#
-print 'Aircraft created'
-
 if __name__ == '__main__':
+    timing = {}
+    cache = None if '--no-cache' in sys.argv else ComponentCache()
+    Aircraft = build_aircraft(timing=timing, cache=cache, table='--table' in sys.argv)
+    print 'Aircraft created'
+    PolarCaches = cache_polars(Aircraft) # the plots below share polar points
+
+    BoxWing = Aircraft.Wing
+    HTail = Aircraft.HTail
+    VTail = Aircraft.VTail
+    EmptyWeight = DESIGN['EmptyWeight']
   
     print
     print 'AIRCRAFT PERFORMANCE'
@@ -367,12 +495,15 @@ if __name__ == '__main__':
     print "LowerWing Weight : ", BoxWing.LowerWing.Weight
     print "UpperWing Weight : ", BoxWing.UpperWing.Weight
     print "EndPlate Weight  : ", BoxWing.EndPlate.Weight
-##
-    ######### SPH: ADD THESE OUTPUTS ##########
-    #Cn beta, Cm alpha, Cl beta
+    print
+    print '---------- WEIGHT GROUPS ----------'
+    print_groups(MassProperties.from_component(Aircraft, 'Aircraft'))
+    print
+    print '---------- STABILITY DERIVATIVES ----------'
+    print_report(stability_report(Aircraft)) # Cn beta, Cm alpha, Cl beta, ...
  
     Aircraft.Draw()
-    Aircraft.WriteAVLAircraft('BAP.avl')  
+    write_component(Aircraft, 'BAP.avl') # only rewritten when the geometry changed
     
     Aircraft.PlotPolarsSlopes(fig=2)
     Aircraft.PlotCMPolars(3, (-10*ARCDEG, -5*ARCDEG, 0*ARCDEG, +5*ARCDEG, +10 * ARCDEG), XcgOffsets=(+0.05, -0.05))
@@ -391,9 +522,19 @@ if __name__ == '__main__':
     #HTail.WingWeight.Draw(fig = 9)
     #HTail.Draw(fig = 10)
     
-    timeEnd = time.time()
+    print
+    print '---------- POLAR EVALUATIONS ----------'
+    print_stats(PolarCaches)
     print 
+    print('Import time: ' + str(round(timing['import'],3)) +\
+          '  Build time: ' + str(round(timing['build'],3)) +\
+          '  (wing ' + str(round(timing['wing'],3)) +\
+          ', fuselage ' + str(round(timing['fuselage'],3)) +\
+          ', propulsion ' + str(round(timing['propulsion'],3)) +\
+          ', aircraft ' + str(round(timing['aircraft'],3)) + ')')
     print('Aircraft calculations complete. Time elapsed: ' +\
-          str(round(timeEnd-timeStart,3)))
+          str(round(time.time()-importStart,3)))
+
+    import pylab as pyl
     pyl.show()
 
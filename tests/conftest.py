@@ -0,0 +1,17 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# conftest.py: pytest set-up for the behaviour tests
+#
+# The tests cover the plain-SI numerical cores and need numpy only; anything
+# that builds Aerothon components is exercised by the __main__ blocks and the
+# equivalence checks instead. Run from the repository root:
+#    python -m pytest -q tests
+#==============================================================================#
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
@@ -0,0 +1,195 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_avl.py: AVL geometry reader and incremental writer
+#==============================================================================#
+import os
+import shutil
+import pytest
+
+from Aerodynamics import avl
+from Aerodynamics.avl import read_avl, parse_avl, avl_text, write_avl, reuse_text,\
+     write_component, SECTION_DTYPE
+
+from conftest import ROOT_DIR
+
+BAP = os.path.join(ROOT_DIR, 'BAP.avl')
+
+
+class FakeWing(object):
+    """ stands in for an Aerothon wing: WriteAVLWing copies a geometry text """
+    def __init__(self, text, own=None):
+        self.text = text
+        self.own = own  # what WriteAVLWing writes instead, if not None
+        self._calls = 0
+
+    def WriteAVLWing(self, filename):
+        self._calls += 1
+        with open(filename, 'w') as f:
+            f.write(self.text if self.own is None else self.own)
+
+
+class FakeAircraft(object):
+    """ stands in for an Aerothon aircraft built of the blocks of BAP.avl """
+    def __init__(self, text):
+        Geometry = parse_avl(text)
+        header, blocks = Geometry._header[0], dict((S.name, S._text) for S in Geometry.Surfaces)
+        self.HTail = FakeWing(header + blocks['Horizontal Tail'])
+        self.Wing = FakeWing(header + blocks['LowerWing'] + blocks['UpperWing'] + blocks['End Plate'])
+        self.VTail = FakeWing(header + blocks['Vertical Tail'])
+        self._values = (Geometry.Sref, Geometry.Cref, Geometry.Bref) + tuple(Geometry.Xref)
+        self._header = header
+        self._calls = 0
+
+    def WriteAVLAircraft(self, filename):
+        self._calls += 1
+        Geometry = parse_avl(self._header)
+        Geometry.Sref, Geometry.Cref, Geometry.Bref = self._values[:3]
+        Geometry.Xref = self._values[3:]
+        text = avl_text(Geometry)
+        for Part in (self.HTail, self.Wing, self.VTail):
+            text += Part.text[len(self._header):]
+        with open(filename, 'w') as f:
+            f.write(text)
+
+    def CG(self):
+        return self._values[3:]
+
+    def calls(self):
+        return [Part._calls for Part in (self, self.HTail, self.Wing, self.VTail)]
+
+
+def edited(text, name, field, scale):
+    """ returns the text with one section field of a surface scaled """
+    Geometry = parse_avl(text)
+    Geometry.surface(name).Sections[field] *= scale
+    return avl_text(Geometry)
+
+
+def read_text():
+    with open(BAP) as f:
+        return f.read()
+
+
+def test_unchanged_geometry_round_trips_byte_for_byte():
+    Geometry = read_avl(BAP)
+    assert avl_text(Geometry) == read_text()
+    assert len(Geometry.Surfaces) > 1
+    assert Geometry.Surfaces[0].Sections.dtype == SECTION_DTYPE
+
+
+def test_only_the_edited_surface_is_regenerated():
+    Geometry = read_avl(BAP)
+    first, last = Geometry.Surfaces[0], Geometry.Surfaces[-1]
+    kept = last._text
+    first.Sections['Chord'] *= 1.1
+    text = avl_text(Geometry)
+    assert text != read_text()
+    assert kept in text
+    assert parse_avl(text).Surfaces[0].Sections['Chord'][0] == \
+        pytest.approx(first.Sections['Chord'][0], rel=1e-11)
+
+
+def test_write_skips_identical_files(tmpdir):
+    target = str(tmpdir.join('BAP.avl'))
+    shutil.copyfile(BAP, target)
+    Geometry = read_avl(target)
+    assert not write_avl(Geometry, target)
+    Geometry.Sref *= 2
+    assert write_avl(Geometry, target)
+    assert read_avl(target).Sref == Geometry.Sref
+
+
+def test_reuse_text_keeps_blocks_of_the_file_on_disk():
+    Previous = parse_avl(read_text())
+    Geometry = parse_avl(read_text())
+    for Surface in Geometry.Surfaces:
+        Surface._text = None
+    Geometry._header = None
+    reuse_text(Geometry, Previous)
+    assert avl_text(Geometry) == read_text()
+
+
+def test_write_component_routes_through_the_incremental_writer(tmpdir):
+    target = str(tmpdir.join('BAP.avl'))
+    shutil.copyfile(BAP, target)
+    Geometry, written = write_component(FakeWing(read_text()), target)
+    assert not written
+
+    changed = parse_avl(read_text())
+    changed.Surfaces[-1].Sections['Ainc'] += 1.0
+    Geometry, written = write_component(FakeWing(avl_text(changed)), target)
+    assert written
+    assert read_avl(target).Surfaces[-1].Sections['Ainc'][0] == changed.Surfaces[-1].Sections['Ainc'][0]
+
+
+@pytest.fixture
+def aircraft(tmpdir, monkeypatch):
+    monkeypatch.setattr(avl, 'header_values', lambda Aircraft: Aircraft._values)
+    target = str(tmpdir.join('BAP.avl'))
+    Aircraft = FakeAircraft(read_text())
+    Geometry, written = write_component(Aircraft, target)
+    assert written
+    assert Aircraft.calls() == [1, 1, 1, 1] # the aircraft and the check of every part
+    return Aircraft, target
+
+
+def test_unchanged_aircraft_runs_no_writer(aircraft):
+    Aircraft, target = aircraft
+    with open(target) as f:
+        assert f.read() == read_text()
+    Geometry, written = write_component(Aircraft, target)
+    assert not written
+    assert Aircraft.calls() == [1, 1, 1, 1]
+
+
+def test_only_the_changed_tail_is_regenerated(aircraft):
+    Aircraft, target = aircraft
+    Aircraft.HTail.text = edited(Aircraft.HTail.text, 'Horizontal Tail', 'Chord', 1.1)
+    Geometry, written = write_component(Aircraft, target)
+    assert written
+    assert Aircraft.calls() == [1, 2, 1, 2] # the vertical tail sits on the horizontal tail
+    with open(target) as f:
+        text = f.read()
+    assert text == edited(read_text(), 'Horizontal Tail', 'Chord', 1.1)
+    for Surface in read_avl(BAP).Surfaces[1:]:
+        assert Surface._text in text
+
+
+def test_a_wing_change_regenerates_the_tails_placed_from_it(aircraft):
+    Aircraft, target = aircraft
+    Aircraft.Wing.text = edited(Aircraft.Wing.text, 'LowerWing', 'Xle', 1.01)
+    assert write_component(Aircraft, target)[1]
+    assert Aircraft.calls() == [1, 2, 2, 2]
+
+
+def test_header_follows_the_aircraft(aircraft):
+    Aircraft, target = aircraft
+    Aircraft._values = Aircraft._values[:3] + (20.0, 0.0, 14.0)
+    assert write_component(Aircraft, target)[1]
+    assert Aircraft.calls() == [1, 1, 1, 1]
+    assert read_avl(target).Xref == (20.0, 0.0, 14.0)
+
+
+def test_parts_that_do_not_reproduce_their_blocks_use_the_aircraft_writer(tmpdir, monkeypatch):
+    monkeypatch.setattr(avl, 'header_values', lambda Aircraft: Aircraft._values)
+    target = str(tmpdir.join('BAP.avl'))
+    Aircraft = FakeAircraft(read_text())
+    Aircraft.VTail.own = edited(Aircraft.VTail.text, 'Vertical Tail', 'Chord', 2.0)
+    write_component(Aircraft, target)
+    Aircraft.VTail.text = edited(Aircraft.VTail.text, 'Vertical Tail', 'Zle', 1.1)
+    assert write_component(Aircraft, target)[1]
+    assert Aircraft.calls()[0] == 2
+    assert read_avl(target).surface('Vertical Tail').Sections['Chord'] == \
+        pytest.approx(read_avl(BAP).surface('Vertical Tail').Sections['Chord'])
+
+
+def test_a_file_edited_on_disk_is_written_anew(aircraft):
+    Aircraft, target = aircraft
+    with open(target, 'w') as f:
+        f.write(read_text().replace('Turbo Time', 'Edited'))
+    assert write_component(Aircraft, target)[1]
+    assert Aircraft.calls()[0] == 2
+    with open(target) as f:
+        assert f.read() == read_text()
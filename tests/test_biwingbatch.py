@@ -0,0 +1,96 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_biwingbatch.py: BatchBoxWing sizing surrogate and its check
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Aerodynamics.Wing.biwingbatch import BatchBoxWing, compare_si, check_rows, VARIANTS
+from Tools.atmosphere import density
+from Tools.fastmode import EquivalenceError
+
+# reference box wing of BiWing.py in SI
+GAP, STAGGER, B, LIFT_RATIO = 0.34, 0.0, 66.86*0.0254, 0.5
+V_LO, END_PLATE = 11.0, 0.9
+
+
+def make_batch():
+    Batch = BatchBoxWing('BoxWing', Lift_LO=60.0, Alt_LO=0.0, Chord=26.07*0.0254,
+                         GapInterp=[0.1, 0.2, 0.3, 0.4],
+                         OeffInterp=[1.1832, 1.3371, 1.4617, 1.5676],
+                         BWCFInterp=[0.85, 0.85, 0.85, 0.85], WingSpanWeight=2.5)
+    Batch.calibrate(GAP, STAGGER, B, V_LO, END_PLATE)
+    return Batch
+
+
+def reference_of(Batch):
+    """
+    Returns a reference model (V_LO [m/s], weight [N]) of a batch model
+    """
+    def reference(Gap, Stagger, b, Lift_Ratio):
+        R = Batch.evaluate_si(Gap, Stagger, b, Lift_Ratio)
+        return float(R['V_LO']), float(R['Weight'])
+    return reference
+
+
+def test_calibration_reproduces_the_reference_point():
+    R = make_batch().evaluate_si(GAP, STAGGER, B, LIFT_RATIO)
+    assert R['V_LO'] == pytest.approx(V_LO, rel=1e-12)
+    assert R['Weight'] == pytest.approx(2*B*2.5 + END_PLATE, rel=1e-12)
+    assert R['UpperLift'] + R['LowerLift'] == pytest.approx(60.0)
+    # lift at lift-off balances the lift-off speed
+    assert 0.5*density(0.0)*V_LO**2*R['S']*R['CL_LO'] == pytest.approx(60.0, rel=1e-12)
+
+
+def test_grid_broadcast_matches_points():
+    Batch = make_batch()
+    Gap = npy.array([0.1, 0.25, 0.4])[:, None, None]
+    b = npy.array([50.0, 66.86, 80.0])[None, :, None]*0.0254
+    Lift_Ratio = npy.array([0.4, 0.7])[None, None, :]
+    R = Batch.evaluate_si(Gap, 0.2, b, Lift_Ratio)
+    for name in R:
+        assert R[name].shape == (3, 3, 2)
+    for i in range(3):
+        for j in range(3):
+            for k in range(2):
+                P = Batch.evaluate_si(Gap[i, 0, 0], 0.2, b[0, j, 0], Lift_Ratio[0, 0, k])
+                for name in R:
+                    assert R[name][i, j, k] == pytest.approx(float(P[name]), rel=1e-12)
+
+
+def test_gap_is_held_at_the_ends_of_the_tables():
+    Batch = make_batch()
+    R = Batch.evaluate_si([0.0, 0.1, 0.4, 0.6], STAGGER, B, LIFT_RATIO)
+    assert R['Oeff'][0] == R['Oeff'][1] and R['Oeff'][2] == R['Oeff'][3]
+    assert npy.all(npy.diff(R['V_LO']) <= 0)
+
+
+def test_stagger_only_lengthens_the_end_plates():
+    Batch = make_batch()
+    R0 = Batch.evaluate_si(GAP, 0.0, B, LIFT_RATIO)
+    R1 = Batch.evaluate_si(GAP, 0.5, B, LIFT_RATIO)
+    assert R1['V_LO'] == R0['V_LO']
+    assert R1['Weight'] > R0['Weight']
+
+
+def test_compare_covers_the_variants():
+    Batch = make_batch()
+    rows = compare_si(Batch, reference_of(Batch))
+    assert len(rows) == len(VARIANTS)
+    assert max(abs(row['V_LO_error']) for row in rows) < 1e-12
+    assert max(abs(row['Weight_error']) for row in rows) < 1e-12
+
+
+def test_compare_raises_past_rtol():
+    Batch = make_batch()
+    Reference = make_batch()
+    Reference.WingSpanWeight *= 1.2
+    rows = compare_si(Batch, reference_of(Reference), rtol=None)
+    assert all(row['Weight_error'] < -0.05 for row in rows)
+    with pytest.raises(EquivalenceError):
+        check_rows(rows)
+    with pytest.raises(EquivalenceError):
+        compare_si(Batch, reference_of(Reference))
+    compare_si(Batch, reference_of(Reference), rtol=0.2)
@@ -0,0 +1,86 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_cgenvelope.py: linearized trim and Monte Carlo CG samples
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Structures.cgenvelope import TrimModel, sample_batch, cg_envelope, AFT_LIMIT
+from Structures.massprops import MassProperties
+
+MAC = 0.6
+
+
+def make_trim(Xcg0=0.50):
+    return TrimModel(Xcg0, MAC, Xcg0 + 0.15*MAC, CL0=0.3, CLa=5.0, CM0=0.05, CMa=-0.75)
+
+
+def make_mass():
+    Mass = MassProperties()
+    Mass.add_si('Nose.Motor', 8.0, (0.05, 0, 0), 'Propulsion')
+    Mass.add_si('Nose.Battery', 6.0, (0.20, 0, 0), 'Propulsion')
+    Mass.add_si('Wing', 20.0, (0.55, 0, 0), 'Wing')
+    Mass.add_si('HTail.Elevator.Servo', 0.5, (1.40, 0, 0), 'Tail')
+    Mass.add_si('Tail', 4.0, (1.30, 0, 0), 'Fuselage')
+    return Mass
+
+
+def test_design_cg_is_the_reference():
+    Trim = make_trim()
+    d, SM, alpha = Trim.evaluate(npy.array([Trim.Xcg0]))
+    assert d[0] == 0.0
+    assert SM[0] == pytest.approx(0.15)
+    assert alpha[0] == pytest.approx(npy.degrees(-0.05/-0.75))
+
+
+def test_trim_alpha_zeroes_the_moment():
+    Trim = make_trim()
+    Xcg = Trim.Xcg0 + npy.array([-0.1, 0.02, 0.05])*MAC
+    d, SM, alpha = Trim.evaluate(Xcg)
+    assert d == pytest.approx([-0.1, 0.02, 0.05])
+    assert SM == pytest.approx(0.15 - d)
+    a = npy.radians(alpha)
+    CM = Trim.CM0 + Trim.CMa*a + (Trim.CL0 + Trim.CLa*a)*d
+    assert npy.abs(CM).max() < 1e-12
+    # a CG at the neutral point has no static margin
+    assert Trim.evaluate(npy.array([Trim.Xnp]))[1][0] == pytest.approx(0.0, abs=1e-12)
+
+
+def test_nominal_items_sample_the_design_cg():
+    # the items weigh and balance differently from the aircraft (residuals
+    # dropped): without bands every sample is the design CG
+    Mass = make_mass()
+    Trim = make_trim(Xcg0=Mass.cg_si()[0] + 0.03)
+    n = Mass.n
+    zero = npy.zeros(n)
+    d, SM, alpha = sample_batch((0, 100, Mass.m[:n], Mass.X[:n], zero, zero, Mass.cg_si()[0], Trim))
+    assert npy.abs(d).max() < 1e-12
+    assert SM == pytest.approx(0.15)
+    E = cg_envelope(Mass, Trim, 2000, bands=[('*', 0.0, 0.0)], processes=1)
+    assert npy.abs(E['dXcg']).max() < 1e-12
+    assert E['P_AFT'] == 0.0 and E['P_FWD'] == 0.0
+
+
+def test_samples_are_centered_and_seeded():
+    Mass = make_mass()
+    Trim = make_trim(Xcg0=Mass.cg_si()[0] + 0.03)
+    E = cg_envelope(Mass, Trim, 20000, batch=5000, processes=1, seed=3)
+    assert len(E['dXcg']) == 20000
+    assert abs(npy.median(E['dXcg'])) < 2e-3
+    Again = cg_envelope(Mass, Trim, 20000, batch=5000, processes=1, seed=3)
+    assert npy.array_equal(E['dXcg'], Again['dXcg'])
+    assert E['P_AFT'] == npy.mean(E['dXcg'] > AFT_LIMIT)
+
+
+def test_banded_item_moves_the_cg():
+    Mass = make_mass()
+    Trim = make_trim()
+    n = Mass.n
+    dW, dX = npy.zeros(n), npy.zeros(n)
+    dX[1] = 0.05 # battery slides +-5 cm
+    d, SM, alpha = sample_batch((1, 5000, Mass.m[:n], Mass.X[:n], dW, dX, Mass.cg_si()[0], Trim))
+    share = Mass.m[1]/Mass.m[:n].sum()
+    assert npy.abs(d).max() <= share*0.05/MAC + 1e-12
+    assert d.max() > 0.9*share*0.05/MAC and d.min() < -0.9*share*0.05/MAC
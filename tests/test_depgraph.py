@@ -0,0 +1,98 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_depgraph.py: lazy recomputation and the aircraft refresh
+#==============================================================================#
+from collections import OrderedDict
+
+from Tools.depgraph import DependencyGraph, AircraftModel
+
+
+def test_nodes_recompute_only_when_inputs_change():
+    Graph = DependencyGraph()
+    Graph.set('HTail.S', 2.0)
+    Graph.set('Wing.S', 10.0)
+    Graph.define('HTail.Area', lambda G: G['HTail.S'], ('HTail',))
+    Graph.define('Wing.Area', lambda G: G['Wing.S'], ('Wing',))
+    Graph.define('Total', lambda G: G['HTail.Area'] + G['Wing.Area'])
+    Graph.define('Sign', lambda G: G['Total'] > 0)
+
+    assert Graph['Sign'] and Graph['Total'] == 12.0
+    assert sorted(name for name, s in Graph.recomputed()) == ['HTail.Area', 'Sign', 'Total',
+                                                               'Wing.Area']
+    assert Graph['Total'] == 12.0 and Graph.recomputed() == []
+
+    assert not Graph.set('HTail.S', 2.0)          # same value: nothing to do
+    assert Graph.set('HTail.S', 3.0)
+    assert Graph['Sign']
+    # Total changed, Sign did not read anything that changed value (early cutoff)
+    assert [name for name, s in Graph.recomputed()] == ['HTail.Area', 'Total', 'Sign']
+    assert Graph['Total'] == 13.0 and Graph.recomputed() == []
+
+    Graph.invalidate('Wing.Area')
+    assert Graph['Wing.Area'] == 10.0
+    assert [name for name, s in Graph.recomputed()] == ['Wing.Area']
+
+
+class Component(object):
+    def __init__(self, **values):
+        self.__dict__.update(values)
+        self.refreshed = 0
+
+    def Refresh(self):
+        self.refreshed += 1
+
+
+class Aircraft(Component):
+    """
+    Aircraft reading its components' areas on Refresh(), like ACTailAircraft
+    """
+    def Refresh(self):
+        Component.Refresh(self)
+        self.S = self.Wing.S + self.HTail.S
+
+
+def _htail(Model):
+    Model.refresh('HTail')
+    return Model.Aircraft.HTail.S
+
+
+def _total(Model):
+    Model.refresh('Aircraft', 'BoxWing', 'HTail')
+    return Model.Aircraft.S
+
+
+DERIVED = OrderedDict([('HTail.Area', (_htail, ('HTail',))),
+                       ('Total',      (_total, ('Aircraft', 'BoxWing', 'HTail')))])
+
+
+def make_model():
+    Plane = Aircraft(Name='Plane', Wing=Component(S=10.0), HTail=Component(S=2.0))
+    Plane.Refresh()
+    return Plane, AircraftModel(Plane, DERIVED)
+
+
+def test_component_refresh_marks_the_aircraft():
+    Plane, Model = make_model()
+    assert Model['Total'] == 12.0
+
+    # the HTail node refreshes HTail first; the aircraft must still re-read it
+    Model.set('HTail.S', 3.0)
+    assert Model['HTail.Area'] == 3.0
+    assert Plane.HTail.refreshed == 1 and Plane.refreshed == 1
+    assert Model['Total'] == 13.0
+    assert Plane.refreshed == 2 and Plane.HTail.refreshed == 1
+
+    # nothing changed since: no refresh at all
+    Model.invalidate()
+    assert Model['Total'] == 13.0
+    assert Plane.refreshed == 2 and Plane.HTail.refreshed == 1 and Plane.Wing.refreshed == 0
+
+
+def test_aircraft_inputs_refresh_the_aircraft_once():
+    Plane, Model = make_model()
+    Model.set('BoxWing.S', 20.0)
+    Model.set('Aircraft.Name', 'Test')
+    assert Model['Total'] == 22.0 and Plane.Name == 'Test'
+    assert Plane.refreshed == 2 and Plane.Wing.refreshed == 1
@@ -0,0 +1,115 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_groundroll.py: batched ground roll against a fine fixed-step reference
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Performance.groundroll import GroundRoll, compare_si
+from Tools.atmosphere import density, GRAVITY
+from Tools.fastmode import EquivalenceError
+
+
+class LinearTable(object):
+    """ thrust falling linearly with airspeed, standing in for a PropulsionTable """
+    def __init__(self, T0=30.0, dTdV=0.6):
+        self.T0, self.dTdV = T0, dTdV
+
+    def interpolate(self, V, h=0.0):
+        V, h = npy.broadcast_arrays(npy.asarray(V, dtype=float), npy.asarray(h, dtype=float))
+        return {'T': self.T0 - self.dTdV*V}
+
+
+def make_roll(RotationTime=0.0):
+    return GroundRoll(LinearTable(), S=1.2, CL=0.8, CD=0.08, CL_LO=1.6, mu=0.04,
+                      RotationTime=RotationTime)
+
+
+def reference(Roll, W, Vw, h=0.0, dt=2e-3):
+    """ ground roll by classic Runge-Kutta with a small fixed step """
+    rho = density(h)
+    VLO = Roll.V_LO(W, h)
+    accel = lambda v: float(Roll._accel(npy.array([v]), W, Vw, h, rho)[0])
+    x, v = 0.0, 0.0
+    while v + Vw < VLO:
+        k1 = accel(v)
+        k2 = accel(v + dt*k1/2)
+        k3 = accel(v + dt*k2/2)
+        k4 = accel(v + dt*k3)
+        x0, v0 = x, v
+        x += dt*(v + dt*(k1 + k2 + k3)/6)
+        v += dt*(k1 + 2*k2 + 2*k3 + k4)/6
+    # linear interpolation to the lift-off speed inside the last step
+    f = (VLO - Vw - v0)/(v - v0)
+    return x0 + f*(x - x0)
+
+
+@pytest.mark.parametrize('Vw', [3.0, 0.0, -2.0])
+def test_matches_reference_in_headwind_calm_and_tailwind(Vw):
+    Roll = make_roll()
+    W = npy.array([80.0, 110.0, 140.0])
+    x, t, VLO = Roll.solve_si(W, Vw)
+    assert npy.all(npy.isfinite(x))
+    for k in range(len(W)):
+        assert x[k] == pytest.approx(reference(Roll, W[k], Vw), rel=2e-4)
+
+
+def test_wind_orders_the_distances():
+    Roll = make_roll()
+    x, t, VLO = Roll.solve_si(110.0, npy.array([3.0, 0.0, -2.0]))
+    assert x[0] < x[1] < x[2]
+    assert npy.allclose(VLO, Roll.V_LO(110.0, 0.0))
+
+
+def test_headwind_above_lift_off_speed_needs_no_roll():
+    Roll = make_roll()
+    VLO = Roll.V_LO(110.0, 0.0)
+    x, t, V = Roll.solve_si(110.0, VLO + 1.0)
+    assert x == 0.0 and t == 0.0
+
+
+def test_too_heavy_never_lifts_off():
+    Roll = make_roll()
+    Roll.tmax = 30.0
+    x, t, VLO = Roll.solve_si(npy.array([110.0, 5000.0]))
+    assert npy.isfinite(x[0])
+    assert npy.isnan(x[1])
+
+
+def test_broadcast_shape_and_rotation_distance():
+    x, t, VLO = make_roll().solve_si(npy.array([80.0, 110.0])[:, None], npy.array([0.0, 2.0]))
+    assert x.shape == (2, 2)
+    xr, tr, VLOr = make_roll(RotationTime=0.5).solve_si(110.0, 2.0)
+    assert xr - x[1, 1] == pytest.approx((VLOr - 2.0)*0.5)
+    assert tr - t[1, 1] == pytest.approx(0.5)
+
+
+def reference_of(Roll, h=0.0):
+    """ Returns a reference (gross weight [N], ground roll [m]) of a ground roll model """
+    return lambda W: (W, float(Roll.solve_si(W, 0.0, h)[0]))
+
+
+def test_friction_reproduces_the_ground_roll():
+    Roll = make_roll()
+    x = float(Roll.solve_si(110.0, 1.0, 200.0)[0])
+    Fit = make_roll()
+    Fit.mu = 0.3
+    assert Fit.friction_si(x, 110.0, 1.0, 200.0) == pytest.approx(0.04, abs=1e-6)
+    assert Fit.mu == 0.3
+    with pytest.raises(ValueError):
+        Fit.friction_si(x, 110.0, 1.0, 200.0, mu=(0.1, 0.5))
+
+
+def test_compare_with_the_reference_roll():
+    Roll = make_roll()
+    x, xref, error = compare_si(Roll, reference_of(Roll, 200.0), [80.0, 110.0, 140.0], h=200.0)
+    assert npy.abs(error).max() < 1e-12
+    Reference = make_roll()
+    Reference.mu = 0.08
+    x, xref, error = compare_si(Roll, reference_of(Reference), [80.0, 110.0, 140.0], rtol=None)
+    assert npy.all(error < -0.02)
+    with pytest.raises(EquivalenceError):
+        compare_si(Roll, reference_of(Reference), [80.0, 110.0, 140.0])
+    compare_si(Roll, reference_of(Reference), [80.0, 110.0, 140.0], rtol=0.5)
@@ -0,0 +1,124 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_massprops.py: running sums, parallel axis and component trees
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Structures.massprops import (MassProperties, mass_items_si, parallel_axis,
+                                  GRAVITY, RESIDUAL)
+
+
+def brute_inertia(m, X, I, about):
+    return sum(I[i] + parallel_axis(m[i], X[i], about) for i in range(len(m)))
+
+
+def random_items(n, seed=0):
+    rnd = npy.random.RandomState(seed)
+    W = rnd.uniform(0.1, 20.0, n)
+    X = rnd.uniform(-1.0, 1.0, (n, 3))
+    I = [npy.diag(rnd.uniform(0.0, 0.01, 3)) for i in range(n)]
+    return W, X, I
+
+
+def test_running_sums_match_the_items():
+    W, X, I = random_items(100)
+    Mass = MassProperties(capacity=4)          # grows several times
+    for i in range(len(W)):
+        Mass.add_si('item%d' % i, W[i], X[i], 'group%d' % (i % 3), I[i])
+    m = W/GRAVITY
+    c = npy.dot(m, X)/m.sum()
+    assert Mass.weight_si() == pytest.approx(W.sum())
+    assert Mass.cg_si() == pytest.approx(c)
+    assert npy.allclose(Mass.inertia_si(), brute_inertia(m, X, I, c))
+    assert npy.allclose(Mass.inertia_si(about=npy.zeros(3)), brute_inertia(m, X, I, npy.zeros(3)))
+
+    # O(1) updates agree with a full recompute
+    Mass.update_si('item7', weight=50.0, cg=(2.0, 0.0, 0.1), inertia=(0.1, 0.2, 0.3))
+    Mass.update_si('item8', cg=(-1.0, 0.5, 0.0))
+    before = Mass.weight_si(), Mass.cg_si(), Mass.inertia_si(), Mass.groups_si()
+    Mass.recompute()
+    assert Mass.weight_si() == pytest.approx(before[0])
+    assert Mass.cg_si() == pytest.approx(before[1])
+    assert npy.allclose(Mass.inertia_si(), before[2])
+    for name, (Wg, Xg) in Mass.groups_si().items():
+        assert Wg == pytest.approx(before[3][name][0])
+        assert Xg == pytest.approx(before[3][name][1])
+    assert sum(Wg for Wg, Xg in Mass.groups_si().values()) == pytest.approx(Mass.weight_si())
+
+    with pytest.raises(KeyError):
+        Mass.add_si('item0', 1.0, (0, 0, 0))
+
+
+class Part(object):
+    """
+    Component with a weight [N], CG [m] and own inertia [kg m**2] (SI stand-in
+    for an Aerothon component)
+    """
+    def __init__(self, name, W, X, I=None, parts=()):
+        self.name = name
+        self._W, self._X, self._I = W, npy.asarray(X, dtype=float), I
+        self.param = type('param', (object,), {})()
+        self.param.Components = list(parts)
+        self.Weight = W
+
+    def CG(self):
+        return self._X
+
+
+def read(Part):
+    return Part._W, Part._X, Part._I
+
+
+def assembly(extra):
+    """
+    Two leaves in a body weighing extra [N] more than the leaves; the body
+    inertia is consistent with a skin of that weight at x = 0.5 m
+    """
+    a = Part('a', 10.0, (1.0, 0.0, 0.0), npy.diag((0.01, 0.02, 0.03)))
+    b = Part('b', 5.0, (-1.0, 0.2, 0.0), npy.diag((0.02, 0.01, 0.01)))
+    skin = [(extra, npy.array((0.5, 0.0, 0.0)), npy.diag((0.05, 0.05, 0.05)))] if extra > 0 else []
+    leaves = [(a._W, a._X, a._I), (b._W, b._X, b._I)] + skin
+    W = sum(w for w, x, i in leaves)
+    X = sum(w*x for w, x, i in leaves)/W
+    I = sum(i + parallel_axis(w/GRAVITY, x, X) for w, x, i in leaves)
+    return Part('body', W, X, I, (a, b))
+
+
+def test_items_carry_their_own_inertia():
+    Body = assembly(3.0)
+    items = mass_items_si(Body, read, 'Body')
+    assert [item[0] for item in items] == ['Body', 'Body.a', 'Body.b']
+    assert items[0][1] == pytest.approx(3.0)
+    assert items[0][2] == pytest.approx([0.5, 0.0, 0.0])
+    assert npy.allclose(items[0][4], npy.diag((0.05, 0.05, 0.05)))
+    assert npy.allclose(items[1][4], npy.diag((0.01, 0.02, 0.03)))
+
+    Mass = MassProperties()
+    for item in items:
+        Mass.add_si(*item)
+    assert Mass.weight_si() == pytest.approx(Body._W)
+    assert Mass.cg_si() == pytest.approx(Body._X)
+    assert npy.allclose(Mass.inertia_si(), Body._I)
+
+
+def test_tiny_and_negative_residuals_are_dropped():
+    for extra in (0.5*RESIDUAL*15.0, 0.0):
+        Body = assembly(extra)
+        names = [item[0] for item in mass_items_si(Body, read, 'Body')]
+        assert names == ['Body.a', 'Body.b']
+
+    Body = assembly(0.0)
+    Body._W -= 0.5                                 # children weigh more than the body
+    items = mass_items_si(Body, read, 'Body')
+    assert [item[0] for item in items] == ['Body.a', 'Body.b']
+    assert all(npy.all(npy.abs(item[2]) < 2.0) for item in items)
+
+
+def test_residual_inertia_is_clamped():
+    Body = assembly(3.0)
+    Body._I = npy.zeros((3, 3))                    # less than the children account for
+    Iown = mass_items_si(Body, read, 'Body')[0][4]
+    assert npy.all(npy.linalg.eigvalsh(Iown) >= -1e-12)
@@ -0,0 +1,165 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_materials.py: material handles, swaps, rescales and undo
+#==============================================================================#
+import pickle
+import pytest
+
+from Structures import materials
+from Structures.materials import REGISTRY, MaterialHandle, substitute
+
+
+class Material(object):
+    """
+    Library material with the densities Aerothon leaves as None when undefined
+    """
+    def __init__(self, ForceDensity=None, AreaForceDensity=None, LinearForceDensity=None):
+        self.ForceDensity = ForceDensity
+        self.AreaForceDensity = AreaForceDensity
+        self.LinearForceDensity = LinearForceDensity
+        self.E = 1.0
+
+
+@pytest.fixture(autouse=True)
+def library(monkeypatch):
+    monkeypatch.setattr(REGISTRY, '_materials', {'Balsa':     Material(ForceDensity=100.0),
+                                                 'Basswood':  Material(ForceDensity=300.0),
+                                                 'Monokote':  Material(AreaForceDensity=0.5),
+                                                 'Ultracote': Material(AreaForceDensity=0.6),
+                                                 'CarbonBar': Material(ForceDensity=1500.0)})
+    monkeypatch.setattr(REGISTRY, '_scales', {})
+
+
+def test_handles_keep_factors():
+    Rib = MaterialHandle('Balsa').copy()
+    Rib.ForceDensity *= 0.5
+    assert Rib.ForceDensity == pytest.approx(50.0)
+    assert Rib.AreaForceDensity is None and Rib.E == 1.0
+    Rib.E = 2.0
+    assert Rib.E == 2.0 and MaterialHandle('Balsa').E == 1.0
+
+    Skin = MaterialHandle('Monokote')
+    Skin.AreaForceDensity *= 2
+    assert Skin.AreaForceDensity == pytest.approx(1.0)
+    assert Skin.ForceDensity is None
+
+    Copy = pickle.loads(pickle.dumps(Rib))
+    assert Copy.ForceDensity == pytest.approx(50.0) and Copy.E == 2.0
+
+
+def test_swap_keeps_factors_and_plain_values():
+    Rib = MaterialHandle('Balsa')
+    Rib.ForceDensity *= 0.5
+    Rib.LinearForceDensity = 2.0              # plain value: Balsa defines none
+    Swapped = Rib.swapped('Basswood')
+    assert Swapped.MaterialName == 'Basswood'
+    assert Swapped.ForceDensity == pytest.approx(150.0)
+    assert Swapped.LinearForceDensity == pytest.approx(6.0)   # ForceDensity ratio
+    assert Rib.ForceDensity == pytest.approx(50.0)            # copy on write
+
+    Scaled = Rib.swapped('Basswood', scale=1.1)
+    assert Scaled.ForceDensity == pytest.approx(165.0)
+    assert Scaled.LinearForceDensity == pytest.approx(6.6)
+    assert Scaled.AreaForceDensity is None
+
+
+def test_swap_between_materials_without_common_densities():
+    Skin = MaterialHandle('Monokote')
+    Skin.AreaForceDensity *= 2
+    Film = Skin.swapped('Ultracote', scale=1.5)
+    assert Film.AreaForceDensity == pytest.approx(0.6*2*1.5)
+    assert Film.ForceDensity is None
+
+    # Monokote and CarbonBar share no density: nothing to take a ratio of
+    Skin.LinearForceDensity = 3.0
+    Bar = Skin.swapped('CarbonBar')
+    assert Bar.ForceDensity == pytest.approx(1500.0)
+    assert Bar.LinearForceDensity == pytest.approx(3.0)
+    assert Bar.AreaForceDensity == pytest.approx(1.0)         # kept as a plain value
+
+
+def test_rescale_and_restore():
+    Rib = MaterialHandle('Balsa')
+    Rib.ForceDensity *= 0.5
+    previous = REGISTRY.rescale('Balsa', ForceDensity=1.2)
+    assert Rib.ForceDensity == pytest.approx(60.0)
+    assert REGISTRY.state() == (('Balsa', (('ForceDensity', 1.2),)),)
+    REGISTRY.rescale('Balsa', ForceDensity=1.5)
+    assert Rib.ForceDensity == pytest.approx(90.0)
+    REGISTRY.restore('Balsa', previous)
+    assert Rib.ForceDensity == pytest.approx(50.0) and REGISTRY.state() == ()
+
+    with pytest.raises(ValueError):
+        REGISTRY.rescale('Monokote', ForceDensity=1.1)
+    with pytest.raises(AttributeError):
+        REGISTRY.rescale('Balsa', E=1.1)
+    assert REGISTRY.state() == ()
+
+
+class Part(object):
+    """
+    Part of an aircraft holding a material (weight from its volume [m**3])
+    """
+    def __init__(self, Material, volume, x):
+        self.SparMat = Material
+        self.volume = volume
+        self.x = x
+        self.refreshed = 0
+
+    @property
+    def Weight(self):
+        return self.SparMat.ForceDensity*self.volume
+
+    def CG(self):
+        return (self.x, 0.0, 0.0)
+
+    def Refresh(self):
+        self.refreshed += 1
+
+
+class Assembly(Part):
+    def __init__(self, **parts):
+        self.__dict__.update(parts)
+        self.refreshed = 0
+
+    @property
+    def Weight(self):
+        return sum(Part.Weight for Part in self.parts())
+
+    @property
+    def x(self):
+        return sum(P.Weight*P.x for P in self.parts())/self.Weight
+
+    def CG(self):
+        return (self.x, 0.0, 0.0)
+
+    def parts(self):
+        return [P for name, P in sorted(vars(self).items()) if isinstance(P, Part)]
+
+
+def test_substitute_and_undo(monkeypatch):
+    from Structures import massprops
+    # plain SI stand-ins: weights [N] and CG [m] of the parts above
+    monkeypatch.setattr(massprops, 'component_si',
+                        lambda C: (C.Weight, massprops.npy.asarray(C.CG(), dtype=float), None))
+    monkeypatch.setattr(massprops, 'PARTS', ('Wing', 'HTail', 'LeadingEdge', 'TrailingEdge'))
+
+    Balsa = MaterialHandle('Balsa')
+    Wing = Assembly(LeadingEdge=Part(Balsa, 0.01, 0.0), TrailingEdge=Part(Balsa, 0.01, 0.2))
+    Aircraft = Assembly(Wing=Wing, HTail=Assembly(TrailingEdge=Part(Balsa, 0.005, 1.0)))
+
+    Trade = substitute(Aircraft, 'Balsa', 'Basswood', match='*TrailingEdge*')
+    assert sorted(path for path, o, a, old, new in Trade.changed) == ['HTail.TrailingEdge',
+                                                                      'Wing.TrailingEdge']
+    assert Wing.LeadingEdge.SparMat is Balsa                  # not matched, left alone
+    assert Wing.TrailingEdge.SparMat is Aircraft.HTail.TrailingEdge.SparMat # shared stays shared
+    assert Trade.dWeight == pytest.approx(200.0*0.015)
+    assert Trade.dCG[0] > 0
+    assert Wing.refreshed == 1 and Aircraft.HTail.refreshed == 1 and Aircraft.refreshed == 1
+
+    Trade.undo()
+    assert Wing.TrailingEdge.SparMat is Balsa and Aircraft.HTail.TrailingEdge.SparMat is Balsa
+    assert Aircraft.Weight == pytest.approx(100.0*0.025)
+    assert Aircraft.refreshed == 2
@@ -0,0 +1,77 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_motorfit.py: batched least squares of the three constant motor model
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Propulsion.motorfit import fit_tests, solve_si, stack_tests, RPM_RADS
+
+
+def synthetic(Ri, Io, Kv, n, noise=0.0, seed=0):
+    """
+    Returns (N [rpm], Q [N m], I [A], V [V]) test points of a motor
+    """
+    rnd = npy.random.RandomState(seed)
+    I = npy.linspace(Io + 2.0, 40.0, n)
+    V = npy.linspace(12.0, 24.0, n)[::-1]
+    N = Kv*(V - Ri*I)
+    Q = (I - Io)/(Kv*RPM_RADS)
+    if noise:
+        V = V*(1 + noise*rnd.standard_normal(n))
+        Q = Q*(1 + noise*rnd.standard_normal(n))
+    return N, Q, I, V
+
+
+MOTORS = [(0.025, 1.2, 250.0, 8), (0.012, 2.0, 480.0, 12)]
+
+
+def test_recovers_the_constants():
+    Fits = fit_tests([synthetic(*m) for m in MOTORS], nBoot=0, names=['A', 'B'])
+    for Fit, (Ri, Io, Kv, n) in zip(Fits, MOTORS):
+        assert Fit['Ri'] == pytest.approx(Ri, rel=1e-8)
+        assert Fit['Io'] == pytest.approx(Io, rel=1e-8)
+        assert Fit['Kv'] == pytest.approx(Kv, rel=1e-8)
+        assert Fit['nPoint'] == n and Fit['Vrms'] < 1e-9 and Fit['Qrms'] < 1e-9
+        assert 'Ri_CI' not in Fit
+    assert [Fit['name'] for Fit in Fits] == ['A', 'B']
+
+
+def test_batched_fit_matches_single_fits():
+    tests = [synthetic(*m, noise=0.01, seed=k) for k, m in enumerate(MOTORS)]
+    Both = fit_tests(tests, nBoot=0)
+    for k, test in enumerate(tests):
+        One = fit_tests([test], nBoot=0)[0]
+        for name in ('Ri', 'Io', 'Kv', 'Vrms', 'Qrms'):
+            assert Both[k][name] == pytest.approx(One[name], rel=1e-10)
+
+
+def test_too_few_points_are_nan():
+    tests = [synthetic(*MOTORS[0]), synthetic(0.02, 1.0, 300.0, 2)]
+    N, Q, I, V, mask = stack_tests(tests)
+    Ri, Io, Kv = solve_si(N, Q, I, V, mask)
+    assert npy.isfinite([Ri[0], Io[0], Kv[0]]).all()
+    assert npy.isnan([Ri[1], Io[1], Kv[1]]).all()
+
+    # a replicate that drew one point three times is no fit either
+    weights = npy.zeros((1,) + mask.shape)
+    weights[0, 0, 0] = 3
+    weights[0, 1, :2] = 1
+    assert npy.isnan(solve_si(N, Q, I, V, weights)[0]).all()
+
+
+def test_bootstrap_intervals_cover_the_constants():
+    Ri, Io, Kv, n = 0.025, 1.2, 250.0, 30
+    Fit = fit_tests([synthetic(Ri, Io, Kv, n, noise=0.01, seed=3)], nBoot=2000, level=0.99)[0]
+    for name, truth in (('Ri', Ri), ('Io', Io), ('Kv', Kv)):
+        low, high = Fit[name + '_CI']
+        assert low < Fit[name] < high
+        assert low < truth < high
+
+    # the same seed gives the same intervals, a higher level wider ones
+    Again = fit_tests([synthetic(Ri, Io, Kv, n, noise=0.01, seed=3)], nBoot=2000, level=0.99)[0]
+    Narrow = fit_tests([synthetic(Ri, Io, Kv, n, noise=0.01, seed=3)], nBoot=2000, level=0.5)[0]
+    assert Again['Kv_CI'] == Fit['Kv_CI']
+    assert Narrow['Kv_CI'][1] - Narrow['Kv_CI'][0] < Fit['Kv_CI'][1] - Fit['Kv_CI'][0]
@@ -0,0 +1,94 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_polarstore.py: compiled polar store and XFOIL polar checks
+#==============================================================================#
+import os
+import numpy as npy
+import pytest
+
+from Aerodynamics import polarstore
+from Aerodynamics.polarstore import read_xfoil_polar, polar_store
+
+HEADER = """
+       XFOIL         Version 6.99
+
+ Calculated polar for: TEST
+
+ 1 1 Reynolds number fixed          Mach number fixed
+
+ xtrf =   1.000 (top)        1.000 (bottom)
+ Mach =   0.000     Re =     %.3f e 6     Ncrit =   9.000
+
+  alpha    CL        CD       CDp       CM     Top_Xtr  Bot_Xtr
+ ------- -------- --------- --------- -------- -------- --------
+"""
+
+
+def write_polar(filename, Re, alpha, slope=0.1, header=HEADER):
+    with open(filename, 'w') as f:
+        f.write(header % (Re/1e6))
+        for a in alpha:
+            f.write('%8.3f %8.4f %9.5f %9.5f %8.4f %8.4f %8.4f\n' %
+                    (a, slope*a + 0.2, 0.01 + 1e-4*a**2, 0.005, -0.05, 0.5, 1.0))
+
+
+@pytest.fixture
+def airfoils(tmpdir, monkeypatch):
+    monkeypatch.setenv('REG2020_CACHE', str(tmpdir.join('cache')))
+    monkeypatch.setattr(polarstore, '_stores', {})
+    directory = tmpdir.mkdir('Airfoils')
+    os.mkdir(str(directory.join('TEST')))
+    write_polar(str(directory.join('TEST', 'TEST_Re300.pol')), 3e5, npy.arange(-5, 12.5, 0.5))
+    write_polar(str(directory.join('TEST', 'TEST_Re600.pol')), 6e5, npy.arange(-5, 12.5, 0.5),
+                slope=0.11)
+    return str(directory)
+
+
+def test_store_interpolates_polars(airfoils):
+    Store = polar_store(('TEST',), airfoils)
+    Polar = Store['TEST']
+    assert list(Polar.Re) == [3e5, 6e5]
+    Cl, Cd, Cm = Polar.coefficients(npy.array([0.0, 4.1]), 3e5)
+    assert Cl == pytest.approx([0.2, 0.61], abs=1e-3)
+    assert Cm == pytest.approx([-0.05, -0.05])
+    # linear in log(Re) between the stored polars
+    Cl = Polar.Cl(4.0, npy.sqrt(3e5*6e5))
+    assert Cl == pytest.approx(0.2 + 0.105*4.0, abs=1e-3)
+    assert polar_store(('TEST',), airfoils) is Store
+
+
+def test_missing_polars_raise(airfoils):
+    with pytest.raises(ValueError):
+        polar_store(('TEST', 'S1223'), airfoils)
+
+
+def test_files_without_polars_raise(airfoils):
+    os.mkdir(os.path.join(airfoils, 'COORDS'))
+    with open(os.path.join(airfoils, 'COORDS', 'coords.dat'), 'w') as f:
+        f.write('COORDS\n1.0 0.0\n0.5 0.05\n0.0 0.0\n0.5 -0.05\n1.0 0.0\n')
+    assert read_xfoil_polar(os.path.join(airfoils, 'COORDS', 'coords.dat')) is None
+    with pytest.raises(ValueError):
+        polar_store(('COORDS',), airfoils)
+
+
+def test_xfoil_layout_is_checked(tmpdir):
+    filename = str(tmpdir.join('bad.pol'))
+    write_polar(filename, 3e5, [0.0, 1.0], header=HEADER.replace('CM ', 'XX '))
+    with pytest.raises(ValueError):
+        read_xfoil_polar(filename)
+
+    write_polar(filename, 3e5, [0.0, 1.0], header=HEADER.replace('Re =', 'Rn ='))
+    with pytest.raises(ValueError):
+        read_xfoil_polar(filename)
+
+    write_polar(filename, 3e5, [0.0, 1.0])
+    with open(filename, 'a') as f:
+        f.write('  2.000   0.4000\n')
+    with pytest.raises(ValueError):
+        read_xfoil_polar(filename)
+
+    write_polar(filename, 3e5, [])
+    with pytest.raises(ValueError):
+        read_xfoil_polar(filename)
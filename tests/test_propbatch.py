@@ -0,0 +1,148 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_propbatch.py: BatchPropeller blade element surrogate and its check
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Propulsion.propbatch import BatchPropeller, compare_si, RANGE
+from Propulsion.matched import BatchMotor, match
+from Tools.atmosphere import density
+from Tools.fastmode import EquivalenceError
+
+
+def make_prop(**params):
+    # APC 22x12E blade parameters in SI
+    values = dict(D=0.5588, Pitch=0.3048, dAlpha=npy.radians(11), Solidity=0.0126,
+                  AlphaStall=npy.radians(20), AlphaZeroCL=0.0, CLSlope=0.065*180/npy.pi,
+                  CDCurve=2.2, CDp=0.04)
+    values.update(params)
+    return BatchPropeller('22x12E', **values)
+
+
+def reference_of(Bprop):
+    """
+    Returns a point by point reference model (thrust, power) of a propeller
+    """
+    def reference(N, V, h):
+        T, P, Q = Bprop.loads_si(N, V, h)
+        return float(T), float(P)
+    return reference
+
+
+def test_grid_broadcast_matches_points():
+    Bprop = make_prop()
+    N = npy.array([2000.0, 4250.0, 6000.0])
+    V = npy.array([0.0, 8.0, 15.0])
+    T, P, Q = Bprop.loads_si(N[:, None], V[None, :], 0.0)
+    assert T.shape == (3, 3)
+    for i, n in enumerate(N):
+        for j, v in enumerate(V):
+            t, p, q = Bprop.loads_si(n, v, 0.0)
+            assert T[i, j] == pytest.approx(float(t), rel=1e-12)
+            assert P[i, j] == pytest.approx(float(p), rel=1e-12)
+
+
+def test_static_loads_scale_with_rpm_squared_and_density():
+    Bprop = make_prop()
+    T1, P1, Q1 = Bprop.loads_si(3000.0, 0.0, 0.0)
+    T2, P2, Q2 = Bprop.loads_si(6000.0, 0.0, 0.0)
+    assert T2/T1 == pytest.approx(4.0, rel=1e-9)
+    assert Q2/Q1 == pytest.approx(4.0, rel=1e-9)
+
+    Th, Ph, Qh = Bprop.loads_si(3000.0, 0.0, 1500.0)
+    assert Th/T1 == pytest.approx(density(1500.0)/density(0.0), rel=1e-9)
+
+
+def test_power_is_torque_times_rate():
+    Bprop = make_prop()
+    N = npy.linspace(1000, 7000, 7)
+    T, P, Q = Bprop.loads_si(N, 5.0, 0.0)
+    assert npy.allclose(P, Q*N*2*npy.pi/60, rtol=1e-12)
+
+
+def test_thrust_falls_with_airspeed():
+    T, P, Q = make_prop().loads_si(4250.0, npy.linspace(0, 20, 11), 0.0)
+    assert npy.all(T[0] > 0)
+    assert npy.all(npy.diff(T) < 0)
+
+
+def test_array_parameters_match_scalar_copies():
+    Bprop = make_prop()
+    dAlpha = npy.radians([5.0, 8.0, 11.0])[:, None]
+    N = npy.array([3000.0, 5000.0])
+    T, P, Q = Bprop.copy(dAlpha=dAlpha).loads_si(N, 0.0, 0.0)
+    assert T.shape == (3, 2)
+    for k in range(3):
+        t, p, q = Bprop.copy(dAlpha=float(dAlpha[k, 0])).loads_si(N, 0.0, 0.0)
+        assert npy.allclose(T[k], t, rtol=1e-12)
+
+
+def test_scales_and_parameter_names():
+    Bprop = make_prop()
+    T, P, Q = Bprop.loads_si(4000.0, 0.0, 0.0)
+    Ts, Ps, Qs = Bprop.copy(Tscale=1.1, Qscale=0.9).loads_si(4000.0, 0.0, 0.0)
+    assert Ts == pytest.approx(1.1*T)
+    assert Qs == pytest.approx(0.9*Q)
+    with pytest.raises(AttributeError):
+        Bprop.copy(Chord=0.1)
+
+
+def test_anchor_reproduces_the_reference_point():
+    Reference = make_prop(CDp=0.06, dAlpha=npy.radians(9))
+    Bprop = make_prop()
+    Bprop.anchor(reference_of(Reference), 5000.0, 0.0, 0.0)
+    T, P, Q = Bprop.loads_si(5000.0, 0.0, 0.0)
+    Tr, Pr, Qr = Reference.loads_si(5000.0, 0.0, 0.0)
+    assert T == pytest.approx(float(Tr), rel=1e-12)
+    assert P == pytest.approx(float(Pr), rel=1e-12)
+    # anchoring again at the same point does not compound the scales
+    Bprop.anchor(reference_of(Reference), 5000.0, 0.0, 0.0)
+    assert Bprop.loads_si(5000.0, 0.0, 0.0)[0] == pytest.approx(float(Tr), rel=1e-12)
+
+
+def test_compare_covers_the_operating_range():
+    Bprop = make_prop()
+    dT, dP = compare_si(Bprop, reference_of(Bprop))
+    assert dT.shape == dP.shape == (len(RANGE[0]), len(RANGE[1]))
+    assert npy.max(npy.abs(dT)) < 1e-12
+    assert npy.max(npy.abs(dP)) < 1e-12
+
+
+def test_compare_errors_are_fractions_of_the_static_values():
+    Bprop = make_prop()
+    Reference = make_prop(Tscale=1.1, Qscale=1.1)
+    dT, dP = compare_si(Bprop, reference_of(Reference), rtol=None)
+    assert dT[:, 0] == pytest.approx(-0.1/1.1, rel=1e-9)
+    assert dP[:, 0] == pytest.approx(-0.1/1.1, rel=1e-9)
+    # the windmilling end is scaled by the static value, not its own
+    assert npy.all(npy.abs(dT) <= 0.1/1.1 + 1e-12)
+
+
+def test_compare_raises_past_rtol():
+    Bprop = make_prop()
+    drifted = make_prop(dAlpha=npy.radians(14))
+    with pytest.raises(EquivalenceError):
+        compare_si(Bprop, reference_of(drifted))
+    # anchored at a single point the drift elsewhere is still caught
+    Bprop.anchor(reference_of(drifted), 5000.0, 0.0, 0.0)
+    dT, dP = compare_si(Bprop, reference_of(drifted), rtol=None)
+    assert abs(dT[-2, 0]) < 0.02
+    assert npy.max(npy.abs(dT)) > 0.05
+    with pytest.raises(EquivalenceError):
+        compare_si(Bprop, reference_of(drifted))
+    compare_si(Bprop, reference_of(drifted), rtol=1.0)
+
+
+def test_series_resistance_lowers_the_matched_current():
+    Bprop = make_prop()
+    V = npy.linspace(0, 12, 5)
+    Bare = BatchMotor('A50', Ri=0.077, Io=1.5, Kv=300.0, Vbatt=22.2)
+    Wired = BatchMotor('A50', Ri=0.077, Io=1.5, Kv=300.0, Vbatt=22.2, Rs=0.05)
+    bare, wired = match(Bprop, Bare, V, 0.0), match(Bprop, Wired, V, 0.0)
+    assert npy.all(wired['I'] < bare['I']) and npy.all(wired['T'] < bare['T'])
+    # the coil sees what the battery and speed controller leave of Vbatt
+    assert wired['I'] == pytest.approx((Wired.Vmotor(wired['I']) - wired['N']/300.0)/0.077)
+    assert Wired.Nmax() == pytest.approx(300.0*(22.2 - 1.5*(0.077 + 0.05)))
@@ -0,0 +1,120 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_teststand.py: streaming reduction of raw test-stand logs
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Propulsion.teststand import (ingest, std_correction, kelvin, FORCE_UNITS, LENGTH_UNITS,
+                                  PRESSURE_UNITS, P_STD, T_STD)
+
+# (rpm, load [ozf], arm [in], current [A], voltage [V]) of the plateaus
+PLATEAUS = [(3000.0, 40.0, 0.0, 10.0, 22.0),
+            (4500.0, 90.0, 0.0, 25.0, 21.5),
+            (6000.0, 160.0, 0.0, 45.0, 21.0),
+            (4500.0, 6.0, 19.5, 25.0, 21.5),
+            (6000.0, 11.0, 19.5, 45.0, 21.0)]
+
+
+def write_log(tmpdir, name='log.csv', header='rpm,load,arm,current,voltage,pressure,temperature',
+              pressure=29.92, temperature=15.0, steady=80, ramp=20, bad=(), seed=0):
+    """
+    Writes a log of the PLATEAUS with ramps in between and returns its path.
+    Rows whose index is in bad get an empty load.
+    """
+    rnd = npy.random.RandomState(seed)
+    rows, last = [], (0.0, 0.0, 0.0, 0.0, 22.0)
+    for plateau in PLATEAUS:
+        for f in npy.linspace(0, 1, ramp, endpoint=False):
+            rows.append([a + f*(b - a) for a, b in zip(last, plateau)])
+        for k in range(steady):
+            rpm, load, arm, current, voltage = plateau
+            rows.append([rpm*(1 + 1e-3*rnd.standard_normal()), load*(1 + 1e-3*rnd.standard_normal()),
+                         arm, current, voltage])
+        last = plateau
+    columns = header.split(',')
+    lines = [header]
+    for i, (rpm, load, arm, current, voltage) in enumerate(rows):
+        values = dict(rpm='%.3f' % rpm, load='' if i in bad else '%.5f' % load, arm='%.2f' % arm,
+                      current='%.3f' % current, voltage='%.3f' % voltage,
+                      pressure='%.2f' % pressure, temperature='%.2f' % temperature)
+        lines.append(','.join(values[c] for c in columns))
+    path = tmpdir.join(name)
+    path.write('\n'.join(lines) + '\n')
+    return str(path)
+
+
+OPTIONS = dict(window=10, minSamples=30)
+
+
+def test_plateaus_become_operating_points(tmpdir):
+    Data = ingest(write_log(tmpdir), **OPTIONS)
+    assert len(Data.rpm) == len(PLATEAUS)
+    assert Data.samples == len(PLATEAUS)*100
+    for k, (rpm, load, arm, current, voltage) in enumerate(PLATEAUS):
+        assert Data.rpm[k] == pytest.approx(rpm, rel=1e-3)
+        assert Data.load[k] == pytest.approx(load*FORCE_UNITS['ozf'], rel=2e-3)
+        assert Data.arm[k] == pytest.approx(arm*LENGTH_UNITS['in'])
+        assert Data.current[k] == pytest.approx(current, rel=2e-3)
+    N, T = Data.thrust_si()
+    assert len(N) == 3
+    N, Q = Data.torque_si()
+    assert Q == pytest.approx([6.0*FORCE_UNITS['ozf']*19.5*0.0254,
+                               11.0*FORCE_UNITS['ozf']*19.5*0.0254], rel=2e-3)
+
+
+@pytest.mark.parametrize('chunksize', [1, 7, 64, 333])
+def test_points_do_not_depend_on_the_chunk_size(tmpdir, chunksize):
+    path = write_log(tmpdir)
+    Whole = ingest(path, chunksize=100000, **OPTIONS)
+    Data = ingest(path, chunksize=chunksize, **OPTIONS)
+    assert Data.samples == Whole.samples
+    assert npy.array_equal(Data.count, Whole.count)
+    for name in ('rpm', 'load', 'arm', 'current', 'voltage'):
+        assert getattr(Data, name) == pytest.approx(getattr(Whole, name), rel=1e-12)
+
+
+def test_standard_day_correction(tmpdir):
+    assert std_correction(P_STD, T_STD) == pytest.approx(1.0)
+    # hot, high test day: thinner air, so the loads are scaled up
+    STD = std_correction(28.5*PRESSURE_UNITS['inHg'], kelvin(95.0, 'F'))
+    assert STD == pytest.approx((29.92/28.5)*((95.0 - 32)/1.8 + 273.15)/288.15, rel=1e-3)
+    Std = ingest(write_log(tmpdir, 'std.csv'), **OPTIONS)
+    Hot = ingest(write_log(tmpdir, 'hot.csv', pressure=28.5, temperature=35.0), **OPTIONS)
+    # same raw samples, so the points differ by the ratio of the corrections
+    ratio = (std_correction(28.5*PRESSURE_UNITS['inHg'], kelvin(35.0)) /
+             std_correction(29.92*PRESSURE_UNITS['inHg'], kelvin(15.0)))
+    assert Hot.load/Std.load == pytest.approx(npy.full(len(PLATEAUS), ratio), rel=1e-12)
+    assert Hot.rpm == pytest.approx(Std.rpm)
+
+
+def test_missing_arm_column_reads_as_thrust(tmpdir):
+    path = write_log(tmpdir, header='voltage,current,rpm,load,pressure,temperature')
+    Data = ingest(path, **OPTIONS)
+    assert len(Data.rpm) == len(PLATEAUS)
+    assert not Data.torque.any()
+    assert len(Data.torque_si()[0]) == 0
+    assert Data.current == pytest.approx([p[3] for p in PLATEAUS], rel=2e-3)
+
+
+def test_missing_column_raises(tmpdir):
+    path = write_log(tmpdir, header='rpm,load,arm,current,pressure,temperature')
+    with pytest.raises(ValueError):
+        ingest(path, **OPTIONS)
+
+
+def test_unreadable_rows_are_dropped(tmpdir):
+    # unreadable loads inside the first plateau cut it short (the part before
+    # them is too short for a point), the other plateaus are untouched
+    bad = (50, 51, 52)
+    Clean = ingest(write_log(tmpdir, 'clean.csv'), **OPTIONS)
+    Data = ingest(write_log(tmpdir, 'bad.csv', bad=bad), chunksize=16, **OPTIONS)
+    assert Data.samples == Clean.samples
+    assert npy.all(npy.isfinite(Data.load))
+    assert len(Data.rpm) == len(PLATEAUS)
+    assert Data.count[0] < Clean.count[0] - len(bad)
+    assert Data.rpm == pytest.approx(Clean.rpm, rel=1e-3)
+    assert Data.load == pytest.approx(Clean.load, rel=2e-3)
+    assert Data.count[1:] == pytest.approx(Clean.count[1:])
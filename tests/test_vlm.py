@@ -0,0 +1,115 @@
+from __future__ import division # let 5/2 = 2.5 rather than 2
+#==============================================================================#
+# University of Cincinnati
+# Aerocats - Regular Class 2020
+# test_vlm.py: vortex lattice against wing theory
+#==============================================================================#
+import numpy as npy
+import pytest
+
+from Aerodynamics.avl import parse_avl
+from Aerodynamics.vlm import VortexLattice, spacing
+
+# flat rectangular wing, span 8, chord 1 (AR 8), full-span flap and aileron
+WING = """Rectangular wing
+0.0                 | Mach
+0 0 0.0             | iYsym  iZsym  Zsym
+8.0 1.0 8.0         | Sref   Cref   Bref
+0.25 0.0 0.0        | Xref   Yref   Zref
+SURFACE
+Wing
+8  1.0  24  1.0
+YDUPLICATE
+0.0
+ANGLE
+0.0
+SECTION
+0.0 0.0 0.0   1.0  0.0
+CONTROL
+flap  1.0  0.75  0.0 0.0 0.0  1.0
+CONTROL
+aileron  1.0  0.75  0.0 0.0 0.0  -1.0
+SECTION
+0.0 4.0 0.0   1.0  0.0
+CONTROL
+flap  1.0  0.75  0.0 0.0 0.0  1.0
+CONTROL
+aileron  1.0  0.75  0.0 0.0 0.0  -1.0
+"""
+
+SWEPT = """Bertin and Smith example 7.2
+0.0
+0 0 0.0
+5.0 1.0 5.0
+0.0 0.0 0.0
+SURFACE
+Wing
+1  0.0  4  0.0
+YDUPLICATE
+0.0
+SECTION
+0.0 0.0 0.0   1.0  0.0
+SECTION
+2.5 2.5 0.0   1.0  0.0
+"""
+
+
+@pytest.fixture(scope='module')
+def lattice():
+    return VortexLattice(parse_avl(WING))
+
+
+def test_spacing_end_points():
+    for space in (0.0, 1.0, 2.0, -2.0, 3.0, 0.5):
+        f = spacing(10, space)
+        assert f[0] == pytest.approx(0.0) and f[-1] == pytest.approx(1.0)
+        assert npy.all(npy.diff(f) > 0)
+
+
+def test_bertin_swept_wing():
+    # Bertin & Smith's four horseshoe example: AR 5, 45 deg sweep, CL_alpha 3.443/rad
+    Lattice = VortexLattice(parse_avl(SWEPT))
+    Res = Lattice.solve(alpha=npy.array([0.0, 1.0]))
+    assert Res['CL'][0] == pytest.approx(0.0, abs=1e-12)
+    assert Res['CL'][1]/npy.radians(1.0) == pytest.approx(3.443, rel=1e-3)
+
+
+def test_rectangular_wing_lift_and_induced_drag(lattice):
+    Res = lattice.solve(alpha=npy.array([0.0, 4.0, 8.0]))
+    CLa = Res['CL'][1]/npy.radians(4.0)
+    AR = 8.0
+    # a little below the elliptic lifting line slope 2 pi AR/(AR + 2)
+    assert 0.9 < CLa/(2*npy.pi*AR/(AR + 2)) < 1.0
+    assert Res['CL'][2] == pytest.approx(2*Res['CL'][1], rel=1e-2)   # nearly linear in alpha
+    e = Res['CL'][1:]**2/(npy.pi*AR*Res['CDi'][1:])
+    assert npy.all((0.9 < e) & (e < 1.01))
+
+
+def test_symmetric_wing_has_no_lateral_loads(lattice):
+    Res = lattice.solve(alpha=5.0)
+    for name in ('CY', 'Cl', 'Cn'):
+        assert abs(Res[name]) < 1e-10
+
+
+def test_batch_matches_single_cases(lattice):
+    alpha = npy.array([-2.0, 3.0, 8.0])
+    beta = npy.array([0.0, 2.0, -4.0])
+    Res = lattice.solve(alpha, beta, {'flap': npy.array([0.0, 5.0, -3.0])})
+    for k in range(3):
+        One = lattice.solve(alpha[k], beta[k], {'flap': [0.0, 5.0, -3.0][k]})
+        for name in ('CL', 'CDi', 'Cm', 'Cl', 'Cn'):
+            assert Res[name][k] == pytest.approx(float(One[name]), abs=1e-12)
+
+
+def test_controls(lattice):
+    base = lattice.solve(alpha=2.0)
+    flap = lattice.solve(alpha=2.0, deflections={'flap': 5.0})
+    assert flap['CL'] > base['CL']                         # trailing edge down
+    assert flap['Cm'] < base['Cm']                         # nose down about the quarter chord
+    # SgnDup -1: antisymmetric, rolls without lift at zero alpha
+    right = lattice.solve(deflections={'aileron': 5.0})
+    left = lattice.solve(deflections={'aileron': -5.0})
+    assert abs(right['CL']) < 1e-12 and right['Cl'] < -1e-3
+    assert left['Cl'] == pytest.approx(-float(right['Cl']), rel=1e-10)
+    with pytest.raises(KeyError):
+        lattice.solve(deflections={'rudder': 1.0})